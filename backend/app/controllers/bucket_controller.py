@@ -1,12 +1,55 @@
-from typing import List, Optional, Dict, Any
+import asyncio
+import json
+from typing import List, Optional, Dict, Any, Union
 from datetime import datetime
 from sqlalchemy.orm import Session # type: ignore
-from fastapi import HTTPException # type: ignore
+from fastapi import HTTPException, Response # type: ignore
 
-from app.repositories.bucket_repository import BucketRepository
+from app.core.columnar import (
+    MEDIA_TYPE_ARROW,
+    MEDIA_TYPE_JSON,
+    ColumnarFormatError,
+    encode_arrow,
+    encode_packed
+)
+from app.core.cursor import NEXT_CURSOR_HEADER, InvalidCursorError
+from app.core.downsampling import METHOD_LTTB
+from app.core.tier_planner import SERVED_TIER_HEADER
+from app.repositories.bucket_aggregate_repository import (
+    FILL_NONE,
+    BucketAggregateRepository,
+    parse_aggregates
+)
+from app.repositories.bucket_chunk_repository import NO_ROW_ID
+from app.repositories.bucket_downsample_repository import BucketDownsampleRepository
+from app.repositories.bucket_fleet_repository import BucketFleetRepository
+from app.repositories.bucket_latest_values import bucket_latest_values
+from app.repositories.bucket_frame_repository import MAX_FRAME_CHANNELS, BucketFrameRepository
+from app.repositories.bucket_read_cache import CACHE_STATUS_HEADER, CachedRead, bucket_read_cache, cache_key
+from app.repositories.bucket_repository import (
+    DEFAULT_HISTOGRAM_BINS,
+    BucketRepository,
+    DuplicateTimestampError,
+    parse_percentiles
+)
+from app.repositories.bucket_write_buffer import bucket_write_buffer, WriteBufferFullError
 from app.repositories.channel_data_repository import ChannelDataRepository
 from app.repositories.well_repository import WellRepository
-from app.schemas.bucket_schema import BucketDataCreate, BucketDataBatch, BucketDataOut, BucketStatistics
+from app.schemas.bucket_schema import (
+    BucketDataCreate,
+    BucketDataBatch,
+    BucketDataOut,
+    BucketDataQueued,
+    BucketBatchResult,
+    BucketStatistics,
+    BucketAggregates,
+    MultiChannelIngest,
+    MultiChannelIngestResult,
+    ChannelIngestResult,
+    FleetAggregates,
+    FleetLatestValues,
+    WellFrame
+)
 
 class BucketController:
     @staticmethod
@@ -17,9 +60,65 @@ class BucketController:
         start_date: Optional[datetime] = None, 
         end_date: Optional[datetime] = None,
         skip: int = 0, 
-        limit: int = 1000
-    ) -> List[BucketDataOut]:
-        """Get time series data from a bucket for a specific well and channel"""
+        limit: int = 1000,
+        media_type: str = MEDIA_TYPE_JSON,
+        max_points: Optional[int] = None,
+        method: str = METHOD_LTTB,
+        cursor: Optional[str] = None,
+        channel_id: Optional[int] = None
+    ) -> Response:
+        """
+        Get time series data from a bucket for a specific well and channel,
+        encoded as JSON, packed binary or Arrow IPC. The body is serialized
+        straight from the selected rows instead of going through BucketDataOut.
+        Pages are read by offset or after a `cursor`, the cursor of the next
+        page being returned in the X-Next-Cursor header. With `max_points` the
+        whole range is downsampled server-side instead of being paged.
+        
+        Given the channel's id, the encoded read goes through the read cache,
+        which serves repeated reads without any lookup (see bucket_read_cache).
+        """
+        read = lambda: BucketController._read_data_points(
+            db, well_name, channel_name, start_date, end_date, skip, limit, media_type, max_points, method, cursor
+        )
+        if channel_id is None:
+            return read()
+        
+        key = cache_key(
+            "data", start_date=start_date, end_date=end_date, skip=skip, limit=limit, media_type=media_type,
+            max_points=max_points, method=method, cursor=cursor
+        )
+        cached, hit = bucket_read_cache.read_through(
+            channel_id, key, (start_date, end_date), lambda: BucketController._to_cached(read())
+        )
+        return Response(
+            content=cached.content,
+            media_type=cached.media_type,
+            headers={**cached.headers, CACHE_STATUS_HEADER: "hit" if hit else "miss"}
+        )
+
+    @staticmethod
+    def _to_cached(response: Response) -> CachedRead:
+        """Body, media type and headers of a response, for the read cache"""
+        headers = {
+            name: value for name, value in response.headers.items() if name not in ("content-length", "content-type")
+        }
+        return CachedRead(response.body, response.media_type, headers)
+
+    @staticmethod
+    def _read_data_points(
+        db: Session, 
+        well_name: str,
+        channel_name: str,
+        start_date: Optional[datetime],
+        end_date: Optional[datetime],
+        skip: int,
+        limit: int,
+        media_type: str,
+        max_points: Optional[int],
+        method: str,
+        cursor: Optional[str]
+    ) -> Response:
         # Check if well and channel exist
         well = WellRepository.get_well_by_name(db, well_name)
         if not well:
@@ -32,19 +131,69 @@ class BucketController:
                 detail=f"Channel with name '{channel_name}' not found for well '{well_name}'"
             )
         
-        # Get the data points
-        data_points = BucketRepository.get_data_points(
-            db, well_name, channel_name, start_date, end_date, skip, limit
-        )
+        headers = {"Vary": "Accept"}
+        if max_points is not None:
+            try:
+                (ids, times, values), tiers = BucketDownsampleRepository.get_downsampled_columns(
+                    db, well_name, channel_name, start_date, end_date, max_points, method
+                )
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            headers["X-Downsample-Method"] = method
+            headers[SERVED_TIER_HEADER] = tiers
+            if media_type == MEDIA_TYPE_JSON:
+                data_points = [
+                    {"id": None if id == NO_ROW_ID else id, "time": time, "value": value}
+                    for id, time, value in zip(ids.tolist(), times.astype(object), values.tolist())
+                ]
+                content = json.dumps(data_points, default=datetime.isoformat)
+                return Response(content=content, media_type=MEDIA_TYPE_JSON, headers=headers)
+            return BucketController._columns_response(ids, times, values, media_type, headers)
+        
+        try:
+            # JSON keeps its row-per-object shape
+            if media_type == MEDIA_TYPE_JSON:
+                data_points, next_cursor = BucketRepository.get_data_points(
+                    db, well_name, channel_name, start_date, end_date, skip, limit, cursor
+                )
+            else:
+                (ids, times, values), next_cursor = BucketRepository.get_data_columns(
+                    db, well_name, channel_name, start_date, end_date, skip, limit, cursor
+                )
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if next_cursor:
+            headers[NEXT_CURSOR_HEADER] = next_cursor
         
-        return [BucketDataOut(**point) for point in data_points]
+        if media_type == MEDIA_TYPE_JSON:
+            content = json.dumps(data_points, default=datetime.isoformat)
+            return Response(content=content, media_type=MEDIA_TYPE_JSON, headers=headers)
+        return BucketController._columns_response(ids, times, values, media_type, headers)
+
+    @staticmethod
+    def _columns_response(ids, times, values, media_type: str, headers: Dict[str, str]) -> Response:
+        """Encode point columns as packed binary or Arrow IPC"""
+        try:
+            if media_type == MEDIA_TYPE_ARROW:
+                content = encode_arrow(times, values, ids)
+            else:
+                content = encode_packed(times, values)
+        except ColumnarFormatError as e:
+            raise HTTPException(status_code=406, detail=str(e))
+        
+        return Response(
+            content=content,
+            media_type=media_type,
+            headers={**headers, "X-Point-Count": str(len(ids))}
+        )
 
     @staticmethod
     def create_data_point(
         db: Session, 
         well_name: str,
         channel_name: str,
-        data_point: BucketDataCreate
+        data_point: BucketDataCreate,
+        on_conflict: Optional[str] = None
     ) -> BucketDataOut:
         """Create a new data point in a bucket for a specific well and channel"""
         # Check if well and channel exist
@@ -60,7 +209,46 @@ class BucketController:
             )
         
         # Create the data point
-        result = BucketRepository.create_data_point(db, well_name, channel_name, data_point)
+        try:
+            result = BucketRepository.create_data_point(
+                db, well_name, channel_name, data_point, on_conflict=on_conflict
+            )
+        except DuplicateTimestampError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        return BucketDataOut(**result)
+
+    @staticmethod
+    async def create_data_point_buffered(
+        well_name: str,
+        channel_name: str,
+        data_point: BucketDataCreate,
+        on_conflict: Optional[str] = None
+    ) -> Union[BucketDataOut, BucketDataQueued]:
+        """
+        Hand a data point to the write buffer, which coalesces it with other
+        points of the channel. Depending on the buffer's durability, returns
+        the stored point once flushed or an acknowledgement once buffered.
+        The caller has already resolved the channel.
+        """
+        try:
+            future = bucket_write_buffer.enqueue(
+                well_name, channel_name, data_point.time, data_point.value, on_conflict
+            )
+        except WriteBufferFullError as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        
+        if not bucket_write_buffer.return_rows:
+            return BucketDataQueued(time=data_point.time, value=data_point.value)
+        
+        try:
+            result = await asyncio.wrap_future(future)
+        except DuplicateTimestampError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
         return BucketDataOut(**result)
 
@@ -69,8 +257,10 @@ class BucketController:
         db: Session, 
         well_name: str,
         channel_name: str,
-        data_points: BucketDataBatch
-    ) -> List[BucketDataOut]:
+        data_points: BucketDataBatch,
+        return_ids: bool = False,
+        on_conflict: Optional[str] = None
+    ) -> BucketBatchResult:
         """Create multiple data points in a bucket for a specific well and channel"""
         # Check if well and channel exist
         well = WellRepository.get_well_by_name(db, well_name)
@@ -85,9 +275,79 @@ class BucketController:
             )
         
         # Create the data points
-        results = BucketRepository.create_data_points_batch(db, well_name, channel_name, data_points)
+        try:
+            result = BucketRepository.create_data_points_batch(
+                db, well_name, channel_name, data_points, return_ids=return_ids, on_conflict=on_conflict
+            )
+        except DuplicateTimestampError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
-        return [BucketDataOut(**point) for point in results]
+        return BucketBatchResult(**result)
+
+    @staticmethod
+    def ingest_channels(
+        db: Session,
+        payload: MultiChannelIngest,
+        on_conflict: Optional[str] = None
+    ) -> MultiChannelIngestResult:
+        """Write points for many channels, across wells, in a single transaction"""
+        # Resolve every target in one query
+        channel_ids = [item.channel_id for item in payload.channels if item.channel_id is not None]
+        name_pairs = [
+            (item.well_name, item.channel_name) for item in payload.channels if item.channel_id is None
+        ]
+        channels = ChannelDataRepository.get_channels_by_keys(db, channel_ids, name_pairs)
+        by_id = {channel.id: channel for channel in channels}
+        by_name = {(channel.well.name, channel.name): channel for channel in channels}
+        
+        # Group the points per channel, a channel may appear more than once
+        points_by_channel: Dict[int, List] = {}
+        missing = []
+        for item in payload.channels:
+            if item.channel_id is not None:
+                channel = by_id.get(item.channel_id)
+                target = f"id {item.channel_id}"
+            else:
+                channel = by_name.get((item.well_name, item.channel_name))
+                target = f"'{item.channel_name}' of well '{item.well_name}'"
+            if not channel:
+                missing.append(target)
+                continue
+            points_by_channel.setdefault(channel.id, []).extend(
+                (point.time, point.value) for point in item.data_points
+            )
+        
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Channels not found: {', '.join(missing)}")
+        
+        writes = [(by_id[channel_id], points) for channel_id, points in points_by_channel.items()]
+        
+        try:
+            results = BucketRepository.write_channels(db, writes, on_conflict=on_conflict)
+        except DuplicateTimestampError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        channel_results = [
+            ChannelIngestResult(
+                channel_id=channel.id,
+                well_name=channel.well.name,
+                channel_name=channel.name,
+                received=result["received"],
+                count=result["count"],
+                data_from=result["data_from"],
+                data_to=result["data_to"]
+            )
+            for (channel, _), result in zip(writes, results)
+        ]
+        
+        return MultiChannelIngestResult(
+            count=sum(result.count for result in channel_results),
+            channels=channel_results
+        )
 
     @staticmethod
     def delete_data_point(
@@ -118,6 +378,34 @@ class BucketController:
             )
         
         return {"message": f"Data point with id {data_point_id} deleted successfully"}
+
+    @staticmethod
+    def delete_data_point_at(
+        db: Session,
+        well_name: str,
+        channel_name: str,
+        time: datetime
+    ) -> Dict[str, str]:
+        """Delete the data point of a timestamp from a bucket, compressed or not"""
+        # Check if well and channel exist
+        well = WellRepository.get_well_by_name(db, well_name)
+        if not well:
+            raise HTTPException(status_code=404, detail=f"Well with name '{well_name}' not found")
+        
+        channel = ChannelDataRepository.get_channel_by_well_and_name(db, well.id, channel_name)
+        if not channel:
+            raise HTTPException(
+                status_code=404, 
+                detail=f"Channel with name '{channel_name}' not found for well '{well_name}'"
+            )
+        
+        if not BucketRepository.delete_data_point_at(db, well_name, channel_name, time):
+            raise HTTPException(
+                status_code=404,
+                detail=f"No data point at {time.isoformat()} in bucket '{well_name}_{channel_name}'"
+            )
+        
+        return {"message": f"Data point at {time.isoformat()} deleted successfully"}
     
     @staticmethod
     def delete_all_bucket_data(
@@ -149,9 +437,43 @@ class BucketController:
         well_name: str,
         channel_name: str,
         start_date: Optional[datetime] = None, 
-        end_date: Optional[datetime] = None
+        end_date: Optional[datetime] = None,
+        percentiles: str = "50,95,99",
+        bins: int = DEFAULT_HISTOGRAM_BINS,
+        response: Optional[Response] = None,
+        channel_id: Optional[int] = None
     ) -> BucketStatistics:
-        """Get statistics for a bucket's data"""
+        """
+        Get statistics for a bucket's data, reporting the tiers the
+        distribution was read from in the X-Served-Tier header of `response`.
+        Given the channel's id, they go through the read cache.
+        """
+        read = lambda: BucketController._read_statistics(
+            db, well_name, channel_name, start_date, end_date, percentiles, bins
+        )
+        if channel_id is None:
+            cached, hit = read(), False
+        else:
+            key = cache_key("statistics", start_date=start_date, end_date=end_date, percentiles=percentiles, bins=bins)
+            cached, hit = bucket_read_cache.read_through(channel_id, key, (start_date, end_date), read)
+        
+        if response is not None:
+            response.headers.update(cached.headers)
+            if channel_id is not None:
+                response.headers[CACHE_STATUS_HEADER] = "hit" if hit else "miss"
+        return BucketStatistics.model_validate_json(cached.content)
+
+    @staticmethod
+    def _read_statistics(
+        db: Session, 
+        well_name: str,
+        channel_name: str,
+        start_date: Optional[datetime],
+        end_date: Optional[datetime],
+        percentiles: str,
+        bins: int
+    ) -> CachedRead:
+        """Statistics of a bucket's data encoded as JSON, with the X-Served-Tier header"""
         # Check if well and channel exist
         well = WellRepository.get_well_by_name(db, well_name)
         if not well:
@@ -165,7 +487,13 @@ class BucketController:
             )
         
         # Get the statistics
-        stats = BucketRepository.get_statistics(db, well_name, channel_name, start_date, end_date)
+        try:
+            stats = BucketRepository.get_statistics(
+                db, well_name, channel_name, start_date, end_date, parse_percentiles(percentiles), bins
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        tiers = stats.pop("tiers")
         
         if stats["count"] == 0:
             raise HTTPException(
@@ -173,4 +501,177 @@ class BucketController:
                 detail=f"No data points found in bucket '{well_name}_{channel_name}' for the specified time range"
             )
         
-        return BucketStatistics(**stats)
\ No newline at end of file
+        return CachedRead(
+            BucketStatistics(**stats).model_dump_json().encode(), MEDIA_TYPE_JSON, {SERVED_TIER_HEADER: tiers}
+        )
+    
+    @staticmethod
+    def get_aggregates(
+        db: Session,
+        well_name: str,
+        channel_name: str,
+        interval: str,
+        aggregates: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        fill: str = FILL_NONE,
+        response: Optional[Response] = None
+    ) -> BucketAggregates:
+        """
+        Get the aggregates of a bucket's data per time interval, reporting the
+        tiers that served them in the X-Served-Tier header of `response`
+        """
+        # Check if well and channel exist
+        well = WellRepository.get_well_by_name(db, well_name)
+        if not well:
+            raise HTTPException(status_code=404, detail=f"Well with name '{well_name}' not found")
+        
+        channel = ChannelDataRepository.get_channel_by_well_and_name(db, well.id, channel_name)
+        if not channel:
+            raise HTTPException(
+                status_code=404, 
+                detail=f"Channel with name '{channel_name}' not found for well '{well_name}'"
+            )
+        
+        try:
+            names = parse_aggregates(aggregates)
+            rows, tiers = BucketAggregateRepository.get_aggregates(
+                db, well_name, channel_name, interval, names, start_date, end_date, fill
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if response is not None:
+            response.headers[SERVED_TIER_HEADER] = tiers
+        
+        return BucketAggregates(
+            interval=interval,
+            aggregates=names,
+            fill=fill,
+            start_date=start_date,
+            end_date=end_date,
+            rows=rows
+        )
+
+    @staticmethod
+    def get_well_frame(
+        db: Session,
+        well_id: int,
+        channels: str,
+        interval: str,
+        aggregate: str = "avg",
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        fill: str = FILL_NONE
+    ) -> WellFrame:
+        """Resample several channels of a well onto shared time intervals in one frame"""
+        well = WellRepository.get_well_by_id(db, well_id)
+        if not well:
+            raise HTTPException(status_code=404, detail=f"Well with id {well_id} not found")
+        
+        names = list(dict.fromkeys(name.strip() for name in channels.split(",") if name.strip()))
+        if not names or len(names) > MAX_FRAME_CHANNELS:
+            raise HTTPException(
+                status_code=400, detail=f"Expected between 1 and {MAX_FRAME_CHANNELS} channel names"
+            )
+        
+        # Resolve every channel in one query, keeping the requested order
+        found = {
+            channel.name: channel
+            for channel in ChannelDataRepository.get_channels_by_keys(db, [], [(well.name, name) for name in names])
+        }
+        missing = [name for name in names if name not in found]
+        if missing:
+            raise HTTPException(
+                status_code=404, detail=f"Channels not found for well '{well.name}': {', '.join(missing)}"
+            )
+        
+        try:
+            frame = BucketFrameRepository.get_frame(
+                db, [found[name] for name in names], interval, aggregate, start_date, end_date, fill
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        return WellFrame(
+            well_name=well.name,
+            interval=interval,
+            aggregate=aggregate,
+            fill=fill,
+            start_date=start_date,
+            end_date=end_date,
+            **frame
+        )
+
+    @staticmethod
+    def get_fleet_aggregates(
+        db: Session,
+        channel_name: str,
+        aggregates: str,
+        group_by: str = "well",
+        region: Optional[str] = None,
+        status: Optional[str] = None,
+        lift_type: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> FleetAggregates:
+        """
+        Aggregate a channel name across the wells matching the filters, each a
+        comma-separated list of allowed values, grouped by well or attribute
+        """
+        def allowed(values: Optional[str]) -> Optional[List[str]]:
+            return [value.strip() for value in values.split(",") if value.strip()] if values else None
+        
+        channels = ChannelDataRepository.get_channels_by_name(
+            db, channel_name, allowed(region), allowed(status), allowed(lift_type)
+        )
+        
+        try:
+            names = parse_aggregates(aggregates)
+            groups = BucketFleetRepository.get_fleet_aggregates(channels, names, group_by, start_date, end_date)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        return FleetAggregates(
+            channel_name=channel_name,
+            group_by=group_by,
+            aggregates=names,
+            region=region,
+            status=status,
+            lift_type=lift_type,
+            start_date=start_date,
+            end_date=end_date,
+            wells=len(channels),
+            groups=groups
+        )
+
+    @staticmethod
+    def get_latest_values(
+        db: Session, well_ids: Optional[str] = None, channels: Optional[str] = None
+    ) -> FleetLatestValues:
+        """
+        Get the latest point of the channels of many wells, every well by
+        default, from the in-memory latest values: one query lists the
+        channels, each point is then a dict lookup
+        """
+        try:
+            ids = [int(well_id) for well_id in well_ids.split(",") if well_id.strip()] if well_ids else None
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid well ids '{well_ids}', expected comma-separated integers")
+        names = [name.strip() for name in channels.split(",") if name.strip()] if channels else None
+        
+        found = ChannelDataRepository.get_channels_by_wells(db, ids, names)
+        latest = bucket_latest_values.get_many(channel.id for channel in found)
+        
+        wells: Dict[int, Dict[str, Any]] = {}
+        for channel in found:
+            well = wells.setdefault(
+                channel.well_id, {"well_id": channel.well_id, "well_name": channel.well.name, "channels": []}
+            )
+            point = latest.get(channel.id)
+            well["channels"].append({
+                "channel_id": channel.id,
+                "channel_name": channel.name,
+                "time": point.time if point else None,
+                "value": point.value if point else None,
+            })
+        return FleetLatestValues(wells=list(wells.values()))
@@ -0,0 +1,130 @@
+import zlib
+from typing import Iterator, Optional
+from datetime import datetime
+import numpy as np # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+from fastapi import HTTPException # type: ignore
+from fastapi.responses import StreamingResponse # type: ignore
+
+from app.core.database import SessionLocal
+from app.models.bucket import get_bucket_store
+from app.repositories.bucket_repository import BucketRepository
+from app.repositories.channel_data_repository import ChannelDataRepository
+from app.repositories.well_repository import WellRepository
+
+# Export formats, mapped to their media type; both upload back as they are
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+CSV_HEADER = b"time,value\n"
+
+# Points read and encoded at a time
+EXPORT_BATCH_POINTS = 10000
+
+# zlib window bits producing a gzip stream
+_GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """Whether an Accept-Encoding header allows a gzip body"""
+    for coding in (accept_encoding or "").lower().split(","):
+        name, _, params = coding.strip().partition(";")
+        if name.strip() in ("gzip", "x-gzip"):
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+class BucketExportController:
+    @staticmethod
+    def _encode_block(times: np.ndarray, values: np.ndarray, export_format: str) -> bytes:
+        """Encode a block of points as CSV or NDJSON lines"""
+        time_strings = np.datetime_as_string(times, unit="us").tolist()
+        if export_format == "csv":
+            lines = [f"{time},{value!r}\n" for time, value in zip(time_strings, values.tolist())]
+        else:
+            lines = [f'{{"time":"{time}","value":{value!r}}}\n' for time, value in zip(time_strings, values.tolist())]
+        return "".join(lines).encode()
+
+    @staticmethod
+    def _iter_body(
+        well_name: str,
+        channel_name: str,
+        start_date: Optional[datetime],
+        end_date: Optional[datetime],
+        export_format: str,
+        gzip: bool
+    ) -> Iterator[bytes]:
+        """
+        Encode the points of a range block by block. The stream outlives the
+        request's session, so it reads through a session of its own.
+        """
+        compressor = zlib.compressobj(wbits=_GZIP_WBITS) if gzip else None
+
+        def emit(data: bytes) -> bytes:
+            # Flushing every block keeps the client's download moving
+            return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH) if compressor else data
+
+        # The header goes out before any query runs
+        yield emit(CSV_HEADER if export_format == "csv" else b"")
+
+        db = SessionLocal()
+        try:
+            store = get_bucket_store(db, well_name, channel_name)
+            for _, times, values in BucketRepository.iter_columns(
+                db, store, start_date, end_date, EXPORT_BATCH_POINTS
+            ):
+                yield emit(BucketExportController._encode_block(times, values, export_format))
+        finally:
+            db.close()
+
+        if compressor:
+            yield compressor.flush()
+
+    @staticmethod
+    def export_data_points(
+        db: Session,
+        well_name: str,
+        channel_name: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        export_format: str = "csv",
+        gzip: bool = False
+    ) -> StreamingResponse:
+        """
+        Stream every point of a channel's range as CSV or NDJSON, gzipped when
+        `gzip` is set. Points are read through a server-side cursor and
+        written block by block, so memory stays constant whatever the size of
+        the range and the first bytes go out right away.
+        """
+        # Check if well and channel exist
+        well = WellRepository.get_well_by_name(db, well_name)
+        if not well:
+            raise HTTPException(status_code=404, detail=f"Well with name '{well_name}' not found")
+
+        channel = ChannelDataRepository.get_channel_by_well_and_name(db, well.id, channel_name)
+        if not channel:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Channel with name '{channel_name}' not found for well '{well_name}'"
+            )
+
+        if export_format not in EXPORT_MEDIA_TYPES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown export format '{export_format}', expected one of {list(EXPORT_MEDIA_TYPES)}"
+            )
+
+        headers = {
+            "Content-Disposition": f'attachment; filename="{channel.bucket_name}.{export_format}"',
+            "Vary": "Accept-Encoding",
+        }
+        if gzip:
+            headers["Content-Encoding"] = "gzip"
+
+        return StreamingResponse(
+            BucketExportController._iter_body(well_name, channel_name, start_date, end_date, export_format, gzip),
+            media_type=EXPORT_MEDIA_TYPES[export_format],
+            headers=headers
+        )
@@ -0,0 +1,24 @@
+from typing import List
+from sqlalchemy.orm import Session # type: ignore
+
+from app.core.database import SessionLocal
+from app.repositories.bucket_lifecycle_repository import BucketLifecycleRepository
+
+class BucketLifecycleController:
+    @staticmethod
+    def get_orphaned_tables(db: Session) -> List[str]:
+        """List the bucket tables no channel maps to"""
+        return BucketLifecycleRepository.find_orphaned_tables(db)
+
+    @staticmethod
+    def sweep_orphaned_tables() -> None:
+        """Reclaim the orphaned bucket tables, run periodically in the background"""
+        db = SessionLocal()
+        try:
+            for result in BucketLifecycleRepository.sweep(db):
+                if result["archived_as"]:
+                    print(f"Sweeper: archived orphaned bucket table {result['table']} as {result['archived_as']}")
+                else:
+                    print(f"Sweeper: dropped orphaned bucket table {result['table']}")
+        finally:
+            db.close()
@@ -0,0 +1,318 @@
+import csv
+import json
+import math
+import tempfile
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+from datetime import datetime
+import numpy as np # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+from fastapi import HTTPException # type: ignore
+from fastapi.concurrency import run_in_threadpool # type: ignore
+
+from app.core.jobs import Job, job_manager
+from app.core.columnar import (
+    MEDIA_TYPE_ARROW,
+    MEDIA_TYPE_PACKED,
+    ColumnarFormatError,
+    PackedBlockReader,
+    arrow_available,
+    iter_arrow_batches
+)
+from app.repositories.bucket_repository import BucketRepository, DuplicateTimestampError
+from app.repositories.channel_data_repository import ChannelDataRepository
+from app.repositories.well_repository import WellRepository
+from app.schemas.bucket_schema import BucketUploadChunk, BucketUploadResult
+
+# Content types accepted by the upload endpoint, mapped to their body format
+UPLOAD_CONTENT_TYPES = {
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "text/csv": "csv",
+    MEDIA_TYPE_PACKED: "packed",
+    MEDIA_TYPE_ARROW: "arrow",
+}
+
+# Formats carrying typed columns rather than text lines
+BINARY_UPLOAD_FORMATS = ("packed", "arrow")
+
+# Upper bound on the points of a single packed block, so a corrupt count can't exhaust memory
+MAX_PACKED_BLOCK_POINTS = 1_000_000
+
+# Arrow IPC bodies beyond this size are spooled to a temporary file
+ARROW_SPOOL_BYTES = 16 * 1024 * 1024
+
+# Upper bound on a single line so a body without newlines can't exhaust memory
+MAX_LINE_BYTES = 1024 * 1024
+
+# Number of rejected lines reported per chunk
+MAX_ERROR_SAMPLES = 5
+
+# Number of chunks with rejected points reported per upload
+MAX_FAILED_CHUNKS = 100
+
+# Reason a point is rejected for, the same for every body format
+NON_FINITE_VALUE = "missing time or non-finite value"
+
+
+class BucketUploadController:
+    @staticmethod
+    def resolve_format(content_type: Optional[str], upload_format: Optional[str] = None) -> str:
+        """Pick the body format from an explicit format or the request content type"""
+        if not upload_format:
+            media_type = (content_type or "").split(";")[0].strip().lower()
+            if media_type not in UPLOAD_CONTENT_TYPES:
+                raise HTTPException(
+                    status_code=415,
+                    detail=f"Unsupported content type '{media_type}', expected one of: {', '.join(UPLOAD_CONTENT_TYPES)}"
+                )
+            upload_format = UPLOAD_CONTENT_TYPES[media_type]
+
+        if upload_format == "arrow" and not arrow_available():
+            raise HTTPException(status_code=415, detail="Arrow IPC uploads require the 'pyarrow' package on the server")
+        return upload_format
+
+    @staticmethod
+    async def _iter_lines(stream: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        """Split a byte stream into lines without buffering more than one partial line"""
+        remainder = b""
+        async for block in stream:
+            remainder += block
+            lines = remainder.split(b"\n")
+            remainder = lines.pop()
+            if len(remainder) > MAX_LINE_BYTES:
+                raise HTTPException(status_code=400, detail=f"Line exceeds {MAX_LINE_BYTES} bytes")
+            for line in lines:
+                yield line
+        if remainder:
+            yield remainder
+
+    @staticmethod
+    async def _iter_columns(
+        stream: AsyncIterator[bytes], upload_format: str
+    ) -> AsyncIterator[Tuple[np.ndarray, np.ndarray]]:
+        """Decode a packed or Arrow IPC body into (times, values) arrays"""
+        if upload_format == "packed":
+            reader = PackedBlockReader(MAX_PACKED_BLOCK_POINTS)
+            async for block in stream:
+                for columns in reader.feed(block):
+                    yield columns
+            reader.close()
+            return
+
+        # Arrow IPC is decoded from a file, spill large bodies to disk
+        with tempfile.SpooledTemporaryFile(max_size=ARROW_SPOOL_BYTES) as spool:
+            async for block in stream:
+                spool.write(block)
+            spool.seek(0)
+            for columns in iter_arrow_batches(spool):
+                yield columns
+
+    @staticmethod
+    def _columns_to_points(
+        times: np.ndarray, values: np.ndarray, offset: int
+    ) -> Tuple[List[Tuple[datetime, float]], List[str]]:
+        """Turn decoded columns into points, rejecting missing timestamps and non-finite values"""
+        valid = ~np.isnat(times) & np.isfinite(values)
+        errors = [f"point {offset + index + 1}: {NON_FINITE_VALUE}" for index in np.flatnonzero(~valid)]
+        points = list(zip(times[valid].astype(object), values[valid].tolist()))
+        return points, errors
+
+    @staticmethod
+    def _finite(value: float) -> float:
+        """Reject NaN and infinite values, which the binary formats drop too"""
+        if not math.isfinite(value):
+            raise ValueError(NON_FINITE_VALUE)
+        return value
+
+    @staticmethod
+    def _parse_ndjson_line(line: str) -> Tuple[datetime, float]:
+        record = json.loads(line)
+        if not isinstance(record, dict):
+            raise ValueError("expected a JSON object")
+        return datetime.fromisoformat(record["time"]), BucketUploadController._finite(float(record["value"]))
+
+    @staticmethod
+    def _parse_csv_line(line: str) -> Tuple[datetime, float]:
+        fields = next(csv.reader([line]))
+        if len(fields) != 2:
+            raise ValueError(f"expected 2 columns, got {len(fields)}")
+        return datetime.fromisoformat(fields[0].strip()), BucketUploadController._finite(float(fields[1]))
+
+    @staticmethod
+    def _parse_chunk(
+        lines: List[Tuple[int, str]], upload_format: str
+    ) -> Tuple[List[Tuple[datetime, float]], List[str]]:
+        """Parse and validate a chunk of numbered lines into points and error messages"""
+        parse_line = (
+            BucketUploadController._parse_ndjson_line
+            if upload_format == "ndjson"
+            else BucketUploadController._parse_csv_line
+        )
+        points = []
+        errors = []
+        for line_number, line in lines:
+            try:
+                points.append(parse_line(line))
+            except (ValueError, KeyError, TypeError) as e:
+                errors.append(f"line {line_number}: {e}")
+        return points, errors
+
+    @staticmethod
+    async def upload_data_points(
+        db: Session,
+        well_name: str,
+        channel_name: str,
+        stream: AsyncIterator[bytes],
+        upload_format: str,
+        chunk_size: int = 10000,
+        on_conflict: Optional[str] = None
+    ) -> BucketUploadResult:
+        """
+        Ingest an NDJSON, CSV, packed or Arrow IPC body chunk by chunk.
+
+        Lines are parsed and validated `chunk_size` at a time, and each chunk
+        is written and committed before the next one is read, so memory use
+        does not depend on the size of the upload. Invalid lines are counted
+        and skipped rather than failing the whole upload, as are chunks
+        rejected for duplicate timestamps; only the first `MAX_FAILED_CHUNKS`
+        chunks with rejected points are listed.
+
+        The upload is tracked as an "upload" job, so its progress can be
+        polled and it can be cancelled between chunks while it streams.
+        """
+        # Check if well and channel exist
+        well = WellRepository.get_well_by_name(db, well_name)
+        if not well:
+            raise HTTPException(status_code=404, detail=f"Well with name '{well_name}' not found")
+
+        channel = ChannelDataRepository.get_channel_by_well_and_name(db, well.id, channel_name)
+        if not channel:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Channel with name '{channel_name}' not found for well '{well_name}'"
+            )
+
+        params = {"well_id": well.id, "channel_id": channel.id, "format": upload_format, "chunk_size": chunk_size}
+        with job_manager.track("upload", params) as job:
+            result = BucketUploadResult(job_id=job.id)
+            await BucketUploadController._upload(
+                db, well_name, channel_name, stream, upload_format, chunk_size, on_conflict, job, result
+            )
+            job.result = result.model_dump(mode="json", exclude={"failed_chunks", "job_id"})
+        return result
+
+    @staticmethod
+    async def _upload(
+        db: Session,
+        well_name: str,
+        channel_name: str,
+        stream: AsyncIterator[bytes],
+        upload_format: str,
+        chunk_size: int,
+        on_conflict: Optional[str],
+        job: Job,
+        result: BucketUploadResult
+    ) -> None:
+        """Stream the body into the channel, adding up the outcome of each chunk in `result`"""
+        def parse_and_write(
+            parse: Callable[[], Tuple[List[Tuple[datetime, float]], List[str]]], label: str
+        ) -> Tuple[Optional[Dict[str, Any]], List[str], int]:
+            """Parse a chunk and write its points, returning the write result, errors and points rejected"""
+            points, errors = parse()
+            if not points:
+                return None, errors, len(errors)
+            try:
+                write_result = BucketRepository.write_points(
+                    db, well_name, channel_name, points, on_conflict=on_conflict
+                )
+            except DuplicateTimestampError as e:
+                # The whole chunk was rolled back
+                rejected = len(errors) + len(points)
+                errors.append(f"{label}: {e}")
+                return None, errors, rejected
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            return write_result, errors, len(errors)
+
+        async def write_chunk(
+            parse: Callable[[], Tuple[List[Tuple[datetime, float]], List[str]]], size: int, label: str
+        ) -> None:
+            # Parsing thousands of lines is as slow as writing them, keep both off the event loop
+            write_result, errors, rejected = await run_in_threadpool(parse_and_write, parse, label)
+            written = 0
+            if write_result:
+                written = write_result["count"]
+                if result.data_from is None or write_result["data_from"] < result.data_from:
+                    result.data_from = write_result["data_from"]
+                if result.data_to is None or write_result["data_to"] > result.data_to:
+                    result.data_to = write_result["data_to"]
+
+            result.lines_read += size
+            result.written += written
+            result.rejected += rejected
+            if rejected and len(result.failed_chunks) < MAX_FAILED_CHUNKS:
+                result.failed_chunks.append(BucketUploadChunk(
+                    chunk=result.chunks,
+                    lines=size,
+                    written=written,
+                    errors=rejected,
+                    total_written=result.written,
+                    error_samples=errors[:MAX_ERROR_SAMPLES]
+                ))
+            result.chunks += 1
+            job.set_progress(result.written)
+
+        async def flush(lines: List[Tuple[int, str]]) -> None:
+            await write_chunk(
+                lambda: BucketUploadController._parse_chunk(lines, upload_format),
+                len(lines),
+                f"lines {lines[0][0]}-{lines[-1][0]}"
+            )
+
+        if upload_format in BINARY_UPLOAD_FORMATS:
+            # Binary points are already typed, chunks only bound the size of each write
+            points_read = 0
+            try:
+                async for times, values in BucketUploadController._iter_columns(stream, upload_format):
+                    if job.is_cancelled():
+                        break
+                    for offset in range(0, len(times), chunk_size):
+                        chunk_times = times[offset:offset + chunk_size]
+                        chunk_values = values[offset:offset + chunk_size]
+                        label = f"points {points_read + 1}-{points_read + len(chunk_times)}"
+                        await write_chunk(
+                            lambda: BucketUploadController._columns_to_points(chunk_times, chunk_values, points_read),
+                            len(chunk_times),
+                            label
+                        )
+                        points_read += len(chunk_times)
+            except ColumnarFormatError as e:
+                raise HTTPException(status_code=400, detail=f"{e} (after {points_read} points)")
+            return
+
+        pending: List[Tuple[int, str]] = []
+        line_number = 0
+        skip_header = upload_format == "csv"
+
+        async for raw_line in BucketUploadController._iter_lines(stream):
+            line_number += 1
+            line = raw_line.decode("utf-8", errors="replace").strip()
+            if not line:
+                continue
+
+            # An optional CSV header row is recognised by its first column name
+            if skip_header:
+                skip_header = False
+                if line.split(",")[0].strip().strip('"').lower() == "time":
+                    continue
+
+            pending.append((line_number, line))
+            if len(pending) >= chunk_size:
+                await flush(pending)
+                pending = []
+                if job.is_cancelled():
+                    return
+
+        if pending:
+            await flush(pending)
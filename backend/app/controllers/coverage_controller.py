@@ -0,0 +1,139 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+from sqlalchemy.orm import Session # type: ignore
+from fastapi import HTTPException # type: ignore
+
+from app.models.bucket import get_channel_store
+from app.models.channel_data import ChannelData
+from app.models.coverage import ChannelCoverage
+from app.repositories.bucket_bulk_writer import to_naive_utc
+from app.repositories.bucket_repository import BucketRepository
+from app.repositories.channel_data_repository import ChannelDataRepository
+from app.repositories.coverage_repository import CoverageRepository
+from app.schemas.coverage_schema import CoverageIndexOut, CoverageIndexUpdate, CoverageReport, FleetCoverage
+
+class CoverageController:
+    @staticmethod
+    def _get_channel(db: Session, well_id: int, channel_id: int) -> ChannelData:
+        channel = ChannelDataRepository.get_channel_by_id(db, channel_id)
+        if not channel or channel.well_id != well_id:
+            raise HTTPException(status_code=404, detail=f"Channel with id {channel_id} not found for well {well_id}")
+        return channel
+
+    @staticmethod
+    def _get_coverage(db: Session, channel_id: int) -> ChannelCoverage:
+        coverage = CoverageRepository.get_coverage(db, channel_id)
+        if not coverage:
+            raise HTTPException(status_code=404, detail=f"Channel with id {channel_id} has no coverage index")
+        return coverage
+
+    @staticmethod
+    def _index_out(db: Session, coverage: ChannelCoverage) -> CoverageIndexOut:
+        return CoverageIndexOut(
+            channel_id=coverage.channel_id,
+            sampling_interval_seconds=coverage.sampling_interval_seconds,
+            max_gap_seconds=CoverageRepository.max_gap(coverage).total_seconds(),
+            runs=CoverageRepository.count_runs(db, coverage.channel_id),
+            created_at=coverage.created_at,
+            updated_at=coverage.updated_at
+        )
+
+    @staticmethod
+    def get_index(db: Session, well_id: int, channel_id: int) -> CoverageIndexOut:
+        """Get the coverage index settings of a channel"""
+        CoverageController._get_channel(db, well_id, channel_id)
+        return CoverageController._index_out(db, CoverageController._get_coverage(db, channel_id))
+
+    @staticmethod
+    def set_index(db: Session, well_id: int, channel_id: int, index: CoverageIndexUpdate) -> CoverageIndexOut:
+        """Index the coverage of a channel at an expected sampling interval, rebuilding its runs from its points"""
+        channel = CoverageController._get_channel(db, well_id, channel_id)
+        store = get_channel_store(channel)
+        blocks = (times for _, times, _ in BucketRepository.iter_columns(db, store))
+        coverage = CoverageRepository.set_coverage(db, channel_id, index.sampling_interval_seconds, blocks)
+        return CoverageController._index_out(db, coverage)
+
+    @staticmethod
+    def delete_index(db: Session, well_id: int, channel_id: int) -> Dict[str, str]:
+        """Stop indexing the coverage of a channel"""
+        CoverageController._get_channel(db, well_id, channel_id)
+        if not CoverageRepository.drop_index(db, channel_id):
+            raise HTTPException(status_code=404, detail=f"Channel with id {channel_id} has no coverage index")
+        db.commit()
+        return {"message": f"Coverage index of channel {channel_id} deleted successfully"}
+
+    @staticmethod
+    def get_report(
+        db: Session,
+        well_id: int,
+        channel_id: int,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        min_gap_seconds: float = 0,
+        limit: int = 1000
+    ) -> CoverageReport:
+        """Get the coverage of a channel over a range and its gaps, from its runs alone"""
+        CoverageController._get_channel(db, well_id, channel_id)
+        coverage = CoverageController._get_coverage(db, channel_id)
+        start_date = to_naive_utc(start_date) if start_date else None
+        end_date = to_naive_utc(end_date) if end_date else None
+        if start_date and end_date and start_date > end_date:
+            raise HTTPException(status_code=400, detail="start_date must not be after end_date")
+
+        runs = CoverageRepository.get_runs(db, [coverage], start_date, end_date)[channel_id]
+        return CoverageReport(
+            **CoverageRepository.report(coverage, runs, start_date, end_date, min_gap_seconds, limit)
+        )
+
+    @staticmethod
+    def get_fleet_coverage(
+        db: Session,
+        channel_name: str,
+        region: Optional[str] = None,
+        status: Optional[str] = None,
+        lift_type: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> FleetCoverage:
+        """
+        Get the coverage of a channel name over a range in every well matching
+        the filters, each a comma-separated list of allowed values, with one
+        query over the runs of all of them
+        """
+        def allowed(values: Optional[str]) -> Optional[List[str]]:
+            return [value.strip() for value in values.split(",") if value.strip()] if values else None
+
+        start = to_naive_utc(start_date) if start_date else None
+        end = to_naive_utc(end_date) if end_date else None
+        if start and end and start > end:
+            raise HTTPException(status_code=400, detail="start_date must not be after end_date")
+
+        channels = ChannelDataRepository.get_channels_by_name(
+            db, channel_name, allowed(region), allowed(status), allowed(lift_type)
+        )
+        coverages = CoverageRepository.get_coverages(db, [channel.id for channel in channels])
+        runs = CoverageRepository.get_runs(db, list(coverages.values()), start, end)
+
+        summaries = []
+        for channel in channels:
+            summary = {"well_id": channel.well_id, "well_name": channel.well.name, "channel_id": channel.id}
+            coverage = coverages.get(channel.id)
+            if coverage:
+                report = CoverageRepository.report(coverage, runs[channel.id], start, end, limit=0)
+                summary.update({
+                    name: report[name] for name in (
+                        "sampling_interval_seconds", "coverage_percent", "covered_seconds",
+                        "gap_count", "longest_gap_seconds"
+                    )
+                })
+            summaries.append(summary)
+
+        return FleetCoverage(
+            channel_name=channel_name,
+            region=region,
+            status=status,
+            lift_type=lift_type,
+            start_date=start_date,
+            end_date=end_date,
+            channels=summaries
+        )
@@ -0,0 +1,46 @@
+from typing import Any, Callable, Dict, List
+from fastapi import HTTPException # type: ignore
+
+from app.core.database import SessionLocal
+from app.core.jobs import Job, JobQueueFullError, job_manager
+from app.schemas.job_schema import JobOut
+
+class JobController:
+    @staticmethod
+    def submit(kind: str, params: Dict[str, Any], fn: Callable[..., Dict[str, Any]]) -> JobOut:
+        """
+        Queue `fn(db, job)` as a background job running in its own database session
+        """
+        def run(job: Job) -> Dict[str, Any]:
+            db = SessionLocal()
+            try:
+                return fn(db, job)
+            finally:
+                db.close()
+
+        try:
+            job = job_manager.submit(kind, params, run)
+        except JobQueueFullError as e:
+            raise HTTPException(status_code=429, detail=str(e))
+        return JobOut.model_validate(job)
+
+    @staticmethod
+    def get_jobs() -> List[JobOut]:
+        """Get all known jobs, oldest first"""
+        return [JobOut.model_validate(job) for job in job_manager.list()]
+
+    @staticmethod
+    def get_job(job_id: str) -> JobOut:
+        """Get the status and progress of a job"""
+        job = job_manager.get(job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail=f"Job with id {job_id} not found")
+        return JobOut.model_validate(job)
+
+    @staticmethod
+    def cancel_job(job_id: str) -> JobOut:
+        """Request cancellation of a job"""
+        job = job_manager.cancel(job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail=f"Job with id {job_id} not found")
+        return JobOut.model_validate(job)
@@ -0,0 +1,72 @@
+from typing import Dict
+from sqlalchemy.orm import Session # type: ignore
+from fastapi import HTTPException # type: ignore
+
+from app.core.database import SessionLocal
+from app.core.jobs import Job
+from app.controllers.job_controller import JobController
+from app.models.channel_data import ChannelData
+from app.repositories.channel_data_repository import ChannelDataRepository
+from app.repositories.retention_repository import RetentionRepository
+from app.schemas.job_schema import JobOut
+from app.schemas.retention_schema import RetentionPolicyOut, RetentionPolicyUpdate
+
+class RetentionController:
+    @staticmethod
+    def _get_channel(db: Session, well_id: int, channel_id: int) -> ChannelData:
+        channel = ChannelDataRepository.get_channel_by_id(db, channel_id)
+        if not channel or channel.well_id != well_id:
+            raise HTTPException(status_code=404, detail=f"Channel with id {channel_id} not found for well {well_id}")
+        return channel
+
+    @staticmethod
+    def get_policy(db: Session, well_id: int, channel_id: int) -> RetentionPolicyOut:
+        """Get the retention policy of a channel"""
+        RetentionController._get_channel(db, well_id, channel_id)
+        policy = RetentionRepository.get_policy(db, channel_id)
+        if not policy:
+            raise HTTPException(status_code=404, detail=f"Channel with id {channel_id} has no retention policy")
+        return RetentionPolicyOut.model_validate(policy)
+
+    @staticmethod
+    def set_policy(db: Session, well_id: int, channel_id: int, policy: RetentionPolicyUpdate) -> RetentionPolicyOut:
+        """Create or replace the retention policy of a channel"""
+        RetentionController._get_channel(db, well_id, channel_id)
+        return RetentionPolicyOut.model_validate(RetentionRepository.set_policy(db, channel_id, policy))
+
+    @staticmethod
+    def delete_policy(db: Session, well_id: int, channel_id: int) -> Dict[str, str]:
+        """Delete the retention policy of a channel"""
+        RetentionController._get_channel(db, well_id, channel_id)
+        if not RetentionRepository.delete_policy(db, channel_id):
+            raise HTTPException(status_code=404, detail=f"Channel with id {channel_id} has no retention policy")
+        return {"message": f"Retention policy of channel {channel_id} deleted successfully"}
+
+    @staticmethod
+    def enforce_policy(db: Session, well_id: int, channel_id: int) -> JobOut:
+        """Apply a channel's retention policy now, as a background job"""
+        RetentionController._get_channel(db, well_id, channel_id)
+        if not RetentionRepository.get_policy(db, channel_id):
+            raise HTTPException(status_code=404, detail=f"Channel with id {channel_id} has no retention policy")
+
+        def run(job_db: Session, job: Job):
+            policy = RetentionRepository.get_policy(job_db, channel_id)
+            if not policy:
+                raise ValueError(f"Channel with id {channel_id} has no retention policy")
+            return RetentionRepository.enforce(job_db, policy, should_cancel=job.is_cancelled)
+
+        return JobController.submit("enforce_retention", {"well_id": well_id, "channel_id": channel_id}, run)
+
+    @staticmethod
+    def enforce_all() -> None:
+        """Apply every channel's retention policy, run periodically in the background"""
+        db = SessionLocal()
+        try:
+            for result in RetentionRepository.enforce_all(db):
+                if result["points_deleted"] or result["rollups_deleted"]:
+                    print(
+                        f"Retention: channel {result['channel_id']} dropped {result['points_deleted']} points "
+                        f"and {result['rollups_deleted']} rollups"
+                    )
+        finally:
+            db.close()
@@ -26,7 +26,10 @@ class WellController:
 
     @staticmethod
     def update_well(db: Session, well_id: int, well_update: WellUpdate) -> Well:
-        db_well = WellRepository.update_well(db, well_id, well_update)
+        try:
+            db_well = WellRepository.update_well(db, well_id, well_update)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         if not db_well:
             raise HTTPException(status_code=404, detail=f"Well with id {well_id} not found")
         return db_well
@@ -0,0 +1,172 @@
+"""
+Compact columnar encodings for bucket data.
+
+Two binary media types are supported next to JSON:
+
+- `application/vnd.well-explorer.packed`: a sequence of blocks, each made of
+  a little-endian uint32 point count, then `count` int64 timestamps
+  (microseconds since the Unix epoch, UTC) and `count` float64 values.
+  Blocks can be streamed one after the other.
+- `application/vnd.apache.arrow.stream`: an Arrow IPC stream with `time`
+  (timestamp[us]) and `value` (float64) columns, plus `id` (int64) when
+  reading, null for points without a row of their own. Requires the
+  optional `pyarrow` package.
+"""
+import struct
+from typing import Iterator, Optional, Tuple
+
+import numpy as np # type: ignore
+
+try:
+    import pyarrow as pa # type: ignore
+    import pyarrow.ipc # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+
+MEDIA_TYPE_JSON = "application/json"
+MEDIA_TYPE_PACKED = "application/vnd.well-explorer.packed"
+MEDIA_TYPE_ARROW = "application/vnd.apache.arrow.stream"
+
+BINARY_MEDIA_TYPES = (MEDIA_TYPE_PACKED, MEDIA_TYPE_ARROW)
+
+_BLOCK_HEADER = struct.Struct("<I")
+_POINT_SIZE = 16  # int64 timestamp + float64 value
+
+
+class ColumnarFormatError(ValueError):
+    """Raised when a binary payload can't be decoded"""
+
+
+def arrow_available() -> bool:
+    return pa is not None
+
+
+def negotiate_media_type(accept: Optional[str]) -> str:
+    """
+    Pick the response encoding from an Accept header, JSON unless a binary
+    media type is explicitly preferred
+    """
+    if not accept:
+        return MEDIA_TYPE_JSON
+
+    preferences = []
+    for position, item in enumerate(accept.split(",")):
+        media_type, *params = [part.strip() for part in item.split(";")]
+        quality = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            preferences.append((-quality, position, media_type.lower()))
+
+    for _, _, media_type in sorted(preferences):
+        if media_type == MEDIA_TYPE_ARROW and not arrow_available():
+            continue
+        if media_type in BINARY_MEDIA_TYPES or media_type in (MEDIA_TYPE_JSON, "*/*", "application/*"):
+            return media_type if media_type in BINARY_MEDIA_TYPES else MEDIA_TYPE_JSON
+    return MEDIA_TYPE_JSON
+
+
+def to_epoch_us(times: np.ndarray) -> np.ndarray:
+    return times.astype("datetime64[us]").astype("<i8")
+
+
+def from_epoch_us(epoch_us: np.ndarray) -> np.ndarray:
+    return epoch_us.astype("<i8").astype("datetime64[us]")
+
+
+def encode_packed(times: np.ndarray, values: np.ndarray) -> bytes:
+    """Encode timestamps and values as a single packed block"""
+    return b"".join((
+        _BLOCK_HEADER.pack(len(times)),
+        to_epoch_us(times).tobytes(),
+        values.astype("<f8").tobytes(),
+    ))
+
+
+class PackedBlockReader:
+    """
+    Incrementally decodes packed blocks from a byte stream.
+
+    Feed arbitrary byte chunks and collect every block completed so far, so
+    only one partial block is ever buffered.
+    """
+
+    def __init__(self, max_block_points: int):
+        self.max_block_points = max_block_points
+        self._buffer = bytearray()
+
+    def feed(self, data: bytes) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        self._buffer += data
+        while len(self._buffer) >= _BLOCK_HEADER.size:
+            (count,) = _BLOCK_HEADER.unpack_from(self._buffer)
+            if count > self.max_block_points:
+                raise ColumnarFormatError(
+                    f"Block of {count} points exceeds the maximum of {self.max_block_points}"
+                )
+            block_size = _BLOCK_HEADER.size + count * _POINT_SIZE
+            if len(self._buffer) < block_size:
+                return
+
+            block = bytes(self._buffer[_BLOCK_HEADER.size:block_size])
+            del self._buffer[:block_size]
+            epoch_us = np.frombuffer(block, dtype="<i8", count=count)
+            values = np.frombuffer(block, dtype="<f8", count=count, offset=count * 8)
+            yield from_epoch_us(epoch_us), values
+
+    def close(self) -> None:
+        """Check that the stream did not end in the middle of a block"""
+        if self._buffer:
+            raise ColumnarFormatError(f"Truncated packed block ({len(self._buffer)} trailing bytes)")
+
+
+def decode_packed(data: bytes, max_block_points: int = 2**31) -> Tuple[np.ndarray, np.ndarray]:
+    """Decode a whole packed payload into timestamp and value arrays"""
+    reader = PackedBlockReader(max_block_points)
+    blocks = list(reader.feed(data))
+    reader.close()
+    if not blocks:
+        return np.array([], dtype="datetime64[us]"), np.array([], dtype="<f8")
+    return np.concatenate([times for times, _ in blocks]), np.concatenate([values for _, values in blocks])
+
+
+def _require_arrow() -> None:
+    if pa is None:
+        raise ColumnarFormatError("Arrow IPC support requires the 'pyarrow' package")
+
+
+def encode_arrow(times: np.ndarray, values: np.ndarray, ids: Optional[np.ndarray] = None) -> bytes:
+    """Encode columns as an Arrow IPC stream with a single record batch, negative ids become nulls"""
+    _require_arrow()
+    columns = {
+        "time": pa.array(times.astype("datetime64[us]"), type=pa.timestamp("us")),
+        "value": pa.array(values, type=pa.float64()),
+    }
+    if ids is not None:
+        columns["id"] = pa.array(ids, type=pa.int64(), mask=ids < 0)
+    batch = pa.RecordBatch.from_pydict(columns)
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
+
+
+def iter_arrow_batches(source) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """Decode an Arrow IPC stream from a file-like object one record batch at a time"""
+    _require_arrow()
+    try:
+        reader = pa.ipc.open_stream(source)
+        for batch in reader:
+            names = batch.schema.names
+            if "time" not in names or "value" not in names:
+                raise ColumnarFormatError("Arrow stream must have 'time' and 'value' columns")
+            times = batch.column("time").cast(pa.timestamp("us")).to_numpy(zero_copy_only=False)
+            values = batch.column("value").cast(pa.float64()).to_numpy(zero_copy_only=False)
+            yield times, values
+    except pa.ArrowException as e:
+        # Covers malformed streams as well as columns that can't be cast
+        raise ColumnarFormatError(f"Invalid Arrow stream: {e}")
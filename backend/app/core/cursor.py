@@ -0,0 +1,35 @@
+"""
+Opaque cursors for keyset pagination of bucket data.
+
+A cursor holds the (time, id) key of the last point of a page, and the next
+page seeks right past it instead of skipping every earlier row. Points read
+from compressed chunks have no row id and carry `NO_ROW_ID` in their key.
+Cursors are URL-safe base64 text; clients pass them back as they are.
+"""
+import base64
+import binascii
+from datetime import datetime
+from typing import Tuple
+
+# Response header carrying the cursor of the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a cursor can't be decoded"""
+
+
+def encode_cursor(time: datetime, id: int) -> str:
+    """Cursor positioned right after the point at `time` with row `id`"""
+    key = f"{time.isoformat()}|{id}".encode()
+    return base64.urlsafe_b64encode(key).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """(time, id) key of the point a cursor was positioned after"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        time, id = base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+        return datetime.fromisoformat(time), int(id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise InvalidCursorError(f"Invalid cursor '{cursor}'") from e
@@ -0,0 +1,125 @@
+"""
+Reduce a time series to a few points that still draw like the original.
+
+- `lttb`: Largest-Triangle-Three-Buckets, one representative point per
+  bucket, picked to keep the shape of the line.
+- `minmax`: the lowest and highest point of every time bucket, so spikes
+  always survive (the envelope of the series).
+- `avg`: the mean time and value of every time bucket.
+
+Every function takes `datetime64[us]` times in ascending order with their
+`int64` ids and `float64` values, and returns the kept (ids, times, values).
+Points made up by averaging get `no_id`.
+"""
+from typing import Optional, Tuple
+
+import numpy as np # type: ignore
+
+# Reduction methods
+METHOD_LTTB = "lttb"
+METHOD_MINMAX = "minmax"
+METHOD_AVG = "avg"
+METHODS = (METHOD_LTTB, METHOD_MINMAX, METHOD_AVG)
+
+Columns = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+def time_buckets(times: np.ndarray, start_us: int, end_us: int, buckets: int) -> np.ndarray:
+    """Index of the equal-width time bucket of [start, end] each point falls into"""
+    epoch_us = times.astype("datetime64[us]").astype(np.int64)
+    width = max(end_us - start_us, 1) / buckets
+    return np.clip(((epoch_us - start_us) / width).astype(np.int64), 0, buckets - 1)
+
+
+def _group_starts(buckets: np.ndarray) -> np.ndarray:
+    """Offsets where a run of equal bucket indexes starts, buckets being sorted"""
+    return np.flatnonzero(np.concatenate(([True], buckets[1:] != buckets[:-1])))
+
+
+def minmax(ids: np.ndarray, times: np.ndarray, values: np.ndarray, start_us: int, end_us: int, buckets: int) -> Columns:
+    """Keep the minimum and maximum point of each time bucket, in time order"""
+    if not len(times):
+        return ids, times, values
+
+    bucket = time_buckets(times, start_us, end_us, buckets)
+    # Sorting by (bucket, value) puts each bucket's minimum first and maximum last
+    order = np.lexsort((values, bucket))
+    starts = _group_starts(bucket[order])
+    ends = np.concatenate((starts[1:], [len(order)])) - 1
+
+    keep = np.unique(np.concatenate((order[starts], order[ends])))
+    return ids[keep], times[keep], values[keep]
+
+
+def average(
+    ids: np.ndarray, times: np.ndarray, values: np.ndarray, start_us: int, end_us: int, buckets: int, no_id: int,
+    weights: Optional[np.ndarray] = None
+) -> Columns:
+    """
+    Replace the points of each time bucket with their mean time and value,
+    each point counting `weights` times when given, such as the number of
+    points a mean already stands for
+    """
+    if not len(times):
+        return ids, times, values
+
+    bucket = time_buckets(times, start_us, end_us, buckets)
+    starts = _group_starts(bucket)
+
+    epoch_us = times.astype("datetime64[us]").astype(np.int64)
+    # Offsets from the first point keep the sum of microsecond timestamps exact
+    offsets = epoch_us - epoch_us[0]
+    if weights is None:
+        counts = np.diff(np.concatenate((starts, [len(times)])))
+        mean_us = epoch_us[0] + np.add.reduceat(offsets, starts) // counts
+        mean_values = np.add.reduceat(values, starts) / counts
+    else:
+        weights = weights.astype(np.float64)
+        totals = np.add.reduceat(weights, starts)
+        mean_us = epoch_us[0] + np.round(np.add.reduceat(offsets * weights, starts) / totals).astype(np.int64)
+        mean_values = np.add.reduceat(values * weights, starts) / totals
+    return np.full(len(starts), no_id, dtype=np.int64), mean_us.astype("datetime64[us]"), mean_values
+
+
+def lttb(ids: np.ndarray, times: np.ndarray, values: np.ndarray, threshold: int) -> Columns:
+    """
+    Keep `threshold` points with Largest-Triangle-Three-Buckets.
+
+    The first and last points are always kept. The points in between are
+    split into `threshold - 2` buckets of equal count, and from each the
+    point forming the largest triangle with the point kept from the previous
+    bucket and the average of the next bucket is kept. Each bucket depends
+    on the previous pick, so buckets are walked in order, every bucket's
+    areas being computed in one vectorized step.
+    """
+    count = len(times)
+    if threshold >= count or threshold < 3:
+        return ids, times, values
+
+    x = times.astype("datetime64[us]").astype(np.int64)
+    x = (x - x[0]).astype(np.float64)
+    y = values
+
+    edges = np.floor(np.linspace(1, count - 1, threshold - 1)).astype(np.int64)
+    # Average point of every bucket, the last point standing in for the bucket after the last one
+    sizes = np.diff(edges)
+    sum_x = np.add.reduceat(x[:count - 1], edges[:-1])
+    sum_y = np.add.reduceat(y[:count - 1], edges[:-1])
+    avg_x = np.concatenate((sum_x / sizes, [x[-1]]))
+    avg_y = np.concatenate((sum_y / sizes, [y[-1]]))
+
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0] = 0
+    keep[-1] = count - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_x, next_y = avg_x[bucket + 1], avg_y[bucket + 1]
+        areas = np.abs(
+            (x[previous] - next_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        keep[bucket + 1] = previous
+
+    return ids[keep], times[keep], values[keep]
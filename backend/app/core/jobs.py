@@ -0,0 +1,173 @@
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from app.core.config import settings
+
+# Job states
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+FINISHED_STATES = (JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED)
+
+
+class JobQueueFullError(Exception):
+    """Raised when too many jobs are waiting for a worker"""
+
+
+class Job:
+    """A unit of background work with progress reporting and cooperative cancellation"""
+
+    def __init__(self, kind: str, params: Dict[str, Any]):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params
+        self.status = JOB_PENDING
+        self.points_written = 0
+        self.total_points: Optional[int] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.now()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self._cancel_event = threading.Event()
+
+    def set_progress(self, points_written: int, total_points: Optional[int] = None) -> None:
+        self.points_written = points_written
+        if total_points is not None:
+            self.total_points = total_points
+
+    def is_cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def cancel(self) -> None:
+        self._cancel_event.set()
+
+    @property
+    def progress(self) -> Optional[float]:
+        if not self.total_points:
+            return None
+        return min(self.points_written / self.total_points, 1.0)
+
+
+class JobManager:
+    """
+    Runs jobs on a bounded thread pool and keeps their state for polling.
+
+    Job functions receive their `Job` and should report progress with
+    `job.set_progress` and stop early once `job.is_cancelled()` is True.
+    Finished jobs are kept for inspection up to `history_size`.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int, history_size: int):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._max_pending = max_pending
+        self._history_size = history_size
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, params: Dict[str, Any], fn: Callable[[Job], Dict[str, Any]]) -> Job:
+        """Queue a job and return it immediately"""
+        job = Job(kind, params)
+        with self._lock:
+            pending = sum(1 for queued in self._jobs.values() if queued.status == JOB_PENDING)
+            if pending >= self._max_pending:
+                raise JobQueueFullError(f"Too many pending jobs ({pending}), try again later")
+            self._jobs[job.id] = job
+            self._prune()
+        self._executor.submit(self._run, job, fn)
+        return job
+
+    @contextmanager
+    def track(self, kind: str, params: Dict[str, Any]) -> Iterator[Job]:
+        """
+        Register work running in the caller, such as a streamed request, as a
+        running job so it can be polled and cancelled like a queued one.
+        The job finishes when the block exits, failed if it raised.
+        """
+        job = Job(kind, params)
+        job.status = JOB_RUNNING
+        job.started_at = datetime.now()
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        try:
+            yield job
+        except BaseException as e:
+            with self._lock:
+                job.error = str(e) or type(e).__name__
+                job.status = JOB_FAILED
+                job.finished_at = datetime.now()
+            raise
+        with self._lock:
+            job.status = JOB_CANCELLED if job.is_cancelled() else JOB_SUCCEEDED
+            job.finished_at = datetime.now()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> List[Job]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """Request cancellation; a running job stops after its current chunk"""
+        job = self.get(job_id)
+        if job is None:
+            return None
+        # Under the lock so a pending job is either cancelled or started, never both
+        with self._lock:
+            if job.status not in FINISHED_STATES:
+                job.cancel()
+                if job.status == JOB_PENDING:
+                    job.status = JOB_CANCELLED
+                    job.finished_at = datetime.now()
+        return job
+
+    def shutdown(self) -> None:
+        """Cancel every unfinished job and wait for the workers to stop"""
+        for job in self.list():
+            self.cancel(job.id)
+        self._executor.shutdown(wait=True)
+
+    def _run(self, job: Job, fn: Callable[[Job], Dict[str, Any]]) -> None:
+        with self._lock:
+            if job.is_cancelled():
+                return
+            job.status = JOB_RUNNING
+            job.started_at = datetime.now()
+
+        try:
+            result = fn(job)
+        except Exception as e:
+            with self._lock:
+                job.error = str(e) or type(e).__name__
+                job.status = JOB_FAILED
+                job.finished_at = datetime.now()
+            return
+
+        with self._lock:
+            job.result = result
+            job.status = JOB_CANCELLED if job.is_cancelled() else JOB_SUCCEEDED
+            job.finished_at = datetime.now()
+
+    def _prune(self) -> None:
+        """Forget the oldest finished jobs beyond the history size"""
+        finished = [job_id for job_id, job in self._jobs.items() if job.status in FINISHED_STATES]
+        for job_id in finished[:max(0, len(finished) - self._history_size)]:
+            del self._jobs[job_id]
+
+
+job_manager = JobManager(
+    max_workers=settings.JOB_MAX_WORKERS,
+    max_pending=settings.JOB_MAX_PENDING,
+    history_size=settings.JOB_HISTORY_SIZE,
+)
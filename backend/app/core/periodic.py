@@ -0,0 +1,42 @@
+import threading
+from typing import Callable, Optional
+
+
+class PeriodicTask:
+    """
+    Runs a function every `interval_seconds` on a daemon thread.
+
+    A run that raises is logged and the task carries on with the next one.
+    `stop` waits for a run in progress to finish.
+    """
+
+    def __init__(self, name: str, interval_seconds: float, fn: Callable[[], None]):
+        self.name = name
+        self.interval_seconds = interval_seconds
+        self._fn = fn
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if not self.running:
+            return
+        self._stop_event.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval_seconds):
+            try:
+                self._fn()
+            except Exception as e:
+                print(f"Periodic task '{self.name}' failed: {e}")
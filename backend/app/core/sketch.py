@@ -0,0 +1,147 @@
+"""
+Mergeable sketches of the distribution of a channel's values.
+
+Values are counted in logarithmic bins, as in DDSketch: bin i > 0 holds the
+positive values in (GAMMA^(k-1), GAMMA^k] with k = i + _MIN_KEY - 1, bin -i
+the negative values of the same magnitudes and bin 0 the values closer to
+zero than MIN_INDEXABLE. The values of a bin are within
+SKETCH_RELATIVE_ACCURACY of each other, and bins sort like their values.
+
+A sketch keeps the count, sum and sum of squares of every bin. All three
+add up, so the sketches of adjacent intervals merge into the sketch of the
+whole range without losing anything, and the count, mean and standard
+deviation of a merged sketch are those of the points themselves. A
+percentile is read from the bin holding its rank, within
+SKETCH_RELATIVE_ACCURACY of the value at that rank.
+"""
+import math
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np # type: ignore
+
+# Relative width of a bin, and so the relative error of a percentile
+SKETCH_RELATIVE_ACCURACY = 0.01
+
+# Values closer to zero than this all fall in bin 0
+MIN_INDEXABLE = 1e-9
+
+_LOG_GAMMA = math.log1p(SKETCH_RELATIVE_ACCURACY)
+
+# Key of the bin holding MIN_INDEXABLE, bin 1
+_MIN_KEY = math.ceil(math.log(MIN_INDEXABLE) / _LOG_GAMMA)
+
+# More bins than any float can fall in on either side of zero, to pack (group, bin) pairs in one int64
+_BIN_SPAN = 1 << 18
+
+
+class Sketch(NamedTuple):
+    """Bins in ascending order with the count, sum and sum of squares of their values"""
+    bins: np.ndarray
+    counts: np.ndarray
+    sums: np.ndarray
+    squares: np.ndarray
+
+
+def empty() -> Sketch:
+    return Sketch(
+        np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64),
+        np.empty(0, dtype=np.float64)
+    )
+
+
+def bin_values(values: np.ndarray) -> np.ndarray:
+    """Bin of every value"""
+    magnitudes = np.abs(values)
+    indexable = magnitudes >= MIN_INDEXABLE
+    keys = np.ceil(
+        np.log(np.clip(magnitudes, MIN_INDEXABLE, np.finfo(np.float64).max)) / _LOG_GAMMA
+    ).astype(np.int64)
+    return np.where(indexable, np.sign(values).astype(np.int64) * (keys - _MIN_KEY + 1), 0)
+
+
+def _reduce(keys: np.ndarray, counts: np.ndarray, sums: np.ndarray, squares: np.ndarray) -> Tuple[np.ndarray, ...]:
+    """Add up the counts, sums and squares of equal keys, keys coming out sorted"""
+    unique, inverse = np.unique(keys, return_inverse=True)
+    return (
+        unique,
+        np.bincount(inverse, weights=counts, minlength=len(unique)).astype(np.int64),
+        np.bincount(inverse, weights=sums, minlength=len(unique)),
+        np.bincount(inverse, weights=squares, minlength=len(unique)),
+    )
+
+
+def from_values(values: np.ndarray) -> Sketch:
+    """Sketch of some values"""
+    return Sketch(*_reduce(bin_values(values), np.ones(len(values), dtype=np.int64), values, values * values))
+
+
+def by_group(groups: np.ndarray, values: np.ndarray) -> Dict[int, Sketch]:
+    """Sketch the values of every group at once, groups being non-negative integers"""
+    if not len(values):
+        return {}
+    keys = groups.astype(np.int64) * _BIN_SPAN + (bin_values(values) + _BIN_SPAN // 2)
+    keys, counts, sums, squares = _reduce(keys, np.ones(len(values), dtype=np.int64), values, values * values)
+    key_groups, bins = np.divmod(keys, _BIN_SPAN)
+    starts = np.flatnonzero(np.concatenate(([True], key_groups[1:] != key_groups[:-1])))
+    ends = np.concatenate((starts[1:], [len(keys)]))
+    return {
+        int(key_groups[first]): Sketch(
+            bins[first:end] - _BIN_SPAN // 2, counts[first:end], sums[first:end], squares[first:end]
+        )
+        for first, end in zip(starts, ends)
+    }
+
+
+def merge(sketches: Sequence[Sketch]) -> Sketch:
+    """Merge sketches into the sketch of all their values"""
+    sketches = [sketch for sketch in sketches if len(sketch.bins)]
+    if not sketches:
+        return empty()
+    if len(sketches) == 1:
+        return sketches[0]
+    return Sketch(*_reduce(*(np.concatenate(columns) for columns in zip(*sketches))))
+
+
+def count(sketch: Sketch) -> int:
+    return int(sketch.counts.sum())
+
+
+def stddev(sketch: Sketch) -> Optional[float]:
+    """Sample standard deviation of the values"""
+    total_count = count(sketch)
+    if total_count < 2:
+        return None
+    total = float(sketch.sums.sum())
+    return math.sqrt(max(float(sketch.squares.sum()) - total * total / total_count, 0.0) / (total_count - 1))
+
+
+def quantiles(sketch: Sketch, fractions: Sequence[float]) -> List[Optional[float]]:
+    """
+    Estimate of the value at each fraction of the sorted values, the mean
+    value of the bin holding the rank fraction * (count - 1)
+    """
+    total_count = count(sketch)
+    if not total_count:
+        return [None for _ in fractions]
+    cumulative = np.cumsum(sketch.counts)
+    ranks = np.floor(np.asarray(fractions, dtype=np.float64) * (total_count - 1))
+    positions = np.searchsorted(cumulative, ranks, side="right")
+    return (sketch.sums[positions] / sketch.counts[positions]).tolist()
+
+
+def histogram(sketch: Sketch, minimum: float, maximum: float, bins: int) -> Tuple[List[float], List[int]]:
+    """
+    Counts of values in `bins` equal-width bins from minimum to maximum.
+    Each sketch bin is counted whole in the histogram bin holding its mean
+    value, so counts are approximate near the histogram bin edges.
+
+    Returns:
+        The bins + 1 edges and the counts of the bins
+    """
+    if maximum <= minimum:
+        return [minimum, maximum], [count(sketch)]
+    edges = np.linspace(minimum, maximum, bins + 1)
+    means = sketch.sums / np.maximum(sketch.counts, 1)
+    positions = np.clip(np.searchsorted(edges, means, side="right") - 1, 0, bins - 1)
+    counts = np.bincount(positions, weights=sketch.counts, minlength=bins).astype(np.int64)
+    return edges.tolist(), counts.tolist()
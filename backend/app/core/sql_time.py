@@ -0,0 +1,35 @@
+"""
+Dialect-specific SQL expressions over timestamp columns.
+
+Timestamps are stored as naive UTC, so seconds since the epoch order and
+bucket them the same way on every backend.
+"""
+from sqlalchemy import Integer, cast, func # type: ignore
+
+# Julian day of 1970-01-01T00:00:00
+_UNIX_EPOCH_JULIAN_DAY = 2440587.5
+
+
+def epoch_seconds(column, dialect_name: str):
+    """Seconds since the epoch of a timestamp column, as a float expression"""
+    if dialect_name == "postgresql":
+        return func.extract("epoch", column)
+    if dialect_name == "sqlite":
+        return (func.julianday(column) - _UNIX_EPOCH_JULIAN_DAY) * 86400.0
+    raise ValueError(f"Time bucketing is not supported on {dialect_name}")
+
+
+def bucket_index(column, dialect_name: str, origin_seconds: float, width_seconds: float):
+    """
+    Index of the `width_seconds` wide bucket, counted from `origin_seconds`,
+    a timestamp column falls into, as an integer expression
+    """
+    if dialect_name == "postgresql":
+        offset = (epoch_seconds(column, dialect_name) - origin_seconds) / width_seconds
+        # PostgreSQL rounds when casting to an integer
+        return cast(func.floor(offset), Integer)
+    # SQLite resolves times to the millisecond, half a millisecond more absorbs the
+    # float error of julianday() that would otherwise push boundary points a bucket back
+    offset = (epoch_seconds(column, dialect_name) - origin_seconds + 0.0005) / width_seconds
+    # SQLite truncates towards zero, the same as flooring for times after the origin
+    return cast(offset, Integer)
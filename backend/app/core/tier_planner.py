@@ -0,0 +1,97 @@
+"""
+Pick the storage tiers a range read is served from.
+
+Besides the raw points, every channel keeps rollups at a few fixed
+resolutions (tiers). A read that only needs a coarse resolution is served
+from the coarsest tier fine enough for it: the range is split into the
+part aligned on that tier's intervals, read from the tier, and the partial
+intervals at both ends, planned again with the finer tiers down to the raw
+points. A tier is only used from the first interval it holds on.
+"""
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional
+
+from app.core.time_buckets import floor_time
+
+# Tier of the raw points
+RAW_TIER = 0
+RAW_TIER_NAME = "raw"
+
+# Response header listing the tiers a read was served from
+SERVED_TIER_HEADER = "X-Served-Tier"
+
+
+class Segment(NamedTuple):
+    """[start, end) range served from one tier, a resolution in seconds or RAW_TIER"""
+    tier: int
+    start: datetime
+    end: datetime
+
+
+def _floor(time: datetime, seconds: int) -> datetime:
+    return floor_time(time, timedelta(seconds=seconds))
+
+
+def _ceil(time: datetime, seconds: int) -> datetime:
+    floor = _floor(time, seconds)
+    return floor if floor == time else floor + timedelta(seconds=seconds)
+
+
+def choose_tier(tiers: List[int], max_resolution: float, aligned_to: Optional[int] = None) -> int:
+    """
+    Coarsest tier at most `max_resolution` seconds wide, RAW_TIER if none is.
+    With `aligned_to`, only tiers whose intervals nest in intervals of that
+    many seconds qualify.
+    """
+    eligible = [
+        tier for tier in tiers
+        if tier <= max_resolution and (aligned_to is None or aligned_to % tier == 0)
+    ]
+    return max(eligible, default=RAW_TIER)
+
+
+def plan(start: datetime, end: datetime, tier: int, coverage: Dict[int, Optional[datetime]]) -> List[Segment]:
+    """
+    Split [start, end) into segments served from `tier` and the finer tiers.
+
+    Args:
+        start: Start of the range
+        end: End of the range, excluded
+        tier: Coarsest tier to serve from, as picked by choose_tier
+        coverage: Start of the first interval each tier holds, None for an empty tier
+
+    Returns:
+        Adjacent segments covering the range, in time order
+    """
+    finer = sorted((candidate for candidate in coverage if candidate < tier), reverse=True)
+    return [segment for segment in _split(start, end, [tier] + finer, coverage) if segment.start < segment.end]
+
+
+def _split(start: datetime, end: datetime, tiers: List[int], coverage: Dict[int, Optional[datetime]]) -> List[Segment]:
+    if start >= end:
+        return []
+    tiers = [tier for tier in tiers if tier != RAW_TIER]
+    if not tiers:
+        return [Segment(RAW_TIER, start, end)]
+
+    tier, finer = tiers[0], tiers[1:]
+    covered_from = coverage.get(tier)
+    if covered_from is None:
+        return _split(start, end, finer, coverage)
+
+    aligned_start = max(_ceil(start, tier), _ceil(covered_from, tier))
+    aligned_end = _floor(end, tier)
+    if aligned_start >= aligned_end:
+        return _split(start, end, finer, coverage)
+
+    return (
+        _split(start, aligned_start, finer, coverage)
+        + [Segment(tier, aligned_start, aligned_end)]
+        + _split(aligned_end, end, finer, coverage)
+    )
+
+
+def served_tiers(segments: List[Segment], names: Dict[int, str]) -> str:
+    """Comma-separated names of the tiers segments are served from, coarsest first"""
+    tiers = sorted({segment.tier for segment in segments}, reverse=True) or [RAW_TIER]
+    return ",".join(RAW_TIER_NAME if tier == RAW_TIER else names[tier] for tier in tiers)
@@ -0,0 +1,41 @@
+"""
+Fixed-width time intervals aligned on the Unix epoch.
+
+Bucket columns store naive UTC timestamps, so every helper takes aware
+times as UTC and works with naive ones.
+"""
+from datetime import datetime, timedelta, timezone
+
+EPOCH = datetime(1970, 1, 1)
+
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def to_naive_utc(time: datetime) -> datetime:
+    """Bucket columns are timezone-naive, store aware timestamps as UTC"""
+    if time.tzinfo is not None:
+        return time.astimezone(timezone.utc).replace(tzinfo=None)
+    return time
+
+
+def seconds_since_epoch(time: datetime) -> float:
+    return (to_naive_utc(time) - EPOCH).total_seconds()
+
+
+def microseconds_since_epoch(time: datetime) -> int:
+    return (to_naive_utc(time) - EPOCH) // _MICROSECOND
+
+
+def interval_index(time: datetime, interval_seconds: float) -> int:
+    """Index of the `interval_seconds` wide interval a time falls into, counted from the epoch"""
+    return int(seconds_since_epoch(time) // interval_seconds)
+
+
+def interval_start(index: int, interval_seconds: float) -> datetime:
+    """Start of the interval of an index, the inverse of `interval_index`"""
+    return EPOCH + timedelta(seconds=index * interval_seconds)
+
+
+def floor_time(time: datetime, step: timedelta) -> datetime:
+    """Start of the epoch-aligned `step` wide interval a time falls into"""
+    return EPOCH + ((to_naive_utc(time) - EPOCH) // step) * step
@@ -1,9 +1,36 @@
+from datetime import datetime, timedelta
 from fastapi import FastAPI # type: ignore
 from fastapi.middleware.cors import CORSMiddleware # type: ignore
 
 from app.core.config import settings
 from app.routes.api import api_router
-from app.core.database import create_tables, wait_for_db
+from app.core.database import SessionLocal, create_tables, engine, wait_for_db
+from app.core.jobs import job_manager
+from app.core.periodic import PeriodicTask
+from app.controllers.bucket_lifecycle_controller import BucketLifecycleController
+from app.controllers.retention_controller import RetentionController
+from app.models.bucket import (
+    STORAGE_PARTITIONED, bucket_registry, create_points_table, ensure_points_partitions, get_storage_backend,
+    relocate_default_points
+)
+from app.repositories.bucket_latest_values import bucket_latest_values
+from app.repositories.bucket_repository import BucketRepository
+from app.repositories.bucket_write_buffer import bucket_write_buffer
+
+# Rolls up and deletes data past its channel's retention policy
+retention_enforcer = PeriodicTask(
+    "retention-enforcer", settings.RETENTION_INTERVAL_MINUTES * 60, RetentionController.enforce_all
+)
+
+# Drops or archives bucket tables no channel maps to
+bucket_sweeper = PeriodicTask(
+    "bucket-sweeper", settings.BUCKET_SWEEP_INTERVAL_MINUTES * 60, BucketLifecycleController.sweep_orphaned_tables
+)
+
+# Picks up the latest values written by other workers
+latest_values_reloader = PeriodicTask(
+    "latest-values-reloader", settings.LATEST_VALUES_RELOAD_SECONDS, bucket_latest_values.load
+)
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -33,6 +60,60 @@ async def startup_event():
     print("Creating database tables...")
     create_tables()
     print("Database tables created successfully!")
+    
+    # Load every existing bucket table in one catalog pass
+    bucket_registry.load()
+    stats = bucket_registry.stats()
+    print(f"Loaded {stats['tables']} bucket tables in {stats['load_seconds'] * 1000:.1f} ms")
+    
+    # Prepare the shared points table, move rows out of its default partition
+    # and create the partitions of the coming months
+    if get_storage_backend() == STORAGE_PARTITIONED:
+        create_points_table(engine)
+        now = datetime.now()
+        with engine.begin() as connection:
+            relocated = relocate_default_points(connection)
+            if relocated:
+                print(f"Moved the default partition's rows to {len(relocated)} new monthly partitions")
+            ensure_points_partitions(
+                connection, now, now + timedelta(days=31 * settings.BUCKET_PARTITION_MONTHS_AHEAD)
+            )
+    
+    # Record the latest point of channels written before latest values were kept, then load them all
+    db = SessionLocal()
+    try:
+        backfilled = BucketRepository.backfill_latest_values(db)
+    finally:
+        db.close()
+    bucket_latest_values.load()
+    stats = bucket_latest_values.stats()
+    print(f"Loaded the latest values of {stats['channels']} channels ({backfilled} backfilled) in {stats['load_seconds'] * 1000:.1f} ms")
+    latest_values_reloader.start()
+    
+    # Start coalescing single-point writes
+    if settings.WRITE_BUFFER_ENABLED:
+        bucket_write_buffer.start()
+    
+    # Apply retention policies periodically
+    if settings.RETENTION_ENFORCER_ENABLED:
+        retention_enforcer.start()
+    
+    # Reclaim orphaned bucket tables periodically
+    if settings.BUCKET_SWEEPER_ENABLED:
+        bucket_sweeper.start()
+
+@app.on_event("shutdown")
+def shutdown_event():
+    # Wait for a running retention pass to finish
+    retention_enforcer.stop()
+    bucket_sweeper.stop()
+    latest_values_reloader.stop()
+    
+    # Write out buffered points
+    bucket_write_buffer.stop()
+    
+    # Stop background jobs after their current chunk
+    job_manager.shutdown()
 
 @app.get("/")
 def read_root():
@@ -1,55 +1,208 @@
-from sqlalchemy import Column, Integer, Float, DateTime, inspect # type: ignore
+import threading
+from time import perf_counter
 
+from sqlalchemy import (  # type: ignore
+    BigInteger, Column, DateTime, Float, Index, Integer, MetaData, Sequence, Table, inspect, select
+)
 
-from app.core.database import Base, engine
+from app.core.config import settings
+from app.core.database import engine
+from app.models.channel_data import ChannelData
+from app.models.well import Well
 
-# Store created bucket models to avoid recreation
-_bucket_models = {}
+# Storage backends for bucket data
+STORAGE_TABLES = "tables"  # One table per channel, see BucketRegistry
+STORAGE_PARTITIONED = "partitioned"  # One table for every channel, range-partitioned by time
+STORAGE_BACKENDS = (STORAGE_TABLES, STORAGE_PARTITIONED)
 
-def get_bucket_model(well_name, channel_name):
+# Bucket tables live in their own metadata: they are created one at a time
+# through the registry, never by `create_tables`
+bucket_metadata = MetaData()
+
+BUCKET_TABLE_PREFIX = "bucket_"
+
+def bucket_table_name(well_name, channel_name):
     """
-    Dynamically create or retrieve a bucket model for a specific well and channel
-    
-    Args:
-        well_name (str): Name of the well
-        channel_name (str): Name of the channel
-        
-    Returns:
-        SQLAlchemy model class for the bucket
+    Name of the bucket table of a well's channel
+
+    Invalid characters are replaced with underscores and everything is lowercased.
     """
-    # Create a valid table name from well_name and channel_name
-    # Replace invalid chars with underscores and lowercase everything
     def sanitize_name(name):
         return ''.join(c.lower() if c.isalnum() else '_' for c in name)
     
-    well_name_safe = sanitize_name(well_name)
-    channel_name_safe = sanitize_name(channel_name)
-    
-    table_name = f"bucket_{well_name_safe}_{channel_name_safe}"
-    
-    # Return existing model if already created
-    if table_name in _bucket_models:
-        return _bucket_models[table_name]
-    
-    # Create a new model
-    class Bucket(Base):
-        __tablename__ = table_name
+    return f"{BUCKET_TABLE_PREFIX}{sanitize_name(well_name)}_{sanitize_name(channel_name)}"
+
+def _bucket_table(table_name):
+    """Describe a bucket table, this doesn't touch the database"""
+    table = bucket_metadata.tables.get(table_name)
+    if table is not None:
+        return table
+    return Table(
+        table_name,
+        bucket_metadata,
+        Column("id", Integer, primary_key=True, index=True),
+        Column("time", DateTime, nullable=False, index=True, unique=True),
+        Column("value", Float, nullable=False),
+    )
+
+def _has_unique_time(indexes):
+    return any(index["column_names"] == ["time"] and index["unique"] for index in indexes)
+
+
+class BucketRegistry:
+    """
+    Process-wide registry of the existing bucket tables.
+
+    Every bucket table and its indexes are read in one bulk catalog pass,
+    on first use or explicitly at startup, then kept as plain `Table`
+    objects so lookups are a dict access. Tables created afterwards, by
+    this process or another one, are registered as they are first used.
+    All state is guarded by a lock since sync routes run on a threadpool;
+    creating a table holds a separate lock so lookups never wait on DDL.
+    """
+
+    def __init__(self, bind):
+        self._bind = bind
+        self._tables = {}
+        self._unique_time = set()
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._create_lock = threading.Lock()
+        self._load_seconds = None
+        self._loads = 0
+        self._hits = 0
+        self._misses = 0
+        self._created = 0
+
+    def load(self):
+        """Read every bucket table and its indexes from the catalog, replacing what is known"""
+        started = perf_counter()
+        inspector = inspect(self._bind)
+        names = [name for name in inspector.get_table_names() if name.startswith(BUCKET_TABLE_PREFIX)]
+        indexes = inspector.get_multi_indexes(filter_names=names) if names else {}
         
-        id = Column(Integer, primary_key=True, index=True)
-        time = Column(DateTime, nullable=False, index=True)
-        value = Column(Float, nullable=False)
+        tables = {}
+        unique_time = set()
+        with self._lock:
+            for name in names:
+                tables[name] = _bucket_table(name)
+                if _has_unique_time(indexes.get((None, name), [])):
+                    unique_time.add(name)
+            self._tables = tables
+            self._unique_time = unique_time
+            self._loaded = True
+            self._loads += 1
+            self._load_seconds = perf_counter() - started
+
+    def _lookup(self, table_name):
+        if not self._loaded:
+            self.load()
+        with self._lock:
+            table = self._tables.get(table_name)
+            if table is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+            return table
+
+    def _register(self, table_name, unique_time):
+        with self._lock:
+            table = self._tables.get(table_name)
+            if table is None:
+                table = self._tables[table_name] = _bucket_table(table_name)
+            if unique_time:
+                self._unique_time.add(table_name)
+            return table
+
+    def get(self, table_name):
+        """Get an existing bucket table, or None if it doesn't exist"""
+        table = self._lookup(table_name)
+        if table is not None:
+            return table
         
-        def __repr__(self):
-            return f"<Bucket {table_name} at {self.time}: {self.value}>"
-    
-    # Store the model for future use
-    _bucket_models[table_name] = Bucket
-    
-    # Create the table if it doesn't exist
-    if not inspect(engine).has_table(table_name):
-        Base.metadata.create_all(engine, tables=[Bucket.__table__])
+        # Created by another process since the registry was loaded
+        inspector = inspect(self._bind)
+        if not inspector.has_table(table_name):
+            return None
+        return self._register(table_name, _has_unique_time(inspector.get_indexes(table_name)))
+
+    def get_or_create(self, table_name):
+        """Get a bucket table, creating it if it doesn't exist"""
+        table = self._lookup(table_name)
+        if table is not None:
+            return table
+        
+        with self._create_lock:
+            with self._lock:
+                table = self._tables.get(table_name)
+            if table is not None:
+                return table
+            
+            inspector = inspect(self._bind)
+            if inspector.has_table(table_name):
+                return self._register(table_name, _has_unique_time(inspector.get_indexes(table_name)))
+            
+            with self._lock:
+                table = _bucket_table(table_name)
+            table.create(self._bind, checkfirst=True)
+            with self._lock:
+                self._created += 1
+            return self._register(table_name, True)
+
+    def discard(self, table_name):
+        """Forget a bucket table that was dropped or renamed"""
+        with self._lock:
+            table = self._tables.pop(table_name, None)
+            self._unique_time.discard(table_name)
+            if table is not None:
+                bucket_metadata.remove(table)
+
+    def table_names(self):
+        """Names of the known bucket tables"""
+        if not self._loaded:
+            self.load()
+        with self._lock:
+            return sorted(self._tables)
+
+    def has_unique_time(self, table_name):
+        if not self._loaded:
+            self.load()
+        with self._lock:
+            return table_name in self._unique_time
+
+    def mark_unique_time(self, table_name):
+        with self._lock:
+            self._unique_time.add(table_name)
+
+    def stats(self):
+        """Registry size, build time and lookup counters"""
+        with self._lock:
+            return {
+                "tables": len(self._tables),
+                "unique_time_tables": len(self._unique_time),
+                "loaded": self._loaded,
+                "loads": self._loads,
+                "load_seconds": self._load_seconds,
+                "hits": self._hits,
+                "misses": self._misses,
+                "created": self._created,
+            }
+
+
+bucket_registry = BucketRegistry(engine)
+
+def get_bucket_table(well_name, channel_name):
+    """
+    Get the bucket table of a specific well and channel, creating it if needed
     
-    return Bucket
+    Args:
+        well_name (str): Name of the well
+        channel_name (str): Name of the channel
+        
+    Returns:
+        SQLAlchemy Table of the bucket
+    """
+    return bucket_registry.get_or_create(bucket_table_name(well_name, channel_name))
 
 def get_all_bucket_tables():
     """
@@ -58,13 +211,11 @@ def get_all_bucket_tables():
     Returns:
         List of table names that start with 'bucket_'
     """
-    inspector = inspect(engine)
-    all_tables = inspector.get_table_names()
-    return [table for table in all_tables if table.startswith('bucket_')]
+    return bucket_registry.table_names()
 
-def get_bucket_model_by_names(well_name, channel_name):
+def get_bucket_table_by_names(well_name, channel_name):
     """
-    Get the bucket model for a specific well and channel,
+    Get the bucket table of a specific well and channel,
     but don't create it if it doesn't exist
     
     Args:
@@ -72,23 +223,248 @@ def get_bucket_model_by_names(well_name, channel_name):
         channel_name (str): Name of the channel
         
     Returns:
-        SQLAlchemy model class for the bucket or None if it doesn't exist
+        SQLAlchemy Table of the bucket or None if it doesn't exist
     """
-    def sanitize_name(name):
-        return ''.join(c.lower() if c.isalnum() else '_' for c in name)
+    return bucket_registry.get(bucket_table_name(well_name, channel_name))
+
+def discard_bucket_table(table_name):
+    """Forget a bucket table that was dropped or renamed"""
+    bucket_registry.discard(table_name)
+
+def has_unique_time_index(table_name):
+    """
+    Check whether a bucket table enforces one row per timestamp
+
+    Tables created before timestamps were unique only have a plain index on
+    `time` until they are migrated, see `BucketRepository.migrate_unique_time_index`.
     
-    well_name_safe = sanitize_name(well_name)
-    channel_name_safe = sanitize_name(channel_name)
+    Args:
+        table_name (str): Name of the bucket table
+        
+    Returns:
+        True if the table has a unique index on `time`
+    """
+    return bucket_registry.has_unique_time(table_name)
+
+def mark_unique_time_index(table_name):
+    """Record that a bucket table now has a unique index on `time`"""
+    bucket_registry.mark_unique_time(table_name)
+
+
+# The partitioned backend lives in its own metadata, so it is only created
+# when it is the configured backend, see `create_points_table`
+points_metadata = MetaData()
+
+POINTS_TABLE_NAME = "timeseries_points"
+
+points_id_seq = Sequence(f"{POINTS_TABLE_NAME}_id_seq", metadata=points_metadata)
+
+# Narrow table holding the points of every channel. The primary key keeps one
+# value per channel and timestamp and serves per-channel range scans; ids are
+# only unique through their sequence since PostgreSQL can't enforce unique
+# constraints across partitions without the partition key
+points_table = Table(
+    POINTS_TABLE_NAME,
+    points_metadata,
+    Column("channel_id", Integer, primary_key=True),
+    Column("time", DateTime, primary_key=True),
+    Column("id", BigInteger, points_id_seq, server_default=points_id_seq.next_value(), nullable=False),
+    Column("value", Float, nullable=False),
+    Index(f"ix_{POINTS_TABLE_NAME}_id", "id"),
+    postgresql_partition_by="RANGE (time)",
+)
+
+
+class BucketStore:
+    """
+    Where the points of one channel are stored: a table, plus the key
+    columns selecting the channel's rows when the table is shared.
+
+    Repositories build their statements from a store so that they work the
+    same on per-channel bucket tables and on the partitioned points table.
+    """
+
+    def __init__(self, table, channel_id, shared=False):
+        self.table = table
+        self.channel_id = channel_id
+        self.shared = shared
+
+    @property
+    def name(self):
+        """Name identifying the channel's rows in messages"""
+        if not self.shared:
+            return self.table.name
+        return f"{self.table.name} (channel {self.channel_id})"
+
+    @property
+    def key_values(self):
+        """Column values every row written to this store must carry"""
+        if not self.shared:
+            return {}
+        return {"channel_id": self.channel_id}
+
+    @property
+    def unique_time(self):
+        """Whether the store keeps a single value per timestamp"""
+        return self.shared or has_unique_time_index(self.table.name)
+
+    def criteria(self):
+        """WHERE clauses restricting the table to this channel's rows"""
+        if not self.shared:
+            return []
+        return [self.table.c.channel_id == self.channel_id]
+
+
+def get_storage_backend():
+    """Return the configured storage backend"""
+    backend = settings.BUCKET_STORAGE
+    if backend not in STORAGE_BACKENDS:
+        raise ValueError(f"Unknown bucket storage '{backend}', expected one of {STORAGE_BACKENDS}")
+    return backend
+
+def get_bucket_store(db, well_name, channel_name):
+    """
+    Get the store holding a channel's points for the configured backend
     
-    table_name = f"bucket_{well_name_safe}_{channel_name_safe}"
+    Args:
+        db: Database session, used to resolve the channel id
+        well_name (str): Name of the well
+        channel_name (str): Name of the channel
+        
+    Returns:
+        BucketStore for the channel
+    """
+    channel_id = db.execute(
+        select(ChannelData.id).join(Well).where(Well.name == well_name, ChannelData.name == channel_name)
+    ).scalar()
+    if channel_id is None:
+        raise ValueError(f"Channel with name '{channel_name}' not found for well '{well_name}'")
     
-    # Return existing model if already created
-    if table_name in _bucket_models:
-        return _bucket_models[table_name]
+    if get_storage_backend() == STORAGE_TABLES:
+        return BucketStore(get_bucket_table(well_name, channel_name), channel_id)
+    return BucketStore(points_table, channel_id, shared=True)
+
+def get_channel_store(channel):
+    """Get the store of a channel whose well is loaded, without a lookup"""
+    if get_storage_backend() == STORAGE_TABLES:
+        return BucketStore(get_bucket_table(channel.well.name, channel.name), channel.id)
+    return BucketStore(points_table, channel.id, shared=True)
+
+def create_points_table(bind):
+    """Create the partitioned points table and its default partition if they don't exist"""
+    if bind.dialect.name != "postgresql":
+        raise RuntimeError("The partitioned bucket storage requires PostgreSQL")
     
-    # Check if table exists in database
-    if not inspect(engine).has_table(table_name):
-        return None
+    points_metadata.create_all(bind)
+    with bind.begin() as connection:
+        # Rows outside every monthly partition land here rather than failing
+        connection.exec_driver_sql(
+            f"CREATE TABLE IF NOT EXISTS {POINTS_TABLE_NAME}_default "
+            f"PARTITION OF {POINTS_TABLE_NAME} DEFAULT"
+        )
+
+def points_partition_bounds(start, end):
+    """
+    List the monthly partitions covering a time range
+    
+    Returns:
+        (partition name, lower bound, upper bound) tuples, bounds being month starts
+    """
+    month = start.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    bounds = []
+    while month <= end:
+        next_month = month.replace(year=month.year + 1, month=1) if month.month == 12 else month.replace(month=month.month + 1)
+        bounds.append((f"{POINTS_TABLE_NAME}_{month:%Y_%m}", month, next_month))
+        month = next_month
+    return bounds
+
+# Monthly partitions known to exist, so writes into them skip the catalog
+_known_partitions = set()
+_known_partitions_lock = threading.Lock()
+
+def _move_default_rows(connection, name, lower, upper):
+    """
+    Give a month already holding rows in the default partition its own
+    partition: the rows move to a new table that is then attached, as
+    PostgreSQL refuses to create a partition whose rows sit in the default.
+    
+    Returns:
+        Whether the default partition held rows of the month
+    """
+    bounds = f"time >= '{lower.isoformat(sep=' ')}' AND time < '{upper.isoformat(sep=' ')}'"
+    has_rows = connection.exec_driver_sql(
+        f"SELECT EXISTS (SELECT 1 FROM {POINTS_TABLE_NAME}_default WHERE {bounds})"
+    ).scalar()
+    if not has_rows:
+        return False
+    
+    connection.exec_driver_sql(
+        f"CREATE TABLE {name} (LIKE {POINTS_TABLE_NAME} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+    )
+    connection.exec_driver_sql(
+        f"WITH moved AS (DELETE FROM {POINTS_TABLE_NAME}_default WHERE {bounds} RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved"
+    )
+    connection.exec_driver_sql(
+        f"ALTER TABLE {POINTS_TABLE_NAME} ATTACH PARTITION {name} "
+        f"FOR VALUES FROM ('{lower.isoformat(sep=' ')}') TO ('{upper.isoformat(sep=' ')}')"
+    )
+    return True
+
+def ensure_points_partitions(connection, start, end):
+    """
+    Create the monthly partitions of the points table covering a time range
+
+    Partitions are created ahead of the data at startup for the coming
+    months, and by every write for the months it writes into. A month whose
+    rows already sit in the default partition has them moved to its new
+    partition. The DDL runs in the connection's transaction, locking the
+    points table until it ends.
+    
+    Args:
+        connection: Connection or session to run the DDL on
+        start (datetime): Start of the range
+        end (datetime): End of the range
+        
+    Returns:
+        Names of the partitions that were created
+    """
+    bounds = points_partition_bounds(start, end)
+    with _known_partitions_lock:
+        bounds = [bound for bound in bounds if bound[0] not in _known_partitions]
+    if not bounds:
+        return []
     
-    # Create and return the model
-    return get_bucket_model(well_name, channel_name)
\ No newline at end of file
+    existing = set(inspect(connection).get_table_names())
+    created = []
+    for name, lower, upper in bounds:
+        if name in existing:
+            continue
+        if not _move_default_rows(connection, name, lower, upper):
+            connection.exec_driver_sql(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {POINTS_TABLE_NAME} "
+                f"FOR VALUES FROM ('{lower.isoformat(sep=' ')}') TO ('{upper.isoformat(sep=' ')}')"
+            )
+        created.append(name)
+    
+    # Partitions created here are only cached once a later lookup finds them committed
+    with _known_partitions_lock:
+        _known_partitions.update(name for name, _, _ in bounds if name in existing)
+    return created
+
+def relocate_default_points(connection):
+    """
+    Move every row of the default partition to the monthly partition of its
+    month, creating the partitions, such as rows written before writes
+    created their partitions
+    
+    Returns:
+        Names of the partitions that were created
+    """
+    months = connection.exec_driver_sql(
+        f"SELECT DISTINCT date_trunc('month', time) FROM {POINTS_TABLE_NAME}_default"
+    ).scalars().all()
+    created = []
+    for month in sorted(months):
+        created += ensure_points_partitions(connection, month, month)
+    return created
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, Float, DateTime, LargeBinary, Index # type: ignore
+
+from app.core.database import Base
+
+class BucketChunk(Base):
+    """
+    A closed time range of a channel's points, compressed into one blob.
+
+    The summary columns answer statistics over whole chunks without
+    decoding them.
+    """
+    __tablename__ = "timeseries_chunks"
+
+    id = Column(Integer, primary_key=True, index=True)
+    channel_id = Column(Integer, nullable=False)
+    time_from = Column(DateTime, nullable=False)  # First point in the chunk
+    time_to = Column(DateTime, nullable=False)    # Last point in the chunk
+    count = Column(Integer, nullable=False)
+    min_value = Column(Float, nullable=False)
+    max_value = Column(Float, nullable=False)
+    sum_value = Column(Float, nullable=False)
+    data = Column(LargeBinary, nullable=False)
+
+    __table_args__ = (
+        Index("ix_timeseries_chunks_channel_time", "channel_id", "time_from"),
+    )
+
+    def __repr__(self):
+        return f"<BucketChunk channel {self.channel_id} {self.time_from} - {self.time_to} ({self.count} points)>"
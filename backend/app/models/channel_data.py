@@ -3,6 +3,7 @@ from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, UniqueCons
 from sqlalchemy.orm import relationship # type: ignore
 
 from app.core.database import Base
+from app.models.retention_policy import RetentionPolicy
 
 class ChannelData(Base):
     __tablename__ = "channel_data"
@@ -18,6 +19,11 @@ class ChannelData(Base):
     # Define the relationship back to Well
     well = relationship("Well", back_populates="channels")
     
+    # Optional retention policy for the channel's data
+    retention_policy = relationship(
+        RetentionPolicy, back_populates="channel", uselist=False, cascade="all, delete-orphan"
+    )
+    
     # Ensure well_id + name combination is unique
     __table_args__ = (
         UniqueConstraint('well_id', 'name', name='uix_well_channel'),
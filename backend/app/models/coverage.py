@@ -0,0 +1,39 @@
+from datetime import date, datetime
+from sqlalchemy import Column, Integer, Float, DateTime, Index # type: ignore
+
+from app.core.database import Base
+
+class ChannelCoverage(Base):
+    """
+    Expected sampling interval of a channel whose coverage is indexed.
+
+    Only channels with a row here keep their runs up to date on ingest.
+    """
+    __tablename__ = "channel_coverage"
+
+    channel_id = Column(Integer, primary_key=True)
+    sampling_interval_seconds = Column(Float, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.today)
+    updated_at = Column(DateTime, nullable=False, default=datetime.today, onupdate=date.today)
+
+    def __repr__(self):
+        return f"<ChannelCoverage for Channel {self.channel_id} every {self.sampling_interval_seconds}s>"
+
+class CoverageRun(Base):
+    """
+    First and last point of a contiguous run of a channel's points, in which
+    no two consecutive points are further apart than the channel's maximum gap.
+    """
+    __tablename__ = "channel_coverage_runs"
+
+    channel_id = Column(Integer, primary_key=True)
+    start_time = Column(DateTime, primary_key=True)
+    end_time = Column(DateTime, nullable=False)
+
+    # Runs are disjoint, so those overlapping a range are found from either end
+    __table_args__ = (
+        Index("ix_channel_coverage_runs_end", "channel_id", "end_time"),
+    )
+
+    def __repr__(self):
+        return f"<CoverageRun for Channel {self.channel_id} from {self.start_time} to {self.end_time}>"
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, Float, DateTime # type: ignore
+
+from app.core.database import Base
+
+class ChannelLatestValue(Base):
+    """
+    The latest point of a channel, maintained by every write so the current
+    reading of a well needs no range read.
+    """
+    __tablename__ = "channel_latest_values"
+
+    channel_id = Column(Integer, primary_key=True)
+    time = Column(DateTime, nullable=False)
+    value = Column(Float, nullable=False)
+
+    def __repr__(self):
+        return f"<ChannelLatestValue channel {self.channel_id} at {self.time}>"
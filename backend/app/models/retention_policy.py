@@ -0,0 +1,28 @@
+from datetime import date, datetime
+from sqlalchemy import Column, Integer, ForeignKey, DateTime # type: ignore
+from sqlalchemy.orm import relationship # type: ignore
+
+from app.core.database import Base
+
+class RetentionPolicy(Base):
+    """
+    How long a channel keeps its raw points and each rollup resolution.
+
+    A number of days of None keeps that tier forever, 0 doesn't keep it at all.
+    """
+    __tablename__ = "channel_retention_policies"
+
+    channel_id = Column(Integer, ForeignKey("channel_data.id", ondelete="CASCADE"), primary_key=True)
+    raw_days = Column(Integer, nullable=True)
+    minute_days = Column(Integer, nullable=True)
+    hour_days = Column(Integer, nullable=True)
+    day_days = Column(Integer, nullable=True)
+    last_enforced_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.today)
+    updated_at = Column(DateTime, nullable=False, default=datetime.today, onupdate=date.today)
+
+    # Define the relationship back to ChannelData
+    channel = relationship("ChannelData", back_populates="retention_policy")
+
+    def __repr__(self):
+        return f"<RetentionPolicy for Channel {self.channel_id}>"
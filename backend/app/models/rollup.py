@@ -0,0 +1,54 @@
+from sqlalchemy import Column, Integer, Float, DateTime # type: ignore
+
+from app.core.database import Base
+
+# Rollup resolutions, in seconds, by name
+ROLLUP_RESOLUTIONS = {
+    "1m": 60,
+    "1h": 3600,
+    "1d": 86400,
+}
+
+class ChannelRollup(Base):
+    """
+    Aggregates of a channel's points over one fixed interval.
+
+    Every column is mergeable: rollups of adjacent intervals, or of finer
+    resolutions, combine into exact coarser ones.
+    """
+    __tablename__ = "channel_rollups"
+
+    channel_id = Column(Integer, primary_key=True)
+    resolution_seconds = Column(Integer, primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)
+    count = Column(Integer, nullable=False)
+    min_value = Column(Float, nullable=False)
+    max_value = Column(Float, nullable=False)
+    sum_value = Column(Float, nullable=False)
+    first_time = Column(DateTime, nullable=False)
+    first_value = Column(Float, nullable=False)
+    last_time = Column(DateTime, nullable=False)
+    last_value = Column(Float, nullable=False)
+
+    def __repr__(self):
+        return f"<ChannelRollup channel {self.channel_id} {self.resolution_seconds}s at {self.bucket_start}>"
+
+
+class ChannelRollupSketch(Base):
+    """
+    One bin of the sketch of a channel's values over one rollup interval
+    (see app.core.sketch). The columns add up, so the rows of a bin merge
+    across intervals and resolutions by summing.
+    """
+    __tablename__ = "channel_rollup_sketches"
+
+    channel_id = Column(Integer, primary_key=True)
+    resolution_seconds = Column(Integer, primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)
+    bin = Column(Integer, primary_key=True)
+    count = Column(Integer, nullable=False)
+    sum_value = Column(Float, nullable=False)
+    sum_squares = Column(Float, nullable=False)
+
+    def __repr__(self):
+        return f"<ChannelRollupSketch channel {self.channel_id} {self.resolution_seconds}s at {self.bucket_start} bin {self.bin}>"
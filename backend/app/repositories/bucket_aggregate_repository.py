@@ -0,0 +1,334 @@
+import math
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from datetime import datetime, timedelta
+import numpy as np # type: ignore
+from sqlalchemy import exists, func, select # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+
+from app.core.sql_time import bucket_index
+from app.core.time_buckets import interval_index, interval_start
+from app.core.tier_planner import RAW_TIER, choose_tier, plan, served_tiers
+from app.models.bucket import BucketStore, get_bucket_store
+from app.repositories.bucket_bulk_writer import to_naive_utc
+from app.repositories.bucket_chunk_repository import BucketChunkRepository
+from app.repositories.bucket_downsample_repository import BucketDownsampleRepository
+from app.repositories.bucket_repository import BucketRepository
+from app.repositories.rollup_repository import RESOLUTION_NAMES, RollupRepository
+
+AGGREGATES = ("min", "max", "avg", "count", "sum", "first", "last", "stddev")
+
+# Policies for intervals without any point
+FILL_NONE = "none"  # Leave them out
+FILL_NULL = "null"  # Return them with null aggregates
+FILL_ZERO = "zero"  # Return them with zero aggregates
+FILL_PREVIOUS = "previous"  # Repeat the aggregates of the previous interval with points
+FILL_LINEAR = "linear"  # Interpolate between the surrounding intervals with points
+FILL_POLICIES = (FILL_NONE, FILL_NULL, FILL_ZERO, FILL_PREVIOUS, FILL_LINEAR)
+
+INTERVAL_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+# Most intervals a single aggregation may span
+MAX_INTERVALS = 100000
+
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def parse_interval(interval: str) -> int:
+    """Length in seconds of an interval such as '1m', '15m', '1h' or '1d'"""
+    match = re.fullmatch(r"(\d+)([smhd])", interval.strip())
+    if not match or int(match.group(1)) == 0:
+        raise ValueError(f"Invalid interval '{interval}', expected a number followed by s, m, h or d")
+    return int(match.group(1)) * INTERVAL_UNITS[match.group(2)]
+
+
+def parse_aggregates(aggregates: str) -> List[str]:
+    """Validate a comma-separated list of aggregates, keeping their order"""
+    names = list(dict.fromkeys(name.strip().lower() for name in aggregates.split(",") if name.strip()))
+    unknown = [name for name in names if name not in AGGREGATES]
+    if unknown or not names:
+        raise ValueError(f"Unknown aggregates {unknown}, expected some of {AGGREGATES}")
+    return names
+
+
+class BucketAggregateRepository:
+    @staticmethod
+    def _stddev(count: int, total: float, squares: float) -> Optional[float]:
+        """Sample standard deviation from a count, a sum and a sum of squares"""
+        if count < 2:
+            return None
+        return math.sqrt(max(squares - total * total / count, 0.0) / (count - 1))
+
+    @staticmethod
+    def _select_intervals(
+        db: Session, store: BucketStore, start: datetime, end: datetime, interval: int, aggregates: Sequence[str]
+    ) -> Dict[int, Dict[str, Any]]:
+        """Aggregate the rows of every interval in one grouped query"""
+        bucket_table = store.table
+        dialect_name = db.get_bind().dialect.name
+        value = bucket_table.c.value
+        bucket = bucket_index(bucket_table.c.time, dialect_name, 0, interval)
+
+        columns = [
+            bucket.label("bucket"),
+            func.count().label("count"),
+            func.min(value).label("min"),
+            func.max(value).label("max"),
+            func.sum(value).label("sum"),
+            func.min(bucket_table.c.time).label("first_time"),
+            func.max(bucket_table.c.time).label("last_time"),
+        ]
+        if dialect_name == "postgresql":
+            columns.append(func.stddev_samp(value).label("stddev"))
+        else:
+            columns.append(func.sum(value * value).label("squares"))
+
+        grouped = (
+            select(*columns)
+            .where(*store.criteria(), bucket_table.c.time >= start, bucket_table.c.time <= end)
+            .group_by(bucket)
+            .subquery()
+        )
+
+        # The value at an interval's first and last timestamps, looked up through the time index
+        edges = []
+        for name, time_column, order in (
+            ("first", grouped.c.first_time, bucket_table.c.id),
+            ("last", grouped.c.last_time, bucket_table.c.id.desc()),
+        ):
+            if name in aggregates:
+                edges.append(
+                    select(value)
+                    .where(*store.criteria(), bucket_table.c.time == time_column)
+                    .order_by(order)
+                    .limit(1)
+                    .scalar_subquery()
+                    .label(name)
+                )
+
+        rows = db.execute(select(grouped, *edges).order_by(grouped.c.bucket)).mappings().all()
+
+        intervals = {}
+        for row in rows:
+            total = float(row["sum"])
+            if "squares" in row:
+                stddev = BucketAggregateRepository._stddev(row["count"], total, float(row["squares"]))
+            else:
+                stddev = float(row["stddev"]) if row["stddev"] is not None else None
+            intervals[row["bucket"]] = {
+                "count": row["count"],
+                "min": float(row["min"]),
+                "max": float(row["max"]),
+                "sum": total,
+                "avg": total / row["count"],
+                "first": row.get("first"),
+                "last": row.get("last"),
+                "first_time": row["first_time"],
+                "last_time": row["last_time"],
+                "stddev": stddev,
+            }
+        return intervals
+
+    @staticmethod
+    def _aggregate_points(
+        db: Session, store: BucketStore, start: datetime, end: datetime, interval: int
+    ) -> Dict[int, Dict[str, Any]]:
+        """Aggregate every interval with numpy over the rows and compressed points of the range"""
+        _, times, values = BucketDownsampleRepository._read_all(db, store, start, end)
+        if not len(times):
+            return {}
+
+        buckets = times.astype("datetime64[us]").astype(np.int64) // (interval * 1_000_000)
+        starts = np.flatnonzero(np.concatenate(([True], buckets[1:] != buckets[:-1])))
+        ends = np.concatenate((starts[1:], [len(times)])) - 1
+        counts = np.diff(np.concatenate((starts, [len(times)])))
+        first_times, last_times = times[starts].astype(object), times[ends].astype(object)
+        sums = np.add.reduceat(values, starts)
+        squares = np.add.reduceat(values * values, starts)
+        minimums = np.minimum.reduceat(values, starts)
+        maximums = np.maximum.reduceat(values, starts)
+
+        intervals = {}
+        for i, bucket in enumerate(buckets[starts].tolist()):
+            count, total = int(counts[i]), float(sums[i])
+            intervals[bucket] = {
+                "count": count,
+                "min": float(minimums[i]),
+                "max": float(maximums[i]),
+                "sum": total,
+                "avg": total / count,
+                "first": float(values[starts[i]]),
+                "last": float(values[ends[i]]),
+                "first_time": first_times[i],
+                "last_time": last_times[i],
+                "stddev": BucketAggregateRepository._stddev(count, total, float(squares[i])),
+            }
+        return intervals
+
+    @staticmethod
+    def _aggregate_raw(
+        db: Session, store: BucketStore, start: datetime, end: datetime, interval: int, aggregates: Sequence[str]
+    ) -> Dict[int, Dict[str, Any]]:
+        """Aggregate the raw points of [start, end], in SQL unless compressed chunks overlap the range"""
+        compressed = db.execute(
+            select(exists().where(*BucketChunkRepository._range_filter(store.channel_id, start, end)))
+        ).scalar()
+        if compressed:
+            return BucketAggregateRepository._aggregate_points(db, store, start, end, interval)
+        return BucketAggregateRepository._select_intervals(db, store, start, end, interval, aggregates)
+
+    @staticmethod
+    def _merge(intervals: Dict[int, Dict[str, Any]], later: Dict[int, Dict[str, Any]]):
+        """Merge the aggregates of a later segment into `intervals`, combining the intervals both hold"""
+        for bucket, aggregate in later.items():
+            earlier = intervals.get(bucket)
+            if earlier is None:
+                intervals[bucket] = aggregate
+                continue
+            count, total = earlier["count"] + aggregate["count"], earlier["sum"] + aggregate["sum"]
+            intervals[bucket] = {
+                "count": count,
+                "min": min(earlier["min"], aggregate["min"]),
+                "max": max(earlier["max"], aggregate["max"]),
+                "sum": total,
+                "avg": total / count,
+                "first": earlier["first"],
+                "last": aggregate["last"],
+                "first_time": earlier["first_time"],
+                "last_time": aggregate["last_time"],
+                # Only whole raw ranges, read in one segment, get a standard deviation
+                "stddev": None,
+            }
+
+    @staticmethod
+    def aggregate_intervals(
+        db: Session, store: BucketStore, start: datetime, end: datetime, interval: int, aggregates: Sequence[str]
+    ) -> Tuple[Dict[int, Dict[str, Any]], str]:
+        """
+        Aggregate the points of [start, end] per epoch-aligned interval of
+        `interval` seconds, from the rollup tiers and raw points planned for
+        the range.
+
+        Returns:
+            The aggregates of the intervals holding points, keyed by interval
+            index since the epoch, and the tiers that served them
+        """
+        coverage = {} if "stddev" in aggregates else RollupRepository.get_coverage(db, store.channel_id)
+        tier = choose_tier(list(coverage), interval, aligned_to=interval)
+        segments = plan(start, end + _MICROSECOND, tier, coverage)
+
+        intervals: Dict[int, Dict[str, Any]] = {}
+        for segment in segments:
+            if segment.tier == RAW_TIER:
+                part = BucketAggregateRepository._aggregate_raw(
+                    db, store, segment.start, segment.end - _MICROSECOND, interval, aggregates
+                )
+            else:
+                part = RollupRepository.select_intervals(
+                    db, store.channel_id, segment.tier, segment.start, segment.end, interval
+                )
+            BucketAggregateRepository._merge(intervals, part)
+        return intervals, served_tiers(segments, RESOLUTION_NAMES)
+
+    @staticmethod
+    def _fill(
+        intervals: Dict[int, Dict[str, Any]], first: int, last: int, aggregates: Sequence[str], fill: str
+    ) -> List[Dict[str, Any]]:
+        """Lay out the intervals from `first` to `last`, filling the empty ones by policy"""
+        if fill == FILL_NONE:
+            return [
+                {"bucket": bucket, **{name: intervals[bucket][name] for name in aggregates}}
+                for bucket in sorted(intervals)
+            ]
+
+        filled = []
+        known = sorted(intervals)
+        position = 0  # Index in `known` of the next interval with points
+        for bucket in range(first, last + 1):
+            while position < len(known) and known[position] < bucket:
+                position += 1
+            if position < len(known) and known[position] == bucket:
+                filled.append({"bucket": bucket, **{name: intervals[bucket][name] for name in aggregates}})
+                continue
+
+            previous = intervals[known[position - 1]] if position > 0 else None
+            following = intervals[known[position]] if position < len(known) else None
+            row = {"bucket": bucket}
+            for name in aggregates:
+                if name in ("count", "sum"):
+                    # No points is an exact count and sum
+                    row[name] = 0
+                elif fill == FILL_ZERO:
+                    row[name] = 0.0
+                elif fill == FILL_PREVIOUS and previous is not None:
+                    row[name] = previous[name]
+                elif (
+                    fill == FILL_LINEAR and previous is not None and following is not None
+                    and previous[name] is not None and following[name] is not None
+                ):
+                    span = known[position] - known[position - 1]
+                    weight = (bucket - known[position - 1]) / span
+                    row[name] = previous[name] + (following[name] - previous[name]) * weight
+                else:
+                    row[name] = None
+            filled.append(row)
+        return filled
+
+    @staticmethod
+    def get_aggregates(
+        db: Session,
+        well_name: str,
+        channel_name: str,
+        interval: str,
+        aggregates: Sequence[str],
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        fill: str = FILL_NONE
+    ) -> Tuple[List[Dict[str, Any]], str]:
+        """
+        Aggregate a channel's points per fixed interval.
+
+        Intervals are aligned on the epoch. When rollups are enabled, the
+        intervals are combined from the coarsest rollup resolution that nests
+        in them, the partial intervals at the ends of the range from finer
+        resolutions and the raw points (see tier_planner). stddev is not kept
+        in rollups and is always computed from the raw points. Raw rows are
+        aggregated in a single grouped query, the first and last values being
+        looked up by timestamp in correlated subqueries; ranges holding
+        compressed chunks are aggregated with numpy instead. A range left open
+        ends at the channel's first or last point.
+
+        Returns:
+            One dict per interval with its start `time` and the requested
+            aggregates, and the tiers that served them, such as "1h,1m,raw"
+        """
+        interval_seconds = parse_interval(interval)
+        if fill not in FILL_POLICIES:
+            raise ValueError(f"Unknown fill policy '{fill}', expected one of {FILL_POLICIES}")
+
+        store = get_bucket_store(db, well_name, channel_name)
+        # Intervals are counted from the naive UTC epoch, like the stored times
+        start_date = to_naive_utc(start_date) if start_date else None
+        end_date = to_naive_utc(end_date) if end_date else None
+        if start_date is None or end_date is None:
+            earliest, latest = BucketRepository.get_time_bounds(db, store)
+            start_date = start_date or earliest
+            end_date = end_date or latest
+        if start_date is None or end_date is None or start_date > end_date:
+            return [], served_tiers([], RESOLUTION_NAMES)
+
+        first = interval_index(start_date, interval_seconds)
+        last = interval_index(end_date, interval_seconds)
+        if last - first + 1 > MAX_INTERVALS:
+            raise ValueError(
+                f"The range spans {last - first + 1} intervals of {interval}, at most {MAX_INTERVALS} are allowed"
+            )
+
+        intervals, tiers = BucketAggregateRepository.aggregate_intervals(
+            db, store, start_date, end_date, interval_seconds, aggregates
+        )
+
+        rows = BucketAggregateRepository._fill(intervals, first, last, aggregates, fill)
+        for row in rows:
+            row["time"] = interval_start(row.pop("bucket"), interval_seconds)
+        return rows, tiers
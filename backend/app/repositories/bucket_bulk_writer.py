@@ -0,0 +1,315 @@
+import uuid
+from typing import Iterable, Iterator, List, Optional, Dict, Any, Tuple
+from datetime import datetime
+from sqlalchemy import Table, insert, text # type: ignore
+from sqlalchemy.dialects import postgresql, sqlite # type: ignore
+from sqlalchemy.exc import IntegrityError # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+
+from app.core.time_buckets import to_naive_utc
+
+
+class _CopyStream:
+    """
+    File-like object feeding `COPY ... FROM STDIN` from an iterator of points.
+
+    Rows are rendered lazily as the driver asks for more bytes, so the whole
+    batch is never materialized as text. The earliest and latest timestamps
+    are tracked on the way through, with the value at the latest one: its
+    first occurrence with `keep_first`, its last otherwise.
+    """
+
+    def __init__(self, points: Iterable[Tuple[datetime, float]], prefix: str = "", keep_first: bool = False):
+        self._points = iter(points)
+        self._prefix = prefix
+        self._keep_first = keep_first
+        self._buffer = b""
+        self.count = 0
+        self.earliest_time: Optional[datetime] = None
+        self.latest_time: Optional[datetime] = None
+        self.latest_value: Optional[float] = None
+
+    def _next_line(self) -> Optional[bytes]:
+        try:
+            time, value = next(self._points)
+        except StopIteration:
+            return None
+
+        time = to_naive_utc(time)
+        if self.earliest_time is None or time < self.earliest_time:
+            self.earliest_time = time
+        if self.latest_time is None or time > self.latest_time or (time == self.latest_time and not self._keep_first):
+            self.latest_time, self.latest_value = time, float(value)
+        self.count += 1
+
+        return f"{self._prefix}{time.isoformat(sep=' ')}\t{float(value)!r}\n".encode()
+
+    def read(self, size: int = -1) -> bytes:
+        while size < 0 or len(self._buffer) < size:
+            line = self._next_line()
+            if line is None:
+                break
+            self._buffer += line
+
+        if size < 0:
+            data, self._buffer = self._buffer, b""
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    def readline(self, size: int = -1) -> bytes:
+        return self._next_line() or b""
+
+
+# Conflict policies for points whose timestamp already exists in the bucket
+CONFLICT_KEEP_FIRST = "keep_first"  # Keep the stored value, skip the new point
+CONFLICT_OVERWRITE = "overwrite"    # Replace the stored value with the new point
+CONFLICT_ERROR = "error"            # Reject the write
+CONFLICT_POLICIES = (CONFLICT_KEEP_FIRST, CONFLICT_OVERWRITE, CONFLICT_ERROR)
+
+
+class BucketBulkWriter:
+    """
+    Bulk ingest engine for bucket tables.
+
+    On PostgreSQL the points are streamed into the table with `COPY`. Other
+    dialects, and callers that need the generated ids back, fall back to
+    multi-row `INSERT ... VALUES` statements sent in fixed-size batches.
+
+    With the `keep_first` and `overwrite` conflict policies the writes become
+    `INSERT ... ON CONFLICT (time)` upserts, which need the unique time index
+    of the bucket table. On PostgreSQL the points are then copied into a
+    staging table first and upserted with a single `INSERT ... SELECT`.
+
+    Tables shared by several channels take the channel's key columns as
+    `key_values`: they are written on every row and join `time` in the
+    conflict target.
+    """
+
+    # Number of rows per multi-row INSERT statement
+    INSERT_BATCH_SIZE = 1000
+
+    @staticmethod
+    def supports_copy(db: Session) -> bool:
+        """Whether the session's connection can stream rows with COPY"""
+        dialect = db.get_bind().dialect
+        return dialect.name == "postgresql" and dialect.driver == "psycopg2"
+
+    @staticmethod
+    def write(
+        db: Session,
+        table: Table,
+        points: Iterable[Tuple[datetime, float]],
+        return_ids: bool = False,
+        on_conflict: Optional[str] = None,
+        key_values: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Write (time, value) points into a bucket table without creating ORM objects.
+
+        The caller owns the transaction: nothing is committed here.
+
+        Args:
+            db: Database session
+            table: Bucket table to write into
+            points: Iterable of (time, value) tuples, consumed once
+            return_ids: Whether to return the written rows with their ids
+            on_conflict: One of `CONFLICT_POLICIES`, None for a plain insert
+            key_values: Constant column values identifying the channel in a shared table
+
+        Returns:
+            Dict with the number of points received and rows written, the
+            earliest and latest timestamps, the value written at the latest
+            one and, when requested, the written rows
+
+        Raises:
+            IntegrityError: If a timestamp already exists and the bucket
+                enforces unique timestamps, unless the policy resolves it
+        """
+        if on_conflict not in (None, *CONFLICT_POLICIES):
+            raise ValueError(f"Unknown conflict policy '{on_conflict}', expected one of {CONFLICT_POLICIES}")
+        upsert = on_conflict in (CONFLICT_KEEP_FIRST, CONFLICT_OVERWRITE)
+        key_values = key_values or {}
+
+        if not return_ids and BucketBulkWriter.supports_copy(db):
+            if upsert:
+                return BucketBulkWriter._write_copy_upsert(db, table, points, on_conflict, key_values)
+            return BucketBulkWriter._write_copy(db, table, points, key_values)
+        return BucketBulkWriter._write_insert(
+            db, table, points, return_ids, on_conflict if upsert else None, key_values
+        )
+
+    @staticmethod
+    def _copy_prefix(key_values: Dict[str, Any]) -> Tuple[str, str]:
+        """Column list and per-row text prefix for COPY with constant key columns"""
+        columns = ", ".join([*key_values, "time", "value"])
+        prefix = "".join(f"{value}\t" for value in key_values.values())
+        return columns, prefix
+
+    @staticmethod
+    def _copy(db: Session, table_name: str, stream: _CopyStream, columns: str = "time, value") -> None:
+        """Run COPY FROM STDIN, surfacing constraint violations as SQLAlchemy errors"""
+        dialect = db.get_bind().dialect
+        statement = f"COPY {table_name} ({columns}) FROM STDIN"
+        cursor = db.connection().connection.cursor()
+        try:
+            cursor.copy_expert(statement, stream)
+        except dialect.dbapi.IntegrityError as e:
+            raise IntegrityError(statement, None, e)
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def _write_copy(
+        db: Session, table: Table, points: Iterable[Tuple[datetime, float]], key_values: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Stream points into the table with PostgreSQL COPY"""
+        table_name = db.get_bind().dialect.identifier_preparer.format_table(table)
+        columns, prefix = BucketBulkWriter._copy_prefix(key_values)
+        stream = _CopyStream(points, prefix)
+        BucketBulkWriter._copy(db, table_name, stream, columns)
+
+        return {
+            "received": stream.count,
+            "count": stream.count,
+            "data_from": stream.earliest_time,
+            "data_to": stream.latest_time,
+            "latest_value": stream.latest_value,
+            "data_points": None
+        }
+
+    @staticmethod
+    def _write_copy_upsert(
+        db: Session,
+        table: Table,
+        points: Iterable[Tuple[datetime, float]],
+        on_conflict: str,
+        key_values: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """COPY points into a staging table, then upsert them with one INSERT ... SELECT"""
+        table_name = db.get_bind().dialect.identifier_preparer.format_table(table)
+        # The staging table disappears with the transaction if anything fails
+        staging_name = f"bucket_ingest_staging_{uuid.uuid4().hex[:12]}"
+        db.execute(text(
+            f"CREATE TEMPORARY TABLE {staging_name} "
+            "(seq BIGSERIAL, time TIMESTAMP NOT NULL, value DOUBLE PRECISION NOT NULL) ON COMMIT DROP"
+        ))
+        stream = _CopyStream(points, keep_first=on_conflict == CONFLICT_KEEP_FIRST)
+        BucketBulkWriter._copy(db, staging_name, stream)
+
+        # Only one row per timestamp may reach ON CONFLICT: keep the first
+        # or the last occurrence of the batch depending on the policy
+        if on_conflict == CONFLICT_OVERWRITE:
+            order, action = "seq DESC", "DO UPDATE SET value = EXCLUDED.value"
+        else:
+            order, action = "seq ASC", "DO NOTHING"
+        key_columns = "".join(f"{column}, " for column in key_values)
+        key_selects = "".join(f":{column}, " for column in key_values)
+        result = db.execute(text(
+            f"INSERT INTO {table_name} ({key_columns}time, value) "
+            f"SELECT DISTINCT ON (time) {key_selects}time, value FROM {staging_name} ORDER BY time, {order} "
+            f"ON CONFLICT ({key_columns}time) {action}"
+        ), key_values)
+        db.execute(text(f"DROP TABLE {staging_name}"))
+
+        return {
+            "received": stream.count,
+            "count": result.rowcount,
+            "data_from": stream.earliest_time,
+            "data_to": stream.latest_time,
+            "latest_value": stream.latest_value,
+            "data_points": None
+        }
+
+    @staticmethod
+    def _batches(
+        points: Iterable[Tuple[datetime, float]], size: int, key_values: Optional[Dict[str, Any]] = None
+    ) -> Iterator[List[Dict[str, Any]]]:
+        batch = []
+        for time, value in points:
+            batch.append({**(key_values or {}), "time": to_naive_utc(time), "value": value})
+            if len(batch) >= size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    @staticmethod
+    def _upsert_statement(
+        db: Session, table: Table, batch: List[Dict[str, Any]], on_conflict: str, key_values: Dict[str, Any]
+    ):
+        """Build a dialect specific INSERT ... ON CONFLICT (time) for one batch"""
+        # Only one row per timestamp may reach ON CONFLICT: later points
+        # replace earlier ones when overwriting, and are dropped otherwise
+        unique_points: Dict[datetime, Dict[str, Any]] = {}
+        for point in batch:
+            if on_conflict == CONFLICT_OVERWRITE or point["time"] not in unique_points:
+                unique_points[point["time"]] = point
+
+        dialect_name = db.get_bind().dialect.name
+        if dialect_name == "postgresql":
+            statement = postgresql.insert(table).values(list(unique_points.values()))
+        elif dialect_name == "sqlite":
+            statement = sqlite.insert(table).values(list(unique_points.values()))
+        else:
+            raise ValueError(f"Conflict policy '{on_conflict}' is not supported on {dialect_name}")
+
+        index_elements = [*(table.c[column] for column in key_values), table.c.time]
+        if on_conflict == CONFLICT_OVERWRITE:
+            return statement.on_conflict_do_update(
+                index_elements=index_elements, set_={"value": statement.excluded.value}
+            )
+        return statement.on_conflict_do_nothing(index_elements=index_elements)
+
+    @staticmethod
+    def _write_insert(
+        db: Session,
+        table: Table,
+        points: Iterable[Tuple[datetime, float]],
+        return_ids: bool,
+        on_conflict: Optional[str] = None,
+        key_values: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Write points with multi-row INSERT ... VALUES statements"""
+        received = 0
+        count = 0
+        earliest_time = None
+        latest_time = None
+        latest_value = None
+        rows = [] if return_ids else None
+
+        for batch in BucketBulkWriter._batches(points, BucketBulkWriter.INSERT_BATCH_SIZE, key_values):
+            if on_conflict:
+                statement = BucketBulkWriter._upsert_statement(db, table, batch, on_conflict, key_values or {})
+            else:
+                statement = insert(table).values(batch)
+
+            if return_ids:
+                statement = statement.returning(table.c.id, table.c.time, table.c.value)
+                result = db.execute(statement)
+                written = [{"id": row.id, "time": row.time, "value": row.value} for row in result]
+                rows.extend(written)
+                count += len(written)
+            else:
+                count += db.execute(statement).rowcount
+
+            batch_min = min(point["time"] for point in batch)
+            if earliest_time is None or batch_min < earliest_time:
+                earliest_time = batch_min
+            # The value at the latest timestamp: its first occurrence is the one kept by keep_first
+            for point in batch:
+                time = point["time"]
+                if latest_time is None or time > latest_time or (
+                    time == latest_time and on_conflict != CONFLICT_KEEP_FIRST
+                ):
+                    latest_time, latest_value = time, point["value"]
+            received += len(batch)
+
+        return {
+            "received": received,
+            "count": count,
+            "data_from": earliest_time,
+            "data_to": latest_time,
+            "latest_value": latest_value,
+            "data_points": rows
+        }
@@ -0,0 +1,397 @@
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from datetime import datetime, timedelta
+import numpy as np # type: ignore
+from sqlalchemy import delete, exists, func, insert, select # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+
+from app.core.compression import decode_chunk, encode_chunk
+from app.core.time_buckets import floor_time
+from app.models.bucket import BucketStore
+from app.models.bucket_chunk import BucketChunk
+from app.repositories.bucket_read_cache import bucket_read_cache
+
+# Id reported for points read from a compressed chunk, they have no row of their own
+NO_ROW_ID = -1
+
+
+class BucketChunkRepository:
+    @staticmethod
+    def _range_filter(channel_id: int, start_date: Optional[datetime], end_date: Optional[datetime]) -> List:
+        conditions = [BucketChunk.channel_id == channel_id]
+        if start_date:
+            conditions.append(BucketChunk.time_to >= start_date)
+        if end_date:
+            conditions.append(BucketChunk.time_from <= end_date)
+        return conditions
+
+    @staticmethod
+    def _slice(
+        times: np.ndarray, values: np.ndarray, start_date: Optional[datetime], end_date: Optional[datetime]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Keep the points of a decoded chunk that fall within a range"""
+        lower = 0 if start_date is None else np.searchsorted(times, np.datetime64(start_date, "us"), "left")
+        upper = len(times) if end_date is None else np.searchsorted(times, np.datetime64(end_date, "us"), "right")
+        return times[lower:upper], values[lower:upper]
+
+    @staticmethod
+    def read_columns(
+        db: Session,
+        channel_id: int,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        max_points: Optional[int] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Decode the compressed points of a channel within a range, in time order.
+
+        Chunks are decoded oldest first and only until `max_points` points
+        have been collected.
+        """
+        chunks = db.execute(
+            select(BucketChunk.id, BucketChunk.count, BucketChunk.time_from)
+            .where(*BucketChunkRepository._range_filter(channel_id, start_date, end_date))
+            .order_by(BucketChunk.time_from)
+        ).all()
+
+        # Chunks never overlap, so whole chunks can be counted before fetching any blob
+        needed = []
+        available = 0
+        for chunk in chunks:
+            if max_points is not None and available >= max_points:
+                break
+            needed.append(chunk.id)
+            # A chunk cut by the start of the range holds fewer points than its count
+            if start_date is None or chunk.time_from >= start_date:
+                available += chunk.count
+
+        times, values = [], []
+        if needed:
+            blobs = db.execute(
+                select(BucketChunk.data).where(BucketChunk.id.in_(needed)).order_by(BucketChunk.time_from)
+            ).scalars()
+            for blob in blobs:
+                chunk_times, chunk_values = BucketChunkRepository._slice(*decode_chunk(blob), start_date, end_date)
+                times.append(chunk_times)
+                values.append(chunk_values)
+
+        if not times:
+            return np.array([], dtype="datetime64[us]"), np.array([], dtype=np.float64)
+        times, values = np.concatenate(times), np.concatenate(values)
+        if max_points is not None:
+            times, values = times[:max_points], values[:max_points]
+        return times, values
+
+    @staticmethod
+    def merge(
+        ids: np.ndarray, times: np.ndarray, values: np.ndarray,
+        chunk_times: np.ndarray, chunk_values: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Merge sorted uncompressed rows with sorted compressed points.
+
+        A row written into an already compressed range takes precedence over
+        the compressed point at the same timestamp.
+        """
+        if not len(chunk_times):
+            return ids, times, values
+
+        all_times = np.concatenate((times.astype("datetime64[us]"), chunk_times))
+        all_ids = np.concatenate((ids, np.full(len(chunk_times), NO_ROW_ID, dtype=np.int64)))
+        all_values = np.concatenate((values, chunk_values))
+        # Rows sort before compressed points with the same timestamp
+        is_chunk = np.concatenate((np.zeros(len(times), dtype=bool), np.ones(len(chunk_times), dtype=bool)))
+        order = np.lexsort((is_chunk, all_times))
+        all_times = all_times[order]
+
+        keep = np.ones(len(all_times), dtype=bool)
+        keep[1:] = all_times[1:] != all_times[:-1]
+        return all_ids[order][keep], all_times[keep], all_values[order][keep]
+
+    @staticmethod
+    def iter_columns(
+        db: Session, channel_id: int, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None
+    ) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """Decode the compressed points of a channel within a range one chunk at a time, in time order"""
+        chunk_ids = db.execute(
+            select(BucketChunk.id)
+            .where(*BucketChunkRepository._range_filter(channel_id, start_date, end_date))
+            .order_by(BucketChunk.time_from)
+        ).scalars().all()
+        for chunk_id in chunk_ids:
+            blob = db.execute(select(BucketChunk.data).where(BucketChunk.id == chunk_id)).scalar()
+            times, values = BucketChunkRepository._slice(*decode_chunk(blob), start_date, end_date)
+            if len(times):
+                yield times, values
+
+    @staticmethod
+    def merge_stream(
+        blocks: Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]],
+        chunks: Iterator[Tuple[np.ndarray, np.ndarray]]
+    ) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        Merge a stream of sorted (ids, times, values) row blocks with a stream
+        of sorted compressed chunks, like `merge`.
+
+        Rows before a chunk pass straight through, so only one chunk and the
+        rows written within its time span are held at once.
+        """
+        empty = (np.array([], dtype=np.int64), np.array([], dtype="datetime64[us]"), np.array([], dtype=np.float64))
+        pending = empty
+        for chunk_times, chunk_values in chunks:
+            parts = []
+            while True:
+                if not len(pending[1]):
+                    pending = next(blocks, None)
+                    if pending is None:
+                        pending = empty
+                        break
+                if pending[1][-1] < chunk_times[0]:
+                    yield pending
+                    pending = empty
+                    continue
+                parts.append(pending)
+                pending = empty
+                if parts[-1][1][-1] > chunk_times[-1]:
+                    break
+
+            ids, times, values = (np.concatenate(column) for column in zip(empty, *parts))
+            split = np.searchsorted(times, chunk_times[-1], "right")
+            pending = (ids[split:], times[split:], values[split:])
+            yield BucketChunkRepository.merge(ids[:split], times[:split], values[:split], chunk_times, chunk_values)
+
+        if len(pending[1]):
+            yield pending
+        yield from blocks
+
+    @staticmethod
+    def get_statistics(
+        db: Session,
+        store: BucketStore,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        """
+        Get min, max, sum and count over the compressed points of a channel.
+
+        Chunks lying entirely within the range are summarized from their
+        metadata. Chunks cut by the range, or holding timestamps that were
+        written again as rows, are decoded.
+        """
+        bucket_table = store.table
+        overwritten = exists().where(
+            *store.criteria(),
+            bucket_table.c.time >= BucketChunk.time_from,
+            bucket_table.c.time <= BucketChunk.time_to
+        )
+        chunks = db.execute(
+            select(
+                BucketChunk.id, BucketChunk.time_from, BucketChunk.time_to, BucketChunk.count,
+                BucketChunk.min_value, BucketChunk.max_value, BucketChunk.sum_value,
+                overwritten.label("overwritten")
+            )
+            .where(*BucketChunkRepository._range_filter(store.channel_id, start_date, end_date))
+        ).all()
+
+        stats = {"min": None, "max": None, "sum": 0.0, "count": 0}
+
+        def add(minimum, maximum, total, count):
+            if not count:
+                return
+            stats["min"] = minimum if stats["min"] is None else min(stats["min"], minimum)
+            stats["max"] = maximum if stats["max"] is None else max(stats["max"], maximum)
+            stats["sum"] += total
+            stats["count"] += count
+
+        for chunk in chunks:
+            inside = (
+                (start_date is None or chunk.time_from >= start_date)
+                and (end_date is None or chunk.time_to <= end_date)
+            )
+            if inside and not chunk.overwritten:
+                add(chunk.min_value, chunk.max_value, chunk.sum_value, chunk.count)
+                continue
+
+            blob = db.execute(select(BucketChunk.data).where(BucketChunk.id == chunk.id)).scalar()
+            times, values = BucketChunkRepository._slice(*decode_chunk(blob), start_date, end_date)
+            if chunk.overwritten and len(times):
+                rows = db.execute(
+                    select(bucket_table.c.time).where(
+                        *store.criteria(),
+                        bucket_table.c.time >= chunk.time_from,
+                        bucket_table.c.time <= chunk.time_to
+                    )
+                ).scalars().all()
+                keep = ~np.isin(times, np.array(rows, dtype="datetime64[us]"))
+                values = values[keep]
+            if len(values):
+                add(float(values.min()), float(values.max()), float(values.sum()), len(values))
+
+        return stats
+
+    @staticmethod
+    def count_points(db: Session, channel_id: int) -> int:
+        """Number of points held in a channel's compressed chunks"""
+        return db.execute(
+            select(func.coalesce(func.sum(BucketChunk.count), 0)).where(BucketChunk.channel_id == channel_id)
+        ).scalar()
+
+    @staticmethod
+    def get_time_bounds(db: Session, channel_id: int) -> Tuple[Optional[datetime], Optional[datetime]]:
+        """Earliest and latest compressed point of a channel"""
+        bounds = db.execute(
+            select(func.min(BucketChunk.time_from), func.max(BucketChunk.time_to))
+            .where(BucketChunk.channel_id == channel_id)
+        ).first()
+        return bounds[0], bounds[1]
+
+    @staticmethod
+    def delete_chunks(db: Session, channel_id: int) -> int:
+        """Delete every compressed chunk of a channel, without committing"""
+        result = db.execute(delete(BucketChunk).where(BucketChunk.channel_id == channel_id))
+        return result.rowcount
+
+    @staticmethod
+    def delete_before(db: Session, channel_id: int, cutoff: datetime) -> int:
+        """
+        Delete a channel's compressed points older than a cutoff, without committing.
+
+        A chunk straddling the cutoff is re-encoded with its remaining points.
+
+        Returns:
+            Number of compressed points deleted
+        """
+        before = (BucketChunk.channel_id == channel_id, BucketChunk.time_from < cutoff)
+        deleted = db.execute(
+            select(func.coalesce(func.sum(BucketChunk.count), 0)).where(*before, BucketChunk.time_to < cutoff)
+        ).scalar()
+        db.execute(delete(BucketChunk).where(*before, BucketChunk.time_to < cutoff))
+
+        straddling = db.execute(
+            select(BucketChunk.id, BucketChunk.count, BucketChunk.data).where(*before, BucketChunk.time_to >= cutoff)
+        ).all()
+        for chunk in straddling:
+            times, values = BucketChunkRepository._slice(*decode_chunk(chunk.data), cutoff, None)
+            db.execute(delete(BucketChunk).where(BucketChunk.id == chunk.id))
+            db.execute(insert(BucketChunk), [BucketChunkRepository._chunk_row(channel_id, times, values)])
+            deleted += chunk.count - len(times)
+
+        return deleted
+
+    @staticmethod
+    def delete_at(db: Session, channel_id: int, time: datetime) -> int:
+        """
+        Delete a channel's compressed point at a timestamp, without committing.
+
+        The chunk holding it is re-encoded with its remaining points, or
+        deleted if it held no other.
+
+        Returns:
+            Number of compressed points deleted
+        """
+        chunks = db.execute(
+            select(BucketChunk.id, BucketChunk.data).where(
+                BucketChunk.channel_id == channel_id, BucketChunk.time_from <= time, BucketChunk.time_to >= time
+            )
+        ).all()
+        deleted = 0
+        target = np.datetime64(time, "us")
+        for chunk in chunks:
+            times, values = decode_chunk(chunk.data)
+            keep = times != target
+            if keep.all():
+                continue
+            deleted += int((~keep).sum())
+            db.execute(delete(BucketChunk).where(BucketChunk.id == chunk.id))
+            if keep.any():
+                remaining = BucketChunkRepository._chunk_row(channel_id, times[keep], values[keep])
+                db.execute(insert(BucketChunk), [remaining])
+        return deleted
+
+    @staticmethod
+    def _chunk_row(channel_id: int, times: np.ndarray, values: np.ndarray) -> Dict[str, Any]:
+        return {
+            "channel_id": channel_id,
+            "time_from": times[0].astype(datetime),
+            "time_to": times[-1].astype(datetime),
+            "count": len(times),
+            "min_value": float(values.min()),
+            "max_value": float(values.max()),
+            "sum_value": float(values.sum()),
+            "data": encode_chunk(times, values),
+        }
+
+    @staticmethod
+    def _window_start(time: datetime, span: timedelta) -> datetime:
+        return floor_time(time, span)
+
+    @staticmethod
+    def compress(db: Session, store: BucketStore, before: datetime, span: timedelta) -> Dict[str, Any]:
+        """
+        Move a channel's rows older than `before` into compressed chunks.
+
+        Rows are packed one `span` long window at a time, windows being
+        aligned on the epoch and `before` rounded down to a window boundary,
+        so only whole windows are closed. Rows written into a window that
+        was already compressed are merged into its chunk. Every window is
+        committed on its own.
+
+        Compressed points lose their row id, so they can no longer be
+        deleted by id; `BucketRepository.delete_data_point_at` deletes them
+        by timestamp.
+
+        Returns:
+            Dict with the number of windows compressed and rows moved
+        """
+        bucket_table = store.table
+        cutoff = BucketChunkRepository._window_start(before, span)
+        windows = 0
+        rows_moved = 0
+
+        while True:
+            first = db.execute(
+                select(func.min(bucket_table.c.time)).where(*store.criteria(), bucket_table.c.time < cutoff)
+            ).scalar()
+            if first is None:
+                break
+
+            window_start = BucketChunkRepository._window_start(first, span)
+            window_end = window_start + span
+            in_window = (bucket_table.c.time >= window_start, bucket_table.c.time < window_end)
+
+            rows = db.execute(
+                select(bucket_table.c.time, bucket_table.c.value)
+                .where(*store.criteria(), *in_window)
+                .order_by(bucket_table.c.time)
+            ).all()
+            times = np.array([row.time for row in rows], dtype="datetime64[us]")
+            values = np.array([row.value for row in rows], dtype=np.float64)
+
+            # Fold in the chunks already covering this window
+            existing = db.execute(
+                select(BucketChunk.id, BucketChunk.data)
+                .where(
+                    BucketChunk.channel_id == store.channel_id,
+                    BucketChunk.time_to >= window_start,
+                    BucketChunk.time_from < window_end
+                )
+                .order_by(BucketChunk.time_from)
+            ).all()
+            if existing:
+                decoded = [decode_chunk(chunk.data) for chunk in existing]
+                _, times, values = BucketChunkRepository.merge(
+                    np.zeros(len(times), dtype=np.int64), times, values,
+                    np.concatenate([chunk_times for chunk_times, _ in decoded]),
+                    np.concatenate([chunk_values for _, chunk_values in decoded])
+                )
+                db.execute(delete(BucketChunk).where(BucketChunk.id.in_([chunk.id for chunk in existing])))
+
+            db.execute(insert(BucketChunk), [BucketChunkRepository._chunk_row(store.channel_id, times, values)])
+            db.execute(delete(bucket_table).where(*store.criteria(), *in_window))
+            # Compressed points read back without their row ids
+            bucket_read_cache.invalidate(db, store.channel_id, window_start, window_end)
+            db.commit()
+
+            windows += 1
+            rows_moved += len(rows)
+
+        return {"windows": windows, "rows": rows_moved}
@@ -0,0 +1,310 @@
+import math
+from typing import List, Optional, Tuple
+from datetime import datetime, timedelta
+import numpy as np # type: ignore
+from sqlalchemy import case, exists, func, or_, select # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+
+from app.core import downsampling
+from app.core.sql_time import bucket_index, epoch_seconds
+from app.core.time_buckets import microseconds_since_epoch, seconds_since_epoch, to_naive_utc
+from app.core.tier_planner import RAW_TIER, Segment, choose_tier, plan, served_tiers
+from app.models.bucket import BucketStore, get_bucket_store
+from app.models.rollup import ChannelRollup
+from app.repositories.bucket_chunk_repository import BucketChunkRepository, NO_ROW_ID
+from app.repositories.bucket_repository import BucketRepository
+from app.repositories.rollup_repository import RESOLUTION_NAMES, RollupRepository
+
+_MICROSECOND = timedelta(microseconds=1)
+
+Columns = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+class BucketDownsampleRepository:
+    # LTTB picks its points among the first, last, lowest and highest points
+    # of this many finer time buckets per point it returns
+    LTTB_CANDIDATES_PER_POINT = 4
+
+    @staticmethod
+    def _bucket_index(db: Session, column, start: datetime, end: datetime, buckets: int):
+        """SQL expression of the equal-width time bucket of [start, end] a row's `column` falls into"""
+        width = max((end - start).total_seconds(), 1e-6) / buckets
+        index = bucket_index(column, db.get_bind().dialect.name, seconds_since_epoch(start), width)
+        return case((index >= buckets, buckets - 1), else_=index)
+
+    @staticmethod
+    def _in_range(store: BucketStore, start: datetime, end: datetime):
+        return (*store.criteria(), store.table.c.time >= start, store.table.c.time <= end)
+
+    @staticmethod
+    def _select_extremes(
+        db: Session, store: BucketStore, start: datetime, end: datetime, buckets: int, with_edges: bool
+    ) -> Columns:
+        """
+        Select the lowest and highest row of each time bucket, plus its first
+        and last row when `with_edges` is set, ranking rows with window functions
+        """
+        bucket_table = store.table
+        bucket = BucketDownsampleRepository._bucket_index(db, bucket_table.c.time, start, end, buckets)
+        rank = lambda *order_by: func.row_number().over(partition_by=bucket, order_by=order_by)
+        ranks = [
+            rank(bucket_table.c.value, bucket_table.c.time),
+            rank(bucket_table.c.value.desc(), bucket_table.c.time),
+        ]
+        if with_edges:
+            ranks += [rank(bucket_table.c.time), rank(bucket_table.c.time.desc())]
+
+        ranked = (
+            select(
+                bucket_table.c.id, bucket_table.c.time, bucket_table.c.value,
+                *[rank_column.label(f"rank_{i}") for i, rank_column in enumerate(ranks)]
+            )
+            .where(*BucketDownsampleRepository._in_range(store, start, end))
+            .subquery()
+        )
+        rows = db.execute(
+            select(ranked.c.id, ranked.c.time, ranked.c.value)
+            .where(or_(*[ranked.c[f"rank_{i}"] == 1 for i in range(len(ranks))]))
+            .order_by(ranked.c.time)
+        ).all()
+        return BucketRepository._rows_to_columns(rows)
+
+    @staticmethod
+    def _select_means(
+        db: Session, store: BucketStore, start: datetime, end: datetime, buckets: int
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Select the mean time, mean value and point count of each time bucket in one grouped query"""
+        bucket_table = store.table
+        bucket = BucketDownsampleRepository._bucket_index(db, bucket_table.c.time, start, end, buckets)
+        seconds = epoch_seconds(bucket_table.c.time, db.get_bind().dialect.name)
+        rows = db.execute(
+            select(func.avg(seconds), func.avg(bucket_table.c.value), func.count())
+            .where(*BucketDownsampleRepository._in_range(store, start, end))
+            .group_by(bucket)
+            .order_by(bucket)
+        ).all()
+
+        mean_us = np.array([round(float(row[0]) * 1_000_000) for row in rows], dtype=np.int64)
+        return (
+            mean_us.astype("datetime64[us]"),
+            np.array([float(row[1]) for row in rows], dtype=np.float64),
+            np.array([row[2] for row in rows], dtype=np.int64),
+        )
+
+    @staticmethod
+    def _select_averages(db: Session, store: BucketStore, start: datetime, end: datetime, buckets: int) -> Columns:
+        """Select the mean time and value of each time bucket in one grouped query"""
+        times, values, _ = BucketDownsampleRepository._select_means(db, store, start, end, buckets)
+        return np.full(len(times), NO_ROW_ID, dtype=np.int64), times, values
+
+    @staticmethod
+    def _read_all(db: Session, store: BucketStore, start: datetime, end: datetime) -> Columns:
+        """Read every point of the range, rows and compressed points merged"""
+        rows = BucketRepository._select_rows(db, store, start, end, 0, None)
+        chunk_times, chunk_values = BucketChunkRepository.read_columns(db, store.channel_id, start, end)
+        return BucketChunkRepository.merge(*BucketRepository._rows_to_columns(rows), chunk_times, chunk_values)
+
+    @staticmethod
+    def _select_rollup_means(
+        db: Session, store: BucketStore, segment: Segment, buckets: int
+    ) -> Tuple[Columns, np.ndarray]:
+        """
+        Select the mean time and value of each time bucket of a segment's
+        rollups in one grouped query, weighted by their point counts
+        """
+        rollup_table = ChannelRollup.__table__
+        bucket = BucketDownsampleRepository._bucket_index(
+            db, rollup_table.c.bucket_start, segment.start, segment.end, buckets
+        )
+        seconds = epoch_seconds(rollup_table.c.bucket_start, db.get_bind().dialect.name)
+        rows = db.execute(
+            select(func.avg(seconds), func.sum(rollup_table.c.count), func.sum(rollup_table.c.sum_value))
+            .where(*RollupRepository._in_range(store.channel_id, segment.tier, segment.start, segment.end))
+            .group_by(bucket)
+            .order_by(bucket)
+        ).all()
+
+        # Each rollup stands at the middle of its interval
+        mean_us = np.array([round((float(row[0]) + segment.tier / 2) * 1_000_000) for row in rows], dtype=np.int64)
+        counts = np.array([row[1] for row in rows], dtype=np.int64)
+        return (
+            (
+                np.full(len(rows), NO_ROW_ID, dtype=np.int64),
+                mean_us.astype("datetime64[us]"),
+                np.array([float(row[2]) for row in rows], dtype=np.float64) / np.maximum(counts, 1),
+            ),
+            counts,
+        )
+
+    @staticmethod
+    def _select_rollup_extremes(db: Session, store: BucketStore, segment: Segment, buckets: int) -> Columns:
+        """
+        Select the rollups holding the first, last, lowest and highest point of
+        each time bucket of a segment, ranking them with window functions. Each
+        one gives its first and last points, and its lowest and highest values
+        placed halfway between them.
+        """
+        rollup_table = ChannelRollup.__table__
+        bucket = BucketDownsampleRepository._bucket_index(
+            db, rollup_table.c.bucket_start, segment.start, segment.end, buckets
+        )
+        rank = lambda *order_by: func.row_number().over(partition_by=bucket, order_by=order_by)
+        ranks = [
+            rank(rollup_table.c.min_value, rollup_table.c.bucket_start),
+            rank(rollup_table.c.max_value.desc(), rollup_table.c.bucket_start),
+            rank(rollup_table.c.bucket_start),
+            rank(rollup_table.c.bucket_start.desc()),
+        ]
+        names = ("first_time", "last_time", "first_value", "min_value", "max_value", "last_value")
+
+        ranked = (
+            select(
+                rollup_table.c.bucket_start, *[rollup_table.c[name] for name in names],
+                *[rank_column.label(f"rank_{i}") for i, rank_column in enumerate(ranks)]
+            )
+            .where(*RollupRepository._in_range(store.channel_id, segment.tier, segment.start, segment.end))
+            .subquery()
+        )
+        rows = db.execute(
+            select(*[ranked.c[name] for name in names])
+            .where(or_(*[ranked.c[f"rank_{i}"] == 1 for i in range(len(ranks))]))
+            .order_by(ranked.c.bucket_start)
+        ).all()
+        if not rows:
+            return BucketRepository._rows_to_columns([])
+
+        first_times, last_times, *values = zip(*rows)
+        first_times = np.array(first_times, dtype="datetime64[us]")
+        last_times = np.array(last_times, dtype="datetime64[us]")
+        middles = first_times + (last_times - first_times) // 2
+        times = np.stack((first_times, middles, middles, last_times), axis=1).ravel()
+        values = np.stack([np.array(column, dtype=np.float64) for column in values], axis=1).ravel()
+        return np.full(len(times), NO_ROW_ID, dtype=np.int64), times, values
+
+    @staticmethod
+    def _read_candidates(
+        db: Session, store: BucketStore, segments: List[Segment], candidates: int, method: str
+    ) -> Tuple[Columns, np.ndarray]:
+        """
+        Candidate points of every segment, with their weights. Each segment
+        gets its share of `candidates` time buckets, reduced in SQL the same
+        way over its rollups or raw rows.
+        """
+        span = segments[-1].end - segments[0].start
+        parts = []
+        for segment in segments:
+            start, end = segment.start, segment.end - _MICROSECOND
+            buckets = max(math.ceil(candidates * ((segment.end - segment.start) / span)), 1)
+            if segment.tier != RAW_TIER and method == downsampling.METHOD_AVG:
+                parts.append(BucketDownsampleRepository._select_rollup_means(db, store, segment, buckets))
+                continue
+            if segment.tier != RAW_TIER:
+                columns = BucketDownsampleRepository._select_rollup_extremes(db, store, segment, buckets)
+                parts.append((columns, np.ones(len(columns[0]), dtype=np.int64)))
+                continue
+
+            compressed = db.execute(
+                select(exists().where(*BucketChunkRepository._range_filter(store.channel_id, start, end)))
+            ).scalar()
+            if compressed:
+                columns = BucketDownsampleRepository._read_all(db, store, start, end)
+                parts.append((columns, np.ones(len(columns[0]), dtype=np.int64)))
+            elif method == downsampling.METHOD_AVG:
+                times, values, counts = BucketDownsampleRepository._select_means(db, store, start, end, buckets)
+                parts.append(((np.full(len(times), NO_ROW_ID, dtype=np.int64), times, values), counts))
+            else:
+                columns = BucketDownsampleRepository._select_extremes(db, store, start, end, buckets, True)
+                parts.append((columns, np.ones(len(columns[0]), dtype=np.int64)))
+
+        columns = tuple(
+            np.concatenate([part[0][i] for part in parts]) for i in range(3)
+        ) if parts else BucketRepository._rows_to_columns([])
+        weights = np.concatenate([part[1] for part in parts]) if parts else np.empty(0, dtype=np.int64)
+        return columns, weights
+
+    @staticmethod
+    def get_downsampled_columns(
+        db: Session,
+        well_name: str,
+        channel_name: str,
+        start_date: Optional[datetime],
+        end_date: Optional[datetime],
+        max_points: int,
+        method: str = downsampling.METHOD_LTTB
+    ) -> Tuple[Columns, str]:
+        """
+        Reduce the points of a whole range to about `max_points` points.
+
+        When the rollups of a resolution fine enough for the requested points
+        exist, the range is served from them: their first, last, lowest and
+        highest points, or their means for `avg`, are the candidates of the
+        reduction, with the partial intervals at the ends of the range read
+        from finer resolutions and the raw points (see tier_planner). Points
+        taken from rollups have no row id, and their lowest and highest values
+        are placed halfway through their interval.
+
+        Over uncompressed rows the reduction of raw points runs in SQL: `avg`
+        is one grouped query, `minmax` ranks the rows of each time bucket with
+        window functions and only returns the extremes, and `lttb` runs on the
+        first, last, lowest and highest rows of finer buckets selected the same
+        way. Ranges holding compressed chunks are decoded and reduced with numpy.
+
+        Returns:
+            (ids, times, values) arrays, averaged points having `NO_ROW_ID`,
+            and the tiers that served them, such as "1h,1m,raw"
+        """
+        if method not in downsampling.METHODS:
+            raise ValueError(f"Unknown downsampling method '{method}', expected one of {downsampling.METHODS}")
+
+        store = get_bucket_store(db, well_name, channel_name)
+        # Buckets are counted from the naive UTC epoch, like the stored times
+        start_date = to_naive_utc(start_date) if start_date else None
+        end_date = to_naive_utc(end_date) if end_date else None
+        if start_date is None or end_date is None:
+            earliest, latest = BucketRepository.get_time_bounds(db, store)
+            start_date = start_date or earliest
+            end_date = end_date or latest
+        if start_date is None or end_date is None or start_date > end_date:
+            return BucketRepository._rows_to_columns([]), served_tiers([], RESOLUTION_NAMES)
+
+        # minmax keeps two points per bucket
+        buckets = max(max_points // 2, 1) if method == downsampling.METHOD_MINMAX else max_points
+        start_us, end_us = microseconds_since_epoch(start_date), microseconds_since_epoch(end_date)
+
+        # Rollups finer than the candidate buckets place their points closely enough
+        candidates = max_points * BucketDownsampleRepository.LTTB_CANDIDATES_PER_POINT
+        coverage = RollupRepository.get_coverage(db, store.channel_id)
+        tier = choose_tier(list(coverage), (end_date - start_date).total_seconds() / candidates)
+        if tier != RAW_TIER:
+            segments = plan(start_date, end_date + _MICROSECOND, tier, coverage)
+            (ids, times, values), weights = BucketDownsampleRepository._read_candidates(
+                db, store, segments, candidates, method
+            )
+            tiers = served_tiers(segments, RESOLUTION_NAMES)
+            if method == downsampling.METHOD_LTTB:
+                return downsampling.lttb(ids, times, values, max_points), tiers
+            if method == downsampling.METHOD_MINMAX:
+                return downsampling.minmax(ids, times, values, start_us, end_us, buckets), tiers
+            return downsampling.average(ids, times, values, start_us, end_us, buckets, NO_ROW_ID, weights), tiers
+
+        tiers = served_tiers([], RESOLUTION_NAMES)
+        compressed = db.execute(
+            select(exists().where(*BucketChunkRepository._range_filter(store.channel_id, start_date, end_date)))
+        ).scalar()
+
+        if compressed:
+            ids, times, values = BucketDownsampleRepository._read_all(db, store, start_date, end_date)
+        elif method == downsampling.METHOD_AVG:
+            return BucketDownsampleRepository._select_averages(db, store, start_date, end_date, buckets), tiers
+        elif method == downsampling.METHOD_MINMAX:
+            return BucketDownsampleRepository._select_extremes(db, store, start_date, end_date, buckets, False), tiers
+        else:
+            ids, times, values = BucketDownsampleRepository._select_extremes(
+                db, store, start_date, end_date, candidates, True
+            )
+
+        if method == downsampling.METHOD_LTTB:
+            return downsampling.lttb(ids, times, values, max_points), tiers
+        if method == downsampling.METHOD_MINMAX:
+            return downsampling.minmax(ids, times, values, start_us, end_us, buckets), tiers
+        return downsampling.average(ids, times, values, start_us, end_us, buckets, NO_ROW_ID), tiers
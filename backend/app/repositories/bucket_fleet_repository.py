@@ -0,0 +1,158 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence
+from datetime import datetime
+
+from app.core.database import SessionLocal
+from app.core.tier_planner import RAW_TIER_NAME
+from app.models.bucket import BucketStore, get_channel_store
+from app.models.channel_data import ChannelData
+from app.repositories.bucket_aggregate_repository import AGGREGATES, BucketAggregateRepository
+from app.repositories.bucket_bulk_writer import to_naive_utc
+from app.repositories.bucket_repository import BucketRepository
+from app.repositories.rollup_repository import RESOLUTION_NAMES
+
+# Well attributes the wells of a fleet aggregation can be grouped by
+FLEET_GROUPS = ("well", "region", "status", "lift_type")
+
+# Channels aggregated at once, each on a connection of its own
+FLEET_WORKERS = 8
+
+# Length of the intervals a channel's range is combined from, served by the 1d rollups
+_SUMMARY_INTERVAL = 86400
+
+# Tier names, coarsest first
+_TIER_ORDER = [RESOLUTION_NAMES[seconds] for seconds in sorted(RESOLUTION_NAMES, reverse=True)] + [RAW_TIER_NAME]
+
+
+class BucketFleetRepository:
+    @staticmethod
+    def _summarize_channel(
+        store: BucketStore,
+        start_date: Optional[datetime],
+        end_date: Optional[datetime],
+        aggregates: Sequence[str]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Aggregate the whole range of one channel on a session of its own, so
+        channels run side by side: the range is aggregated per day, from the
+        rollups where possible, and the days combined. The sum of squares
+        behind stddev comes from the channel's value sketch.
+
+        Returns:
+            The channel's aggregates and the tiers that served them, None when
+            the range holds no point
+        """
+        db = SessionLocal()
+        try:
+            if start_date is None or end_date is None:
+                earliest, latest = BucketRepository.get_time_bounds(db, store)
+                start_date = start_date or earliest
+                end_date = end_date or latest
+            if start_date is None or end_date is None or start_date > end_date:
+                return None
+
+            intervals, tiers = BucketAggregateRepository.aggregate_intervals(
+                db, store, start_date, end_date, _SUMMARY_INTERVAL,
+                [name for name in aggregates if name != "stddev"]
+            )
+            if not intervals:
+                return None
+
+            combined: Dict[int, Dict[str, Any]] = {}
+            for bucket in sorted(intervals):
+                BucketAggregateRepository._merge(combined, {0: intervals[bucket]})
+            summary = combined[0]
+            summary["tiers"] = tiers
+
+            if "stddev" in aggregates:
+                distribution, _ = BucketRepository._sketch_range(db, store, start_date, end_date)
+                summary["squares"] = float(distribution.squares.sum())
+        finally:
+            db.close()
+        return summary
+
+    @staticmethod
+    def _combine(group: Optional[Dict[str, Any]], summary: Dict[str, Any]) -> Dict[str, Any]:
+        """Combine the aggregates of one more channel into those of its group"""
+        if group is None:
+            return {**summary, "wells": 1, "tiers": set(summary["tiers"].split(","))}
+
+        earlier = group if group["first_time"] <= summary["first_time"] else summary
+        later = group if group["last_time"] >= summary["last_time"] else summary
+        return {
+            "count": group["count"] + summary["count"],
+            "min": min(group["min"], summary["min"]),
+            "max": max(group["max"], summary["max"]),
+            "sum": group["sum"] + summary["sum"],
+            "first": earlier["first"],
+            "last": later["last"],
+            "first_time": earlier["first_time"],
+            "last_time": later["last_time"],
+            "squares": group.get("squares", 0.0) + summary.get("squares", 0.0),
+            "wells": group["wells"] + 1,
+            "tiers": group["tiers"] | set(summary["tiers"].split(",")),
+        }
+
+    @staticmethod
+    def get_fleet_aggregates(
+        channels: List[ChannelData],
+        aggregates: Sequence[str],
+        group_by: str = "well",
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Aggregate a channel name over the whole range across many wells,
+        grouped by well or by a well attribute.
+
+        Each channel is aggregated like the aggregation endpoint with daily
+        intervals, from its rollups where possible, on up to FLEET_WORKERS
+        connections at once. The aggregates of the channels are then combined
+        per group: avg and stddev are those of all the points of the group,
+        first and last those of its earliest and latest point. A range left
+        open ends at each channel's own first or last point.
+
+        Returns:
+            One dict per group holding points, sorted by key, with the
+            requested aggregates, the number of wells and the tiers that
+            served them
+        """
+        unknown = [name for name in aggregates if name not in AGGREGATES]
+        if unknown:
+            raise ValueError(f"Unknown aggregates {unknown}, expected some of {AGGREGATES}")
+        if group_by not in FLEET_GROUPS:
+            raise ValueError(f"Unknown grouping '{group_by}', expected one of {FLEET_GROUPS}")
+        if not channels:
+            return []
+
+        start_date = to_naive_utc(start_date) if start_date else None
+        end_date = to_naive_utc(end_date) if end_date else None
+        stores = [get_channel_store(channel) for channel in channels]
+        with ThreadPoolExecutor(max_workers=min(FLEET_WORKERS, len(stores))) as pool:
+            summaries = list(pool.map(
+                lambda store: BucketFleetRepository._summarize_channel(store, start_date, end_date, aggregates),
+                stores
+            ))
+
+        groups: Dict[Optional[str], Dict[str, Any]] = {}
+        for channel, summary in zip(channels, summaries):
+            if summary is None:
+                continue
+            key = channel.well.name if group_by == "well" else getattr(channel.well, group_by)
+            groups[key] = BucketFleetRepository._combine(groups.get(key), summary)
+
+        rows = []
+        for key in sorted(groups, key=lambda key: (key is None, key or "")):
+            group = groups[key]
+            values = {
+                **group,
+                "avg": group["sum"] / group["count"],
+                "stddev": BucketAggregateRepository._stddev(group["count"], group["sum"], group.get("squares", 0.0)),
+            }
+            rows.append({
+                "key": key,
+                "wells": group["wells"],
+                **{name: values[name] for name in aggregates},
+                "tiers": ",".join(tier for tier in _TIER_ORDER if tier in group["tiers"]),
+            })
+        return rows
@@ -0,0 +1,160 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime
+import numpy as np # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+
+from app.core.database import SessionLocal
+from app.core.time_buckets import interval_index, to_naive_utc
+from app.models.bucket import BucketStore, get_channel_store
+from app.models.channel_data import ChannelData
+from app.repositories.bucket_aggregate_repository import (
+    AGGREGATES,
+    FILL_LINEAR,
+    FILL_NONE,
+    FILL_POLICIES,
+    FILL_PREVIOUS,
+    FILL_ZERO,
+    MAX_INTERVALS,
+    BucketAggregateRepository,
+    parse_interval
+)
+from app.repositories.bucket_repository import BucketRepository
+
+# Most channels a single frame may hold
+MAX_FRAME_CHANNELS = 32
+
+# Channels aggregated at once, each on a connection of its own
+FRAME_WORKERS = 4
+
+
+class BucketFrameRepository:
+    @staticmethod
+    def _aggregate_channel(
+        store: BucketStore, start: datetime, end: datetime, interval: int, aggregate: str
+    ) -> Tuple[Dict[int, Optional[float]], str]:
+        """Aggregate one channel per interval on a session of its own, so channels run side by side"""
+        db = SessionLocal()
+        try:
+            intervals, tiers = BucketAggregateRepository.aggregate_intervals(
+                db, store, start, end, interval, [aggregate]
+            )
+        finally:
+            db.close()
+        return {bucket: row[aggregate] for bucket, row in intervals.items()}, tiers
+
+    @staticmethod
+    def _to_column(values: Dict[int, Optional[float]], first: int, length: int) -> np.ndarray:
+        """Place the values of some intervals on the frame's grid, NaN where an interval has none"""
+        column = np.full(length, np.nan)
+        if values:
+            index = np.fromiter(values.keys(), dtype=np.int64, count=len(values)) - first
+            column[index] = np.fromiter(
+                (np.nan if value is None else value for value in values.values()), dtype=np.float64, count=len(values)
+            )
+        return column
+
+    @staticmethod
+    def _fill(column: np.ndarray, fill: str) -> np.ndarray:
+        """Fill the empty intervals of a column by policy, vectorized"""
+        empty = np.isnan(column)
+        if not empty.any() or not (~empty).any():
+            return column
+        if fill == FILL_ZERO:
+            return np.where(empty, 0.0, column)
+        if fill == FILL_PREVIOUS:
+            # Index of the last interval with a value at or before each interval
+            last_known = np.maximum.accumulate(np.where(empty, 0, np.arange(len(column))))
+            return column[last_known]
+        if fill == FILL_LINEAR:
+            known = np.flatnonzero(~empty)
+            filled = column.copy()
+            inside = np.arange(known[0], known[-1] + 1)
+            filled[inside] = np.interp(inside, known, column[known])
+            return filled
+        return column
+
+    @staticmethod
+    def get_frame(
+        db: Session,
+        channels: List[ChannelData],
+        interval: str,
+        aggregate: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        fill: str = FILL_NONE
+    ) -> Dict[str, Any]:
+        """
+        Resample several channels onto shared epoch-aligned intervals.
+
+        Each channel is aggregated per interval like the aggregation endpoint,
+        from its rollups where possible, on up to FRAME_WORKERS connections at
+        once. The intervals are then laid out on one time grid with numpy, a
+        column per channel. With FILL_NONE only the intervals where some
+        channel has points are kept, the others holding None. A range left
+        open ends at the first or last point of any of the channels.
+
+        Returns:
+            The shared `time` column, a column per channel name, and the
+            tiers each channel was served from
+        """
+        interval_seconds = parse_interval(interval)
+        if aggregate not in AGGREGATES:
+            raise ValueError(f"Unknown aggregate '{aggregate}', expected one of {AGGREGATES}")
+        if fill not in FILL_POLICIES:
+            raise ValueError(f"Unknown fill policy '{fill}', expected one of {FILL_POLICIES}")
+
+        stores = [get_channel_store(channel) for channel in channels]
+        # Intervals are counted from the naive UTC epoch, like the stored times
+        start_date = to_naive_utc(start_date) if start_date else None
+        end_date = to_naive_utc(end_date) if end_date else None
+        if start_date is None or end_date is None:
+            bounds = [BucketRepository.get_time_bounds(db, store) for store in stores]
+            earliest = [first for first, _ in bounds if first is not None]
+            latest = [last for _, last in bounds if last is not None]
+            start_date = start_date or (min(earliest) if earliest else None)
+            end_date = end_date or (max(latest) if latest else None)
+
+        names = [channel.name for channel in channels]
+        if start_date is None or end_date is None or start_date > end_date:
+            return {"time": [], "columns": {name: [] for name in names}, "tiers": {}}
+
+        first = interval_index(start_date, interval_seconds)
+        last = interval_index(end_date, interval_seconds)
+        if last - first + 1 > MAX_INTERVALS:
+            raise ValueError(
+                f"The range spans {last - first + 1} intervals of {interval}, at most {MAX_INTERVALS} are allowed"
+            )
+
+        with ThreadPoolExecutor(max_workers=min(FRAME_WORKERS, len(stores))) as pool:
+            results = list(pool.map(
+                lambda store: BucketFrameRepository._aggregate_channel(
+                    store, start_date, end_date, interval_seconds, aggregate
+                ),
+                stores
+            ))
+
+        length = last - first + 1
+        columns = [BucketFrameRepository._to_column(values, first, length) for values, _ in results]
+        keep = np.ones(length, dtype=bool)
+        if fill == FILL_NONE:
+            keep = np.zeros(length, dtype=bool)
+            for values, _ in results:
+                if values:
+                    keep[np.fromiter(values.keys(), dtype=np.int64, count=len(values)) - first] = True
+        elif aggregate not in ("count", "sum"):
+            columns = [BucketFrameRepository._fill(column, fill) for column in columns]
+        if aggregate in ("count", "sum"):
+            # No points is an exact count and sum
+            columns = [np.where(np.isnan(column), 0.0, column) for column in columns]
+
+        buckets = np.arange(first, last + 1, dtype=np.int64)[keep]
+        times = (buckets * interval_seconds).astype("datetime64[s]").astype(object).tolist()
+        return {
+            "time": times,
+            "columns": {
+                name: [None if value != value else value for value in column[keep].tolist()]
+                for name, column in zip(names, columns)
+            },
+            "tiers": {name: tiers for name, (_, tiers) in zip(names, results)},
+        }
@@ -1,14 +1,96 @@
 import datetime
-import random
-import math
-from typing import Optional, List, Dict, Any, Union
+from typing import Optional, Dict, Any, Callable, Iterator, Tuple
+import numpy as np # type: ignore
 from sqlalchemy.orm import Session # type: ignore
 
-from app.models.bucket import get_bucket_model
+from app.core.time_buckets import to_naive_utc
+from app.models.bucket import STORAGE_PARTITIONED, ensure_points_partitions, get_channel_store, get_storage_backend
+from app.models.channel_data import ChannelData
+from app.repositories.bucket_bulk_writer import BucketBulkWriter, CONFLICT_OVERWRITE
+from app.repositories.bucket_repository import BucketRepository
 from app.repositories.channel_data_repository import ChannelDataRepository
 from app.repositories.well_repository import WellRepository
 
+# Vectorized value generator: receives the days elapsed since the start date for
+# every point of a chunk plus the random generator, returns one value per point
+ValueGenerator = Callable[[np.ndarray, np.random.Generator], np.ndarray]
+
+# Called after every committed chunk with the points written so far and the total
+ProgressCallback = Callable[[int, int], None]
+
+# Vectorized pattern shapes, indexed by pattern type. Each receives the phase
+# (days since start / period) and returns values in [-1, 1]
+PATTERNS: Dict[str, Callable[[np.ndarray], np.ndarray]] = {
+    "sine": lambda phase: np.sin(2 * np.pi * phase),
+    "cosine": lambda phase: np.cos(2 * np.pi * phase),
+    "sawtooth": lambda phase: 2 * (phase - np.floor(0.5 + phase)),
+    "square": lambda phase: np.where(np.sin(2 * np.pi * phase) >= 0, 1.0, -1.0),
+    "random": np.zeros_like,  # Pure noise
+    "trend": np.zeros_like,   # Pure trend
+}
+
 class BucketDataGenerator:
+    # Number of points computed and written per chunk
+    DEFAULT_CHUNK_SIZE = 50000
+
+    @staticmethod
+    def iter_chunks(
+        start_date: datetime.datetime,
+        end_date: datetime.datetime,
+        interval_seconds: int,
+        value_generator: ValueGenerator,
+        seed: Optional[int] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Compute regularly spaced points between two dates as fixed-size array chunks.
+
+        Yields (timestamps, values) pairs of `datetime64[us]` and `float64`
+        arrays. The random generator is drawn from sequentially, so a given
+        seed produces the same series whatever the chunk size.
+        """
+        rng = np.random.default_rng(seed)
+        total_points = int((end_date - start_date).total_seconds() // interval_seconds) + 1
+        start = np.datetime64(start_date, "us")
+        step = np.timedelta64(interval_seconds * 1_000_000, "us")
+
+        for offset in range(0, total_points, chunk_size):
+            indexes = np.arange(offset, min(offset + chunk_size, total_points), dtype=np.int64)
+            days_since_start = indexes * (interval_seconds / 86400)
+            timestamps = start + indexes * step
+            values = np.round(value_generator(days_since_start, rng), 2)
+            yield timestamps, values
+
+    @staticmethod
+    def resolve_range(
+        channel: ChannelData,
+        start_date: Optional[datetime.datetime],
+        end_date: Optional[datetime.datetime],
+        interval_seconds: int
+    ) -> Tuple[datetime.datetime, datetime.datetime]:
+        """
+        Check the parameters of a generation and fill in its range, in naive
+        UTC, defaulting to the channel's data range or the last 30 days.
+
+        Raises:
+            ValueError: If the interval isn't positive or the range is empty
+        """
+        if interval_seconds <= 0:
+            raise ValueError(f"Interval must be a positive number of seconds, got {interval_seconds}")
+
+        now = datetime.datetime.now()
+
+        if not start_date:
+            start_date = channel.data_from if channel.data_from else now - datetime.timedelta(days=30)
+
+        if not end_date:
+            end_date = channel.data_to if channel.data_to else now
+
+        start_date, end_date = to_naive_utc(start_date), to_naive_utc(end_date)
+        if start_date >= end_date:
+            raise ValueError(f"Start date ({start_date}) must be before end date ({end_date})")
+        return start_date, end_date
+
     @staticmethod
     def populate_bucket(
         db: Session,
@@ -17,12 +99,19 @@ class BucketDataGenerator:
         start_date: Optional[datetime.datetime] = None,
         end_date: Optional[datetime.datetime] = None,
         interval_seconds: int = 3600,  # Default: hourly
-        value_generator: Optional[callable] = None,
-        update_channel_dates: bool = True
+        value_generator: Optional[ValueGenerator] = None,
+        update_channel_dates: bool = True,
+        seed: Optional[int] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        progress_callback: Optional[ProgressCallback] = None,
+        should_cancel: Optional[Callable[[], bool]] = None
     ) -> Dict[str, Any]:
         """
         Populate a bucket with time series data points at regular intervals.
-        
+
+        Every chunk is committed together with the channel's date range, so
+        an interrupted run leaves consistent partial data behind.
+
         Args:
             db: Database session
             well_name: Name of the well
@@ -30,9 +119,14 @@ class BucketDataGenerator:
             start_date: Start date for data generation (defaults to channel's data_from or current date - 30 days)
             end_date: End date for data generation (defaults to channel's data_to or current date)
             interval_seconds: Time interval between data points in seconds
-            value_generator: Function to generate values, receives timestamp as input. Defaults to sine wave + random noise
+            value_generator: Vectorized function generating the values of a chunk, see `ValueGenerator`.
+                Defaults to sine wave + random noise
             update_channel_dates: Whether to update the channel's data_from and data_to dates
-            
+            seed: Seed for the random noise, for reproducible datasets
+            chunk_size: Number of points computed and bulk written at a time
+            progress_callback: Called after each committed chunk, see `ProgressCallback`
+            should_cancel: Checked before each chunk, generation stops when it returns True
+
         Returns:
             Dict with information about the generated data
         """
@@ -40,85 +134,82 @@ class BucketDataGenerator:
         well = WellRepository.get_well_by_name(db, well_name)
         if not well:
             raise ValueError(f"Well with name '{well_name}' not found")
-        
+
         channel = ChannelDataRepository.get_channel_by_well_and_name(db, well.id, channel_name)
         if not channel:
             raise ValueError(f"Channel with name '{channel_name}' not found for well '{well_name}'")
-        
-        # Determine date range
-        now = datetime.datetime.now()
-        
-        if not start_date:
-            start_date = channel.data_from if channel.data_from else now - datetime.timedelta(days=30)
-        
-        if not end_date:
-            end_date = channel.data_to if channel.data_to else now
-        
-        # Ensure start_date is before end_date
-        if start_date >= end_date:
-            raise ValueError(f"Start date ({start_date}) must be before end date ({end_date})")
-        
+
+        start_date, end_date = BucketDataGenerator.resolve_range(channel, start_date, end_date, interval_seconds)
+
         # Use default value generator if none provided
         if not value_generator:
-            def default_value_generator(timestamp):
+            def default_value_generator(days_since_start, rng):
                 # Generate a value based on sine wave + random noise
                 # This creates realistic-looking time series data
-                days_since_start = (timestamp - start_date).total_seconds() / 86400
-                base_value = 50 + 25 * math.sin(days_since_start * math.pi / 15)  # Sine wave with 30-day period
-                noise = random.uniform(-5, 5)  # Random noise
-                return round(base_value + noise, 2)
-            
+                base_value = 50 + 25 * np.sin(days_since_start * np.pi / 15)  # Sine wave with 30-day period
+                noise = rng.uniform(-5, 5, size=days_since_start.shape)  # Random noise
+                return base_value + noise
+
             value_generator = default_value_generator
-        
-        # Get the bucket model
-        BucketModel = get_bucket_model(well_name, channel_name)
-        
-        # Generate data points
-        current_time = start_date
+
+        # Get the bucket store
+        store = get_channel_store(channel)
+
+        # The generated range is known up front, give it its partitions
+        if get_storage_backend() == STORAGE_PARTITIONED:
+            ensure_points_partitions(db.connection(), start_date, end_date)
+            db.commit()
+
+        # Regenerating a range replaces the values instead of duplicating timestamps
+        on_conflict = CONFLICT_OVERWRITE if store.unique_time else None
+
+        # Generate and write data points chunk by chunk
+        total_points = int((end_date - start_date).total_seconds() // interval_seconds) + 1
         points_generated = 0
-        earliest_time = None
-        latest_time = None
-        
-        while current_time <= end_date:
-            # Generate a value for this timestamp
-            value = value_generator(current_time)
-            
-            # Create the data point
-            db_point = BucketModel(
-                time=current_time,
-                value=value
+        cancelled = False
+
+        if progress_callback:
+            progress_callback(points_generated, total_points)
+
+        for timestamps, values in BucketDataGenerator.iter_chunks(
+            start_date, end_date, interval_seconds, value_generator, seed, chunk_size
+        ):
+            if should_cancel and should_cancel():
+                cancelled = True
+                break
+
+            points, delta, coverage = BucketRepository._track_write(
+                db, store, zip(timestamps.astype(object), values.tolist())
             )
-            db.add(db_point)
-            
-            # Track earliest and latest times
-            if earliest_time is None or current_time < earliest_time:
-                earliest_time = current_time
-            if latest_time is None or current_time > latest_time:
-                latest_time = current_time
-            
-            # Move to the next time
-            current_time += datetime.timedelta(seconds=interval_seconds)
-            points_generated += 1
-        
-        # Update channel's date range if needed
-        if update_channel_dates:
-            if channel.data_from is None or earliest_time < channel.data_from:
-                channel.data_from = earliest_time
-            if channel.data_to is None or latest_time > channel.data_to:
-                channel.data_to = latest_time
-        
-        # Commit all changes
-        db.commit()
-        
+            result = BucketBulkWriter.write(
+                db, store.table, points, on_conflict=on_conflict, key_values=store.key_values
+            )
+            points_generated += result["count"]
+
+            # Fold the chunk into the channel's rollups, coverage and date range
+            BucketRepository._apply_write(db, store, result, delta, coverage, on_conflict)
+            if update_channel_dates and result["count"]:
+                ChannelDataRepository.extend_time_range(
+                    db, well_name, channel_name, result["data_from"], result["data_to"]
+                )
+
+            # Commit the chunk with the date range it extends
+            db.commit()
+
+            if progress_callback:
+                progress_callback(points_generated, total_points)
+
         return {
             "well_name": well_name,
             "channel_name": channel_name,
             "points_generated": points_generated,
             "start_date": start_date,
             "end_date": end_date,
-            "interval_seconds": interval_seconds
+            "interval_seconds": interval_seconds,
+            "seed": seed,
+            "cancelled": cancelled
         }
-    
+
     @staticmethod
     def generate_pattern_data(
         db: Session,
@@ -132,11 +223,14 @@ class BucketDataGenerator:
         amplitude: float = 25.0,
         period_days: float = 7.0,
         trend_slope: float = 0.0,
-        noise_level: float = 2.0
+        noise_level: float = 2.0,
+        seed: Optional[int] = None,
+        progress_callback: Optional[ProgressCallback] = None,
+        should_cancel: Optional[Callable[[], bool]] = None
     ) -> Dict[str, Any]:
         """
         Generate time series data with specific patterns.
-        
+
         Args:
             db: Database session
             well_name: Name of the well
@@ -150,41 +244,28 @@ class BucketDataGenerator:
             period_days: Period of the pattern in days
             trend_slope: Slope of the trend (units per day)
             noise_level: Magnitude of random noise to add
-            
+            seed: Seed for the random noise, for reproducible datasets
+            progress_callback: Called after each committed chunk, see `ProgressCallback`
+            should_cancel: Checked before each chunk, generation stops when it returns True
+
         Returns:
             Dict with information about the generated data
         """
-        def create_generator(pattern_type):
-            def value_generator(timestamp):
-                days_since_start = (timestamp - start_date).total_seconds() / 86400
-                
-                # Add trend component if specified
-                trend = trend_slope * days_since_start
-                
-                # Generate the pattern value
-                if pattern_type == "sine":
-                    pattern = amplitude * math.sin(2 * math.pi * days_since_start / period_days)
-                elif pattern_type == "cosine":
-                    pattern = amplitude * math.cos(2 * math.pi * days_since_start / period_days)
-                elif pattern_type == "sawtooth":
-                    pattern = amplitude * (2 * (days_since_start / period_days - math.floor(0.5 + days_since_start / period_days)))
-                elif pattern_type == "square":
-                    pattern = amplitude if math.sin(2 * math.pi * days_since_start / period_days) >= 0 else -amplitude
-                elif pattern_type == "random":
-                    pattern = 0  # Pure noise
-                elif pattern_type == "trend":
-                    pattern = 0  # Pure trend
-                else:
-                    pattern = 0
-                
-                # Add random noise
-                noise = random.uniform(-noise_level, noise_level)
-                
-                # Combine all components
-                return round(base_value + pattern + trend + noise, 2)
-            
-            return value_generator
-        
+        pattern = PATTERNS.get(pattern_type, np.zeros_like)
+
+        def value_generator(days_since_start, rng):
+            # Add trend component if specified
+            trend = trend_slope * days_since_start
+
+            # Generate the pattern value
+            pattern_values = amplitude * pattern(days_since_start / period_days)
+
+            # Add random noise
+            noise = rng.uniform(-noise_level, noise_level, size=days_since_start.shape)
+
+            # Combine all components
+            return base_value + pattern_values + trend + noise
+
         # Use the pattern-specific generator
         return BucketDataGenerator.populate_bucket(
             db=db,
@@ -193,5 +274,8 @@ class BucketDataGenerator:
             start_date=start_date,
             end_date=end_date,
             interval_seconds=interval_seconds,
-            value_generator=create_generator(pattern_type)
-        )
\ No newline at end of file
+            value_generator=value_generator,
+            seed=seed,
+            progress_callback=progress_callback,
+            should_cancel=should_cancel
+        )
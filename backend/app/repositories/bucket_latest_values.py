@@ -0,0 +1,169 @@
+"""
+Latest point of every channel, kept in memory for O(1) lookups.
+
+Every write records the latest point it wrote in channel_latest_values, in
+the write's transaction, with `advance`: the row only moves forward in time.
+Deletes that may take a channel's latest point away `replace` the row with
+the latest point left. Once the transaction commits, the same change is
+applied to this process's map; a rollback drops it. Changes committed by
+other workers reach the map when it is reloaded from the table, every
+LATEST_VALUES_RELOAD_SECONDS.
+"""
+import threading
+from datetime import datetime
+from time import perf_counter
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import delete, event, select # type: ignore
+from sqlalchemy.dialects import postgresql, sqlite # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+
+from app.core.database import SessionLocal
+from app.models.latest_value import ChannelLatestValue
+from app.repositories.bucket_bulk_writer import to_naive_utc
+
+# How a change applies to the stored latest point
+_ADVANCE = "advance"  # Kept if later than the stored point
+_OVERWRITE = "overwrite"  # Kept if later than or as late as the stored point
+_REPLACE = "replace"  # Kept whatever the stored point, None removing it
+
+# Session.info key of the changes a transaction made, applied to the map once it commits
+_PENDING_KEY = "latest_value_changes"
+
+
+class LatestValue(NamedTuple):
+    time: datetime
+    value: float
+
+
+class BucketLatestValues:
+    """Process-wide map of the latest point of every channel, by channel id"""
+
+    def __init__(self):
+        self._values: Dict[int, LatestValue] = {}
+        self._loaded = False
+        # Changes committed while a load reads the table, applied again on top of what it read
+        self._committed_during_load: Optional[List[Tuple[int, Optional[LatestValue], str]]] = None
+        self._lock = threading.Lock()
+        self._loads = 0
+        self._load_seconds = None
+
+    @staticmethod
+    def _insert(db: Session):
+        """The dialect's INSERT construct, which supports ON CONFLICT"""
+        dialect_name = db.get_bind().dialect.name
+        if dialect_name == "postgresql":
+            return postgresql.insert
+        if dialect_name == "sqlite":
+            return sqlite.insert
+        raise ValueError(f"Latest values are not supported on {dialect_name}")
+
+    @staticmethod
+    def _apply(values: Dict[int, LatestValue], channel_id: int, latest: Optional[LatestValue], mode: str) -> None:
+        current = values.get(channel_id)
+        if mode == _REPLACE:
+            if latest is None:
+                values.pop(channel_id, None)
+            else:
+                values[channel_id] = latest
+        elif current is None or latest.time > current.time or (latest.time == current.time and mode == _OVERWRITE):
+            values[channel_id] = latest
+
+    def advance(self, db: Session, channel_id: int, time: datetime, value: float, overwrite: bool = False) -> None:
+        """
+        Record the latest point of a write in the session's transaction. It
+        becomes the channel's latest point unless a later one is stored, or
+        one as late when the write didn't overwrite it.
+        """
+        latest = LatestValue(to_naive_utc(time), float(value))
+        statement = BucketLatestValues._insert(db)(ChannelLatestValue).values(
+            channel_id=channel_id, time=latest.time, value=latest.value
+        )
+        if overwrite:
+            newer = ChannelLatestValue.time <= statement.excluded.time
+        else:
+            newer = ChannelLatestValue.time < statement.excluded.time
+        db.execute(statement.on_conflict_do_update(
+            index_elements=[ChannelLatestValue.channel_id],
+            set_={"time": statement.excluded.time, "value": statement.excluded.value},
+            where=newer
+        ))
+        db.info.setdefault(_PENDING_KEY, []).append((channel_id, latest, _OVERWRITE if overwrite else _ADVANCE))
+
+    def replace(self, db: Session, channel_id: int, latest: Optional[Tuple[datetime, float]]) -> None:
+        """Set a channel's latest point in the session's transaction, None when it has no point left"""
+        if latest is None:
+            db.execute(delete(ChannelLatestValue).where(ChannelLatestValue.channel_id == channel_id))
+            db.info.setdefault(_PENDING_KEY, []).append((channel_id, None, _REPLACE))
+            return
+
+        replacement = LatestValue(to_naive_utc(latest[0]), float(latest[1]))
+        statement = BucketLatestValues._insert(db)(ChannelLatestValue).values(
+            channel_id=channel_id, time=replacement.time, value=replacement.value
+        )
+        db.execute(statement.on_conflict_do_update(
+            index_elements=[ChannelLatestValue.channel_id],
+            set_={"time": statement.excluded.time, "value": statement.excluded.value}
+        ))
+        db.info.setdefault(_PENDING_KEY, []).append((channel_id, replacement, _REPLACE))
+
+    def commit(self, changes: List[Tuple[int, Optional[LatestValue], str]]) -> None:
+        """Apply the changes of a committed transaction to the map"""
+        with self._lock:
+            for change in changes:
+                BucketLatestValues._apply(self._values, *change)
+            if self._committed_during_load is not None:
+                self._committed_during_load.extend(changes)
+
+    def load(self) -> None:
+        """Read every channel's latest point from the table, replacing what is known"""
+        started = perf_counter()
+        with self._lock:
+            self._committed_during_load = []
+        db = SessionLocal()
+        try:
+            rows = db.execute(
+                select(ChannelLatestValue.channel_id, ChannelLatestValue.time, ChannelLatestValue.value)
+            ).all()
+        finally:
+            db.close()
+
+        with self._lock:
+            values = {row.channel_id: LatestValue(row.time, row.value) for row in rows}
+            for change in self._committed_during_load or []:
+                BucketLatestValues._apply(values, *change)
+            self._values = values
+            self._committed_during_load = None
+            self._loaded = True
+            self._loads += 1
+            self._load_seconds = perf_counter() - started
+
+    def get_many(self, channel_ids: Iterable[int]) -> Dict[int, LatestValue]:
+        """Latest point of each channel that has one"""
+        if not self._loaded:
+            self.load()
+        with self._lock:
+            return {channel_id: self._values[channel_id] for channel_id in channel_ids if channel_id in self._values}
+
+    def stats(self):
+        with self._lock:
+            return {
+                "channels": len(self._values),
+                "loads": self._loads,
+                "load_seconds": self._load_seconds,
+            }
+
+
+bucket_latest_values = BucketLatestValues()
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_committed_changes(session: Session) -> None:
+    changes = session.info.pop(_PENDING_KEY, None)
+    if changes:
+        bucket_latest_values.commit(changes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_rolled_back_changes(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,264 @@
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Float, Integer, MetaData, Table, delete, insert, inspect, select # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+
+from app.core.config import settings
+from app.models.bucket import (
+    STORAGE_TABLES,
+    bucket_registry,
+    bucket_table_name,
+    discard_bucket_table,
+    get_storage_backend,
+    points_table
+)
+from app.models.channel_data import ChannelData
+from app.models.well import Well
+from app.repositories.bucket_chunk_repository import BucketChunkRepository
+from app.repositories.bucket_latest_values import bucket_latest_values
+from app.repositories.bucket_read_cache import bucket_read_cache
+from app.repositories.coverage_repository import CoverageRepository
+from app.repositories.rollup_repository import RollupRepository
+
+# What becomes of the bucket table of a deleted channel
+BUCKET_DELETE_DROP = "drop"  # The table and its data are dropped
+BUCKET_DELETE_ARCHIVE = "archive"  # The table is renamed out of the bucket_ namespace and kept
+BUCKET_DELETE_MODES = (BUCKET_DELETE_DROP, BUCKET_DELETE_ARCHIVE)
+
+ARCHIVE_TABLE_PREFIX = "archived_"
+
+# PostgreSQL truncates longer identifiers
+MAX_IDENTIFIER_LENGTH = 63
+
+
+class BucketLifecycleRepository:
+    """
+    Keeps bucket tables in step with their channels: renamed along with the
+    channel or its well, dropped or archived when the channel is deleted.
+
+    Every operation runs its DDL in the caller's transaction, so the table
+    changes commit or roll back together with the channel row.
+    """
+
+    @staticmethod
+    def _check_mode(mode: str) -> None:
+        if mode not in BUCKET_DELETE_MODES:
+            raise ValueError(f"Unknown bucket delete mode '{mode}', expected one of {BUCKET_DELETE_MODES}")
+
+    @staticmethod
+    def _rename_table(db: Session, old_name: str, new_name: str) -> None:
+        """Rename a table along with the indexes and sequence named after it"""
+        connection = db.connection()
+        dialect_name = connection.dialect.name
+        quote = connection.dialect.identifier_preparer.quote
+        indexes = inspect(connection).get_indexes(old_name)
+
+        connection.exec_driver_sql(f"ALTER TABLE {quote(old_name)} RENAME TO {quote(new_name)}")
+
+        # Index names are global, left as they are they'd clash with a new table taking the old name
+        for index in indexes:
+            if not index["name"] or not index["name"].startswith(f"ix_{old_name}_"):
+                continue
+            new_index = f"ix_{new_name}_{index['name'][len(old_name) + 4:]}"[:MAX_IDENTIFIER_LENGTH]
+            if dialect_name == "postgresql":
+                connection.exec_driver_sql(f"ALTER INDEX {quote(index['name'])} RENAME TO {quote(new_index)}")
+            else:
+                columns = ", ".join(quote(column) for column in index["column_names"])
+                unique = "UNIQUE " if index["unique"] else ""
+                connection.exec_driver_sql(f"DROP INDEX {quote(index['name'])}")
+                connection.exec_driver_sql(
+                    f"CREATE {unique}INDEX {quote(new_index)} ON {quote(new_name)} ({columns})"
+                )
+
+        if dialect_name == "postgresql":
+            connection.exec_driver_sql(
+                f"ALTER INDEX IF EXISTS {quote(old_name + '_pkey')} RENAME TO {quote(new_name + '_pkey')}"
+            )
+            connection.exec_driver_sql(
+                f"ALTER SEQUENCE IF EXISTS {quote(old_name + '_id_seq')} RENAME TO {quote(new_name + '_id_seq')}"
+            )
+
+        discard_bucket_table(old_name)
+        discard_bucket_table(new_name)
+
+    @staticmethod
+    def _archive_name(table_name: str, now: datetime) -> str:
+        return f"{ARCHIVE_TABLE_PREFIX}{now:%Y%m%d%H%M%S}_{table_name}"[:MAX_IDENTIFIER_LENGTH]
+
+    @staticmethod
+    def _restore_chunks(db: Session, table: Table, channel_id: int) -> int:
+        """Write a channel's compressed points into a table as rows, rows already there winning"""
+        restored = 0
+        for times, values in BucketChunkRepository.iter_columns(db, channel_id):
+            first, last = times[0].astype(datetime), times[-1].astype(datetime)
+            existing = set(db.execute(
+                select(table.c.time).where(table.c.time >= first, table.c.time <= last)
+            ).scalars())
+            rows = [
+                {"time": time, "value": value}
+                for time, value in zip(times.astype(object), values.tolist())
+                if time not in existing
+            ]
+            if rows:
+                db.execute(insert(table), rows)
+                restored += len(rows)
+        return restored
+
+    @staticmethod
+    def _archive_points(db: Session, channel_id: int, table_name: str) -> Optional[str]:
+        """
+        Move a channel's rows of the shared points table into an archive
+        table laid out like a bucket table, returning its name, or None if
+        the channel had no points
+        """
+        has_rows = db.execute(select(points_table.c.id).where(points_table.c.channel_id == channel_id).limit(1)).first()
+        if not has_rows and not BucketChunkRepository.count_points(db, channel_id):
+            return None
+
+        archive_name = BucketLifecycleRepository._archive_name(table_name, datetime.now())
+        archive = Table(
+            archive_name,
+            MetaData(),
+            Column("id", Integer, primary_key=True),
+            Column("time", DateTime, nullable=False, index=True),
+            Column("value", Float, nullable=False),
+        )
+        archive.create(db.connection())
+        db.execute(insert(archive).from_select(
+            ["time", "value"],
+            select(points_table.c.time, points_table.c.value)
+            .where(points_table.c.channel_id == channel_id)
+            .order_by(points_table.c.time)
+        ))
+        BucketLifecycleRepository._restore_chunks(db, archive, channel_id)
+        db.execute(delete(points_table).where(points_table.c.channel_id == channel_id))
+        return archive_name
+
+    @staticmethod
+    def _reclaim_table(db: Session, table_name: str, mode: str) -> Optional[str]:
+        """Drop or archive a bucket table, returning the archive table name if any"""
+        quote = db.get_bind().dialect.identifier_preparer.quote
+        if mode == BUCKET_DELETE_DROP:
+            db.connection().exec_driver_sql(f"DROP TABLE IF EXISTS {quote(table_name)}")
+            discard_bucket_table(table_name)
+            return None
+
+        archive_name = BucketLifecycleRepository._archive_name(table_name, datetime.now())
+        BucketLifecycleRepository._rename_table(db, table_name, archive_name)
+        return archive_name
+
+    @staticmethod
+    def rename_bucket(db: Session, old_table_name: str, new_table_name: str) -> bool:
+        """
+        Rename a bucket table for a channel or well rename, without committing.
+
+        Returns:
+            True if a table was renamed, False if the channel had no bucket table
+
+        Raises:
+            ValueError: If a bucket table already has the new name
+        """
+        if old_table_name == new_table_name or get_storage_backend() != STORAGE_TABLES:
+            return False
+
+        inspector = inspect(db.connection())
+        if not inspector.has_table(old_table_name):
+            return False
+        if inspector.has_table(new_table_name):
+            raise ValueError(f"Bucket table '{new_table_name}' already exists")
+
+        BucketLifecycleRepository._rename_table(db, old_table_name, new_table_name)
+        return True
+
+    @staticmethod
+    def release_bucket(db: Session, channel: ChannelData, mode: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Drop or archive the data of a channel about to be deleted, without committing.
+
+        With the per-channel tables backend the bucket table is dropped, or
+        renamed with the `archived_` prefix, out of reach of the registry and
+        the sweeper. With the partitioned backend the channel's rows of the
+        shared points table are deleted, or moved into an `archived_` table
+        of their own. Archiving first writes the channel's compressed points
+        back as rows, so the archive holds all of its data. Either way the
+        chunks go, along with the rollups, sketches and coverage index that
+        only serve reads of a live channel.
+
+        Args:
+            db: Database session
+            channel: Channel being deleted, with its well loaded
+            mode: "drop" or "archive", BUCKET_DELETE_MODE by default
+
+        Returns:
+            Dict with the bucket table, the mode applied and the archive table name
+        """
+        mode = mode or settings.BUCKET_DELETE_MODE
+        BucketLifecycleRepository._check_mode(mode)
+        table_name = bucket_table_name(channel.well.name, channel.name)
+        result = {"table": table_name, "mode": mode, "archived_as": None}
+
+        if get_storage_backend() == STORAGE_TABLES:
+            if inspect(db.connection()).has_table(table_name):
+                if mode == BUCKET_DELETE_ARCHIVE:
+                    BucketLifecycleRepository._restore_chunks(db, bucket_registry.get(table_name), channel.id)
+                result["archived_as"] = BucketLifecycleRepository._reclaim_table(db, table_name, mode)
+        elif mode == BUCKET_DELETE_ARCHIVE:
+            result["archived_as"] = BucketLifecycleRepository._archive_points(db, channel.id, table_name)
+        else:
+            db.execute(delete(points_table).where(points_table.c.channel_id == channel.id))
+
+        BucketChunkRepository.delete_chunks(db, channel.id)
+        RollupRepository.delete_channel(db, channel.id)
+        bucket_read_cache.invalidate(db, channel.id)
+        bucket_latest_values.replace(db, channel.id, None)
+        CoverageRepository.drop_index(db, channel.id)
+        return result
+
+    @staticmethod
+    def find_orphaned_tables(db: Session) -> List[str]:
+        """
+        List the bucket tables no channel maps to.
+
+        The catalog is read before the channels, so a table created for a
+        new channel in the meantime always finds its channel.
+        """
+        if get_storage_backend() != STORAGE_TABLES:
+            return []
+
+        bucket_registry.load()
+        tables = set(bucket_registry.table_names())
+        expected = {
+            bucket_table_name(well_name, channel_name)
+            for well_name, channel_name in db.query(Well.name, ChannelData.name).join(ChannelData.well)
+        }
+        return sorted(tables - expected)
+
+    @staticmethod
+    def sweep(db: Session, mode: Optional[str] = None, dry_run: bool = False) -> List[Dict[str, Any]]:
+        """
+        Drop or archive every orphaned bucket table, committing each one on its own.
+
+        Args:
+            db: Database session
+            mode: "drop" or "archive", BUCKET_ORPHAN_MODE by default
+            dry_run: Only list the orphaned tables
+
+        Returns:
+            One dict per orphaned table with the mode applied and the archive table name
+        """
+        mode = mode or settings.BUCKET_ORPHAN_MODE
+        BucketLifecycleRepository._check_mode(mode)
+
+        results = []
+        for table_name in BucketLifecycleRepository.find_orphaned_tables(db):
+            result = {"table": table_name, "mode": mode, "archived_as": None}
+            if not dry_run:
+                try:
+                    result["archived_as"] = BucketLifecycleRepository._reclaim_table(db, table_name, mode)
+                    db.commit()
+                except Exception as e:
+                    db.rollback()
+                    print(f"Reclaiming orphaned bucket table '{table_name}' failed: {e}")
+                    continue
+            results.append(result)
+        return results
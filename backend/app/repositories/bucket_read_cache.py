@@ -0,0 +1,350 @@
+"""
+Cache of encoded statistics and range reads, invalidated by the writes
+that touch their range.
+
+Entries are keyed by channel id and the read's parameters, and remember the
+time range they cover, None for an open end. Write paths record the range
+they wrote on their session with `invalidate`; once the transaction commits,
+only the channel's entries overlapping that range are evicted. Every
+eviction also bumps the channel's version: a read computed while a write
+committed is not cached, as it may predate the write.
+
+The "memory" backend is a per-process LRU bounded in entries and bytes; it
+only sees the writes of its own process, so a write committed by another
+worker or a script is only picked up once the entry expires. The "redis"
+backend, which requires the optional `redis` package, is shared by every
+worker, its memory being bounded by the server's own policy. Entries of
+either backend expire after READ_CACHE_TTL_SECONDS. Backend failures are
+counted and the read is served uncached.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from time import monotonic
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy import event # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+
+try:
+    import redis # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    redis = None
+
+from app.core.config import settings
+from app.repositories.bucket_bulk_writer import to_naive_utc
+
+CACHE_BACKEND_MEMORY = "memory"
+CACHE_BACKEND_REDIS = "redis"
+CACHE_BACKENDS = (CACHE_BACKEND_MEMORY, CACHE_BACKEND_REDIS)
+
+# Response header telling whether a read was served from the cache
+CACHE_STATUS_HEADER = "X-Cache"
+
+# Session.info key of the ranges a transaction wrote, evicted once it commits
+_PENDING_KEY = "read_cache_invalidations"
+
+# [start, end] time range, None for an open end
+Range = Tuple[Optional[datetime], Optional[datetime]]
+
+
+class CachedRead(NamedTuple):
+    """Encoded body of a read, with its media type and headers"""
+    content: bytes
+    media_type: str
+    headers: Dict[str, str]
+
+
+def cache_key(kind: str, **params: Any) -> str:
+    """Key of a read of some kind from its parameters"""
+    return f"{kind}:{json.dumps(params, sort_keys=True, default=str)}"
+
+
+def _normalize(span: Range) -> Range:
+    return tuple(None if time is None else to_naive_utc(time) for time in span)
+
+
+def _overlaps(entry: Range, written: Range) -> bool:
+    entry_start, entry_end = entry
+    written_start, written_end = written
+    return (
+        (entry_start is None or written_end is None or entry_start <= written_end)
+        and (entry_end is None or written_start is None or written_start <= entry_end)
+    )
+
+
+class _MemoryStore:
+    """LRU entries of this process, bounded in number and total size and expiring after `ttl_seconds`"""
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        # (value, range, size, expiry) per (channel id, key)
+        self._entries: "OrderedDict[Tuple[int, str], Tuple[CachedRead, Range, int, float]]" = OrderedDict()
+        self._keys_by_channel: Dict[int, Set[str]] = {}
+        self._versions: Dict[int, int] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, channel_id: int, key: str) -> Optional[CachedRead]:
+        with self._lock:
+            entry = self._entries.get((channel_id, key))
+            if entry is None:
+                return None
+            if entry[3] <= monotonic():
+                self._remove(channel_id, key)
+                return None
+            self._entries.move_to_end((channel_id, key))
+            return entry[0]
+
+    def version(self, channel_id: int) -> int:
+        with self._lock:
+            return self._versions.get(channel_id, 0)
+
+    def _remove(self, channel_id: int, key: str) -> None:
+        _, _, size, _ = self._entries.pop((channel_id, key))
+        self._bytes -= size
+        keys = self._keys_by_channel[channel_id]
+        keys.discard(key)
+        if not keys:
+            del self._keys_by_channel[channel_id]
+
+    def put(self, channel_id: int, key: str, span: Range, value: CachedRead, version: int) -> Optional[int]:
+        """Store an entry unless the channel changed since `version`, returning the entries evicted for room"""
+        size = len(value.content) + len(key)
+        if size > self.max_bytes:
+            return 0
+        with self._lock:
+            if self._versions.get(channel_id, 0) != version:
+                return None
+            if (channel_id, key) in self._entries:
+                self._remove(channel_id, key)
+            evicted = 0
+            while self._entries and (len(self._entries) >= self.max_entries or self._bytes + size > self.max_bytes):
+                (old_channel_id, old_key), _ = next(iter(self._entries.items()))
+                self._remove(old_channel_id, old_key)
+                evicted += 1
+            self._entries[(channel_id, key)] = (value, span, size, monotonic() + self.ttl_seconds)
+            self._keys_by_channel.setdefault(channel_id, set()).add(key)
+            self._bytes += size
+            return evicted
+
+    def invalidate(self, channel_id: int, written: Range) -> int:
+        """Evict a channel's entries overlapping a written range, returning how many"""
+        with self._lock:
+            self._versions[channel_id] = self._versions.get(channel_id, 0) + 1
+            stale = [
+                key for key in self._keys_by_channel.get(channel_id, ())
+                if _overlaps(self._entries[(channel_id, key)][1], written)
+            ]
+            for key in stale:
+                self._remove(channel_id, key)
+            return len(stale)
+
+    def size(self) -> Tuple[Optional[int], Optional[int]]:
+        with self._lock:
+            return len(self._entries), self._bytes
+
+
+class _RedisStore:
+    """
+    Entries shared by every worker through Redis: a hash per entry, a hash
+    per channel mapping its entries to their range, and a version counter
+    per channel, compared in a WATCH transaction before storing.
+    """
+
+    def __init__(self, url: str, ttl_seconds: int, prefix: str = "well-explorer:read-cache"):
+        self._client = redis.Redis.from_url(url)
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+
+    def _channel_key(self, channel_id: int, name: str) -> str:
+        return f"{self.prefix}:{channel_id}:{name}"
+
+    def _entry_key(self, channel_id: int, digest: str) -> str:
+        return self._channel_key(channel_id, f"entry:{digest}")
+
+    @staticmethod
+    def _digest(key: str) -> str:
+        return hashlib.sha1(key.encode()).hexdigest()
+
+    @staticmethod
+    def _encode_range(span: Range) -> str:
+        return "|".join("" if time is None else time.isoformat() for time in span)
+
+    @staticmethod
+    def _decode_range(encoded: bytes) -> Range:
+        return tuple(datetime.fromisoformat(time) if time else None for time in encoded.decode().split("|"))
+
+    def get(self, channel_id: int, key: str) -> Optional[CachedRead]:
+        content, media_type, headers = self._client.hmget(
+            self._entry_key(channel_id, self._digest(key)), "content", "media_type", "headers"
+        )
+        if content is None:
+            return None
+        return CachedRead(content, media_type.decode(), json.loads(headers))
+
+    def version(self, channel_id: int) -> int:
+        return int(self._client.get(self._channel_key(channel_id, "version")) or 0)
+
+    def put(self, channel_id: int, key: str, span: Range, value: CachedRead, version: int) -> Optional[int]:
+        digest = self._digest(key)
+        entry_key, ranges_key = self._entry_key(channel_id, digest), self._channel_key(channel_id, "ranges")
+        version_key = self._channel_key(channel_id, "version")
+        with self._client.pipeline() as pipe:
+            try:
+                pipe.watch(version_key)
+                if int(pipe.get(version_key) or 0) != version:
+                    return None
+                pipe.multi()
+                pipe.hset(entry_key, mapping={
+                    "content": value.content, "media_type": value.media_type, "headers": json.dumps(value.headers)
+                })
+                pipe.expire(entry_key, self.ttl_seconds)
+                pipe.hset(ranges_key, digest, self._encode_range(span))
+                pipe.expire(ranges_key, self.ttl_seconds)
+                pipe.execute()
+            except redis.WatchError:
+                return None
+        return 0
+
+    def invalidate(self, channel_id: int, written: Range) -> int:
+        ranges_key = self._channel_key(channel_id, "ranges")
+        self._client.incr(self._channel_key(channel_id, "version"))
+        stale = [
+            digest.decode() for digest, span in self._client.hgetall(ranges_key).items()
+            if _overlaps(self._decode_range(span), written)
+        ]
+        if stale:
+            with self._client.pipeline() as pipe:
+                pipe.delete(*(self._entry_key(channel_id, digest) for digest in stale))
+                pipe.hdel(ranges_key, *stale)
+                pipe.execute()
+        return len(stale)
+
+    def size(self) -> Tuple[Optional[int], Optional[int]]:
+        return None, None
+
+
+class BucketReadCache:
+    """Read-through cache of encoded reads with hit, miss and eviction counters"""
+
+    def __init__(self, store, backend: str, enabled: bool = True):
+        self.store = store
+        self.backend = backend
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+        self._discarded = 0
+        self._errors = 0
+
+    def _count(self, counter: str, amount: int = 1) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def read_through(
+        self, channel_id: int, key: str, span: Range, compute: Callable[[], CachedRead]
+    ) -> Tuple[CachedRead, bool]:
+        """
+        Serve a read of a channel's [start, end] range from the cache, or
+        compute and cache it. Nothing is cached when `compute` raises.
+
+        Returns:
+            The read and whether it came from the cache
+        """
+        if not self.enabled:
+            return compute(), False
+
+        try:
+            cached = self.store.get(channel_id, key)
+            version = self.store.version(channel_id) if cached is None else None
+        except Exception as e:
+            self._count("_errors")
+            print(f"Read cache lookup failed: {e}")
+            return compute(), False
+        if cached is not None:
+            self._count("_hits")
+            return cached, True
+
+        self._count("_misses")
+        value = compute()
+        try:
+            evicted = self.store.put(channel_id, key, _normalize(span), value, version)
+        except Exception as e:
+            self._count("_errors")
+            print(f"Read cache store failed: {e}")
+            return value, False
+        if evicted is None:
+            self._count("_discarded")
+        else:
+            self._count("_evictions", evicted)
+        return value, False
+
+    def invalidate(
+        self, db: Session, channel_id: int, start: Optional[datetime] = None, end: Optional[datetime] = None
+    ) -> None:
+        """
+        Evict the channel's entries overlapping [start, end] once the session's
+        transaction commits, or drop the eviction if it rolls back
+        """
+        if self.enabled:
+            db.info.setdefault(_PENDING_KEY, []).append((channel_id, _normalize((start, end))))
+
+    def evict(self, channel_id: int, written: Range) -> None:
+        """Evict the channel's entries overlapping a range right away"""
+        try:
+            self._count("_invalidations", self.store.invalidate(channel_id, written))
+        except Exception as e:
+            self._count("_errors")
+            print(f"Read cache invalidation of channel {channel_id} failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        entries, size = self.store.size()
+        with self._lock:
+            return {
+                "backend": self.backend,
+                "enabled": self.enabled,
+                "entries": entries,
+                "bytes": size,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+                "discarded": self._discarded,
+                "errors": self._errors,
+            }
+
+
+def _create_store(backend: str):
+    if backend == CACHE_BACKEND_MEMORY:
+        return _MemoryStore(
+            settings.READ_CACHE_MAX_ENTRIES, settings.READ_CACHE_MAX_MB * 1024 * 1024, settings.READ_CACHE_TTL_SECONDS
+        )
+    if backend == CACHE_BACKEND_REDIS:
+        if redis is None:
+            raise RuntimeError("The redis read cache backend requires the 'redis' package")
+        return _RedisStore(settings.READ_CACHE_REDIS_URL, settings.READ_CACHE_TTL_SECONDS)
+    raise ValueError(f"Unknown read cache backend '{backend}', expected one of {CACHE_BACKENDS}")
+
+
+bucket_read_cache = BucketReadCache(
+    _create_store(settings.READ_CACHE_BACKEND), settings.READ_CACHE_BACKEND, settings.READ_CACHE_ENABLED
+)
+
+
+@event.listens_for(Session, "after_commit")
+def _evict_committed_writes(session: Session) -> None:
+    written: List[Tuple[int, Range]] = session.info.pop(_PENDING_KEY, [])
+    for channel_id, span in written:
+        bucket_read_cache.evict(channel_id, span)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_rolled_back_writes(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -1,14 +1,256 @@
-from typing import List, Optional, Dict, Any
-from datetime import datetime
-from sqlalchemy.orm import Session # type: ignore
-from sqlalchemy import func, inspect # type: ignore
+from typing import Iterable, Iterator, List, Optional, Dict, Any, Sequence, Tuple
+from datetime import datetime, timedelta
+import numpy as np # type: ignore
+from sqlalchemy.orm import Session, contains_eager # type: ignore
+from sqlalchemy import delete, func, inspect, or_, select, text # type: ignore
+from sqlalchemy.exc import IntegrityError # type: ignore
 
-from app.models.bucket import get_bucket_model
+from app.core import sketch as sketches
+from app.core.config import settings
+from app.core.cursor import decode_cursor, encode_cursor
+from app.core.sketch import Sketch
+from app.core.tier_planner import RAW_TIER, RAW_TIER_NAME, plan, served_tiers
+from app.models.bucket import (
+    BucketStore,
+    bucket_registry,
+    discard_bucket_table,
+    ensure_points_partitions,
+    get_bucket_store,
+    get_bucket_table_by_names,
+    get_channel_store,
+    has_unique_time_index,
+    mark_unique_time_index,
+    points_table
+)
 from app.models.channel_data import ChannelData
+from app.models.latest_value import ChannelLatestValue
 from app.models.well import Well
+from app.repositories.bucket_bulk_writer import CONFLICT_OVERWRITE, BucketBulkWriter, to_naive_utc
+from app.repositories.bucket_chunk_repository import BucketChunkRepository, NO_ROW_ID
+from app.repositories.bucket_latest_values import bucket_latest_values
+from app.repositories.bucket_read_cache import bucket_read_cache
+from app.repositories.channel_data_repository import ChannelDataRepository
+from app.repositories.coverage_repository import CoverageDelta, CoverageRepository
+from app.repositories.rollup_repository import RESOLUTION_NAMES, RollupDelta, RollupRepository
 from app.schemas.bucket_schema import BucketDataCreate, BucketDataBatch
 
+# Percentiles reported by default, and bins of the value histogram
+DEFAULT_PERCENTILES = (50.0, 95.0, 99.0)
+DEFAULT_HISTOGRAM_BINS = 20
+
+# Raw points read and sketched at a time
+SKETCH_BATCH_POINTS = 100000
+
+_MICROSECOND = timedelta(microseconds=1)
+
+class DuplicateTimestampError(ValueError):
+    """Raised when a write hits a timestamp that is already stored in the bucket"""
+
+
+def parse_percentiles(percentiles: str) -> List[float]:
+    """Validate a comma-separated list of percentiles between 0 and 100, keeping their order"""
+    try:
+        values = list(dict.fromkeys(float(value) for value in percentiles.split(",") if value.strip()))
+    except ValueError:
+        raise ValueError(f"Invalid percentiles '{percentiles}', expected numbers between 0 and 100")
+    if not values or any(not 0 <= value <= 100 for value in values):
+        raise ValueError(f"Invalid percentiles '{percentiles}', expected numbers between 0 and 100")
+    return values
+
+
 class BucketRepository:
+    @staticmethod
+    def _check_conflict_policy(store: BucketStore, on_conflict: Optional[str]) -> None:
+        """Conflict policies rely on the bucket's unique time index"""
+        if on_conflict and not store.unique_time:
+            raise ValueError(
+                f"Bucket '{store.name}' does not enforce unique timestamps yet, "
+                "run the unique time index migration before using a conflict policy"
+            )
+
+    @staticmethod
+    def _ensure_partitions(
+        db: Session, store: BucketStore, points: Iterable[Tuple[datetime, float]]
+    ) -> Iterable[Tuple[datetime, float]]:
+        """
+        Create the monthly partitions a write to the partitioned points table
+        falls in before it runs, so none of its points lands in the default
+        partition. The points are materialized to find their range; every
+        caller writes bounded chunks.
+        """
+        if not store.shared:
+            return points
+        points = points if isinstance(points, list) else list(points)
+        if points:
+            times = [to_naive_utc(time) for time, _ in points]
+            ensure_points_partitions(db.connection(), min(times), max(times))
+        return points
+
+    @staticmethod
+    def _track_write(
+        db: Session, store: BucketStore, points: Iterable[Tuple[datetime, float]]
+    ) -> Tuple[Iterable[Tuple[datetime, float]], RollupDelta, Optional[CoverageDelta]]:
+        """
+        Pass the points of a write through the deltas of everything derived
+        from them, as they stream to the bulk writer. Returns the points to
+        write and the deltas to give `_apply_write` once they are.
+        """
+        delta = RollupDelta()
+        if settings.ROLLUPS_ENABLED:
+            points = delta.track(points)
+        coverage = CoverageRepository.start_write(db, store.channel_id)
+        if coverage:
+            points = coverage.track(points)
+        return points, delta, coverage
+
+    @staticmethod
+    def _apply_write(
+        db: Session,
+        store: BucketStore,
+        result: Dict[str, Any],
+        delta: RollupDelta,
+        coverage: Optional[CoverageDelta],
+        on_conflict: Optional[str]
+    ) -> None:
+        """
+        Update everything derived from a channel's points after a bulk write,
+        in its transaction. The channel's date range is left to the caller,
+        which may widen several at once.
+        """
+        if not result["count"]:
+            return
+        if settings.ROLLUPS_ENABLED:
+            RollupRepository.apply_write(db, store, delta.rows(), delta.sketch_rows(), on_conflict)
+        bucket_read_cache.invalidate(db, store.channel_id, result["data_from"], result["data_to"])
+        bucket_latest_values.advance(
+            db, store.channel_id, result["data_to"], result["latest_value"], on_conflict == CONFLICT_OVERWRITE
+        )
+        if coverage:
+            CoverageRepository.apply_write(db, store.channel_id, coverage)
+
+    @staticmethod
+    def _rows_query(
+        store: BucketStore,
+        start_date: Optional[datetime],
+        end_date: Optional[datetime],
+        after: Optional[Tuple[datetime, int]] = None
+    ):
+        """
+        Query of the uncompressed (id, time, value) rows of a store in time
+        order. With `after`, a (time, id) key, only the rows ordered after it
+        are selected, seeking through the time index.
+        """
+        bucket_table = store.table
+        
+        # Build the query
+        query = select(bucket_table.c.id, bucket_table.c.time, bucket_table.c.value).where(*store.criteria())
+        
+        if start_date:
+            query = query.where(bucket_table.c.time >= start_date)
+        if end_date:
+            query = query.where(bucket_table.c.time <= end_date)
+        
+        # Timestamps only need the id to break ties where they aren't unique
+        order = [bucket_table.c.time] if store.unique_time else [bucket_table.c.time, bucket_table.c.id]
+        if after and store.unique_time:
+            query = query.where(bucket_table.c.time > after[0])
+        elif after:
+            query = query.where(
+                bucket_table.c.time >= after[0],
+                or_(bucket_table.c.time > after[0], bucket_table.c.id > after[1])
+            )
+        return query.order_by(*order)
+
+    @staticmethod
+    def _select_rows(
+        db: Session,
+        store: BucketStore,
+        start_date: Optional[datetime],
+        end_date: Optional[datetime],
+        skip: int,
+        limit: Optional[int],
+        after: Optional[Tuple[datetime, int]] = None
+    ) -> List[Any]:
+        """Select the uncompressed rows of `_rows_query`, all of them without a limit"""
+        query = BucketRepository._rows_query(store, start_date, end_date, after)
+        
+        # Execute the query with pagination
+        return db.execute(query.offset(skip).limit(limit)).all()
+
+    @staticmethod
+    def _rows_to_columns(rows: List[Any]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        if not rows:
+            return np.array([], dtype=np.int64), np.array([], dtype="datetime64[us]"), np.array([], dtype=np.float64)
+        
+        ids, times, values = zip(*rows)
+        return (
+            np.fromiter(ids, dtype=np.int64, count=len(rows)),
+            np.array(times, dtype="datetime64[us]"),
+            np.fromiter(values, dtype=np.float64, count=len(rows)),
+        )
+
+    @staticmethod
+    def _read_merged(
+        db: Session,
+        store: BucketStore,
+        start_date: Optional[datetime],
+        end_date: Optional[datetime],
+        skip: int,
+        limit: int,
+        after: Optional[Tuple[datetime, int]] = None
+    ) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        Read a page of points across compressed chunks and rows, or None when
+        no chunk overlaps the range and the rows can be paged on their own.
+        """
+        chunk_start = start_date
+        if after:
+            # A compressed point at the cursor's time was either on a page already
+            # or gave way to a row with the same timestamp; times are whole microseconds
+            chunk_start = max(start_date or after[0], after[0] + timedelta(microseconds=1))
+        chunk_times, chunk_values = BucketChunkRepository.read_columns(
+            db, store.channel_id, chunk_start, end_date, max_points=skip + limit
+        )
+        if not len(chunk_times):
+            return None
+        
+        # The first skip + limit points of each source hold the page
+        rows = BucketRepository._select_rows(db, store, start_date, end_date, 0, skip + limit, after)
+        ids, times, values = BucketChunkRepository.merge(
+            *BucketRepository._rows_to_columns(rows), chunk_times, chunk_values
+        )
+        return ids[skip:skip + limit], times[skip:skip + limit], values[skip:skip + limit]
+
+    @staticmethod
+    def _read_page(
+        db: Session,
+        store: BucketStore,
+        start_date: Optional[datetime],
+        end_date: Optional[datetime],
+        skip: int,
+        limit: int,
+        cursor: Optional[str]
+    ) -> Tuple[Tuple[np.ndarray, np.ndarray, np.ndarray], Optional[str]]:
+        """
+        Read a page of points after `skip` points, counted from the cursor's
+        position when one is given, and the cursor of the next page, None on
+        the last page. One point past the page is read to tell whether more follow.
+        """
+        after = decode_cursor(cursor) if cursor else None
+
+        merged = BucketRepository._read_merged(db, store, start_date, end_date, skip, limit + 1, after)
+        if merged is not None:
+            ids, times, values = merged
+        else:
+            rows = BucketRepository._select_rows(db, store, start_date, end_date, skip, limit + 1, after)
+            ids, times, values = BucketRepository._rows_to_columns(rows)
+
+        next_cursor = None
+        if len(ids) > limit:
+            ids, times, values = ids[:limit], times[:limit], values[:limit]
+            next_cursor = encode_cursor(times[-1].astype(datetime), int(ids[-1]))
+        return (ids, times, values), next_cursor
+
     @staticmethod
     def get_data_points(
         db: Session, 
@@ -17,117 +259,231 @@ class BucketRepository:
         start_date: Optional[datetime] = None, 
         end_date: Optional[datetime] = None,
         skip: int = 0, 
-        limit: int = 1000
-    ) -> List[Dict[str, Any]]:
-        """Get time series data from a bucket for a specific well and channel"""
-        # Get the dynamic model for this bucket
-        BucketModel = get_bucket_model(well_name, channel_name)
-        
-        # Build the query
-        query = db.query(BucketModel)
+        limit: int = 1000,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Get time series data from a bucket for a specific well and channel.
+        Points packed into compressed chunks are decoded and merged with the
+        uncompressed rows; they have no id of their own.
+
+        Pages are read either by offset, with `skip`, or by keyset, passing the
+        cursor returned with the previous page: the cursor seeks straight to
+        the page through the time index, however deep it is.
+
+        Returns:
+            The points and the cursor of the next page, None on the last page
+        """
+        # Get the store for this bucket, rows are read without loading ORM objects
+        store = get_bucket_store(db, well_name, channel_name)
         
-        if start_date:
-            query = query.filter(BucketModel.time >= start_date)
-        if end_date:
-            query = query.filter(BucketModel.time <= end_date)
-            
-        # Execute the query with pagination
-        results = query.order_by(BucketModel.time).offset(skip).limit(limit).all()
+        (ids, times, values), next_cursor = BucketRepository._read_page(
+            db, store, start_date, end_date, skip, limit, cursor
+        )
         
         # Convert to dictionaries for easier serialization
-        return [{"id": item.id, "time": item.time, "value": item.value} for item in results]
+        data_points = [
+            {"id": None if id == NO_ROW_ID else id, "time": time, "value": value}
+            for id, time, value in zip(ids.tolist(), times.astype(object), values.tolist())
+        ]
+        return data_points, next_cursor
+
+    @staticmethod
+    def get_data_columns(
+        db: Session,
+        well_name: str,
+        channel_name: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        skip: int = 0,
+        limit: int = 1000,
+        cursor: Optional[str] = None
+    ) -> Tuple[Tuple[np.ndarray, np.ndarray, np.ndarray], Optional[str]]:
+        """
+        Get time series data as (ids, times, values) arrays, paged like
+        `get_data_points`, with the cursor of the next page.
+
+        Rows are read with a plain Core select and copied column by column
+        into `int64`, `datetime64[us]` and `float64` arrays, without building
+        ORM objects or a dict per point. Compressed points get `NO_ROW_ID`.
+        """
+        store = get_bucket_store(db, well_name, channel_name)
+        return BucketRepository._read_page(db, store, start_date, end_date, skip, limit, cursor)
+
+    @staticmethod
+    def iter_columns(
+        db: Session,
+        store: BucketStore,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        batch_size: int = 10000
+    ) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        Stream the points of a range as (ids, times, values) blocks, in time order.
+
+        Rows are fetched `batch_size` at a time through a server-side cursor
+        (a named cursor on PostgreSQL) and compressed chunks are decoded one
+        by one and merged in, so memory stays bounded whatever the size of the
+        range. The session must stay open until the stream is exhausted.
+        """
+        query = BucketRepository._rows_query(store, start_date, end_date)
+        result = db.execute(query, execution_options={"yield_per": batch_size})
+        blocks = (BucketRepository._rows_to_columns(rows) for rows in result.partitions())
+        chunks = BucketChunkRepository.iter_columns(db, store.channel_id, start_date, end_date)
+        yield from BucketChunkRepository.merge_stream(blocks, chunks)
 
     @staticmethod
     def create_data_point(
         db: Session, 
         well_name: str,
         channel_name: str,
-        data_point: BucketDataCreate
+        data_point: BucketDataCreate,
+        on_conflict: Optional[str] = None
     ) -> Dict[str, Any]:
         """Create a new data point in a bucket for a specific well and channel"""
-        # Get the dynamic model for this bucket
-        BucketModel = get_bucket_model(well_name, channel_name)
-        
-        # Create the data point
-        db_data_point = BucketModel(
-            time=data_point.time,
-            value=data_point.value
+        result = BucketRepository.write_points(
+            db, well_name, channel_name, [(data_point.time, data_point.value)],
+            return_ids=True, on_conflict=on_conflict
         )
-        db.add(db_data_point)
+        if result["data_points"]:
+            return result["data_points"][0]
         
-        # Find the channel to update its data_from and data_to
-        channel = db.query(ChannelData).join(Well).filter(
-            Well.name == well_name,
-            ChannelData.name == channel_name
+        # The point was skipped in favour of the stored one, return that instead
+        store = get_bucket_store(db, well_name, channel_name)
+        bucket_table = store.table
+        existing = db.execute(
+            select(bucket_table.c.id, bucket_table.c.time, bucket_table.c.value)
+            .where(*store.criteria(), bucket_table.c.time == result["data_from"])
         ).first()
+        return {"id": existing.id, "time": existing.time, "value": existing.value}
+
+    @staticmethod
+    def write_points(
+        db: Session,
+        well_name: str,
+        channel_name: str,
+        points: Iterable[Tuple[datetime, float]],
+        return_ids: bool = False,
+        commit: bool = True,
+        on_conflict: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Bulk write (time, value) points into a bucket and extend the channel's data range.
+
+        Points are streamed through the bulk writer (COPY on PostgreSQL,
+        multi-row INSERT elsewhere) and only materialized when ids are
+        requested, or with the partitioned backend, which creates the monthly
+        partitions they fall in first.
+        With a conflict policy, points whose timestamp is already stored are
+        skipped, overwrite the stored value or fail the write. The points are
+        folded into the channel's rollups and the latest point recorded in the
+        same transaction, as are its runs when the channel's coverage is
+        indexed, and the cached reads of the range written are evicted once
+        it commits.
+
+        Raises:
+            DuplicateTimestampError: If a timestamp already exists and no policy resolves it
+            ValueError: If a conflict policy is requested on a bucket without unique timestamps
+        """
+        # Get the store for this bucket
+        store = get_bucket_store(db, well_name, channel_name)
+        
+        BucketRepository._check_conflict_policy(store, on_conflict)
+        points = BucketRepository._ensure_partitions(db, store, points)
+        
+        points, delta, coverage = BucketRepository._track_write(db, store, points)
+        
+        try:
+            result = BucketBulkWriter.write(
+                db, store.table, points, return_ids=return_ids, on_conflict=on_conflict,
+                key_values=store.key_values
+            )
+        except IntegrityError:
+            db.rollback()
+            raise DuplicateTimestampError(
+                f"Bucket '{store.name}' already has data at one or more of these timestamps"
+            )
+        
+        # Extend the channel's data_from and data_to and fold the points into its rollups
+        if result["count"]:
+            ChannelDataRepository.extend_time_range(
+                db, well_name, channel_name, result["data_from"], result["data_to"]
+            )
+        BucketRepository._apply_write(db, store, result, delta, coverage, on_conflict)
         
-        if channel:
-            # Update channel data_to if needed
-            if not channel.data_to or data_point.time > channel.data_to:
-                channel.data_to = data_point.time
-            # Update channel data_from if needed
-            if not channel.data_from or data_point.time < channel.data_from:
-                channel.data_from = data_point.time
+        if commit:
+            db.commit()
         
+        return result
+
+    @staticmethod
+    def write_channels(
+        db: Session,
+        writes: List[Tuple[ChannelData, Iterable[Tuple[datetime, float]]]],
+        on_conflict: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Bulk write points for several channels in one transaction.
+
+        Each channel's points go to its bucket through the bulk writer, then
+        every channel's data_from/data_to is widened with a single statement
+        and everything is committed once, along with the updated rollups.
+        A duplicate timestamp in any channel rolls back the whole write.
+
+        Args:
+            db: Database session
+            writes: (channel with its well loaded, points) pairs
+            on_conflict: Conflict policy applied to every channel
+
+        Returns:
+            One write result per channel, in the order given
+        """
+        results = []
+        ranges = {}
+        try:
+            for channel, points in writes:
+                store = get_channel_store(channel)
+                BucketRepository._check_conflict_policy(store, on_conflict)
+                points = BucketRepository._ensure_partitions(db, store, points)
+                
+                points, delta, coverage = BucketRepository._track_write(db, store, points)
+                
+                result = BucketBulkWriter.write(
+                    db, store.table, points, on_conflict=on_conflict, key_values=store.key_values
+                )
+                results.append(result)
+                if result["count"]:
+                    ranges[channel.id] = (result["data_from"], result["data_to"])
+                BucketRepository._apply_write(db, store, result, delta, coverage, on_conflict)
+        except IntegrityError:
+            db.rollback()
+            raise DuplicateTimestampError(
+                f"Bucket '{store.name}' already has data at one or more of these timestamps"
+            )
+        except Exception:
+            db.rollback()
+            raise
+        
+        ChannelDataRepository.extend_time_ranges(db, ranges)
         db.commit()
-        db.refresh(db_data_point)
         
-        # Convert to dictionary for serialization
-        return {
-            "id": db_data_point.id,
-            "time": db_data_point.time,
-            "value": db_data_point.value
-        }
+        return results
 
     @staticmethod
     def create_data_points_batch(
         db: Session, 
         well_name: str,
         channel_name: str,
-        data_points: BucketDataBatch
-    ) -> List[Dict[str, Any]]:
+        data_points: BucketDataBatch,
+        return_ids: bool = False,
+        on_conflict: Optional[str] = None
+    ) -> Dict[str, Any]:
         """Create multiple data points in a bucket for a specific well and channel"""
-        # Get the dynamic model for this bucket
-        BucketModel = get_bucket_model(well_name, channel_name)
-        
-        # Find the channel to update its data_from and data_to
-        channel = db.query(ChannelData).join(Well).filter(
-            Well.name == well_name,
-            ChannelData.name == channel_name
-        ).first()
+        points = ((data_point.time, data_point.value) for data_point in data_points.data_points)
         
-        # Track earliest and latest times
-        earliest_time = None
-        latest_time = None
-        
-        # Create all data points
-        db_data_points = []
-        for data_point in data_points.data_points:
-            point = BucketModel(
-                time=data_point.time,
-                value=data_point.value
-            )
-            db.add(point)
-            db_data_points.append(point)
-            
-            # Track earliest and latest times
-            if earliest_time is None or data_point.time < earliest_time:
-                earliest_time = data_point.time
-            if latest_time is None or data_point.time > latest_time:
-                latest_time = data_point.time
-        
-        # Update channel data_from and data_to if needed
-        if channel and earliest_time:
-            if not channel.data_from or earliest_time < channel.data_from:
-                channel.data_from = earliest_time
-        if channel and latest_time:
-            if not channel.data_to or latest_time > channel.data_to:
-                channel.data_to = latest_time
-        
-        db.commit()
-        
-        # Convert to dictionaries for serialization
-        return [{"id": item.id, "time": item.time, "value": item.value} for item in db_data_points]
+        return BucketRepository.write_points(
+            db, well_name, channel_name, points, return_ids=return_ids, on_conflict=on_conflict
+        )
 
     @staticmethod
     def delete_data_point(
@@ -136,18 +492,53 @@ class BucketRepository:
         channel_name: str,
         data_point_id: int
     ) -> bool:
-        """Delete a specific data point from a bucket"""
-        # Get the dynamic model for this bucket
-        BucketModel = get_bucket_model(well_name, channel_name)
+        """
+        Delete a specific data point from a bucket. Only rows have an id,
+        compressed points are deleted by time with `delete_data_point_at`.
+        """
+        # Get the store for this bucket
+        store = get_bucket_store(db, well_name, channel_name)
         
-        # Find and delete the data point
-        db_data_point = db.query(BucketModel).filter(BucketModel.id == data_point_id).first()
-        if not db_data_point:
+        # Delete the data point
+        deleted = db.execute(
+            delete(store.table)
+            .where(*store.criteria(), store.table.c.id == data_point_id)
+            .returning(store.table.c.time)
+        ).first()
+        if not deleted:
             return False
-            
-        db.delete(db_data_point)
+        
+        BucketRepository._apply_delete(db, store, deleted.time)
         db.commit()
         return True
+
+    @staticmethod
+    def delete_data_point_at(db: Session, well_name: str, channel_name: str, time: datetime) -> int:
+        """
+        Delete the data point of a timestamp, whether stored as a row or in a
+        compressed chunk, returning how many points were deleted
+        """
+        time = to_naive_utc(time)
+        store = get_bucket_store(db, well_name, channel_name)
+        
+        deleted = db.execute(delete(store.table).where(*store.criteria(), store.table.c.time == time)).rowcount
+        deleted += BucketChunkRepository.delete_at(db, store.channel_id, time)
+        if not deleted:
+            return 0
+        
+        BucketRepository._apply_delete(db, store, time)
+        db.commit()
+        return deleted
+
+    @staticmethod
+    def _apply_delete(db: Session, store: BucketStore, time: datetime) -> None:
+        """Update everything derived from a channel's points after its point at `time` was deleted"""
+        if settings.ROLLUPS_ENABLED:
+            RollupRepository.refresh(db, store, [time.replace(second=0, microsecond=0)])
+        bucket_read_cache.invalidate(db, store.channel_id, time, time)
+        # The deleted point may have been the latest one
+        bucket_latest_values.replace(db, store.channel_id, BucketRepository.get_latest_point(db, store))
+        CoverageRepository.remove_point(db, store, time)
     
     @staticmethod
     def delete_all_bucket_data(
@@ -156,47 +547,294 @@ class BucketRepository:
         channel_name: str
     ) -> int:
         """Delete all data points from a bucket and return the count of deleted rows"""
-        # Get the dynamic model for this bucket
-        BucketModel = get_bucket_model(well_name, channel_name)
+        # Get the store for this bucket
+        store = get_bucket_store(db, well_name, channel_name)
         
-        # Delete all data points
-        result = db.query(BucketModel).delete()
+        # Delete all data points, compressed ones included, and their rollups
+        result = db.execute(delete(store.table).where(*store.criteria())).rowcount
+        result += BucketChunkRepository.count_points(db, store.channel_id)
+        BucketChunkRepository.delete_chunks(db, store.channel_id)
+        RollupRepository.delete_channel(db, store.channel_id)
+        bucket_read_cache.invalidate(db, store.channel_id)
+        bucket_latest_values.replace(db, store.channel_id, None)
+        CoverageRepository.delete_runs(db, store.channel_id)
         db.commit()
         return result
     
+    @staticmethod
+    def get_time_bounds(db: Session, store: BucketStore) -> Tuple[Optional[datetime], Optional[datetime]]:
+        """Earliest and latest stored point of a store, compressed ones included"""
+        bucket_table = store.table
+        rows = db.execute(
+            select(func.min(bucket_table.c.time), func.max(bucket_table.c.time)).where(*store.criteria())
+        ).first()
+        chunks = BucketChunkRepository.get_time_bounds(db, store.channel_id)
+        earliest = [time for time in (rows[0], chunks[0]) if time is not None]
+        latest = [time for time in (rows[1], chunks[1]) if time is not None]
+        return (min(earliest) if earliest else None, max(latest) if latest else None)
+
+    @staticmethod
+    def get_latest_point(db: Session, store: BucketStore) -> Optional[Tuple[datetime, float]]:
+        """Latest stored point of a store, compressed ones included, None when it has none"""
+        _, latest = BucketRepository.get_time_bounds(db, store)
+        if latest is None:
+            return None
+        point = None
+        for _, times, values in BucketRepository.iter_columns(db, store, latest, latest):
+            if len(values):
+                point = (latest, float(values[-1]))
+        return point
+
+    @staticmethod
+    def backfill_latest_values(db: Session) -> int:
+        """
+        Record the latest point of the channels holding points without a
+        latest value yet, such as those written before latest values were
+        kept, returning how many were recorded
+        """
+        channels = (
+            db.query(ChannelData)
+            .join(Well)
+            .options(contains_eager(ChannelData.well))
+            .outerjoin(ChannelLatestValue, ChannelLatestValue.channel_id == ChannelData.id)
+            .filter(ChannelData.data_to.isnot(None), ChannelLatestValue.channel_id.is_(None))
+            .all()
+        )
+        recorded = 0
+        for channel in channels:
+            latest = BucketRepository.get_latest_point(db, get_channel_store(channel))
+            if latest is not None:
+                bucket_latest_values.replace(db, channel.id, latest)
+                recorded += 1
+        db.commit()
+        return recorded
+
+    @staticmethod
+    def _sketch_range(
+        db: Session, store: BucketStore, start_date: Optional[datetime], end_date: Optional[datetime]
+    ) -> Tuple[Sketch, str]:
+        """
+        Sketch the values of [start_date, end_date]. Whole 1d and 1h intervals
+        are merged from their stored sketches in SQL, the partial hours at the
+        ends of the range sketched from the raw points, streamed block by
+        block (see tier_planner).
+
+        Returns:
+            The sketch and the tiers that served it
+        """
+        if start_date is None or end_date is None:
+            earliest, latest = BucketRepository.get_time_bounds(db, store)
+            start_date, end_date = start_date or earliest, end_date or latest
+        if start_date is None or end_date is None:
+            return sketches.empty(), RAW_TIER_NAME
+        start_date, end_date = to_naive_utc(start_date), to_naive_utc(end_date)
+        if start_date > end_date:
+            return sketches.empty(), RAW_TIER_NAME
+
+        coverage = RollupRepository.get_sketch_coverage(db, store.channel_id)
+        segments = plan(start_date, end_date + _MICROSECOND, max(coverage, default=RAW_TIER), coverage)
+
+        parts = []
+        for segment in segments:
+            if segment.tier != RAW_TIER:
+                parts.append(
+                    RollupRepository.select_sketch(db, store.channel_id, segment.tier, segment.start, segment.end)
+                )
+                continue
+            raw = sketches.empty()
+            for _, _, values in BucketRepository.iter_columns(
+                db, store, segment.start, segment.end - _MICROSECOND, SKETCH_BATCH_POINTS
+            ):
+                raw = sketches.merge([raw, sketches.from_values(values)])
+            parts.append(raw)
+        return sketches.merge(parts), served_tiers(segments, RESOLUTION_NAMES)
+
     @staticmethod
     def get_statistics(
         db: Session, 
         well_name: str,
         channel_name: str,
         start_date: Optional[datetime] = None, 
-        end_date: Optional[datetime] = None
+        end_date: Optional[datetime] = None,
+        percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+        histogram_bins: int = DEFAULT_HISTOGRAM_BINS
     ) -> Dict[str, Any]:
-        """Get statistics for a bucket's data"""
-        # Get the dynamic model for this bucket
-        BucketModel = get_bucket_model(well_name, channel_name)
+        """
+        Get statistics for a bucket's data.
+
+        min, max, avg and count are exact. stddev, the percentiles and the
+        histogram of the values come from the sketch of the range (see
+        app.core.sketch): stddev is exact too, percentiles are within
+        SKETCH_RELATIVE_ACCURACY of the value at their rank and histogram
+        counts are approximate near the bin edges. `tiers` lists the tiers
+        the sketch was served from.
+        """
+        # Get the store for this bucket
+        store = get_bucket_store(db, well_name, channel_name)
+        bucket_table = store.table
         
         # Build the query for statistics
-        query = db.query(
-            func.min(BucketModel.value).label("min"),
-            func.max(BucketModel.value).label("max"),
-            func.avg(BucketModel.value).label("avg"),
-            func.count(BucketModel.id).label("count")
-        )
+        query = select(
+            func.min(bucket_table.c.value).label("min"),
+            func.max(bucket_table.c.value).label("max"),
+            func.sum(bucket_table.c.value).label("sum"),
+            func.count(bucket_table.c.id).label("count")
+        ).where(*store.criteria())
         
         # Apply date filters if provided
         if start_date:
-            query = query.filter(BucketModel.time >= start_date)
+            query = query.where(bucket_table.c.time >= start_date)
         if end_date:
-            query = query.filter(BucketModel.time <= end_date)
+            query = query.where(bucket_table.c.time <= end_date)
             
         # Execute the query
-        result = query.first()
+        result = db.execute(query).first()
+        
+        # Combine with the points of the compressed chunks
+        compressed = BucketChunkRepository.get_statistics(db, store, start_date, end_date)
+        minimums = [value for value in (result.min, compressed["min"]) if value is not None]
+        maximums = [value for value in (result.max, compressed["max"]) if value is not None]
+        count = result.count + compressed["count"]
+        total = (result.sum or 0.0) + compressed["sum"]
+        
+        minimum = min(minimums) if minimums else None
+        maximum = max(maximums) if maximums else None
+        
+        # Read the distribution from the sketch of the range
+        distribution, tiers = BucketRepository._sketch_range(db, store, start_date, end_date)
+        estimates = sketches.quantiles(distribution, [percentile / 100 for percentile in percentiles])
+        histogram = []
+        if count:
+            edges, counts = sketches.histogram(distribution, minimum, maximum, histogram_bins)
+            histogram = [
+                {"lower": lower, "upper": upper, "count": bin_count}
+                for lower, upper, bin_count in zip(edges[:-1], edges[1:], counts)
+            ]
         
         # Return the statistics
         return {
-            "min": result.min,
-            "max": result.max,
-            "avg": result.avg,
-            "count": result.count
-        }
\ No newline at end of file
+            "min": minimum,
+            "max": maximum,
+            "avg": total / count if count else None,
+            "count": count,
+            "stddev": sketches.stddev(distribution),
+            "percentiles": {f"p{percentile:g}": estimate for percentile, estimate in zip(percentiles, estimates)},
+            "histogram": histogram,
+            "tiers": tiers
+        }
+    
+    @staticmethod
+    def migrate_unique_time_index(db: Session, table_name: str, keep: str = "first") -> int:
+        """
+        Deduplicate a bucket table and make its time index unique.
+
+        Dropping duplicates changes the values of their timestamps but not
+        the timestamps stored, so the channel's coverage runs still hold.
+        Everything derived from the values is brought up to date in the same
+        transaction: the channel's data_from/data_to, its cached reads over
+        the duplicated range, its latest value and the rollups and sketches
+        of the minutes that had duplicates.
+
+        Args:
+            db: Database session
+            table_name: Name of the bucket table
+            keep: Which row to keep per duplicated timestamp, the 'first' or 'last' inserted
+
+        Returns:
+            Number of duplicate rows removed
+        """
+        if keep not in ("first", "last"):
+            raise ValueError(f"keep must be 'first' or 'last', got '{keep}'")
+        if has_unique_time_index(table_name):
+            return 0
+        
+        preparer = db.get_bind().dialect.identifier_preparer
+        table = preparer.quote(table_name)
+        index = preparer.quote(f"ix_{table_name}_time")
+        
+        bucket_table = bucket_registry.get(table_name)
+        duplicated = db.execute(
+            select(bucket_table.c.time).group_by(bucket_table.c.time).having(func.count() > 1)
+        ).scalars().all()
+        
+        # Remove every row that has a sibling with the same timestamp inserted
+        # before it (keep first) or after it (keep last)
+        comparison = ">" if keep == "first" else "<"
+        removed = db.execute(text(
+            f"DELETE FROM {table} WHERE EXISTS ("
+            f"SELECT 1 FROM {table} AS other "
+            f"WHERE other.time = {table}.time AND {table}.id {comparison} other.id)"
+        )).rowcount
+        
+        db.execute(text(f"DROP INDEX IF EXISTS {index}"))
+        db.execute(text(f"CREATE UNIQUE INDEX {index} ON {table} (time)"))
+        
+        channel = next(
+            (
+                channel for channel in db.query(ChannelData).join(Well).options(contains_eager(ChannelData.well))
+                if channel.table_name == table_name
+            ),
+            None
+        )
+        if duplicated and channel is not None:
+            store = get_channel_store(channel)
+            channel.data_from, channel.data_to = BucketRepository.get_time_bounds(db, store)
+            bucket_read_cache.invalidate(db, channel.id, min(duplicated), max(duplicated))
+            bucket_latest_values.replace(db, channel.id, BucketRepository.get_latest_point(db, store))
+            if settings.ROLLUPS_ENABLED:
+                RollupRepository.refresh(db, store, {time.replace(second=0, microsecond=0) for time in duplicated})
+        db.commit()
+        
+        mark_unique_time_index(table_name)
+        return removed
+
+    @staticmethod
+    def migrate_to_partitioned(db: Session, channel: ChannelData, drop_source: bool = False) -> Dict[str, Any]:
+        """
+        Copy a channel's bucket table into the partitioned points table.
+
+        The monthly partitions covering the table's range are created first,
+        then its rows are copied with a single INSERT ... SELECT that skips
+        timestamps already present, so an interrupted migration can be rerun.
+        The copy is committed on its own; the source table is only dropped
+        once every row is accounted for.
+
+        Args:
+            db: Database session
+            channel: Channel to migrate, with its well loaded
+            drop_source: Drop the bucket table after a complete copy
+
+        Returns:
+            Dict with the source table, its row count, the rows copied and whether it was dropped
+        """
+        source = get_bucket_table_by_names(channel.well.name, channel.name)
+        if source is None:
+            return {"table": channel.table_name, "rows": 0, "copied": 0, "dropped": False}
+        
+        bounds = db.execute(select(func.min(source.c.time), func.max(source.c.time), func.count())).first()
+        if bounds[2]:
+            ensure_points_partitions(db.connection(), bounds[0], bounds[1])
+        
+        # Several rows per timestamp only survive in tables that predate the
+        # unique time index, the first inserted one is kept
+        source_name = db.get_bind().dialect.identifier_preparer.quote(source.name)
+        copied = db.execute(text(
+            f"INSERT INTO {points_table.name} (channel_id, time, value) "
+            f"SELECT :channel_id, time, value FROM {source_name} ORDER BY id "
+            "ON CONFLICT (channel_id, time) DO NOTHING"
+        ), {"channel_id": channel.id}).rowcount
+        db.commit()
+        
+        stored = db.execute(
+            select(func.count()).select_from(points_table).where(points_table.c.channel_id == channel.id)
+        ).scalar()
+        distinct_times = db.execute(select(func.count(source.c.time.distinct()))).scalar()
+        
+        dropped = False
+        if drop_source and stored >= distinct_times:
+            source.drop(db.connection())
+            db.commit()
+            discard_bucket_table(source.name)
+            dropped = True
+        
+        return {"table": source.name, "rows": bounds[2], "copied": copied, "dropped": dropped}
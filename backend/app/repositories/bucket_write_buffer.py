@@ -0,0 +1,242 @@
+import threading
+from time import monotonic
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import select # type: ignore
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.bucket import get_bucket_store
+from app.repositories.bucket_bulk_writer import to_naive_utc
+from app.repositories.bucket_repository import BucketRepository, DuplicateTimestampError
+
+# Acknowledge a point once it has been written and committed
+DURABILITY_FLUSH = "flush"
+# Acknowledge a point as soon as it has been buffered
+DURABILITY_ENQUEUE = "enqueue"
+
+# Buffers are keyed by (well_name, channel_name, conflict policy)
+BufferKey = Tuple[str, str, Optional[str]]
+
+# Flushes are serialized per (well_name, channel_name)
+ChannelKey = Tuple[str, str]
+
+
+class WriteBufferFullError(Exception):
+    """Raised when the buffer holds as many unwritten points as it may"""
+
+
+class _PendingPoint:
+    __slots__ = ("time", "value", "future")
+
+    def __init__(self, time: datetime, value: float):
+        self.time = to_naive_utc(time)
+        self.value = value
+        self.future: Future = Future()
+
+
+class _ChannelBuffer:
+    __slots__ = ("points", "deadline")
+
+    def __init__(self, deadline: float):
+        self.points: List[_PendingPoint] = []
+        self.deadline = deadline
+
+
+class BucketWriteBuffer:
+    """
+    Coalesces single-point writes into per-channel bulk writes.
+
+    Points are buffered per channel and flushed as one bulk insert and one
+    channel range update when a channel reaches `max_points` or its oldest
+    point has waited `max_delay_seconds`. Each enqueued point gets a future
+    resolved with the stored row (or the write error) once its flush commits.
+    A channel has at most one flush running, so its buffers commit in the
+    order they were filled and the last point written wins an overwrite.
+    """
+
+    def __init__(
+        self,
+        max_points: int,
+        max_delay_seconds: float,
+        max_pending: int,
+        flush_workers: int,
+        return_rows: bool = True
+    ):
+        self.max_points = max_points
+        self.max_delay_seconds = max_delay_seconds
+        self.max_pending = max_pending
+        self.return_rows = return_rows
+        self._flush_workers = flush_workers
+        self._buffers: Dict[BufferKey, _ChannelBuffer] = {}
+        self._flushing: Set[ChannelKey] = set()
+        self._pending = 0
+        self._condition = threading.Condition()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def start(self) -> None:
+        """Start the background thread flushing due buffers"""
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+        self._executor = ThreadPoolExecutor(max_workers=self._flush_workers, thread_name_prefix="write-buffer")
+        self._thread = threading.Thread(target=self._run, name="write-buffer-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Flush everything still buffered and stop the background thread"""
+        with self._condition:
+            if not self._running:
+                return
+            self._running = False
+            self._condition.notify()
+        self._thread.join()
+        self._executor.shutdown(wait=True)
+
+    def enqueue(
+        self, well_name: str, channel_name: str, time: datetime, value: float, on_conflict: Optional[str] = None
+    ) -> Future:
+        """
+        Buffer a point for its channel.
+
+        Returns:
+            Future resolved with the stored row dict once the point is committed
+
+        Raises:
+            WriteBufferFullError: If too many points are waiting to be written
+        """
+        point = _PendingPoint(time, value)
+        key = (well_name, channel_name, on_conflict)
+
+        with self._condition:
+            if not self._running:
+                raise RuntimeError("Write buffer is not running")
+            if self._pending >= self.max_pending:
+                raise WriteBufferFullError(f"Write buffer is full ({self._pending} points pending)")
+
+            buffer = self._buffers.get(key)
+            is_new = buffer is None
+            if is_new:
+                buffer = self._buffers[key] = _ChannelBuffer(monotonic() + self.max_delay_seconds)
+            buffer.points.append(point)
+            self._pending += 1
+
+            # Wake the scheduler for a new deadline or a full buffer
+            if is_new or len(buffer.points) >= self.max_points:
+                self._condition.notify()
+
+        return point.future
+
+    def _take_due(self, force: bool) -> List[Tuple[BufferKey, List[_PendingPoint]]]:
+        """
+        Detach the buffers that are full or past their deadline, at most one
+        per channel and none of a channel still being flushed. Requires the lock.
+        """
+        now = monotonic()
+        due = []
+        for key, buffer in self._buffers.items():
+            channel = key[:2]
+            if channel in self._flushing:
+                continue
+            if force or len(buffer.points) >= self.max_points or buffer.deadline <= now:
+                self._flushing.add(channel)
+                due.append(key)
+        return [(key, self._buffers.pop(key).points) for key in due]
+
+    def _next_deadline(self) -> Optional[float]:
+        """Earliest deadline of a buffer that can be flushed, the others wait for their channel's flush"""
+        deadlines = [
+            buffer.deadline for key, buffer in self._buffers.items() if key[:2] not in self._flushing
+        ]
+        return min(deadlines) if deadlines else None
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                batches = self._take_due(force=not self._running)
+                # Stopping waits for the buffers held back by their channel's flush
+                while not batches and (self._running or self._buffers):
+                    deadline = self._next_deadline()
+                    timeout = None if deadline is None else max(deadline - monotonic(), 0)
+                    self._condition.wait(timeout)
+                    batches = self._take_due(force=not self._running)
+                stopping = not self._running and not self._buffers
+
+            for key, points in batches:
+                self._executor.submit(self._flush, key, points)
+
+            if stopping:
+                return
+
+    def _flush(self, key: BufferKey, points: List[_PendingPoint]) -> None:
+        """Write one channel's points in a single transaction and resolve their futures"""
+        well_name, channel_name, on_conflict = key
+        db = SessionLocal()
+        try:
+            try:
+                self._write(db, well_name, channel_name, on_conflict, points)
+            except DuplicateTimestampError:
+                # Isolate the offending points so the rest of the batch still lands
+                for point in points:
+                    try:
+                        self._write(db, well_name, channel_name, on_conflict, [point])
+                    except Exception as e:
+                        point.future.set_exception(e)
+        except Exception as e:
+            db.rollback()
+            print(f"Write buffer flush of {len(points)} points to '{well_name}/{channel_name}' failed: {e}")
+            for point in points:
+                if not point.future.done():
+                    point.future.set_exception(e)
+        finally:
+            db.close()
+            with self._condition:
+                self._pending -= len(points)
+                self._flushing.discard(key[:2])
+                # The channel's next buffer may be due already
+                self._condition.notify()
+
+    def _write(
+        self, db, well_name: str, channel_name: str, on_conflict: Optional[str], points: List[_PendingPoint]
+    ) -> None:
+        result = BucketRepository.write_points(
+            db, well_name, channel_name, [(point.time, point.value) for point in points],
+            return_ids=self.return_rows, on_conflict=on_conflict
+        )
+        if not self.return_rows:
+            for point in points:
+                point.future.set_result(None)
+            return
+
+        # Points skipped in favour of a stored row resolve to that row
+        rows = {row["time"]: row for row in result["data_points"]}
+        missing = {point.time for point in points} - rows.keys()
+        if missing:
+            store = get_bucket_store(db, well_name, channel_name)
+            bucket_table = store.table
+            stored = db.execute(
+                select(bucket_table.c.id, bucket_table.c.time, bucket_table.c.value)
+                .where(*store.criteria(), bucket_table.c.time.in_(missing))
+            )
+            rows.update({row.time: {"id": row.id, "time": row.time, "value": row.value} for row in stored})
+
+        for point in points:
+            point.future.set_result(rows.get(point.time))
+
+
+bucket_write_buffer = BucketWriteBuffer(
+    max_points=settings.WRITE_BUFFER_MAX_POINTS,
+    max_delay_seconds=settings.WRITE_BUFFER_MAX_DELAY_MS / 1000,
+    max_pending=settings.WRITE_BUFFER_MAX_PENDING,
+    flush_workers=settings.WRITE_BUFFER_FLUSH_WORKERS,
+    return_rows=settings.WRITE_BUFFER_DURABILITY == DURABILITY_FLUSH,
+)
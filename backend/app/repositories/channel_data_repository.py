@@ -1,12 +1,13 @@
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
-from sqlalchemy.orm import Session # type: ignore
-from sqlalchemy import func, desc # type: ignore
+from sqlalchemy.orm import Session, contains_eager # type: ignore
+from sqlalchemy import func, desc, update, select, case, or_, tuple_, values, column, bindparam, Integer, DateTime # type: ignore
 
 from app.models.channel_data import ChannelData
 from app.models.well import Well
 from app.schemas.channel_data_schema import ChannelDataCreate, ChannelDataUpdate
-from app.models.bucket import get_bucket_model
+from app.models.bucket import STORAGE_TABLES, bucket_table_name, get_bucket_table, get_storage_backend
+from app.repositories.bucket_lifecycle_repository import BucketLifecycleRepository
 
 class ChannelDataRepository:
     @staticmethod
@@ -42,6 +43,69 @@ class ChannelDataRepository:
             ChannelData.name == channel_name
         ).first()
 
+    @staticmethod
+    def get_channels_by_keys(
+        db: Session, channel_ids: List[int], name_pairs: List[Tuple[str, str]]
+    ) -> List[ChannelData]:
+        """
+        Get channels by id and by (well name, channel name) in a single query,
+        with their well loaded
+        """
+        conditions = []
+        if channel_ids:
+            conditions.append(ChannelData.id.in_(channel_ids))
+        if name_pairs:
+            conditions.append(tuple_(Well.name, ChannelData.name).in_(name_pairs))
+        if not conditions:
+            return []
+        
+        return (
+            db.query(ChannelData)
+            .join(Well)
+            .options(contains_eager(ChannelData.well))
+            .filter(or_(*conditions))
+            .all()
+        )
+
+    @staticmethod
+    def get_channels_by_name(
+        db: Session,
+        name: str,
+        regions: Optional[List[str]] = None,
+        statuses: Optional[List[str]] = None,
+        lift_types: Optional[List[str]] = None
+    ) -> List[ChannelData]:
+        """
+        Get the channels of a name across wells in a single query, with their
+        well loaded, keeping the wells of the given regions, statuses and lift
+        types only
+        """
+        query = (
+            db.query(ChannelData)
+            .join(Well)
+            .options(contains_eager(ChannelData.well))
+            .filter(ChannelData.name == name)
+        )
+        for attribute, allowed in ((Well.region, regions), (Well.status, statuses), (Well.lift_type, lift_types)):
+            if allowed:
+                query = query.filter(attribute.in_(allowed))
+        return query.order_by(Well.name).all()
+
+    @staticmethod
+    def get_channels_by_wells(
+        db: Session, well_ids: Optional[List[int]] = None, names: Optional[List[str]] = None
+    ) -> List[ChannelData]:
+        """
+        Get the channels of some wells, every well by default, in a single
+        query with their well loaded, keeping the given channel names only
+        """
+        query = db.query(ChannelData).join(Well).options(contains_eager(ChannelData.well))
+        if well_ids:
+            query = query.filter(Well.id.in_(well_ids))
+        if names:
+            query = query.filter(ChannelData.name.in_(names))
+        return query.order_by(Well.name, ChannelData.name).all()
+
     @staticmethod
     def create_channel(db: Session, channel: ChannelDataCreate) -> ChannelData:
         """Create a new channel for a well"""
@@ -70,7 +134,8 @@ class ChannelDataRepository:
         
         # Create the bucket table for this channel
         # This ensures the table exists when data is added
-        get_bucket_model(well.name, channel.name)
+        if get_storage_backend() == STORAGE_TABLES:
+            get_bucket_table(well.name, channel.name)
         
         return db_channel
 
@@ -92,8 +157,12 @@ class ChannelDataRepository:
                     f"Channel '{channel_update.name}' already exists for well ID {db_channel.well_id}"
                 )
             
-            # TODO: Handle renaming the bucket table if needed
-            # This would require database migration logic
+            # Rename the bucket table in the same transaction as the channel
+            BucketLifecycleRepository.rename_bucket(
+                db,
+                bucket_table_name(db_channel.well.name, db_channel.name),
+                bucket_table_name(db_channel.well.name, channel_update.name)
+            )
         
         update_data = channel_update.dict(exclude_unset=True)
         
@@ -106,14 +175,13 @@ class ChannelDataRepository:
 
     @staticmethod
     def delete_channel(db: Session, channel_id: int) -> bool:
-        """Delete a channel (note: this does not delete the bucket data)"""
+        """Delete a channel, dropping or archiving its bucket data as BUCKET_DELETE_MODE says"""
         db_channel = ChannelDataRepository.get_channel_by_id(db, channel_id)
         if not db_channel:
             return False
         
-        # TODO: Consider whether to delete the bucket data table
-        # This would require additional logic with the bucket factory
-            
+        BucketLifecycleRepository.release_bucket(db, db_channel)
+        
         db.delete(db_channel)
         db.commit()
         return True
@@ -137,6 +205,74 @@ class ChannelDataRepository:
         db.refresh(db_channel)
         return db_channel
     
+    @staticmethod
+    def extend_time_range(
+        db: Session, well_name: str, channel_name: str, earliest: datetime, latest: datetime
+    ) -> None:
+        """
+        Widen a channel's data_from and data_to to include a written time range.
+
+        Runs as a single UPDATE so concurrent writers can't lose each other's
+        bounds. The caller owns the transaction.
+        """
+        well_id = select(Well.id).where(Well.name == well_name).scalar_subquery()
+        db.execute(
+            update(ChannelData)
+            .where(ChannelData.well_id == well_id, ChannelData.name == channel_name)
+            .values(
+                data_from=case(
+                    (or_(ChannelData.data_from.is_(None), ChannelData.data_from > earliest), earliest),
+                    else_=ChannelData.data_from
+                ),
+                data_to=case(
+                    (or_(ChannelData.data_to.is_(None), ChannelData.data_to < latest), latest),
+                    else_=ChannelData.data_to
+                )
+            )
+            .execution_options(synchronize_session=False)
+        )
+    
+    @staticmethod
+    def extend_time_ranges(db: Session, ranges: Dict[int, Tuple[datetime, datetime]]) -> None:
+        """
+        Widen the data_from and data_to of several channels, keyed by channel id,
+        in a single statement. The caller owns the transaction.
+        """
+        if not ranges:
+            return
+        
+        if db.get_bind().dialect.name == "postgresql":
+            # UPDATE ... FROM (VALUES ...) joins every channel's range at once
+            written = values(
+                column("id", Integer), column("earliest", DateTime), column("latest", DateTime),
+                name="written_ranges"
+            ).data([(channel_id, earliest, latest) for channel_id, (earliest, latest) in ranges.items()])
+            channel_id, earliest, latest = written.c.id, written.c.earliest, written.c.latest
+            parameters = None
+        else:
+            # Other dialects run the same UPDATE once per channel as an executemany
+            channel_id, earliest, latest = bindparam("channel_id"), bindparam("earliest"), bindparam("latest")
+            parameters = [
+                {"channel_id": key, "earliest": first, "latest": last}
+                for key, (first, last) in ranges.items()
+            ]
+        
+        statement = (
+            update(ChannelData)
+            .where(ChannelData.id == channel_id)
+            .values(
+                data_from=case(
+                    (or_(ChannelData.data_from.is_(None), ChannelData.data_from > earliest), earliest),
+                    else_=ChannelData.data_from
+                ),
+                data_to=case(
+                    (or_(ChannelData.data_to.is_(None), ChannelData.data_to < latest), latest),
+                    else_=ChannelData.data_to
+                )
+            )
+        )
+        db.connection().execute(statement, parameters)
+    
     @staticmethod
     def get_channel_count_by_well_id(db: Session, well_id: int) -> int:
         """Get the count of channels for a specific well"""
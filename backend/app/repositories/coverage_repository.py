@@ -0,0 +1,399 @@
+"""
+Coverage index of channels: the contiguous runs of their points.
+
+A channel is indexed once it is given the interval its points are expected
+at. Consecutive points further apart than GAP_TOLERANCE sampling intervals
+end a run, and every point covers one sampling interval from its time, so a
+run covers [first point, last point + interval) and the spans between runs
+are the channel's gaps. Writes fold the runs of their points into the
+stored ones in the write's transaction, merging the runs they touch; deleting
+a point splits its run where it leaves a gap, and retention trims the runs
+it expires. Coverage and gaps of any range are then read from the runs
+alone, without reading a point.
+"""
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from datetime import datetime, timedelta
+import numpy as np # type: ignore
+from sqlalchemy import delete, func, insert, select, update # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+
+from app.models.bucket import BucketStore
+from app.models.coverage import ChannelCoverage, CoverageRun
+from app.repositories.bucket_bulk_writer import to_naive_utc
+from app.repositories.bucket_chunk_repository import BucketChunkRepository
+
+# Consecutive points further apart than this many sampling intervals leave a gap, a late point isn't an outage
+GAP_TOLERANCE = 1.5
+
+# Timestamps of a write held before being folded into runs
+COVERAGE_FLUSH_POINTS = 100000
+
+# Runs inserted per statement when an index is rebuilt
+_INSERT_BATCH = 10000
+
+# (first point, last point) of a run
+Run = Tuple[datetime, datetime]
+
+
+def runs_of(times: np.ndarray, max_gap: timedelta) -> List[Run]:
+    """Runs of some timestamps, in any order"""
+    if not len(times):
+        return []
+    times = np.unique(np.asarray(times, dtype="datetime64[us]"))
+    breaks = np.flatnonzero(np.diff(times) > np.timedelta64(max_gap, "us"))
+    starts = np.concatenate(([0], breaks + 1))
+    ends = np.concatenate((breaks, [len(times) - 1]))
+    return list(zip(times[starts].astype(object).tolist(), times[ends].astype(object).tolist()))
+
+
+def merge_runs(runs: Iterable[Run], max_gap: timedelta) -> List[Run]:
+    """Merge runs, in any order, that overlap or are at most `max_gap` apart"""
+    merged: List[Run] = []
+    for start, end in sorted(runs):
+        if merged and start - merged[-1][1] <= max_gap:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class CoverageDelta:
+    """
+    Runs of the points of one write, built while the points stream to the
+    bulk writer, in whatever order they come.
+    """
+
+    def __init__(self, max_gap: timedelta):
+        self.max_gap = max_gap
+        self._runs: List[Run] = []
+        self._pending: List[datetime] = []
+
+    def track(self, points: Iterable[Tuple[datetime, float]]) -> Iterator[Tuple[datetime, float]]:
+        """Pass (time, value) points through, collecting their timestamps"""
+        for time, value in points:
+            self._pending.append(to_naive_utc(time))
+            if len(self._pending) >= COVERAGE_FLUSH_POINTS:
+                self._flush()
+            yield time, value
+
+    def add_times(self, times: np.ndarray) -> None:
+        """Add the timestamps of a block of points written at once"""
+        self._runs = merge_runs(self._runs + runs_of(times, self.max_gap), self.max_gap)
+
+    def _flush(self) -> None:
+        if self._pending:
+            self.add_times(np.array(self._pending, dtype="datetime64[us]"))
+            self._pending = []
+
+    def runs(self, max_gap: timedelta) -> List[Run]:
+        """Runs of every point tracked, with the channel's maximum gap when the write applies them"""
+        self.max_gap = max_gap
+        self._flush()
+        return merge_runs(self._runs, max_gap)
+
+
+class CoverageRepository:
+    @staticmethod
+    def get_coverage(db: Session, channel_id: int) -> Optional[ChannelCoverage]:
+        """Get the coverage index settings of a channel"""
+        return db.query(ChannelCoverage).filter(ChannelCoverage.channel_id == channel_id).first()
+
+    @staticmethod
+    def get_coverages(db: Session, channel_ids: Sequence[int]) -> Dict[int, ChannelCoverage]:
+        """Get the coverage index settings of the channels that have one, by channel id"""
+        if not channel_ids:
+            return {}
+        coverages = db.query(ChannelCoverage).filter(ChannelCoverage.channel_id.in_(channel_ids)).all()
+        return {coverage.channel_id: coverage for coverage in coverages}
+
+    @staticmethod
+    def max_gap(coverage: ChannelCoverage) -> timedelta:
+        """Longest spacing of consecutive points of the same run"""
+        return timedelta(seconds=coverage.sampling_interval_seconds * GAP_TOLERANCE)
+
+    @staticmethod
+    def _lock(db: Session, channel_id: int) -> Optional[ChannelCoverage]:
+        """
+        Lock a channel's coverage settings until the transaction ends (a row
+        lock on PostgreSQL, SQLite serializing writers anyway), so
+        concurrent writers merge their runs one after the other
+        """
+        return (
+            db.query(ChannelCoverage)
+            .filter(ChannelCoverage.channel_id == channel_id)
+            .with_for_update()
+            .populate_existing()
+            .first()
+        )
+
+    @staticmethod
+    def start_write(db: Session, channel_id: int) -> Optional[CoverageDelta]:
+        """Delta collecting the runs of a write to a channel, None when its coverage isn't indexed"""
+        coverage = CoverageRepository.get_coverage(db, channel_id)
+        return CoverageDelta(CoverageRepository.max_gap(coverage)) if coverage else None
+
+    @staticmethod
+    def _stored_runs(db: Session, channel_id: int, start: datetime, end: datetime) -> List[Run]:
+        """Stored runs of a channel overlapping [start, end]"""
+        rows = db.execute(
+            select(CoverageRun.start_time, CoverageRun.end_time)
+            .where(
+                CoverageRun.channel_id == channel_id,
+                CoverageRun.end_time >= start,
+                CoverageRun.start_time <= end
+            )
+            .order_by(CoverageRun.start_time)
+        ).all()
+        return [(row.start_time, row.end_time) for row in rows]
+
+    @staticmethod
+    def _replace_runs(db: Session, channel_id: int, stored: List[Run], merged: List[Run]) -> None:
+        """Replace some stored runs with the runs they merged into, touching only the runs that changed"""
+        stored_ends = dict(stored)
+        inserted = []
+        for start, end in merged:
+            if start not in stored_ends:
+                inserted.append({"channel_id": channel_id, "start_time": start, "end_time": end})
+            elif stored_ends.pop(start) != end:
+                db.execute(
+                    update(CoverageRun)
+                    .where(CoverageRun.channel_id == channel_id, CoverageRun.start_time == start)
+                    .values(end_time=end)
+                )
+        if stored_ends:
+            db.execute(
+                delete(CoverageRun)
+                .where(CoverageRun.channel_id == channel_id, CoverageRun.start_time.in_(list(stored_ends)))
+            )
+        if inserted:
+            db.execute(insert(CoverageRun), inserted)
+
+    @staticmethod
+    def apply_write(db: Session, channel_id: int, delta: CoverageDelta) -> None:
+        """
+        Merge the runs of a write into the channel's stored runs, in the
+        write's transaction. Only the stored runs within the maximum gap of
+        the written ones are read and rewritten.
+        """
+        coverage = CoverageRepository._lock(db, channel_id)
+        if coverage is None:
+            return
+        max_gap = CoverageRepository.max_gap(coverage)
+        runs = delta.runs(max_gap)
+        if not runs:
+            return
+
+        stored = CoverageRepository._stored_runs(db, channel_id, runs[0][0] - max_gap, runs[-1][1] + max_gap)
+        CoverageRepository._replace_runs(db, channel_id, stored, merge_runs(stored + runs, max_gap))
+
+    @staticmethod
+    def _read_times(db: Session, store: BucketStore, start: datetime, end: datetime) -> np.ndarray:
+        """Timestamps of the points of [start, end], rows and compressed points together"""
+        bucket_table = store.table
+        rows = db.execute(
+            select(bucket_table.c.time)
+            .where(*store.criteria(), bucket_table.c.time >= start, bucket_table.c.time <= end)
+        ).scalars().all()
+        chunk_times, _ = BucketChunkRepository.read_columns(db, store.channel_id, start, end)
+        return np.concatenate((np.array(rows, dtype="datetime64[us]"), chunk_times))
+
+    @staticmethod
+    def remove_point(db: Session, store: BucketStore, time: datetime) -> None:
+        """
+        Take a deleted point out of its run, in the delete's transaction. The
+        run only splits when the points either side of it are now further
+        apart than the maximum gap, which the points within that gap tell.
+        """
+        coverage = CoverageRepository._lock(db, store.channel_id)
+        if coverage is None:
+            return
+        max_gap = CoverageRepository.max_gap(coverage)
+        stored = CoverageRepository._stored_runs(db, store.channel_id, time, time)
+        if not stored:
+            return
+
+        run_start, run_end = stored[0]
+        times = CoverageRepository._read_times(db, store, time - max_gap, time + max_gap)
+        deleted = np.datetime64(time, "us")
+        if (times == deleted).any():
+            # Another point still stands at that time
+            return
+
+        parts = []
+        before, after = times[times < deleted], times[times > deleted]
+        if run_start < time and len(before):
+            parts.append((run_start, before.max().astype(object)))
+        if time < run_end and len(after):
+            parts.append((after.min().astype(object), run_end))
+        CoverageRepository._replace_runs(db, store.channel_id, stored, merge_runs(parts, max_gap))
+
+    @staticmethod
+    def trim_before(db: Session, channel_id: int, earliest: Optional[datetime]) -> None:
+        """
+        Cut a channel's runs down to its points left after the oldest ones
+        were removed, given its earliest remaining point, None when none is
+        left. The caller owns the transaction.
+        """
+        if CoverageRepository._lock(db, channel_id) is None:
+            return
+        if earliest is None:
+            CoverageRepository.delete_runs(db, channel_id)
+            return
+
+        db.execute(delete(CoverageRun).where(CoverageRun.channel_id == channel_id, CoverageRun.end_time < earliest))
+        db.execute(
+            update(CoverageRun)
+            .where(CoverageRun.channel_id == channel_id, CoverageRun.start_time < earliest)
+            .values(start_time=earliest)
+        )
+
+    @staticmethod
+    def delete_runs(db: Session, channel_id: int) -> None:
+        """Delete the runs of a channel left without points, keeping its index settings. The caller owns the transaction."""
+        db.execute(delete(CoverageRun).where(CoverageRun.channel_id == channel_id))
+
+    @staticmethod
+    def drop_index(db: Session, channel_id: int) -> bool:
+        """
+        Stop indexing a channel's coverage, deleting its settings and runs.
+        The caller owns the transaction.
+
+        Returns:
+            Whether the channel was indexed
+        """
+        CoverageRepository.delete_runs(db, channel_id)
+        return bool(db.execute(delete(ChannelCoverage).where(ChannelCoverage.channel_id == channel_id)).rowcount)
+
+    @staticmethod
+    def set_coverage(
+        db: Session, channel_id: int, sampling_interval_seconds: float, blocks: Iterable[np.ndarray]
+    ) -> ChannelCoverage:
+        """
+        Index a channel's coverage at an expected sampling interval, or change
+        it, and rebuild its runs from the timestamps of all its points,
+        streamed in time order as blocks. Writes to the channel wait for the
+        rebuild, so none is left out.
+        """
+        coverage = CoverageRepository._lock(db, channel_id)
+        if coverage is None:
+            coverage = ChannelCoverage(channel_id=channel_id)
+            db.add(coverage)
+        coverage.sampling_interval_seconds = sampling_interval_seconds
+        db.flush()
+
+        max_gap = CoverageRepository.max_gap(coverage)
+        runs: List[Run] = []
+        for times in blocks:
+            # Blocks come in time order, so only the last run can continue into the next block
+            runs[-1:] = merge_runs(runs[-1:] + runs_of(times, max_gap), max_gap)
+
+        CoverageRepository.delete_runs(db, channel_id)
+        for position in range(0, len(runs), _INSERT_BATCH):
+            db.execute(insert(CoverageRun), [
+                {"channel_id": channel_id, "start_time": start, "end_time": end}
+                for start, end in runs[position:position + _INSERT_BATCH]
+            ])
+        db.commit()
+        db.refresh(coverage)
+        return coverage
+
+    @staticmethod
+    def count_runs(db: Session, channel_id: int) -> int:
+        """Number of runs of a channel"""
+        return db.execute(
+            select(func.count()).select_from(CoverageRun).where(CoverageRun.channel_id == channel_id)
+        ).scalar()
+
+    @staticmethod
+    def get_runs(
+        db: Session, coverages: Sequence[ChannelCoverage], start_date: Optional[datetime], end_date: Optional[datetime]
+    ) -> Dict[int, List[Run]]:
+        """Runs of indexed channels covering part of [start_date, end_date], in time order, by channel id"""
+        runs: Dict[int, List[Run]] = {coverage.channel_id: [] for coverage in coverages}
+        if not coverages:
+            return runs
+
+        query = select(CoverageRun.channel_id, CoverageRun.start_time, CoverageRun.end_time).where(
+            CoverageRun.channel_id.in_(list(runs))
+        )
+        if start_date:
+            # A run covers one sampling interval past its last point
+            longest = max(coverage.sampling_interval_seconds for coverage in coverages)
+            query = query.where(CoverageRun.end_time > start_date - timedelta(seconds=longest))
+        if end_date:
+            query = query.where(CoverageRun.start_time < end_date)
+        for row in db.execute(query.order_by(CoverageRun.channel_id, CoverageRun.start_time)):
+            runs[row.channel_id].append((row.start_time, row.end_time))
+        return runs
+
+    @staticmethod
+    def report(
+        coverage: ChannelCoverage,
+        runs: List[Run],
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        min_gap_seconds: float = 0,
+        limit: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Coverage of [start_date, end_date) by a channel's runs and the gaps
+        between them. A range left open starts at the first point of the
+        runs and ends one sampling interval past their last point.
+
+        Returns:
+            Dict with the range, the seconds covered and their percentage of
+            the range, the number, total and longest seconds of gaps, and
+            the gaps of at least `min_gap_seconds`, the first `limit` of them
+        """
+        interval = timedelta(seconds=coverage.sampling_interval_seconds)
+        spans = [(start, end + interval) for start, end in runs]
+        start_date = to_naive_utc(start_date) if start_date else (spans[0][0] if spans else None)
+        end_date = to_naive_utc(end_date) if end_date else (spans[-1][1] if spans else None)
+        result = {
+            "channel_id": coverage.channel_id,
+            "sampling_interval_seconds": coverage.sampling_interval_seconds,
+            "max_gap_seconds": CoverageRepository.max_gap(coverage).total_seconds(),
+            "start_date": start_date,
+            "end_date": end_date,
+            "range_seconds": 0.0,
+            "covered_seconds": 0.0,
+            "coverage_percent": None,
+            "gap_count": 0,
+            "gap_seconds": 0.0,
+            "longest_gap_seconds": None,
+            "gaps": [],
+        }
+        if start_date is None or end_date is None or end_date <= start_date:
+            return result
+
+        covered = timedelta(0)
+        gaps = []
+        cursor = start_date
+        for span_start, span_end in spans:
+            span_start, span_end = max(span_start, start_date), min(span_end, end_date)
+            if span_end <= span_start:
+                continue
+            if span_start > cursor:
+                gaps.append((cursor, span_start))
+            covered += span_end - span_start
+            cursor = max(cursor, span_end)
+        if cursor < end_date:
+            gaps.append((cursor, end_date))
+
+        durations = [(gap_end - gap_start).total_seconds() for gap_start, gap_end in gaps]
+        listed = [
+            {"start": gap_start, "end": gap_end, "duration_seconds": duration}
+            for (gap_start, gap_end), duration in zip(gaps, durations) if duration >= min_gap_seconds
+        ]
+        range_seconds = (end_date - start_date).total_seconds()
+        result.update({
+            "range_seconds": range_seconds,
+            "covered_seconds": covered.total_seconds(),
+            "coverage_percent": 100.0 * covered.total_seconds() / range_seconds,
+            "gap_count": len(gaps),
+            "gap_seconds": sum(durations),
+            "longest_gap_seconds": max(durations) if durations else None,
+            "gaps": listed[:limit] if limit is not None else listed,
+        })
+        return result
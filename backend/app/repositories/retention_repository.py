@@ -0,0 +1,187 @@
+from typing import Any, Callable, Dict, List, Optional
+from datetime import datetime, timedelta
+from sqlalchemy import delete, select # type: ignore
+from sqlalchemy.orm import Session, joinedload # type: ignore
+
+from app.core.config import settings
+from app.core.time_buckets import floor_time
+from app.models.bucket import BucketStore, get_channel_store
+from app.models.channel_data import ChannelData
+from app.models.retention_policy import RetentionPolicy
+from app.models.rollup import ROLLUP_RESOLUTIONS
+from app.repositories.bucket_chunk_repository import BucketChunkRepository
+from app.repositories.bucket_latest_values import bucket_latest_values
+from app.repositories.bucket_read_cache import bucket_read_cache
+from app.repositories.bucket_repository import BucketRepository
+from app.repositories.coverage_repository import CoverageRepository
+from app.repositories.rollup_repository import SKETCH_RESOLUTIONS, RollupRepository
+from app.schemas.retention_schema import RetentionPolicyUpdate
+
+# Policy attribute holding the retention of each rollup resolution
+ROLLUP_RETENTION = {
+    ROLLUP_RESOLUTIONS["1m"]: "minute_days",
+    ROLLUP_RESOLUTIONS["1h"]: "hour_days",
+    ROLLUP_RESOLUTIONS["1d"]: "day_days",
+}
+
+# Raw data expires one whole day at a time, so every rollup interval is built from all its points
+EXPIRY_WINDOW = timedelta(days=1)
+
+
+class RetentionRepository:
+    @staticmethod
+    def get_policy(db: Session, channel_id: int) -> Optional[RetentionPolicy]:
+        """Get the retention policy of a channel"""
+        return db.query(RetentionPolicy).filter(RetentionPolicy.channel_id == channel_id).first()
+
+    @staticmethod
+    def get_policies(db: Session) -> List[RetentionPolicy]:
+        """Get every retention policy with its channel and well loaded"""
+        return (
+            db.query(RetentionPolicy)
+            .options(joinedload(RetentionPolicy.channel).joinedload(ChannelData.well))
+            .order_by(RetentionPolicy.channel_id)
+            .all()
+        )
+
+    @staticmethod
+    def set_policy(db: Session, channel_id: int, policy: RetentionPolicyUpdate) -> RetentionPolicy:
+        """Create or replace the retention policy of a channel"""
+        db_policy = RetentionRepository.get_policy(db, channel_id)
+        if not db_policy:
+            db_policy = RetentionPolicy(channel_id=channel_id)
+            db.add(db_policy)
+
+        for field, value in policy.model_dump().items():
+            setattr(db_policy, field, value)
+
+        db.commit()
+        db.refresh(db_policy)
+        return db_policy
+
+    @staticmethod
+    def delete_policy(db: Session, channel_id: int) -> bool:
+        """Delete the retention policy of a channel, its data is then kept forever"""
+        db_policy = RetentionRepository.get_policy(db, channel_id)
+        if not db_policy:
+            return False
+
+        db.delete(db_policy)
+        db.commit()
+        return True
+
+    @staticmethod
+    def _day_start(time: datetime) -> datetime:
+        return floor_time(time, EXPIRY_WINDOW)
+
+    @staticmethod
+    def _read_window(db: Session, store: BucketStore, start: datetime, end: datetime):
+        """Read every point of [start, end), rows and compressed points merged"""
+        bucket_table = store.table
+        rows = db.execute(
+            select(bucket_table.c.id, bucket_table.c.time, bucket_table.c.value)
+            .where(*store.criteria(), bucket_table.c.time >= start, bucket_table.c.time < end)
+            .order_by(bucket_table.c.time)
+        ).all()
+        chunk_times, chunk_values = BucketChunkRepository.read_columns(
+            db, store.channel_id, start, end - timedelta(microseconds=1)
+        )
+        _, times, values = BucketChunkRepository.merge(
+            *BucketRepository._rows_to_columns(rows), chunk_times, chunk_values
+        )
+        return times, values
+
+    @staticmethod
+    def enforce(
+        db: Session,
+        policy: RetentionPolicy,
+        now: Optional[datetime] = None,
+        should_cancel: Optional[Callable[[], bool]] = None
+    ) -> Dict[str, Any]:
+        """
+        Apply a channel's retention policy.
+
+        Raw points older than `raw_days` (rounded down to a whole UTC day) are
+        removed with one range delete over the rows and the compressed chunks.
+        Writes already keep the 1m/1h/1d rollups current; with ROLLUPS_ENABLED
+        off, the expiring points are merged into the rollups the policy keeps
+        first. Each day is committed on its own, so an interrupted run resumes
+        where it stopped. Rollups past their own retention are then range deleted and
+        the channel's data_from/data_to and coverage runs are moved to the
+        remaining points.
+
+        Returns:
+            Dict with the number of raw points removed and rollups written and removed
+        """
+        now = now or datetime.utcnow()
+        channel = policy.channel
+        store = get_channel_store(channel)
+        bucket_table = store.table
+        result = {"channel_id": channel.id, "points_deleted": 0, "rollups_written": 0, "rollups_deleted": 0}
+
+        if policy.raw_days is not None:
+            cutoff = RetentionRepository._day_start(now - timedelta(days=policy.raw_days))
+            resolutions = [
+                resolution for resolution, attribute in ROLLUP_RETENTION.items()
+                if getattr(policy, attribute) != 0 and not settings.ROLLUPS_ENABLED
+            ]
+
+            while not (should_cancel and should_cancel()):
+                earliest, _ = BucketRepository.get_time_bounds(db, store)
+                if earliest is None or earliest >= cutoff:
+                    break
+
+                window_start = RetentionRepository._day_start(earliest)
+                window_end = min(window_start + EXPIRY_WINDOW, cutoff)
+                times, values = RetentionRepository._read_window(db, store, window_start, window_end)
+
+                # The window's points are deleted below, so they're merged into the rollups exactly once
+                for resolution in resolutions:
+                    rows = RollupRepository.aggregate(times, values, resolution)
+                    result["rollups_written"] += RollupRepository.upsert(
+                        db, channel.id, resolution, rows, merge=True
+                    )
+                    if resolution in SKETCH_RESOLUTIONS:
+                        RollupRepository.upsert_sketches(
+                            db, channel.id, resolution, RollupRepository.sketch(times, values, resolution), merge=True
+                        )
+
+                db.execute(
+                    delete(bucket_table).where(
+                        *store.criteria(), bucket_table.c.time >= window_start, bucket_table.c.time < window_end
+                    )
+                )
+                BucketChunkRepository.delete_before(db, channel.id, window_end)
+                bucket_read_cache.invalidate(db, channel.id, window_start, window_end)
+                db.commit()
+                result["points_deleted"] += len(times)
+
+        for resolution, attribute in ROLLUP_RETENTION.items():
+            days = getattr(policy, attribute)
+            if days is not None:
+                cutoff = now - timedelta(days=days)
+                result["rollups_deleted"] += RollupRepository.delete_before(db, channel.id, resolution, cutoff)
+                # Reads served from the deleted rollups change with them
+                bucket_read_cache.invalidate(db, channel.id, None, cutoff)
+
+        if result["points_deleted"]:
+            channel.data_from, channel.data_to = BucketRepository.get_time_bounds(db, store)
+            # Only the oldest points go, the latest one with them when none is left
+            if channel.data_to is None:
+                bucket_latest_values.replace(db, channel.id, None)
+            CoverageRepository.trim_before(db, channel.id, channel.data_from)
+        policy.last_enforced_at = now
+        db.commit()
+        return result
+
+    @staticmethod
+    def enforce_all(db: Session, now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Apply every channel's retention policy, one channel failing doesn't stop the others"""
+        results = []
+        for policy in RetentionRepository.get_policies(db):
+            try:
+                results.append(RetentionRepository.enforce(db, policy, now))
+            except Exception as e:
+                db.rollback()
+                print(f"Retention enforcement for channel {policy.channel_id} failed: {e}")
+        return results
@@ -0,0 +1,690 @@
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from datetime import datetime, timedelta
+import numpy as np # type: ignore
+from sqlalchemy import case, delete, func, select # type: ignore
+from sqlalchemy.dialects import postgresql, sqlite # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+
+from app.core import sketch as sketches
+from app.core.config import settings
+from app.core.sketch import Sketch
+from app.core.sql_time import bucket_index
+from app.core.time_buckets import floor_time, interval_start
+from app.models.bucket import BucketStore
+from app.models.rollup import ChannelRollup, ChannelRollupSketch, ROLLUP_RESOLUTIONS
+from app.repositories.bucket_bulk_writer import CONFLICT_KEEP_FIRST, CONFLICT_OVERWRITE, to_naive_utc
+from app.repositories.bucket_chunk_repository import BucketChunkRepository
+
+# Rollup columns besides the (channel_id, resolution_seconds, bucket_start) key
+ROLLUP_VALUE_COLUMNS = (
+    "count", "min_value", "max_value", "sum_value", "first_time", "first_value", "last_time", "last_value"
+)
+
+# Resolutions from the finest up, each one refreshed from the one before it
+REFRESH_ORDER = sorted(ROLLUP_RESOLUTIONS.values())
+
+# Resolution names by seconds
+RESOLUTION_NAMES = {seconds: name for name, seconds in ROLLUP_RESOLUTIONS.items()}
+
+# Windows rebuilt at once, each holding whole intervals of every resolution
+REBUILD_WINDOW = timedelta(seconds=REFRESH_ORDER[-1])
+
+# Resolutions keeping value sketches, finest first. A minute holds too few
+# points for its sketch to be much smaller than the points themselves.
+SKETCH_RESOLUTIONS = (ROLLUP_RESOLUTIONS["1h"], ROLLUP_RESOLUTIONS["1d"])
+
+# Points of a write whose values are held before being folded into sketches
+SKETCH_FLUSH_POINTS = 100000
+
+
+def _sketch_rows(interval_sketches: Dict[datetime, Sketch]) -> List[Dict[str, Any]]:
+    """Sketch rows of the intervals starting at the given times"""
+    return [
+        {"bucket_start": bucket_start, "bin": index, "count": count, "sum_value": total, "sum_squares": squares}
+        for bucket_start in sorted(interval_sketches)
+        for index, count, total, squares in zip(*(column.tolist() for column in interval_sketches[bucket_start]))
+    ]
+
+
+class RollupDelta:
+    """
+    1m rollup rows and 1h sketch rows of the points of one write, built while
+    the points stream to the bulk writer, in whatever order they come.
+    """
+
+    def __init__(self):
+        self.minutes: Dict[datetime, Dict[str, Any]] = {}
+        self.hours: Dict[datetime, Sketch] = {}
+        # Values not sketched yet by hour, and the list of each minute's hour
+        self._pending: Dict[datetime, List[float]] = {}
+        self._pending_of_minute: Dict[datetime, List[float]] = {}
+        self._pending_count = 0
+
+    def track(self, points: Iterable[Tuple[datetime, float]]) -> Iterator[Tuple[datetime, float]]:
+        """Pass (time, value) points through, adding each one to its minute"""
+        for time, value in points:
+            self.add(to_naive_utc(time), value)
+            yield time, value
+
+    def add(self, time: datetime, value: float) -> None:
+        bucket_start = time.replace(second=0, microsecond=0)
+        pending = self._pending_of_minute.get(bucket_start)
+        if pending is None:
+            pending = self._pending.setdefault(bucket_start.replace(minute=0), [])
+            self._pending_of_minute[bucket_start] = pending
+        pending.append(value)
+        self._pending_count += 1
+        if self._pending_count >= SKETCH_FLUSH_POINTS:
+            self._flush()
+
+        row = self.minutes.get(bucket_start)
+        if row is None:
+            self.minutes[bucket_start] = {
+                "bucket_start": bucket_start, "count": 1, "min_value": value, "max_value": value,
+                "sum_value": value, "first_time": time, "first_value": value, "last_time": time, "last_value": value,
+            }
+            return
+        row["count"] += 1
+        row["sum_value"] += value
+        if value < row["min_value"]:
+            row["min_value"] = value
+        if value > row["max_value"]:
+            row["max_value"] = value
+        if time < row["first_time"]:
+            row["first_time"], row["first_value"] = time, value
+        if time >= row["last_time"]:
+            row["last_time"], row["last_value"] = time, value
+
+    def _flush(self) -> None:
+        """Fold the pending values into the sketches of their hours"""
+        for hour, values in self._pending.items():
+            sketch = sketches.from_values(np.array(values, dtype=np.float64))
+            self.hours[hour] = sketches.merge([self.hours[hour], sketch]) if hour in self.hours else sketch
+        self._pending, self._pending_of_minute, self._pending_count = {}, {}, 0
+
+    def rows(self) -> List[Dict[str, Any]]:
+        return [self.minutes[bucket_start] for bucket_start in sorted(self.minutes)]
+
+    def sketch_rows(self) -> List[Dict[str, Any]]:
+        self._flush()
+        return _sketch_rows(self.hours)
+
+
+class RollupRepository:
+    # Number of rollup rows per upsert statement
+    UPSERT_BATCH_SIZE = 1000
+
+    # Touched intervals at most this many intervals apart are refreshed with one range read
+    REFRESH_MAX_GAP = 60
+
+    @staticmethod
+    def aggregate(times: np.ndarray, values: np.ndarray, resolution_seconds: int) -> List[Dict[str, Any]]:
+        """
+        Aggregate sorted points into one rollup row per interval.
+
+        Intervals are aligned on the epoch, so every point falls in exactly
+        one interval of each resolution whatever the batch it arrives in.
+        """
+        if not len(times):
+            return []
+
+        epoch_us = times.astype("datetime64[us]").astype(np.int64)
+        step = resolution_seconds * 1_000_000
+        buckets = epoch_us // step
+
+        starts = np.flatnonzero(np.concatenate(([True], buckets[1:] != buckets[:-1])))
+        ends = np.concatenate((starts[1:], [len(times)])) - 1
+
+        columns = {
+            "bucket_start": (buckets[starts] * step).astype("datetime64[us]").astype(object),
+            "count": np.diff(np.concatenate((starts, [len(times)]))).tolist(),
+            "min_value": np.minimum.reduceat(values, starts).tolist(),
+            "max_value": np.maximum.reduceat(values, starts).tolist(),
+            "sum_value": np.add.reduceat(values, starts).tolist(),
+            "first_time": epoch_us[starts].astype("datetime64[us]").astype(object),
+            "first_value": values[starts].tolist(),
+            "last_time": epoch_us[ends].astype("datetime64[us]").astype(object),
+            "last_value": values[ends].tolist(),
+        }
+        return [dict(zip(columns, row)) for row in zip(*columns.values())]
+
+    @staticmethod
+    def sketch(times: np.ndarray, values: np.ndarray, resolution_seconds: int) -> List[Dict[str, Any]]:
+        """Sketch points, in any order, into sketch rows of epoch-aligned intervals"""
+        buckets = times.astype("datetime64[us]").astype(np.int64) // (resolution_seconds * 1_000_000)
+        return _sketch_rows({
+            interval_start(bucket, resolution_seconds): sketch
+            for bucket, sketch in sketches.by_group(buckets, values).items()
+        })
+
+    @staticmethod
+    def _batches(rows: List[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+        for offset in range(0, len(rows), size):
+            yield rows[offset:offset + size]
+
+    @staticmethod
+    def _merged_columns(table, excluded) -> Dict[str, Any]:
+        """Combine a stored rollup row with an incoming one of the same interval"""
+        earlier = excluded.first_time < table.c.first_time
+        later = excluded.last_time > table.c.last_time
+        return {
+            "count": table.c.count + excluded.count,
+            "min_value": case((excluded.min_value < table.c.min_value, excluded.min_value), else_=table.c.min_value),
+            "max_value": case((excluded.max_value > table.c.max_value, excluded.max_value), else_=table.c.max_value),
+            "sum_value": table.c.sum_value + excluded.sum_value,
+            "first_time": case((earlier, excluded.first_time), else_=table.c.first_time),
+            "first_value": case((earlier, excluded.first_value), else_=table.c.first_value),
+            "last_time": case((later, excluded.last_time), else_=table.c.last_time),
+            "last_value": case((later, excluded.last_value), else_=table.c.last_value),
+        }
+
+    @staticmethod
+    def _insert(db: Session):
+        """The dialect's INSERT construct, which supports ON CONFLICT"""
+        dialect_name = db.get_bind().dialect.name
+        if dialect_name == "postgresql":
+            return postgresql.insert
+        if dialect_name == "sqlite":
+            return sqlite.insert
+        raise ValueError(f"Rollups are not supported on {dialect_name}")
+
+    @staticmethod
+    def _write_batches(
+        db: Session, statement, channel_id: int, resolution_seconds: int, rows: List[Dict[str, Any]]
+    ) -> int:
+        # Compiled once, each batch is then sent as multi-row inserts instead of row by row
+        written = 0
+        for batch in RollupRepository._batches(rows, RollupRepository.UPSERT_BATCH_SIZE):
+            db.execute(
+                statement,
+                [{"channel_id": channel_id, "resolution_seconds": resolution_seconds, **row} for row in batch]
+            ).close()
+            written += len(batch)
+        return written
+
+    @staticmethod
+    def upsert(
+        db: Session, channel_id: int, resolution_seconds: int, rows: List[Dict[str, Any]], merge: bool = False
+    ) -> int:
+        """
+        Insert rollup rows. Stored rows of the same intervals are replaced, or
+        combined with the new ones when `merge` is set, for rows aggregating
+        points the stored rows don't cover yet. The caller owns the transaction.
+        """
+        table = ChannelRollup.__table__
+        statement = RollupRepository._insert(db)(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.channel_id, table.c.resolution_seconds, table.c.bucket_start],
+            set_=(
+                RollupRepository._merged_columns(table, statement.excluded) if merge
+                else {column: statement.excluded[column] for column in ROLLUP_VALUE_COLUMNS}
+            )
+        # SQLAlchemy only batches ON CONFLICT executemany into multi-row inserts with RETURNING
+        ).returning(table.c.bucket_start)
+        return RollupRepository._write_batches(db, statement, channel_id, resolution_seconds, rows)
+
+    @staticmethod
+    def upsert_sketches(
+        db: Session, channel_id: int, resolution_seconds: int, rows: List[Dict[str, Any]], merge: bool = False
+    ) -> int:
+        """
+        Insert sketch rows, replacing the stored rows of the same bins or adding
+        to them when `merge` is set. Replacing a whole sketch takes deleting
+        its stored bins first, as the new one may not hold all of them. The
+        caller owns the transaction.
+        """
+        table = ChannelRollupSketch.__table__
+        statement = RollupRepository._insert(db)(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.channel_id, table.c.resolution_seconds, table.c.bucket_start, table.c.bin],
+            set_={
+                column: (table.c[column] + statement.excluded[column]) if merge else statement.excluded[column]
+                for column in ("count", "sum_value", "sum_squares")
+            }
+        ).returning(table.c.bucket_start)
+        return RollupRepository._write_batches(db, statement, channel_id, resolution_seconds, rows)
+
+    @staticmethod
+    def get_coverage(db: Session, channel_id: int) -> Dict[int, Optional[datetime]]:
+        """
+        Start of the first interval each resolution holds for a channel, None
+        for resolutions without rollups. Rollups are only pruned from their
+        old end, so a resolution holds every interval with points from there
+        on. With ROLLUPS_ENABLED off rollups lag behind writes, and none are
+        reported.
+        """
+        if not settings.ROLLUPS_ENABLED:
+            return {}
+
+        coverage = {resolution: None for resolution in REFRESH_ORDER}
+        rows = db.execute(
+            select(ChannelRollup.resolution_seconds, func.min(ChannelRollup.bucket_start))
+            .where(ChannelRollup.channel_id == channel_id)
+            .group_by(ChannelRollup.resolution_seconds)
+        ).all()
+        for resolution, first_bucket in rows:
+            if resolution in coverage:
+                coverage[resolution] = first_bucket
+        return coverage
+
+    @staticmethod
+    def _in_range(channel_id: int, resolution_seconds: int, start: datetime, end: datetime):
+        return (
+            ChannelRollup.channel_id == channel_id,
+            ChannelRollup.resolution_seconds == resolution_seconds,
+            ChannelRollup.bucket_start >= start,
+            ChannelRollup.bucket_start < end,
+        )
+
+    @staticmethod
+    def select_intervals(
+        db: Session, channel_id: int, resolution_seconds: int, start: datetime, end: datetime, interval_seconds: int
+    ) -> Dict[int, Dict[str, Any]]:
+        """
+        Combine the rollups of one resolution for the intervals starting in
+        [start, end) into coarser epoch-aligned intervals, in one grouped query.
+        The first and last values come from the first and last rollup of each
+        interval, looked up by their primary key.
+
+        Returns:
+            Aggregates keyed by interval index since the epoch
+        """
+        table = ChannelRollup.__table__
+        bucket = bucket_index(table.c.bucket_start, db.get_bind().dialect.name, 0, interval_seconds)
+        grouped = (
+            select(
+                bucket.label("bucket"),
+                func.sum(table.c.count).label("count"),
+                func.min(table.c.min_value).label("min"),
+                func.max(table.c.max_value).label("max"),
+                func.sum(table.c.sum_value).label("sum"),
+                func.min(table.c.bucket_start).label("first_bucket"),
+                func.max(table.c.bucket_start).label("last_bucket"),
+            )
+            .where(*RollupRepository._in_range(channel_id, resolution_seconds, start, end))
+            .group_by(bucket)
+            .subquery()
+        )
+
+        # Correlated primary key lookups, planned the same whatever the table statistics
+        edge = lambda column, bucket_start: (
+            select(column)
+            .where(
+                table.c.channel_id == channel_id,
+                table.c.resolution_seconds == resolution_seconds,
+                table.c.bucket_start == bucket_start
+            )
+            .scalar_subquery()
+        )
+        rows = db.execute(
+            select(
+                grouped.c.bucket, grouped.c.count, grouped.c.min, grouped.c.max, grouped.c.sum,
+                edge(table.c.first_time, grouped.c.first_bucket).label("first_time"),
+                edge(table.c.first_value, grouped.c.first_bucket).label("first_value"),
+                edge(table.c.last_time, grouped.c.last_bucket).label("last_time"),
+                edge(table.c.last_value, grouped.c.last_bucket).label("last_value"),
+            )
+        ).all()
+
+        return {
+            row.bucket: {
+                "count": int(row.count),
+                "min": row.min,
+                "max": row.max,
+                "sum": float(row.sum),
+                "avg": float(row.sum) / int(row.count),
+                "first": row.first_value,
+                "last": row.last_value,
+                "first_time": row.first_time,
+                "last_time": row.last_time,
+                "stddev": None,
+            }
+            for row in rows
+        }
+
+    @staticmethod
+    def get_sketch_coverage(db: Session, channel_id: int) -> Dict[int, Optional[datetime]]:
+        """Start of the first interval each sketch resolution holds for a channel, as get_coverage"""
+        if not settings.ROLLUPS_ENABLED:
+            return {}
+
+        coverage = {resolution: None for resolution in SKETCH_RESOLUTIONS}
+        rows = db.execute(
+            select(ChannelRollupSketch.resolution_seconds, func.min(ChannelRollupSketch.bucket_start))
+            .where(ChannelRollupSketch.channel_id == channel_id)
+            .group_by(ChannelRollupSketch.resolution_seconds)
+        ).all()
+        for resolution, first_bucket in rows:
+            if resolution in coverage:
+                coverage[resolution] = first_bucket
+        return coverage
+
+    @staticmethod
+    def select_sketch(db: Session, channel_id: int, resolution_seconds: int, start: datetime, end: datetime) -> Sketch:
+        """Merge the sketches of one resolution for the intervals starting in [start, end), in SQL"""
+        rows = db.execute(
+            select(
+                ChannelRollupSketch.bin,
+                func.sum(ChannelRollupSketch.count),
+                func.sum(ChannelRollupSketch.sum_value),
+                func.sum(ChannelRollupSketch.sum_squares)
+            )
+            .where(
+                ChannelRollupSketch.channel_id == channel_id,
+                ChannelRollupSketch.resolution_seconds == resolution_seconds,
+                ChannelRollupSketch.bucket_start >= start,
+                ChannelRollupSketch.bucket_start < end
+            )
+            .group_by(ChannelRollupSketch.bin)
+            .order_by(ChannelRollupSketch.bin)
+        ).all()
+        if not rows:
+            return sketches.empty()
+        bins, counts, sums, squares = zip(*rows)
+        return Sketch(
+            np.array(bins, dtype=np.int64), np.array(counts, dtype=np.int64),
+            np.array(sums, dtype=np.float64), np.array(squares, dtype=np.float64)
+        )
+
+    @staticmethod
+    def _delete_sketches(db: Session, channel_id: int, *criteria) -> None:
+        db.execute(delete(ChannelRollupSketch).where(ChannelRollupSketch.channel_id == channel_id, *criteria))
+
+    @staticmethod
+    def delete_before(db: Session, channel_id: int, resolution_seconds: int, cutoff: datetime) -> int:
+        """Delete a channel's rollup intervals of one resolution starting before a cutoff, sketches included"""
+        result = db.execute(
+            delete(ChannelRollup).where(
+                ChannelRollup.channel_id == channel_id,
+                ChannelRollup.resolution_seconds == resolution_seconds,
+                ChannelRollup.bucket_start < cutoff
+            )
+        )
+        RollupRepository._delete_sketches(
+            db, channel_id,
+            ChannelRollupSketch.resolution_seconds == resolution_seconds,
+            ChannelRollupSketch.bucket_start < cutoff
+        )
+        return result.rowcount
+
+    @staticmethod
+    def delete_channel(db: Session, channel_id: int) -> int:
+        """Delete every rollup and sketch of a channel, without committing"""
+        result = db.execute(delete(ChannelRollup).where(ChannelRollup.channel_id == channel_id))
+        RollupRepository._delete_sketches(db, channel_id)
+        return result.rowcount
+
+    @staticmethod
+    def _floor(time: datetime, resolution_seconds: int) -> datetime:
+        return floor_time(time, timedelta(seconds=resolution_seconds))
+
+    @staticmethod
+    def _runs(starts: List[datetime], resolution_seconds: int) -> Iterator[Tuple[datetime, datetime]]:
+        """Group sorted interval starts into [start, end) ranges, bridging short gaps"""
+        step = timedelta(seconds=resolution_seconds)
+        max_gap = step * RollupRepository.REFRESH_MAX_GAP
+        run_start = previous = starts[0]
+        for start in starts[1:]:
+            if start - previous > max_gap:
+                yield run_start, previous + step
+                run_start = start
+            previous = start
+        yield run_start, previous + step
+
+    @staticmethod
+    def _read_points(db: Session, store: BucketStore, start: datetime, end: datetime) -> Tuple[np.ndarray, np.ndarray]:
+        """Read the points of [start, end), rows and compressed points merged"""
+        bucket_table = store.table
+        rows = db.execute(
+            select(bucket_table.c.id, bucket_table.c.time, bucket_table.c.value)
+            .where(*store.criteria(), bucket_table.c.time >= start, bucket_table.c.time < end)
+            .order_by(bucket_table.c.time)
+        ).all()
+        chunk_times, chunk_values = BucketChunkRepository.read_columns(
+            db, store.channel_id, start, end - timedelta(microseconds=1)
+        )
+        _, times, values = BucketChunkRepository.merge(
+            np.array([row.id for row in rows], dtype=np.int64),
+            np.array([row.time for row in rows], dtype="datetime64[us]"),
+            np.array([row.value for row in rows], dtype=np.float64),
+            chunk_times, chunk_values
+        )
+        return times, values
+
+    @staticmethod
+    def _combine(rows: List[Any], resolution_seconds: int) -> List[Dict[str, Any]]:
+        """Combine finer rollup rows, sorted by interval, into rollup rows of a coarser resolution"""
+        combined = {}
+        for row in rows:
+            bucket_start = RollupRepository._floor(row["bucket_start"], resolution_seconds)
+            current = combined.get(bucket_start)
+            if current is None:
+                combined[bucket_start] = {
+                    "bucket_start": bucket_start, **{column: row[column] for column in ROLLUP_VALUE_COLUMNS}
+                }
+                continue
+            current["count"] += row["count"]
+            current["min_value"] = min(current["min_value"], row["min_value"])
+            current["max_value"] = max(current["max_value"], row["max_value"])
+            current["sum_value"] += row["sum_value"]
+            current["last_time"] = row["last_time"]
+            current["last_value"] = row["last_value"]
+        return list(combined.values())
+
+    @staticmethod
+    def _combine_sketches(rows: List[Any], resolution_seconds: int) -> List[Dict[str, Any]]:
+        """Combine finer sketch rows into sketch rows of a coarser resolution"""
+        combined = {}
+        for row in rows:
+            key = (RollupRepository._floor(row["bucket_start"], resolution_seconds), row["bin"])
+            current = combined.get(key)
+            if current is None:
+                combined[key] = {
+                    "bucket_start": key[0], "bin": key[1], "count": row["count"],
+                    "sum_value": row["sum_value"], "sum_squares": row["sum_squares"]
+                }
+                continue
+            current["count"] += row["count"]
+            current["sum_value"] += row["sum_value"]
+            current["sum_squares"] += row["sum_squares"]
+        return list(combined.values())
+
+    @staticmethod
+    def _refresh_sketches(db: Session, store: BucketStore, touched: Iterable[datetime]) -> None:
+        """
+        Recompute the sketches of the intervals covering `touched` times: the
+        finest resolution from the stored points, the others from the
+        resolution before them.
+        """
+        for position, resolution in enumerate(SKETCH_RESOLUTIONS):
+            touched = sorted({RollupRepository._floor(time, resolution) for time in touched})
+            if not touched:
+                break
+
+            for run_start, run_end in RollupRepository._runs(touched, resolution):
+                if position == 0:
+                    times, values = RollupRepository._read_points(db, store, run_start, run_end)
+                    rows = RollupRepository.sketch(times, values, resolution)
+                else:
+                    finer = db.execute(
+                        select(ChannelRollupSketch.__table__).where(
+                            ChannelRollupSketch.channel_id == store.channel_id,
+                            ChannelRollupSketch.resolution_seconds == SKETCH_RESOLUTIONS[position - 1],
+                            ChannelRollupSketch.bucket_start >= run_start,
+                            ChannelRollupSketch.bucket_start < run_end
+                        )
+                    ).mappings().all()
+                    rows = RollupRepository._combine_sketches(finer, resolution)
+
+                RollupRepository._delete_sketches(
+                    db, store.channel_id,
+                    ChannelRollupSketch.resolution_seconds == resolution,
+                    ChannelRollupSketch.bucket_start >= run_start,
+                    ChannelRollupSketch.bucket_start < run_end
+                )
+                RollupRepository.upsert_sketches(db, store.channel_id, resolution, rows)
+
+    @staticmethod
+    def _cascade(db: Session, store: BucketStore, touched: Iterable[datetime], first_position: int) -> int:
+        """
+        Recompute the intervals covering `touched` times, from the resolution at
+        `first_position` in REFRESH_ORDER up. The finest resolution is aggregated
+        from the stored points, every other one from the resolution before it.
+        Touched intervals left without points lose their rollup.
+        """
+        written = 0
+        for position in range(first_position, len(REFRESH_ORDER)):
+            resolution = REFRESH_ORDER[position]
+            touched = sorted({RollupRepository._floor(time, resolution) for time in touched})
+            if not touched:
+                break
+
+            for run_start, run_end in RollupRepository._runs(touched, resolution):
+                if position == 0:
+                    times, values = RollupRepository._read_points(db, store, run_start, run_end)
+                    rows = RollupRepository.aggregate(times, values, resolution)
+                else:
+                    finer = db.execute(
+                        select(ChannelRollup.__table__).where(
+                            ChannelRollup.channel_id == store.channel_id,
+                            ChannelRollup.resolution_seconds == REFRESH_ORDER[position - 1],
+                            ChannelRollup.bucket_start >= run_start,
+                            ChannelRollup.bucket_start < run_end
+                        ).order_by(ChannelRollup.bucket_start)
+                    ).mappings().all()
+                    rows = RollupRepository._combine(finer, resolution)
+
+                refreshed = {row["bucket_start"] for row in rows}
+                emptied = [start for start in touched if run_start <= start < run_end and start not in refreshed]
+                if emptied:
+                    db.execute(
+                        delete(ChannelRollup).where(
+                            ChannelRollup.channel_id == store.channel_id,
+                            ChannelRollup.resolution_seconds == resolution,
+                            ChannelRollup.bucket_start.in_(emptied)
+                        )
+                    )
+                written += RollupRepository.upsert(db, store.channel_id, resolution, rows)
+        return written
+
+    @staticmethod
+    def refresh(db: Session, store: BucketStore, minutes: Iterable[datetime]) -> int:
+        """
+        Recompute the rollup intervals covering the given minutes.
+
+        1m intervals are aggregated again from the stored points, 1h ones
+        from their 1m rollups and 1d ones from their 1h rollups. 1h sketches
+        are rebuilt from the stored points and 1d ones from them. Being derived
+        from the finer tiers, intervals are only refreshed correctly while
+        those are still kept. The caller owns the transaction.
+
+        Returns:
+            Number of rollup rows written
+        """
+        minutes = list(minutes)
+        RollupRepository._refresh_sketches(db, store, minutes)
+        return RollupRepository._cascade(db, store, minutes, 0)
+
+    @staticmethod
+    def apply_write(
+        db: Session,
+        store: BucketStore,
+        minute_rows: List[Dict[str, Any]],
+        sketch_rows: List[Dict[str, Any]],
+        on_conflict: Optional[str] = None
+    ) -> int:
+        """
+        Fold a write into every rollup resolution, given the 1m rollup rows
+        and the 1h sketch rows of the points written, in the write's transaction.
+
+        Plain inserts only add points, so their rollups and sketches are
+        merged into the stored ones without reading anything back, late
+        points included. Upserts may have skipped points or replaced stored
+        values, so the intervals they touch are recomputed instead.
+
+        Returns:
+            Number of rollup rows written
+        """
+        if on_conflict in (CONFLICT_KEEP_FIRST, CONFLICT_OVERWRITE):
+            return RollupRepository.refresh(db, store, [row["bucket_start"] for row in minute_rows])
+
+        written = 0
+        rows = minute_rows
+        for position, resolution in enumerate(REFRESH_ORDER):
+            if position:
+                rows = RollupRepository._combine(rows, resolution)
+            written += RollupRepository.upsert(db, store.channel_id, resolution, rows, merge=True)
+
+        rows = sketch_rows
+        for position, resolution in enumerate(SKETCH_RESOLUTIONS):
+            if position:
+                rows = RollupRepository._combine_sketches(rows, resolution)
+            RollupRepository.upsert_sketches(db, store.channel_id, resolution, rows, merge=True)
+        return written
+
+    @staticmethod
+    def _rebuild_window(db: Session, store: BucketStore, start: datetime, end: datetime) -> Tuple[int, int]:
+        """
+        Replace every rollup of [start, end), a window holding whole intervals
+        of every resolution: the 1m rollups are aggregated from the stored
+        points and the coarser ones from those, while the sketches of every
+        resolution are built from the points. The caller owns the transaction.
+
+        Returns:
+            (points read, rollup rows written)
+        """
+        db.execute(
+            delete(ChannelRollup).where(
+                ChannelRollup.channel_id == store.channel_id,
+                ChannelRollup.bucket_start >= start,
+                ChannelRollup.bucket_start < end
+            )
+        )
+
+        RollupRepository._delete_sketches(
+            db, store.channel_id, ChannelRollupSketch.bucket_start >= start, ChannelRollupSketch.bucket_start < end
+        )
+
+        times, values = RollupRepository._read_points(db, store, start, end)
+        rows = RollupRepository.aggregate(times, values, REFRESH_ORDER[0])
+        written = RollupRepository.upsert(db, store.channel_id, REFRESH_ORDER[0], rows)
+        written += RollupRepository._cascade(db, store, [row["bucket_start"] for row in rows], 1)
+        for resolution in SKETCH_RESOLUTIONS:
+            RollupRepository.upsert_sketches(
+                db, store.channel_id, resolution, RollupRepository.sketch(times, values, resolution)
+            )
+        return len(times), written
+
+    @staticmethod
+    def rebuild(
+        db: Session,
+        store: BucketStore,
+        earliest: Optional[datetime],
+        latest: Optional[datetime],
+        should_cancel: Optional[Callable[[], bool]] = None
+    ) -> Dict[str, Any]:
+        """
+        Rebuild a channel's rollups from its stored points between its earliest
+        and latest point, one day at a time, each day committed on its own.
+        Rollups of ranges whose points already expired are left as they are.
+
+        Returns:
+            Dict with the number of days, points read and rollup rows written
+        """
+        result = {"channel_id": store.channel_id, "days": 0, "points": 0, "rollups_written": 0, "cancelled": False}
+        if earliest is None or latest is None:
+            return result
+
+        window_start = RollupRepository._floor(earliest, REFRESH_ORDER[-1])
+        while window_start <= latest:
+            if should_cancel and should_cancel():
+                result["cancelled"] = True
+                break
+
+            points, written = RollupRepository._rebuild_window(db, store, window_start, window_start + REBUILD_WINDOW)
+            db.commit()
+            result["days"] += 1
+            result["points"] += points
+            result["rollups_written"] += written
+            window_start += REBUILD_WINDOW
+        return result
@@ -1,7 +1,9 @@
 from typing import List, Optional
 from sqlalchemy.orm import Session # type: ignore
 
+from app.models.bucket import bucket_table_name
 from app.models.well import Well
+from app.repositories.bucket_lifecycle_repository import BucketLifecycleRepository
 from app.schemas.well_schema import WellCreate, WellUpdate
 from sqlalchemy import func # type: ignore
 
@@ -43,6 +45,14 @@ class WellRepository:
             
         update_data = well_update.dict(exclude_unset=True)
         
+        # Bucket tables are named after the well, rename them in the same transaction
+        new_name = update_data.get("name")
+        if new_name is not None and new_name != db_well.name:
+            for channel in db_well.channels:
+                BucketLifecycleRepository.rename_bucket(
+                    db, bucket_table_name(db_well.name, channel.name), bucket_table_name(new_name, channel.name)
+                )
+        
         for field, value in update_data.items():
             setattr(db_well, field, value)
             
@@ -55,6 +65,10 @@ class WellRepository:
         db_well = WellRepository.get_well_by_id(db, well_id)
         if not db_well:
             return False
+        
+        # Its channels are deleted along with it, and so is their bucket data
+        for channel in db_well.channels:
+            BucketLifecycleRepository.release_bucket(db, channel)
             
         db.delete(db_well)
         db.commit()
@@ -4,6 +4,12 @@ from app.routes import well_routes
 from app.routes import channel_data_routes
 from app.routes import bucket_routes
 from app.routes import bucket_generator_routes
+from app.routes import job_routes
+from app.routes import ingest_routes
+from app.routes import fleet_routes
+from app.routes import retention_routes
+from app.routes import coverage_routes
+from app.routes import system_routes
 
 api_router = APIRouter()
 
@@ -30,4 +36,40 @@ api_router.include_router(
     bucket_generator_routes.router, 
     prefix="/wells/{well_id}/channels/{channel_id}/generator", 
     tags=["data generation"]
+)
+
+api_router.include_router(
+    retention_routes.router, 
+    prefix="/wells/{well_id}/channels/{channel_id}/retention", 
+    tags=["retention"]
+)
+
+api_router.include_router(
+    coverage_routes.router, 
+    prefix="/wells/{well_id}/channels/{channel_id}/coverage", 
+    tags=["coverage"]
+)
+
+api_router.include_router(
+    ingest_routes.router, 
+    prefix="/ingest", 
+    tags=["data"]
+)
+
+api_router.include_router(
+    fleet_routes.router, 
+    prefix="/fleet", 
+    tags=["data"]
+)
+
+api_router.include_router(
+    job_routes.router, 
+    prefix="/jobs", 
+    tags=["jobs"]
+)
+
+api_router.include_router(
+    system_routes.router, 
+    prefix="/system", 
+    tags=["system"]
 )
\ No newline at end of file
@@ -1,4 +1,4 @@
-from typing import Optional, Dict, Any
+from typing import Optional
 from datetime import datetime
 from fastapi import APIRouter, Depends, Query, Body, Path # type: ignore
 from sqlalchemy.orm import Session # type: ignore
@@ -6,8 +6,11 @@ from pydantic import BaseModel, Field # type: ignore
 from fastapi import HTTPException # type: ignore
 
 from app.core.database import get_db
+from app.core.jobs import Job
+from app.controllers.job_controller import JobController
 from app.repositories.bucket_generator_repository import BucketDataGenerator
 from app.repositories.channel_data_repository import ChannelDataRepository
+from app.schemas.job_schema import JobOut
 
 router = APIRouter()
 
@@ -15,12 +18,13 @@ class PatternDataRequest(BaseModel):
     pattern_type: str = Field(default="sine", description="Pattern type: sine, cosine, sawtooth, square, random, trend")
     start_date: Optional[datetime] = Field(default=None, description="Start date (defaults to 30 days ago)")
     end_date: Optional[datetime] = Field(default=None, description="End date (defaults to current date)")
-    interval_seconds: int = Field(default=3600, description="Time interval between points in seconds")
+    interval_seconds: int = Field(default=3600, gt=0, description="Time interval between points in seconds")
     base_value: float = Field(default=50.0, description="Base value for the data")
     amplitude: float = Field(default=25.0, description="Amplitude of the pattern")
     period_days: float = Field(default=7.0, description="Period of the pattern in days")
     trend_slope: float = Field(default=0.0, description="Slope of the trend (units per day)")
     noise_level: float = Field(default=2.0, description="Magnitude of random noise")
+    seed: Optional[int] = Field(default=None, description="Seed for the random noise, for reproducible datasets")
 
 # Helper function to get well_name and channel_name from IDs
 async def get_names_from_ids(well_id: int, channel_id: int, db: Session):
@@ -29,7 +33,17 @@ async def get_names_from_ids(well_id: int, channel_id: int, db: Session):
         return None, None
     return channel.well.name, channel.name
 
-@router.post("/pattern", response_model=Dict[str, Any])
+# Reject a generation its job would fail on before queueing it
+def check_generation(
+    db: Session, channel_id: int, start_date: Optional[datetime], end_date: Optional[datetime], interval_seconds: int
+):
+    channel = ChannelDataRepository.get_channel_by_id(db, channel_id)
+    try:
+        BucketDataGenerator.resolve_range(channel, start_date, end_date, interval_seconds)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/pattern", response_model=JobOut, status_code=202)
 async def generate_bucket_data(
     request: PatternDataRequest,
     well_id: int = Path(..., description="The ID of the well"),
@@ -38,47 +52,75 @@ async def generate_bucket_data(
 ):
     """
     Generate time series data with specific patterns.
+    Runs as a background job: poll `/api/jobs/{job_id}` for progress.
     """
     well_name, channel_name = await get_names_from_ids(well_id, channel_id, db)
     if not well_name or not channel_name:
         raise HTTPException(status_code=404, detail=f"Channel with id {channel_id} not found for well {well_id}")
     
-    return BucketDataGenerator.generate_pattern_data(
-        db=db,
-        well_name=well_name,
-        channel_name=channel_name,
-        pattern_type=request.pattern_type,
-        start_date=request.start_date,
-        end_date=request.end_date,
-        interval_seconds=request.interval_seconds,
-        base_value=request.base_value,
-        amplitude=request.amplitude,
-        period_days=request.period_days,
-        trend_slope=request.trend_slope,
-        noise_level=request.noise_level
-    )
+    check_generation(db, channel_id, request.start_date, request.end_date, request.interval_seconds)
+    params = {"well_id": well_id, "channel_id": channel_id, **request.model_dump(mode="json")}
+    
+    def run(job_db: Session, job: Job):
+        return BucketDataGenerator.generate_pattern_data(
+            db=job_db,
+            well_name=well_name,
+            channel_name=channel_name,
+            pattern_type=request.pattern_type,
+            start_date=request.start_date,
+            end_date=request.end_date,
+            interval_seconds=request.interval_seconds,
+            base_value=request.base_value,
+            amplitude=request.amplitude,
+            period_days=request.period_days,
+            trend_slope=request.trend_slope,
+            noise_level=request.noise_level,
+            seed=request.seed,
+            progress_callback=job.set_progress,
+            should_cancel=job.is_cancelled
+        )
+    
+    return JobController.submit("generate_pattern", params, run)
 
-@router.post("/populate", response_model=Dict[str, Any])
+@router.post("/populate", response_model=JobOut, status_code=202)
 async def populate_bucket(
     well_id: int = Path(..., description="The ID of the well"),
     channel_id: int = Path(..., description="The ID of the channel"),
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
-    interval_seconds: int = Query(3600, description="Time interval between points in seconds"),
+    interval_seconds: int = Query(3600, gt=0, description="Time interval between points in seconds"),
+    seed: Optional[int] = Query(None, description="Seed for the random noise, for reproducible datasets"),
     db: Session = Depends(get_db)
 ):
     """
     Populate a bucket with time series data at regular intervals using default sine wave pattern.
+    Runs as a background job: poll `/api/jobs/{job_id}` for progress.
     """
     well_name, channel_name = await get_names_from_ids(well_id, channel_id, db)
     if not well_name or not channel_name:
         raise HTTPException(status_code=404, detail=f"Channel with id {channel_id} not found for well {well_id}")
     
-    return BucketDataGenerator.populate_bucket(
-        db=db,
-        well_name=well_name,
-        channel_name=channel_name,
-        start_date=start_date,
-        end_date=end_date,
-        interval_seconds=interval_seconds
-    )
\ No newline at end of file
+    check_generation(db, channel_id, start_date, end_date, interval_seconds)
+    params = {
+        "well_id": well_id,
+        "channel_id": channel_id,
+        "start_date": start_date.isoformat() if start_date else None,
+        "end_date": end_date.isoformat() if end_date else None,
+        "interval_seconds": interval_seconds,
+        "seed": seed
+    }
+    
+    def run(job_db: Session, job: Job):
+        return BucketDataGenerator.populate_bucket(
+            db=job_db,
+            well_name=well_name,
+            channel_name=channel_name,
+            start_date=start_date,
+            end_date=end_date,
+            interval_seconds=interval_seconds,
+            seed=seed,
+            progress_callback=job.set_progress,
+            should_cancel=job.is_cancelled
+        )
+    
+    return JobController.submit("populate", params, run)
\ No newline at end of file
@@ -1,16 +1,35 @@
-from http.client import HTTPException
-from typing import List, Optional
+from typing import List, Optional, Union
 from datetime import datetime
-from fastapi import APIRouter, Depends, Query, Path # type: ignore
+from fastapi import APIRouter, Depends, HTTPException, Query, Path, Request, Response # type: ignore
 from sqlalchemy.orm import Session # type: ignore
 
+from app.core.columnar import MEDIA_TYPE_ARROW, MEDIA_TYPE_PACKED, negotiate_media_type
 from app.core.database import get_db
 from app.controllers.bucket_controller import BucketController
+from app.controllers.bucket_export_controller import BucketExportController, accepts_gzip
+from app.controllers.bucket_upload_controller import BucketUploadController
+from app.repositories.bucket_write_buffer import bucket_write_buffer
 from app.repositories.channel_data_repository import ChannelDataRepository
-from app.schemas.bucket_schema import BucketDataOut, BucketDataCreate, BucketDataBatch, BucketStatistics
+from app.schemas.bucket_schema import (
+    BucketDataOut,
+    BucketDataCreate,
+    BucketDataBatch,
+    BucketDataQueued,
+    BucketBatchResult,
+    BucketUploadResult,
+    BucketStatistics,
+    BucketAggregates
+)
 
 router = APIRouter()
 
+# Query parameter selecting how writes treat timestamps that are already stored
+ON_CONFLICT_QUERY = Query(
+    None,
+    pattern="^(keep_first|overwrite|error)$",
+    description="Enforce one value per timestamp: keep the stored value, overwrite it, or reject the write"
+)
+
 # Helper function to get well_name and channel_name from IDs
 async def get_names_from_ids(well_id: int, channel_id: int, db: Session):
     channel = ChannelDataRepository.get_channel_by_id(db, channel_id)
@@ -18,58 +37,168 @@ async def get_names_from_ids(well_id: int, channel_id: int, db: Session):
         return None, None
     return channel.well.name, channel.name
 
-@router.get("/", response_model=List[BucketDataOut])
+@router.get(
+    "/",
+    response_model=List[BucketDataOut],
+    responses={200: {"content": {MEDIA_TYPE_PACKED: {}, MEDIA_TYPE_ARROW: {}}}}
+)
 async def get_data_points(
+    request: Request,
     well_id: int = Path(..., description="The ID of the well"),
     channel_id: int = Path(..., description="The ID of the channel"),
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
     skip: int = Query(0, ge=0),
     limit: int = Query(1000, ge=1, le=10000),
+    cursor: Optional[str] = Query(
+        None, description="Read the page after this cursor, from the X-Next-Cursor header of the previous page"
+    ),
+    max_points: Optional[int] = Query(
+        None, ge=3, le=100000, description="Downsample the whole range to about this many points, ignoring skip/limit"
+    ),
+    method: str = Query(
+        "lttb", pattern="^(lttb|minmax|avg)$",
+        description="Downsampling method: largest triangle three buckets, min/max envelope or bucket averages"
+    ),
     db: Session = Depends(get_db)
 ):
     """
     Retrieve time series data points for a specific channel.
+    Send `Accept: application/vnd.well-explorer.packed` or `application/vnd.apache.arrow.stream`
+    to get the points as compact columnar binary instead of JSON.
+    Set `max_points` to the chart width to get a reduced series of the full range, computed server-side.
+    Page through long ranges with `cursor` rather than `skip`: it seeks straight to the next page.
+    Repeated reads are served from a cache evicted by writes to their range, as the X-Cache header tells.
     """
     well_name, channel_name = await get_names_from_ids(well_id, channel_id, db)
     if not well_name or not channel_name:
         raise HTTPException(status_code=404, detail=f"Channel with id {channel_id} not found for well {well_id}")
     
+    media_type = negotiate_media_type(request.headers.get("accept"))
+    
     return BucketController.get_data_points(
-        db, well_name, channel_name, start_date, end_date, skip, limit
+        db, well_name, channel_name, start_date, end_date, skip, limit, media_type, max_points, method, cursor,
+        channel_id
     )
 
-@router.post("/", response_model=BucketDataOut)
+@router.post("/", response_model=Union[BucketDataOut, BucketDataQueued])
 async def create_data_point(
     data_point: BucketDataCreate,
+    response: Response,
     well_id: int = Path(..., description="The ID of the well"),
     channel_id: int = Path(..., description="The ID of the channel"),
+    on_conflict: Optional[str] = ON_CONFLICT_QUERY,
     db: Session = Depends(get_db)
 ):
     """
     Create a new time series data point.
+    When write buffering is enabled the point is coalesced with other points of
+    the channel and acknowledged after the flush, or as soon as it is buffered.
     """
     well_name, channel_name = await get_names_from_ids(well_id, channel_id, db)
     if not well_name or not channel_name:
         raise HTTPException(status_code=404, detail=f"Channel with id {channel_id} not found for well {well_id}")
     
-    return BucketController.create_data_point(db, well_name, channel_name, data_point)
+    if bucket_write_buffer.running:
+        result = await BucketController.create_data_point_buffered(well_name, channel_name, data_point, on_conflict)
+        if isinstance(result, BucketDataQueued):
+            response.status_code = 202
+        return result
+    
+    return BucketController.create_data_point(db, well_name, channel_name, data_point, on_conflict)
 
-@router.post("/batch", response_model=List[BucketDataOut])
+@router.post("/batch", response_model=BucketBatchResult)
 async def create_data_points_batch(
     data_points: BucketDataBatch,
     well_id: int = Path(..., description="The ID of the well"),
     channel_id: int = Path(..., description="The ID of the channel"),
+    return_ids: bool = Query(False, description="Return the created data points with their ids"),
+    on_conflict: Optional[str] = ON_CONFLICT_QUERY,
     db: Session = Depends(get_db)
 ):
     """
     Create multiple time series data points in a batch operation.
+    Points are bulk loaded; the created rows are only returned when `return_ids` is set.
+    """
+    well_name, channel_name = await get_names_from_ids(well_id, channel_id, db)
+    if not well_name or not channel_name:
+        raise HTTPException(status_code=404, detail=f"Channel with id {channel_id} not found for well {well_id}")
+    
+    return BucketController.create_data_points_batch(
+        db, well_name, channel_name, data_points, return_ids=return_ids, on_conflict=on_conflict
+    )
+
+@router.post("/upload", response_model=BucketUploadResult)
+async def upload_data_points(
+    request: Request,
+    well_id: int = Path(..., description="The ID of the well"),
+    channel_id: int = Path(..., description="The ID of the channel"),
+    format: Optional[str] = Query(
+        None, pattern="^(ndjson|csv|packed|arrow)$", description="Body format, defaults to the Content-Type header"
+    ),
+    chunk_size: int = Query(
+        10000, ge=1, le=100000, description="Number of lines (or binary points) parsed and written per chunk"
+    ),
+    on_conflict: Optional[str] = ON_CONFLICT_QUERY,
+    db: Session = Depends(get_db)
+):
+    """
+    Stream NDJSON (`{"time": ..., "value": ...}` per line) or CSV (`time,value`) data points,
+    or binary columnar points as packed blocks or an Arrow IPC stream.
+    The body is parsed, validated and written chunk by chunk, so uploads of any size use constant memory.
+    While it streams, the upload's progress is reported as an "upload" job in `/api/jobs`, where it can be cancelled.
+    """
+    well_name, channel_name = await get_names_from_ids(well_id, channel_id, db)
+    if not well_name or not channel_name:
+        raise HTTPException(status_code=404, detail=f"Channel with id {channel_id} not found for well {well_id}")
+    
+    upload_format = BucketUploadController.resolve_format(request.headers.get("content-type"), format)
+    
+    return await BucketUploadController.upload_data_points(
+        db, well_name, channel_name, request.stream(), upload_format, chunk_size, on_conflict
+    )
+
+@router.get("/export", responses={200: {"content": {"text/csv": {}, "application/x-ndjson": {}}}})
+async def export_data_points(
+    request: Request,
+    well_id: int = Path(..., description="The ID of the well"),
+    channel_id: int = Path(..., description="The ID of the channel"),
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    format: str = Query("csv", pattern="^(csv|ndjson)$", description="Body format, CSV (`time,value`) or NDJSON"),
+    db: Session = Depends(get_db)
+):
+    """
+    Stream every data point of a range as CSV or NDJSON, in the format the upload endpoint reads back.
+    There is no limit: points are read through a server-side cursor and written as they come,
+    gzipped when the request's Accept-Encoding allows it.
     """
     well_name, channel_name = await get_names_from_ids(well_id, channel_id, db)
     if not well_name or not channel_name:
         raise HTTPException(status_code=404, detail=f"Channel with id {channel_id} not found for well {well_id}")
     
-    return BucketController.create_data_points_batch(db, well_name, channel_name, data_points)
+    gzip = accepts_gzip(request.headers.get("accept-encoding"))
+    
+    return BucketExportController.export_data_points(
+        db, well_name, channel_name, start_date, end_date, format, gzip
+    )
+
+# Registered before "/{data_point_id}", which would otherwise match "/at"
+@router.delete("/at")
+async def delete_data_point_at(
+    time: datetime = Query(..., description="Timestamp of the data point"),
+    well_id: int = Path(..., description="The ID of the well"),
+    channel_id: int = Path(..., description="The ID of the channel"),
+    db: Session = Depends(get_db)
+):
+    """
+    Delete the time series data point of a timestamp, including one already moved into a compressed chunk.
+    """
+    well_name, channel_name = await get_names_from_ids(well_id, channel_id, db)
+    if not well_name or not channel_name:
+        raise HTTPException(status_code=404, detail=f"Channel with id {channel_id} not found for well {well_id}")
+    
+    return BucketController.delete_data_point_at(db, well_name, channel_name, time)
 
 @router.delete("/{data_point_id}")
 async def delete_data_point(
@@ -79,7 +208,8 @@ async def delete_data_point(
     db: Session = Depends(get_db)
 ):
     """
-    Delete a specific time series data point.
+    Delete a specific time series data point by id.
+    Compressed points are served without an id; delete them by timestamp with `DELETE .../data/at`.
     """
     well_name, channel_name = await get_names_from_ids(well_id, channel_id, db)
     if not well_name or not channel_name:
@@ -104,17 +234,56 @@ async def delete_all_bucket_data(
 
 @router.get("/statistics", response_model=BucketStatistics)
 async def get_statistics(
+    response: Response,
     well_id: int = Path(..., description="The ID of the well"),
     channel_id: int = Path(..., description="The ID of the channel"),
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
+    percentiles: str = Query("50,95,99", description="Comma-separated percentiles between 0 and 100"),
+    bins: int = Query(20, ge=1, le=1000, description="Number of equal-width bins of the value histogram"),
     db: Session = Depends(get_db)
 ):
     """
     Get statistical information about time series data.
+    Percentiles and the value histogram are estimated from the 1h/1d value sketches
+    and the raw points at the ends of the range, within 1% of the exact values,
+    the tiers used being listed in the X-Served-Tier header. Repeated reads are served
+    from a cache evicted by writes to their range, as the X-Cache header tells.
     """
     well_name, channel_name = await get_names_from_ids(well_id, channel_id, db)
     if not well_name or not channel_name:
         raise HTTPException(status_code=404, detail=f"Channel with id {channel_id} not found for well {well_id}")
     
-    return BucketController.get_statistics(db, well_name, channel_name, start_date, end_date)
\ No newline at end of file
+    return BucketController.get_statistics(
+        db, well_name, channel_name, start_date, end_date, percentiles, bins, response, channel_id
+    )
+
+@router.get("/aggregate", response_model=BucketAggregates, response_model_exclude_unset=True)
+async def get_aggregates(
+    response: Response,
+    well_id: int = Path(..., description="The ID of the well"),
+    channel_id: int = Path(..., description="The ID of the channel"),
+    interval: str = Query(..., pattern="^[0-9]+[smhd]$", description="Interval length, such as 1m, 15m, 1h or 1d"),
+    aggregates: str = Query(
+        "min,max,avg,count", description="Comma-separated aggregates among min, max, avg, count, sum, first, last, stddev"
+    ),
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    fill: str = Query(
+        "none", pattern="^(none|null|zero|previous|linear)$",
+        description="Empty intervals: leave out, null, zero, repeat the previous interval or interpolate"
+    ),
+    db: Session = Depends(get_db)
+):
+    """
+    Get one row of aggregates per time interval, intervals being aligned on the epoch.
+    Whole intervals are combined from the stored 1m/1h/1d rollups where possible,
+    the tiers used being listed in the X-Served-Tier header.
+    """
+    well_name, channel_name = await get_names_from_ids(well_id, channel_id, db)
+    if not well_name or not channel_name:
+        raise HTTPException(status_code=404, detail=f"Channel with id {channel_id} not found for well {well_id}")
+    
+    return BucketController.get_aggregates(
+        db, well_name, channel_name, interval, aggregates, start_date, end_date, fill, response
+    )
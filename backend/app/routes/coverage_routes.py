@@ -0,0 +1,62 @@
+from typing import Dict, Optional
+from datetime import datetime
+from fastapi import APIRouter, Depends, Path, Query # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+
+from app.core.database import get_db
+from app.controllers.coverage_controller import CoverageController
+from app.schemas.coverage_schema import CoverageIndexOut, CoverageIndexUpdate, CoverageReport
+
+router = APIRouter()
+
+@router.get("/", response_model=CoverageReport)
+def get_coverage(
+    well_id: int = Path(..., description="The ID of the well"),
+    channel_id: int = Path(..., description="The ID of the channel"),
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    min_gap_seconds: float = Query(0, ge=0, description="Only list the gaps at least this long"),
+    limit: int = Query(1000, ge=0, le=100000, description="Maximum number of gaps listed"),
+    db: Session = Depends(get_db)
+):
+    """
+    Get how much of a range a channel covers and the gaps in its data, read from its coverage index
+    without scanning its points. A range left open spans the channel's data.
+    """
+    return CoverageController.get_report(db, well_id, channel_id, start_date, end_date, min_gap_seconds, limit)
+
+@router.get("/index", response_model=CoverageIndexOut)
+def get_coverage_index(
+    well_id: int = Path(..., description="The ID of the well"),
+    channel_id: int = Path(..., description="The ID of the channel"),
+    db: Session = Depends(get_db)
+):
+    """
+    Get the expected sampling interval a channel's coverage is indexed at.
+    """
+    return CoverageController.get_index(db, well_id, channel_id)
+
+@router.put("/index", response_model=CoverageIndexOut)
+def set_coverage_index(
+    index: CoverageIndexUpdate,
+    well_id: int = Path(..., description="The ID of the well"),
+    channel_id: int = Path(..., description="The ID of the channel"),
+    db: Session = Depends(get_db)
+):
+    """
+    Index a channel's coverage at an expected sampling interval, or change it. The index is rebuilt from
+    the channel's points once, then kept up to date by every write; points more than 1.5 intervals
+    apart leave a gap.
+    """
+    return CoverageController.set_index(db, well_id, channel_id, index)
+
+@router.delete("/index", response_model=Dict[str, str])
+def delete_coverage_index(
+    well_id: int = Path(..., description="The ID of the well"),
+    channel_id: int = Path(..., description="The ID of the channel"),
+    db: Session = Depends(get_db)
+):
+    """
+    Stop indexing a channel's coverage.
+    """
+    return CoverageController.delete_index(db, well_id, channel_id)
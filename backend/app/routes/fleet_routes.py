@@ -0,0 +1,63 @@
+from typing import Optional
+from datetime import datetime
+from fastapi import APIRouter, Depends, Query # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+
+from app.core.database import get_db
+from app.controllers.bucket_controller import BucketController
+from app.controllers.coverage_controller import CoverageController
+from app.schemas.bucket_schema import FleetAggregates, FleetLatestValues
+from app.schemas.coverage_schema import FleetCoverage
+
+router = APIRouter()
+
+@router.get("/aggregate", response_model=FleetAggregates, response_model_exclude_unset=True)
+def get_fleet_aggregates(
+    channel: str = Query(..., min_length=1, description="Name of the channel to aggregate in every well, such as pressure"),
+    aggregates: str = Query("avg,min,max,count", description="Comma-separated aggregates: min,max,avg,count,sum,first,last,stddev"),
+    group_by: str = Query(
+        "well", pattern="^(well|region|status|lift_type)$", description="Group the wells by name, region, status or lift type"
+    ),
+    region: Optional[str] = Query(None, description="Comma-separated regions of the wells to include"),
+    status: Optional[str] = Query(None, description="Comma-separated statuses of the wells to include"),
+    lift_type: Optional[str] = Query(None, description="Comma-separated lift types of the wells to include"),
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Aggregate a channel over a range across every well holding it, grouped by well or by a well attribute,
+    such as the average pressure per region over the last week. The wells are aggregated concurrently,
+    from their rollups where possible.
+    """
+    return BucketController.get_fleet_aggregates(
+        db, channel, aggregates, group_by, region, status, lift_type, start_date, end_date
+    )
+
+@router.get("/latest", response_model=FleetLatestValues)
+def get_latest_values(
+    well_ids: Optional[str] = Query(None, description="Comma-separated ids of the wells, every well by default"),
+    channels: Optional[str] = Query(None, description="Comma-separated channel names to include, every channel by default"),
+    db: Session = Depends(get_db)
+):
+    """
+    Get the current reading of many wells at once: the latest time and value of each of their channels,
+    served from memory and kept up to date by every write.
+    """
+    return BucketController.get_latest_values(db, well_ids, channels)
+
+@router.get("/coverage", response_model=FleetCoverage)
+def get_fleet_coverage(
+    channel: str = Query(..., min_length=1, description="Name of the channel to report in every well, such as pressure"),
+    region: Optional[str] = Query(None, description="Comma-separated regions of the wells to include"),
+    status: Optional[str] = Query(None, description="Comma-separated statuses of the wells to include"),
+    lift_type: Optional[str] = Query(None, description="Comma-separated lift types of the wells to include"),
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Get how much of a range a channel covers in every well holding it, with its number of gaps and the
+    longest one, read from the coverage indexes. Channels whose coverage isn't indexed are listed without.
+    """
+    return CoverageController.get_fleet_coverage(db, channel, region, status, lift_type, start_date, end_date)
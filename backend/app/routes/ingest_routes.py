@@ -0,0 +1,23 @@
+from typing import Optional
+from fastapi import APIRouter, Depends # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+
+from app.core.database import get_db
+from app.controllers.bucket_controller import BucketController
+from app.routes.bucket_routes import ON_CONFLICT_QUERY
+from app.schemas.bucket_schema import MultiChannelIngest, MultiChannelIngestResult
+
+router = APIRouter()
+
+@router.post("/", response_model=MultiChannelIngestResult)
+def ingest_channels(
+    payload: MultiChannelIngest,
+    on_conflict: Optional[str] = ON_CONFLICT_QUERY,
+    db: Session = Depends(get_db)
+):
+    """
+    Ingest time series data points for many channels, across wells, in one request.
+    Channels are addressed by `channel_id` or by `well_name` and `channel_name`,
+    and all points are written in a single transaction.
+    """
+    return BucketController.ingest_channels(db, payload, on_conflict)
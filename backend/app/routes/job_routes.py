@@ -0,0 +1,28 @@
+from typing import List
+from fastapi import APIRouter, Path # type: ignore
+
+from app.controllers.job_controller import JobController
+from app.schemas.job_schema import JobOut
+
+router = APIRouter()
+
+@router.get("/", response_model=List[JobOut])
+def get_jobs():
+    """
+    Retrieve all background jobs still held in memory.
+    """
+    return JobController.get_jobs()
+
+@router.get("/{job_id}", response_model=JobOut)
+def get_job(job_id: str = Path(..., description="The ID of the job")):
+    """
+    Get the status and progress (points written) of a background job.
+    """
+    return JobController.get_job(job_id)
+
+@router.post("/{job_id}/cancel", response_model=JobOut)
+def cancel_job(job_id: str = Path(..., description="The ID of the job")):
+    """
+    Cancel a background job. A running job stops after its current committed chunk.
+    """
+    return JobController.cancel_job(job_id)
@@ -0,0 +1,58 @@
+from typing import Dict
+from fastapi import APIRouter, Depends, Path # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+
+from app.core.database import get_db
+from app.controllers.retention_controller import RetentionController
+from app.schemas.job_schema import JobOut
+from app.schemas.retention_schema import RetentionPolicyOut, RetentionPolicyUpdate
+
+router = APIRouter()
+
+@router.get("/", response_model=RetentionPolicyOut)
+def get_retention_policy(
+    well_id: int = Path(..., description="The ID of the well"),
+    channel_id: int = Path(..., description="The ID of the channel"),
+    db: Session = Depends(get_db)
+):
+    """
+    Get how long a channel keeps its raw points and rollups.
+    """
+    return RetentionController.get_policy(db, well_id, channel_id)
+
+@router.put("/", response_model=RetentionPolicyOut)
+def set_retention_policy(
+    policy: RetentionPolicyUpdate,
+    well_id: int = Path(..., description="The ID of the well"),
+    channel_id: int = Path(..., description="The ID of the channel"),
+    db: Session = Depends(get_db)
+):
+    """
+    Create or replace a channel's retention policy.
+    Raw points past `raw_days` are rolled up into 1m/1h/1d aggregates before being deleted;
+    a tier left empty is kept forever, a tier set to 0 isn't kept at all.
+    """
+    return RetentionController.set_policy(db, well_id, channel_id, policy)
+
+@router.delete("/", response_model=Dict[str, str])
+def delete_retention_policy(
+    well_id: int = Path(..., description="The ID of the well"),
+    channel_id: int = Path(..., description="The ID of the channel"),
+    db: Session = Depends(get_db)
+):
+    """
+    Delete a channel's retention policy, its data is then kept forever.
+    """
+    return RetentionController.delete_policy(db, well_id, channel_id)
+
+@router.post("/enforce", response_model=JobOut, status_code=202)
+def enforce_retention_policy(
+    well_id: int = Path(..., description="The ID of the well"),
+    channel_id: int = Path(..., description="The ID of the channel"),
+    db: Session = Depends(get_db)
+):
+    """
+    Apply a channel's retention policy now instead of waiting for the background enforcer.
+    Runs as a background job: poll `/api/jobs/{job_id}` for progress.
+    """
+    return RetentionController.enforce_policy(db, well_id, channel_id)
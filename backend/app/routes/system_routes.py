@@ -0,0 +1,32 @@
+from typing import List
+from fastapi import APIRouter, Depends # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+
+from app.core.database import get_db
+from app.controllers.bucket_lifecycle_controller import BucketLifecycleController
+from app.models.bucket import bucket_registry
+from app.repositories.bucket_read_cache import bucket_read_cache
+from app.schemas.system_schema import BucketRegistryStats, ReadCacheStats
+
+router = APIRouter()
+
+@router.get("/bucket-registry", response_model=BucketRegistryStats)
+def get_bucket_registry_stats():
+    """
+    Get the size of this process's bucket table registry, the time spent building it and its lookup counters.
+    """
+    return bucket_registry.stats()
+
+@router.get("/read-cache", response_model=ReadCacheStats)
+def get_read_cache_stats():
+    """
+    Get the read cache's backend, size and hit, miss and eviction counters since this process started.
+    """
+    return bucket_read_cache.stats()
+
+@router.get("/orphaned-buckets", response_model=List[str])
+def get_orphaned_buckets(db: Session = Depends(get_db)):
+    """
+    List the bucket tables no channel maps to any more. The background sweeper reclaims them.
+    """
+    return BucketLifecycleController.get_orphaned_tables(db)
@@ -1,9 +1,12 @@
-from typing import List
+from typing import List, Optional
+from datetime import datetime
 from fastapi import APIRouter, Depends, Query # type: ignore
 from sqlalchemy.orm import Session # type: ignore
 
 from app.core.database import get_db
+from app.controllers.bucket_controller import BucketController
 from app.controllers.well_controller import WellController
+from app.schemas.bucket_schema import WellFrame
 from app.schemas.well_schema import Well, WellCreate, WellUpdate
 
 router = APIRouter()
@@ -26,6 +29,31 @@ def get_well(well_id: int, db: Session = Depends(get_db)):
     """
     return WellController.get_well_by_id(db, well_id=well_id)
 
+@router.get("/{well_id}/frame", response_model=WellFrame)
+def get_well_frame(
+    well_id: int,
+    channels: str = Query(..., description="Comma-separated channel names of the well, such as pressure,temperature"),
+    interval: str = Query(..., pattern="^[0-9]+[smhd]$", description="Interval length, such as 1m, 15m, 1h or 1d"),
+    aggregate: str = Query(
+        "avg", pattern="^(min|max|avg|count|sum|first|last|stddev)$",
+        description="Aggregate giving each channel's value per interval"
+    ),
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    fill: str = Query(
+        "none", pattern="^(none|null|zero|previous|linear)$",
+        description="Empty intervals: leave out where every channel is empty, null, zero, repeat or interpolate"
+    ),
+    db: Session = Depends(get_db)
+):
+    """
+    Get several channels of a well side by side: one shared time column, aligned on the epoch,
+    and one value column per channel. The channels are aggregated concurrently.
+    """
+    return BucketController.get_well_frame(
+        db, well_id, channels, interval, aggregate, start_date, end_date, fill
+    )
+
 @router.post("/", response_model=Well)
 def create_well(well: WellCreate, db: Session = Depends(get_db)):
     """
@@ -1,6 +1,6 @@
 from datetime import datetime
 from typing import Optional, List, Dict, Any
-from pydantic import BaseModel, ConfigDict # type: ignore
+from pydantic import BaseModel, ConfigDict, model_validator # type: ignore
 
 # Schema for a data point in a bucket
 class BucketDataBase(BaseModel):
@@ -17,13 +17,166 @@ class BucketDataBatch(BaseModel):
 
 # Schema for returning a data point from a bucket
 class BucketDataOut(BucketDataBase):
-    id: int
+    id: Optional[int] = None  # None for points read from a compressed chunk
     
     model_config = ConfigDict(from_attributes=True, arbitrary_types_allowed=True)
 
+# Schema for acknowledging a data point accepted by the write buffer
+class BucketDataQueued(BucketDataBase):
+    status: str = "queued"
+
+# Schema for the result of a batch write
+class BucketBatchResult(BaseModel):
+    received: int
+    count: int
+    data_from: Optional[datetime] = None
+    data_to: Optional[datetime] = None
+    data_points: Optional[List[BucketDataOut]] = None
+
+# Schema for one chunk of a streamed upload that rejected points
+class BucketUploadChunk(BaseModel):
+    chunk: int
+    lines: int
+    written: int
+    errors: int
+    total_written: int
+    error_samples: List[str] = []
+
+# Schema for the result of a streamed upload
+class BucketUploadResult(BaseModel):
+    lines_read: int = 0
+    written: int = 0
+    rejected: int = 0
+    data_from: Optional[datetime] = None
+    data_to: Optional[datetime] = None
+    chunks: int = 0
+    failed_chunks: List[BucketUploadChunk] = []  # The first chunks with rejected points, up to a limit
+    job_id: Optional[str] = None  # Job the upload's progress was reported on
+
+# Schema for the points of one channel in a multi-channel ingest,
+# addressed either by channel id or by well and channel name
+class ChannelIngest(BaseModel):
+    channel_id: Optional[int] = None
+    well_name: Optional[str] = None
+    channel_name: Optional[str] = None
+    data_points: List[BucketDataBase]
+
+    @model_validator(mode="after")
+    def validate_target(self):
+        if self.channel_id is None and not (self.well_name and self.channel_name):
+            raise ValueError("Either channel_id or both well_name and channel_name are required")
+        return self
+
+# Schema for ingesting points for many channels at once
+class MultiChannelIngest(BaseModel):
+    channels: List[ChannelIngest]
+
+# Schema for the result of one channel of a multi-channel ingest
+class ChannelIngestResult(BaseModel):
+    channel_id: int
+    well_name: str
+    channel_name: str
+    received: int
+    count: int
+    data_from: Optional[datetime] = None
+    data_to: Optional[datetime] = None
+
+# Schema for the result of a multi-channel ingest
+class MultiChannelIngestResult(BaseModel):
+    count: int
+    channels: List[ChannelIngestResult]
+
+# Schema for one bin of a value histogram
+class HistogramBin(BaseModel):
+    lower: float
+    upper: float
+    count: int
+
 # Schema for statistics of a bucket
 class BucketStatistics(BaseModel):
     min: Optional[float] = None
     max: Optional[float] = None
     avg: Optional[float] = None
-    count: int
\ No newline at end of file
+    count: int
+    stddev: Optional[float] = None
+    percentiles: Dict[str, Optional[float]] = {}
+    histogram: List[HistogramBin] = []
+
+# Schema for the aggregates of one time interval, only the requested ones being set
+class BucketAggregateRow(BaseModel):
+    time: datetime
+    min: Optional[float] = None
+    max: Optional[float] = None
+    avg: Optional[float] = None
+    count: Optional[int] = None
+    sum: Optional[float] = None
+    first: Optional[float] = None
+    last: Optional[float] = None
+    stddev: Optional[float] = None
+
+# Schema for a time-bucketed aggregation of a bucket
+class BucketAggregates(BaseModel):
+    interval: str
+    aggregates: List[str]
+    fill: str
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+    rows: List[BucketAggregateRow]
+
+
+# Schema for several channels of a well resampled onto shared time intervals,
+# a value column per channel next to the shared time column
+class WellFrame(BaseModel):
+    well_name: str
+    interval: str
+    aggregate: str
+    fill: str
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+    time: List[datetime]
+    columns: Dict[str, List[Optional[float]]]
+    tiers: Dict[str, str]  # Rollup tiers and raw points each channel was served from
+
+# Schema for the aggregates of one group of wells, only the requested ones being set
+class FleetAggregateGroup(BaseModel):
+    key: Optional[str] = None  # Well name, or the region, status or lift type of the group
+    wells: int  # Wells of the group with points in the range
+    min: Optional[float] = None
+    max: Optional[float] = None
+    avg: Optional[float] = None
+    count: Optional[int] = None
+    sum: Optional[float] = None
+    first: Optional[float] = None
+    last: Optional[float] = None
+    stddev: Optional[float] = None
+    tiers: str  # Rollup tiers and raw points the group was served from
+
+# Schema for a channel name aggregated across the wells of the fleet
+class FleetAggregates(BaseModel):
+    channel_name: str
+    group_by: str
+    aggregates: List[str]
+    region: Optional[str] = None
+    status: Optional[str] = None
+    lift_type: Optional[str] = None
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+    wells: int  # Wells matching the filters with a channel of that name
+    groups: List[FleetAggregateGroup]
+
+# Schema for the latest point of a channel, unset while it has none
+class ChannelLatestPoint(BaseModel):
+    channel_id: int
+    channel_name: str
+    time: Optional[datetime] = None
+    value: Optional[float] = None
+
+# Schema for the latest points of the channels of one well
+class WellLatestValues(BaseModel):
+    well_id: int
+    well_name: str
+    channels: List[ChannelLatestPoint]
+
+# Schema for the latest points of the channels of many wells
+class FleetLatestValues(BaseModel):
+    wells: List[WellLatestValues]
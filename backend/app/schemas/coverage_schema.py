@@ -0,0 +1,59 @@
+from datetime import datetime
+from typing import List, Optional
+from pydantic import BaseModel, ConfigDict, Field # type: ignore
+
+# Properties to receive on coverage index update
+class CoverageIndexUpdate(BaseModel):
+    sampling_interval_seconds: float = Field(..., gt=0, description="Interval the channel's points are expected at")
+
+# Properties to return to client
+class CoverageIndexOut(CoverageIndexUpdate):
+    channel_id: int
+    max_gap_seconds: float  # Longest spacing of consecutive points that isn't a gap
+    runs: int  # Contiguous runs of points indexed
+    created_at: datetime
+    updated_at: datetime
+
+    model_config = ConfigDict(from_attributes=True, arbitrary_types_allowed=True)
+
+# Schema for a span without data
+class CoverageGap(BaseModel):
+    start: datetime  # One sampling interval past the last point before the gap, or the start of the range
+    end: datetime  # First point after the gap, or the end of the range
+    duration_seconds: float
+
+# Schema for the coverage of a channel over a range
+class CoverageReport(BaseModel):
+    channel_id: int
+    sampling_interval_seconds: float
+    max_gap_seconds: float
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+    range_seconds: float
+    covered_seconds: float
+    coverage_percent: Optional[float] = None  # None when the range is empty
+    gap_count: int
+    gap_seconds: float
+    longest_gap_seconds: Optional[float] = None
+    gaps: List[CoverageGap]  # Gaps at least min_gap_seconds long, up to the limit
+
+# Schema for the coverage of one well's channel, unset when its coverage isn't indexed
+class ChannelCoverageSummary(BaseModel):
+    well_id: int
+    well_name: str
+    channel_id: int
+    sampling_interval_seconds: Optional[float] = None
+    coverage_percent: Optional[float] = None
+    covered_seconds: Optional[float] = None
+    gap_count: Optional[int] = None
+    longest_gap_seconds: Optional[float] = None
+
+# Schema for the coverage of a channel name across the wells of the fleet
+class FleetCoverage(BaseModel):
+    channel_name: str
+    region: Optional[str] = None
+    status: Optional[str] = None
+    lift_type: Optional[str] = None
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+    channels: List[ChannelCoverageSummary]
@@ -0,0 +1,20 @@
+from datetime import datetime
+from typing import Optional, Dict, Any
+from pydantic import BaseModel, ConfigDict # type: ignore
+
+# Schema for returning a background job
+class JobOut(BaseModel):
+    id: str
+    kind: str
+    status: str
+    params: Dict[str, Any]
+    points_written: int
+    total_points: Optional[int] = None
+    progress: Optional[float] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True, arbitrary_types_allowed=True)
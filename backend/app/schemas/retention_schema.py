@@ -0,0 +1,19 @@
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel, ConfigDict, Field # type: ignore
+
+# Properties to receive on retention policy update
+class RetentionPolicyUpdate(BaseModel):
+    raw_days: Optional[int] = Field(None, ge=0, description="Days of raw points to keep, None keeps them forever")
+    minute_days: Optional[int] = Field(None, ge=0, description="Days of 1 minute rollups to keep, 0 keeps none")
+    hour_days: Optional[int] = Field(None, ge=0, description="Days of 1 hour rollups to keep, 0 keeps none")
+    day_days: Optional[int] = Field(None, ge=0, description="Days of 1 day rollups to keep, 0 keeps none")
+
+# Properties to return to client
+class RetentionPolicyOut(RetentionPolicyUpdate):
+    channel_id: int
+    last_enforced_at: Optional[datetime] = None
+    created_at: datetime
+    updated_at: datetime
+
+    model_config = ConfigDict(from_attributes=True, arbitrary_types_allowed=True)
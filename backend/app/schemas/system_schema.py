@@ -0,0 +1,26 @@
+from typing import Optional
+from pydantic import BaseModel, Field # type: ignore
+
+# Schema for returning the bucket registry metrics
+class BucketRegistryStats(BaseModel):
+    tables: int = Field(..., description="Bucket tables known to the registry")
+    unique_time_tables: int = Field(..., description="Bucket tables enforcing one row per timestamp")
+    loaded: bool = Field(..., description="Whether the catalog has been read")
+    loads: int = Field(..., description="Number of bulk catalog reads")
+    load_seconds: Optional[float] = Field(None, description="Duration of the last bulk catalog read")
+    hits: int = Field(..., description="Lookups answered from the registry")
+    misses: int = Field(..., description="Lookups of tables the registry didn't know")
+    created: int = Field(..., description="Bucket tables created by this process")
+
+# Schema for returning the read cache metrics
+class ReadCacheStats(BaseModel):
+    backend: str = Field(..., description="Where entries are kept: memory of this process or redis")
+    enabled: bool = Field(..., description="Whether reads go through the cache")
+    entries: Optional[int] = Field(None, description="Entries held, unknown for the redis backend")
+    bytes: Optional[int] = Field(None, description="Size of the entries held, unknown for the redis backend")
+    hits: int = Field(..., description="Reads served from the cache")
+    misses: int = Field(..., description="Reads computed and then cached")
+    evictions: int = Field(..., description="Entries evicted to make room for newer ones")
+    invalidations: int = Field(..., description="Entries evicted by writes to their range")
+    discarded: int = Field(..., description="Reads left uncached as a write committed while they ran")
+    errors: int = Field(..., description="Failed cache operations, the reads being served uncached")
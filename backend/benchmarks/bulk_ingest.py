@@ -0,0 +1,86 @@
+"""
+Benchmark bucket batch writes: ORM unit of work vs. the bulk ingest engine.
+
+Creates a throwaway well and channel, writes the same synthetic points with
+each strategy and prints rows/sec. Run from the backend directory against
+the database configured in DATABASE_URL:
+
+    python -m benchmarks.bulk_ingest --rows 100000
+"""
+import argparse
+import datetime
+import random
+import time
+import uuid
+
+from sqlalchemy import delete # type: ignore
+from sqlalchemy.orm import registry # type: ignore
+
+from app.core.database import SessionLocal, create_tables
+from app.models.bucket import get_bucket_table
+from app.models.well import Well
+from app.repositories.bucket_bulk_writer import BucketBulkWriter
+from app.repositories.channel_data_repository import ChannelDataRepository
+from app.schemas.channel_data_schema import ChannelDataCreate
+
+
+def generate_points(rows):
+    start = datetime.datetime(2024, 1, 1)
+    return [(start + datetime.timedelta(seconds=i), random.uniform(0, 100)) for i in range(rows)]
+
+
+class BenchmarkBucket:
+    """ORM class mapped onto the throwaway bucket table, for the ORM strategy only"""
+
+
+def write_orm(db, bucket_table, points):
+    """The original create_data_points_batch strategy: one ORM object per point"""
+    for point_time, value in points:
+        db.add(BenchmarkBucket(time=point_time, value=value))
+    db.commit()
+
+
+def write_bulk(db, bucket_table, points, return_ids=False):
+    BucketBulkWriter.write(db, bucket_table, iter(points), return_ids=return_ids)
+    db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000, help="Number of points per strategy")
+    args = parser.parse_args()
+
+    create_tables()
+    db = SessionLocal()
+    well_name = f"bench_{uuid.uuid4().hex[:8]}"
+    well = Well(name=well_name, latitude=0, longitude=0, region="bench", depth=0, status="active")
+    db.add(well)
+    db.commit()
+    channel = ChannelDataRepository.create_channel(db, ChannelDataCreate(well_id=well.id, name="ingest"))
+    bucket_table = get_bucket_table(well_name, channel.name)
+    registry().map_imperatively(BenchmarkBucket, bucket_table)
+
+    points = generate_points(args.rows)
+    strategies = [("orm", write_orm), ("bulk", write_bulk)]
+    if BucketBulkWriter.supports_copy(db):
+        strategies.append(("bulk+ids", lambda db, table, pts: write_bulk(db, table, pts, return_ids=True)))
+
+    try:
+        print(f"dialect={db.get_bind().dialect.name} copy={BucketBulkWriter.supports_copy(db)} rows={args.rows}")
+        for name, strategy in strategies:
+            db.execute(delete(bucket_table))
+            db.commit()
+            started = time.perf_counter()
+            strategy(db, bucket_table, points)
+            elapsed = time.perf_counter() - started
+            print(f"{name:>10}: {elapsed:8.2f}s  {args.rows / elapsed:12,.0f} rows/sec")
+    finally:
+        bucket_table.drop(db.get_bind())
+        db.delete(channel)
+        db.delete(well)
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Compare offset and cursor pagination of a channel's points at increasing depths.
+
+For every depth, the page starting that many points into the channel is read
+with `skip` and then with the cursor of the point just before it, keeping
+the best of a few runs of each. Offset pages get slower the deeper they are,
+as every skipped row is still scanned, while cursor pages seek straight to
+their first point. Run from the backend directory on a channel holding
+enough points:
+
+    python -m scripts.benchmark_pagination --well W1 --channel pressure [--limit 1000]
+"""
+import argparse
+import time
+
+from app.core.cursor import encode_cursor
+from app.core.database import SessionLocal, create_tables
+from app.models.bucket import get_bucket_store
+from app.repositories.bucket_repository import BucketRepository
+
+
+def best_time(read, repeat):
+    """Best wall time in milliseconds of `repeat` calls"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        read()
+        timings.append((time.perf_counter() - started) * 1000)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--well", required=True, help="Well of the channel to read")
+    parser.add_argument("--channel", required=True, help="Channel to read")
+    parser.add_argument("--limit", type=int, default=1000, help="Points per page")
+    parser.add_argument(
+        "--depths", default="0,1000,10000,100000,1000000,10000000",
+        help="Comma-separated numbers of points before the page"
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Runs of each read, the best one is kept")
+    args = parser.parse_args()
+
+    create_tables()
+
+    db = SessionLocal()
+    try:
+        store = get_bucket_store(db, args.well, args.channel)
+        total = BucketRepository.get_statistics(db, args.well, args.channel)["count"]
+        print(f"{store.name}: {total} points, pages of {args.limit}")
+        print(f"{'depth':>12} {'offset ms':>12} {'cursor ms':>12} {'speedup':>9}")
+
+        for depth in (int(depth) for depth in args.depths.split(",")):
+            if depth + args.limit > total:
+                print(f"{depth:>12} skipped, the channel holds fewer points")
+                continue
+
+            cursor = None
+            if depth:
+                (ids, times, _), _ = BucketRepository.get_data_columns(
+                    db, args.well, args.channel, skip=depth - 1, limit=1
+                )
+                cursor = encode_cursor(times[0].astype(object), int(ids[0]))
+
+            offset_ms = best_time(
+                lambda: BucketRepository.get_data_columns(db, args.well, args.channel, skip=depth, limit=args.limit),
+                args.repeat
+            )
+            cursor_ms = best_time(
+                lambda: BucketRepository.get_data_columns(
+                    db, args.well, args.channel, limit=args.limit, cursor=cursor
+                ),
+                args.repeat
+            )
+            print(f"{depth:>12} {offset_ms:>12.1f} {cursor_ms:>12.1f} {offset_ms / cursor_ms:>8.1f}x")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Pack closed time ranges of bucket data into compressed chunks.
+
+For every channel, rows older than --older-than-hours (CHUNK_COMPRESS_AFTER_HOURS
+by default) are moved into Gorilla-style compressed chunks of CHUNK_SPAN_HOURS
+each, one committed chunk at a time. Reads decode the chunks transparently.
+Run periodically from the backend directory against the database configured
+in DATABASE_URL:
+
+    python -m scripts.compress_buckets [--older-than-hours 168]
+"""
+import argparse
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import joinedload # type: ignore
+
+from app.core.config import settings
+from app.core.database import SessionLocal, create_tables
+from app.models.bucket import get_channel_store
+from app.models.channel_data import ChannelData
+from app.repositories.bucket_chunk_repository import BucketChunkRepository
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--older-than-hours", type=int, default=settings.CHUNK_COMPRESS_AFTER_HOURS,
+        help="Compress rows older than this many hours"
+    )
+    args = parser.parse_args()
+
+    create_tables()
+    before = datetime.now() - timedelta(hours=args.older_than_hours)
+    span = timedelta(hours=settings.CHUNK_SPAN_HOURS)
+
+    db = SessionLocal()
+    try:
+        channels = db.query(ChannelData).options(joinedload(ChannelData.well)).order_by(ChannelData.id).all()
+        for channel in channels:
+            result = BucketChunkRepository.compress(db, get_channel_store(channel), before, span)
+            if result["rows"]:
+                print(f"  {channel.bucket_name}: {result['rows']} rows packed into {result['windows']} chunks")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
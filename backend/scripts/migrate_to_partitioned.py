@@ -0,0 +1,52 @@
+"""
+Move per-channel bucket tables into the partitioned points table.
+
+Creates the partitioned `timeseries_points` table if needed, then copies
+every channel's `bucket_<well>_<channel>` table into it, one channel per
+transaction. Rows already present are skipped, so the migration can be
+interrupted and rerun. Switch the application over with
+BUCKET_STORAGE=partitioned once it has completed. Run from the backend
+directory against the database configured in DATABASE_URL:
+
+    python -m scripts.migrate_to_partitioned [--drop-source]
+"""
+import argparse
+
+from sqlalchemy.orm import joinedload # type: ignore
+
+from app.core.database import SessionLocal, engine
+from app.models.bucket import create_points_table, get_bucket_table_by_names
+from app.models.channel_data import ChannelData
+from app.repositories.bucket_repository import BucketRepository
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--drop-source", action="store_true",
+        help="Drop each bucket table once all of its rows are in the points table"
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Only list the bucket tables that would be migrated")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        channels = db.query(ChannelData).options(joinedload(ChannelData.well)).order_by(ChannelData.id).all()
+        pending = [channel for channel in channels if get_bucket_table_by_names(channel.well.name, channel.name) is not None]
+        print(f"{len(pending)} of {len(channels)} channels have a bucket table")
+        if args.dry_run:
+            for channel in pending:
+                print(f"  {channel.table_name} -> channel_id {channel.id}")
+            return
+
+        create_points_table(engine)
+        for channel in pending:
+            result = BucketRepository.migrate_to_partitioned(db, channel, drop_source=args.drop_source)
+            status = "dropped" if result["dropped"] else "kept"
+            print(f"  {result['table']}: {result['rows']} rows, {result['copied']} copied, source {status}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Deduplicate existing bucket tables and make their time index unique.
+
+Buckets created before timestamps were unique only have a plain index on
+`time`, so they may hold several rows per timestamp and can't be used with
+the keep_first/overwrite conflict policies. For every such table this keeps
+one row per timestamp and replaces the index with a unique one; the
+channel's range, cached reads, latest value and rollups are refreshed in
+the same transaction. Run from the backend directory against the database
+configured in DATABASE_URL:
+
+    python -m scripts.migrate_unique_time_index --keep first
+"""
+import argparse
+
+from app.core.database import SessionLocal
+from app.models.bucket import get_all_bucket_tables, has_unique_time_index
+from app.repositories.bucket_repository import BucketRepository
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--keep", choices=["first", "last"], default="first",
+        help="Row kept per duplicated timestamp: the first or the last inserted"
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Only list the tables that need migrating")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        pending = [table for table in get_all_bucket_tables() if not has_unique_time_index(table)]
+        print(f"{len(pending)} bucket tables without a unique time index")
+        if args.dry_run:
+            for table in pending:
+                print(f"  {table}")
+            return
+
+        for table in pending:
+            removed = BucketRepository.migrate_unique_time_index(db, table, keep=args.keep)
+            print(f"  {table}: removed {removed} duplicate rows")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
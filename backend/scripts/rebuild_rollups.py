@@ -0,0 +1,54 @@
+"""
+Rebuild the 1m/1h/1d rollups and the 1h/1d value sketches of existing
+channels from their stored points.
+
+Writes keep the rollups current; run this once for data written before
+rollups or sketches existed or while ROLLUPS_ENABLED was off, or to repair
+them. Each channel is rebuilt one day at a time, every day committed on its
+own, so the script can be interrupted and rerun. Rollups of days whose
+points already expired are left as they are. Run from the backend directory:
+
+    python -m scripts.rebuild_rollups [--well W1] [--channel pressure]
+"""
+import argparse
+
+from sqlalchemy.orm import joinedload # type: ignore
+
+from app.core.database import SessionLocal, create_tables
+from app.models.bucket import get_channel_store
+from app.models.channel_data import ChannelData
+from app.models.well import Well
+from app.repositories.bucket_repository import BucketRepository
+from app.repositories.rollup_repository import RollupRepository
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--well", help="Only rebuild the channels of this well")
+    parser.add_argument("--channel", help="Only rebuild the channels with this name")
+    args = parser.parse_args()
+
+    create_tables()
+
+    db = SessionLocal()
+    try:
+        query = db.query(ChannelData).join(ChannelData.well).options(joinedload(ChannelData.well))
+        if args.well:
+            query = query.filter(Well.name == args.well)
+        if args.channel:
+            query = query.filter(ChannelData.name == args.channel)
+
+        for channel in query.order_by(ChannelData.id).all():
+            store = get_channel_store(channel)
+            earliest, latest = BucketRepository.get_time_bounds(db, store)
+            result = RollupRepository.rebuild(db, store, earliest, latest)
+            print(
+                f"  {channel.bucket_name}: {result['points']} points over {result['days']} days, "
+                f"{result['rollups_written']} rollups written"
+            )
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Drop or archive the bucket tables no channel maps to any more.
+
+Tables are orphaned by channels deleted, or renamed, before bucket tables
+followed their channel. The backend sweeps them every
+BUCKET_SWEEP_INTERVAL_MINUTES; run this from the backend directory to sweep
+on demand, or to list them first with --dry-run:
+
+    python -m scripts.sweep_bucket_tables [--mode drop|archive] [--dry-run]
+"""
+import argparse
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.repositories.bucket_lifecycle_repository import BUCKET_DELETE_MODES, BucketLifecycleRepository
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--mode", choices=BUCKET_DELETE_MODES, default=settings.BUCKET_ORPHAN_MODE,
+        help="Drop the orphaned tables or archive them under an archived_ name"
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Only list the orphaned tables")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        results = BucketLifecycleRepository.sweep(db, args.mode, dry_run=args.dry_run)
+        print(f"{len(results)} orphaned bucket tables")
+        for result in results:
+            if args.dry_run:
+                print(f"  {result['table']}")
+            elif result["archived_as"]:
+                print(f"  {result['table']}: archived as {result['archived_as']}")
+            else:
+                print(f"  {result['table']}: dropped")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
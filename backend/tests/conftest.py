@@ -0,0 +1,34 @@
+import os
+import tempfile
+import uuid
+
+# The app reads its database from the environment when it is first imported
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}"
+
+import pytest # type: ignore
+from fastapi.testclient import TestClient # type: ignore
+
+from app import main
+
+
+@pytest.fixture(scope="session")
+def client():
+    # SQLite is ready as soon as it is opened
+    main.wait_for_db = lambda: None
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def channel(client):
+    """A new well with a `pressure` channel, as (well id, channel id, channel URL)"""
+    well = client.post("/api/wells/", json={
+        "name": f"well-{uuid.uuid4().hex[:8]}", "latitude": 1, "longitude": 2, "region": "north", "depth": 100,
+        "status": "active"
+    })
+    assert well.status_code == 200, well.text
+    well_id = well.json()["id"]
+    created = client.post(f"/api/wells/{well_id}/channels/", json={"name": "pressure", "well_id": well_id})
+    assert created.status_code == 200, created.text
+    channel_id = created.json()["id"]
+    return well_id, channel_id, f"/api/wells/{well_id}/channels/{channel_id}"
@@ -0,0 +1,69 @@
+"""Conflict policies of the bulk writer on timestamps already stored"""
+from datetime import datetime
+
+import pytest # type: ignore
+from sqlalchemy import select # type: ignore
+from sqlalchemy.exc import IntegrityError # type: ignore
+
+from app.core.database import SessionLocal
+from app.models.bucket import get_channel_store
+from app.repositories.bucket_bulk_writer import (
+    BucketBulkWriter,
+    CONFLICT_ERROR,
+    CONFLICT_KEEP_FIRST,
+    CONFLICT_OVERWRITE
+)
+from app.repositories.channel_data_repository import ChannelDataRepository
+
+STORED = [(datetime(2024, 6, 1, hour), float(hour)) for hour in range(3)]
+# Two stored timestamps, one of them twice, and a new one
+WRITTEN = [
+    (datetime(2024, 6, 1, 1), 10.0),
+    (datetime(2024, 6, 1, 2), 20.0),
+    (datetime(2024, 6, 1, 2), 21.0),
+    (datetime(2024, 6, 1, 3), 30.0),
+]
+
+
+def write(channel_id, points, on_conflict):
+    """Write points to the channel's bucket, returning the write result and every stored value"""
+    with SessionLocal() as db:
+        store = get_channel_store(ChannelDataRepository.get_channel_by_id(db, channel_id))
+        assert store.unique_time
+        try:
+            result = BucketBulkWriter.write(
+                db, store.table, points, on_conflict=on_conflict, key_values=store.key_values
+            )
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            result = None
+        table = store.table
+        stored = db.execute(
+            select(table.c.time, table.c.value).where(*store.criteria()).order_by(table.c.time)
+        ).all()
+        return result, [tuple(row) for row in stored]
+
+
+@pytest.mark.parametrize("on_conflict, values, latest_value", [
+    (CONFLICT_KEEP_FIRST, [0.0, 1.0, 2.0, 30.0], 30.0),
+    (CONFLICT_OVERWRITE, [0.0, 10.0, 21.0, 30.0], 30.0),
+])
+def test_upsert_policies(channel, on_conflict, values, latest_value):
+    _, channel_id, _ = channel
+    write(channel_id, STORED, None)
+
+    result, stored = write(channel_id, WRITTEN, on_conflict)
+    assert (result["received"], result["data_from"], result["data_to"]) == (4, WRITTEN[0][0], WRITTEN[-1][0])
+    assert result["latest_value"] == latest_value
+    assert stored == [(datetime(2024, 6, 1, hour), value) for hour, value in enumerate(values)]
+
+
+@pytest.mark.parametrize("on_conflict", [None, CONFLICT_ERROR])
+def test_rejected_write_stores_nothing(channel, on_conflict):
+    _, channel_id, _ = channel
+    write(channel_id, STORED, None)
+
+    result, stored = write(channel_id, WRITTEN, on_conflict)
+    assert result is None
+    assert stored == STORED
@@ -0,0 +1,39 @@
+"""Deleting a channel archives all of its data and leaves nothing behind under its id"""
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, inspect, select, table, column # type: ignore
+
+from app.core.database import SessionLocal, engine
+from app.models.bucket import bucket_table_name, get_channel_store
+from app.models.bucket_chunk import BucketChunk
+from app.models.rollup import ChannelRollup, ChannelRollupSketch
+from app.repositories.bucket_chunk_repository import BucketChunkRepository
+from app.repositories.channel_data_repository import ChannelDataRepository
+
+POINTS = [{"time": f"2024-02-0{day}T12:00:00", "value": float(day)} for day in range(1, 6)]
+
+
+def test_archive_keeps_compressed_points_and_purges_derived_rows(client, channel):
+    well_id, channel_id, url = channel
+    response = client.post(f"{url}/data/batch", json={"data_points": POINTS})
+    assert response.status_code == 200, response.text
+
+    with SessionLocal() as db:
+        db_channel = ChannelDataRepository.get_channel_by_id(db, channel_id)
+        table_name = bucket_table_name(db_channel.well.name, db_channel.name)
+        store = get_channel_store(db_channel)
+        compressed = BucketChunkRepository.compress(db, store, datetime(2024, 2, 4), timedelta(days=1))
+        assert compressed["rows"] == 3
+
+    response = client.delete(f"/api/wells/{well_id}/channels/{channel_id}")
+    assert response.status_code == 200, response.text
+
+    archives = [name for name in inspect(engine).get_table_names() if name.endswith(table_name)]
+    assert len(archives) == 1 and archives[0].startswith("archived_")
+    with SessionLocal() as db:
+        values = db.execute(select(column("value")).select_from(table(archives[0])).order_by(column("time"))).scalars()
+        assert list(values) == [point["value"] for point in POINTS]
+
+        for model in (BucketChunk, ChannelRollup, ChannelRollupSketch):
+            rows = db.execute(select(func.count()).select_from(model).where(model.channel_id == channel_id)).scalar()
+            assert rows == 0, model.__tablename__
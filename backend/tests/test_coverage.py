@@ -0,0 +1,53 @@
+"""Writes merge their points into the coverage runs and deletes split them where a gap opens"""
+from app.core.database import SessionLocal
+from app.repositories.coverage_repository import CoverageRepository
+
+
+def minute(value):
+    return f"2024-09-01T00:{value:02d}:00"
+
+
+def stored_runs(channel_id):
+    with SessionLocal() as db:
+        coverage = CoverageRepository.get_coverage(db, channel_id)
+        runs = CoverageRepository.get_runs(db, [coverage], None, None)[channel_id]
+        return [(start.minute, end.minute) for start, end in runs]
+
+
+def test_runs_merge_on_write_and_split_on_delete(client, channel):
+    _, channel_id, url = channel
+    # Points more than 90 seconds apart leave a gap
+    response = client.put(f"{url}/coverage/index", json={"sampling_interval_seconds": 60})
+    assert response.status_code == 200, response.text
+
+    def write(*minutes):
+        response = client.post(f"{url}/data/batch", json={"data_points": [
+            {"time": minute(value), "value": 1.0} for value in minutes
+        ]})
+        assert response.status_code == 200, response.text
+        return stored_runs(channel_id)
+
+    def delete(value):
+        response = client.delete(f"{url}/data/at", params={"time": minute(value)})
+        assert response.status_code == 200, response.text
+        return stored_runs(channel_id)
+
+    assert write(0, 1, 2, 5, 6, 10) == [(0, 2), (5, 6), (10, 10)]
+    # Points filling the gaps join the runs either side
+    assert write(4, 3) == [(0, 6), (10, 10)]
+    assert write(9, 11, 20) == [(0, 6), (9, 11), (20, 20)]
+
+    # Deleting a point only splits its run where its neighbours end up too far apart
+    assert delete(0) == [(1, 6), (9, 11), (20, 20)]
+    assert delete(10) == [(1, 6), (9, 9), (11, 11), (20, 20)]
+    assert delete(20) == [(1, 6), (9, 9), (11, 11)]
+    assert write(10) == [(1, 6), (9, 11)]
+
+    # The runs kept up to date match the ones rebuilt from the points
+    runs = stored_runs(channel_id)
+    response = client.put(f"{url}/coverage/index", json={"sampling_interval_seconds": 60})
+    assert response.status_code == 200, response.text
+    assert stored_runs(channel_id) == runs
+    assert response.json()["runs"] == 2
+    assert response.json()["max_gap_seconds"] == 90
+
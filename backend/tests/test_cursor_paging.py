@@ -0,0 +1,50 @@
+"""Cursor pages run through compressed chunks and rows in time order, each point once"""
+from datetime import datetime, timedelta
+
+import pytest # type: ignore
+
+from app.core.database import SessionLocal
+from app.models.bucket import get_channel_store
+from app.repositories.bucket_chunk_repository import BucketChunkRepository
+from app.repositories.channel_data_repository import ChannelDataRepository
+
+HOURS = [f"2024-07-01T{hour:02d}:00:00" for hour in range(10)]
+# Rows written after their window was compressed
+LATE = ["2024-07-01T01:30:00", "2024-07-01T03:30:00"]
+
+
+def read_pages(client, url, limit, **params):
+    """Times of every point of a range read in pages of `limit` points, and the number of pages"""
+    times, pages = [], 0
+    params = {**params, "limit": limit}
+    while True:
+        response = client.get(f"{url}/data/", params=params)
+        assert response.status_code == 200, response.text
+        assert len(response.json()) <= limit
+        times += [point["time"] for point in response.json()]
+        pages += 1
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return times, pages
+        params["cursor"] = cursor
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 5, 20])
+def test_cursor_pages_across_compressed_points(client, channel, limit):
+    _, channel_id, url = channel
+    response = client.post(f"{url}/data/batch", json={"data_points": [{"time": time, "value": 1.0} for time in HOURS]})
+    assert response.status_code == 200, response.text
+    with SessionLocal() as db:
+        store = get_channel_store(ChannelDataRepository.get_channel_by_id(db, channel_id))
+        BucketChunkRepository.compress(db, store, datetime(2024, 7, 1, 5), timedelta(hours=1))
+    response = client.post(f"{url}/data/batch", json={"data_points": [{"time": time, "value": 2.0} for time in LATE]})
+    assert response.status_code == 200, response.text
+
+    expected = sorted(HOURS + LATE)
+    times, pages = read_pages(client, url, limit, start_date=HOURS[0], end_date=HOURS[-1])
+    assert times == expected
+    # One point past each page tells whether another follows, so no page comes back empty
+    assert pages == -(-len(expected) // limit)
+
+    times, _ = read_pages(client, url, limit, start_date="2024-07-01T03:00:00", end_date="2024-07-01T06:00:00")
+    assert times == [time for time in expected if "03:00" <= time[11:16] <= "06:00"]
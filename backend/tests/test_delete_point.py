@@ -0,0 +1,31 @@
+"""Points are deleted by timestamp whether stored as rows or compressed"""
+from datetime import datetime, timedelta
+
+from app.core.database import SessionLocal
+from app.models.bucket import get_channel_store
+from app.repositories.bucket_chunk_repository import BucketChunkRepository
+from app.repositories.channel_data_repository import ChannelDataRepository
+
+POINTS = [{"time": f"2024-04-01T0{hour}:00:00", "value": float(hour)} for hour in range(4)]
+RANGE = {"start_date": "2024-04-01T00:00:00", "end_date": "2024-04-01T03:00:00"}
+
+
+def test_delete_compressed_and_row_points_by_time(client, channel):
+    _, channel_id, url = channel
+    response = client.post(f"{url}/data/batch", json={"data_points": POINTS})
+    assert response.status_code == 200, response.text
+    with SessionLocal() as db:
+        store = get_channel_store(ChannelDataRepository.get_channel_by_id(db, channel_id))
+        BucketChunkRepository.compress(db, store, datetime(2024, 4, 1, 2), timedelta(hours=1))
+
+    points = client.get(f"{url}/data/", params=RANGE).json()
+    assert [point["id"] for point in points][:2] == [None, None]
+
+    for time in ("2024-04-01T01:00:00", "2024-04-01T03:00:00Z"):
+        response = client.delete(f"{url}/data/at", params={"time": time})
+        assert response.status_code == 200, response.text
+    assert client.delete(f"{url}/data/at", params={"time": "2024-04-01T01:00:00"}).status_code == 404
+
+    assert [point["value"] for point in client.get(f"{url}/data/", params=RANGE).json()] == [0.0, 2.0]
+    statistics = client.get(f"{url}/data/statistics", params=RANGE).json()
+    assert (statistics["count"], statistics["max"]) == (2, 2.0)
@@ -0,0 +1,23 @@
+"""Generator requests a job would fail on are rejected before they are queued"""
+import pytest # type: ignore
+
+
+@pytest.mark.parametrize("kind, request_args", [
+    ("populate", {"params": {"interval_seconds": 0}}),
+    ("pattern", {"json": {"interval_seconds": 0}}),
+])
+def test_non_positive_interval_is_rejected(client, channel, kind, request_args):
+    _, _, url = channel
+    response = client.post(f"{url}/generator/{kind}", **request_args)
+    assert response.status_code == 422, response.text
+
+
+@pytest.mark.parametrize("kind, request_args", [
+    ("populate", {"params": {"start_date": "2024-01-02T00:00:00", "end_date": "2024-01-01T00:00:00"}}),
+    ("pattern", {"json": {"start_date": "2024-01-02T00:00:00Z", "end_date": "2024-01-02T00:00:00+01:00"}}),
+])
+def test_empty_range_is_rejected(client, channel, kind, request_args):
+    _, channel_id, url = channel
+    response = client.post(f"{url}/generator/{kind}", **request_args)
+    assert response.status_code == 400, response.text
+    assert all(job["params"]["channel_id"] != channel_id for job in client.get("/api/jobs/").json())
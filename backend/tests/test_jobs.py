@@ -0,0 +1,40 @@
+"""Job state transitions"""
+import threading
+import time
+
+from app.core.jobs import FINISHED_STATES, JOB_CANCELLED, JOB_FAILED, JOB_SUCCEEDED, JobManager
+
+
+def wait(*jobs):
+    deadline = time.monotonic() + 5
+    while any(job.status not in FINISHED_STATES for job in jobs) and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_jobs_finish_with_their_outcome():
+    manager = JobManager(max_workers=1, max_pending=10, history_size=10)
+    try:
+        succeeded = manager.submit("test", {}, lambda job: {"done": True})
+        failed = manager.submit("test", {}, lambda job: 1 / 0)
+        wait(succeeded, failed)
+    finally:
+        manager.shutdown()
+    assert (succeeded.status, succeeded.result) == (JOB_SUCCEEDED, {"done": True})
+    assert (failed.status, failed.error) == (JOB_FAILED, "division by zero")
+
+
+def test_cancelled_pending_job_never_starts():
+    manager = JobManager(max_workers=1, max_pending=10, history_size=10)
+    release = threading.Event()
+    started = []
+    try:
+        blocker = manager.submit("test", {}, lambda job: release.wait(5) and {})
+        queued = manager.submit("test", {}, lambda job: started.append(job.id) or {})
+        manager.cancel(queued.id)
+        release.set()
+        wait(blocker, queued)
+    finally:
+        manager.shutdown()
+    assert blocker.status == JOB_SUCCEEDED
+    assert (queued.status, queued.started_at, started) == (JOB_CANCELLED, None, [])
+    assert queued.finished_at is not None
@@ -0,0 +1,66 @@
+"""Read cache entries are evicted by the writes overlapping them and expire after their TTL"""
+from datetime import datetime
+
+from app.repositories import bucket_read_cache as read_cache
+from app.repositories.bucket_read_cache import CACHE_STATUS_HEADER, CachedRead, _MemoryStore
+
+READ = CachedRead(b"{}", "application/json", {})
+MORNING = {"start_date": "2024-08-01T00:00:00", "end_date": "2024-08-01T11:59:59"}
+AFTERNOON = {"start_date": "2024-08-01T12:00:00", "end_date": "2024-08-01T23:59:59"}
+
+
+def test_memory_entries_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(read_cache, "monotonic", lambda: now[0])
+    store = _MemoryStore(max_entries=10, max_bytes=1024, ttl_seconds=60)
+    store.put(1, "stats", (None, None), READ, store.version(1))
+
+    now[0] += 59
+    assert store.get(1, "stats") == READ
+    now[0] += 1
+    assert store.get(1, "stats") is None
+    assert store.size() == (0, 0)
+
+
+def test_memory_invalidate_evicts_overlapping_entries_only():
+    store = _MemoryStore(max_entries=10, max_bytes=1024, ttl_seconds=60)
+    for key, span in (
+        ("morning", (datetime(2024, 8, 1), datetime(2024, 8, 1, 12))),
+        ("afternoon", (datetime(2024, 8, 1, 12, 1), datetime(2024, 8, 2))),
+        ("since", (datetime(2024, 8, 1, 18), None)),
+    ):
+        store.put(1, key, span, READ, store.version(1))
+    store.put(2, "morning", (datetime(2024, 8, 1), datetime(2024, 8, 1, 12)), READ, store.version(2))
+
+    assert store.invalidate(1, (datetime(2024, 8, 1, 11), datetime(2024, 8, 1, 12))) == 1
+    assert [store.get(1, key) for key in ("morning", "afternoon", "since")] == [None, READ, READ]
+    assert store.get(2, "morning") == READ
+    assert store.invalidate(1, (datetime(2024, 8, 3), None)) == 1
+    assert store.get(1, "afternoon") == READ
+
+
+def test_write_evicts_the_cached_reads_of_its_range(client, channel):
+    _, _, url = channel
+    response = client.post(f"{url}/data/batch", json={"data_points": [
+        {"time": "2024-08-01T06:00:00", "value": 1.0}, {"time": "2024-08-01T18:00:00", "value": 2.0}
+    ]})
+    assert response.status_code == 200, response.text
+
+    def cache_status(params):
+        response = client.get(f"{url}/data/statistics", params=params)
+        assert response.status_code == 200, response.text
+        return response.headers[CACHE_STATUS_HEADER]
+
+    assert [cache_status(MORNING), cache_status(AFTERNOON)] == ["miss", "miss"]
+    assert [cache_status(MORNING), cache_status(AFTERNOON)] == ["hit", "hit"]
+
+    response = client.post(f"{url}/data/", json={"time": "2024-08-01T19:00:00", "value": 3.0})
+    assert response.status_code == 200, response.text
+    assert [cache_status(MORNING), cache_status(AFTERNOON)] == ["hit", "miss"]
+
+    # A rolled back write evicts nothing
+    response = client.post(
+        f"{url}/data/", params={"on_conflict": "error"}, json={"time": "2024-08-01T06:00:00", "value": 4.0}
+    )
+    assert response.status_code == 409, response.text
+    assert [cache_status(MORNING), cache_status(AFTERNOON)] == ["hit", "hit"]
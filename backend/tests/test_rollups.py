@@ -0,0 +1,56 @@
+"""Rollups folded in by every write and delete match the ones rebuilt from the stored points"""
+from sqlalchemy import select # type: ignore
+
+from app.core.database import SessionLocal
+from app.models.bucket import get_channel_store
+from app.models.rollup import ChannelRollup, ChannelRollupSketch
+from app.repositories.channel_data_repository import ChannelDataRepository
+from app.repositories.rollup_repository import RollupRepository
+
+
+def points(minutes, value):
+    """Points every 20 seconds of some minutes of 2024-05-01, counted from midnight"""
+    return [
+        {"time": f"2024-05-01T{minute // 60:02d}:{minute % 60:02d}:{second:02d}", "value": value + minute + second}
+        for minute in minutes for second in (0, 20, 40)
+    ]
+
+
+def rollups(db, channel_id):
+    """Every rollup and sketch row of a channel"""
+    rows = []
+    for model in (ChannelRollup, ChannelRollupSketch):
+        selected = db.execute(
+            select(model).where(model.channel_id == channel_id).order_by(*model.__table__.primary_key.columns)
+        ).scalars().all()
+        rows.append([
+            {column: getattr(row, column) for column in model.__table__.columns.keys()} for row in selected
+        ])
+    return rows
+
+
+def test_incremental_rollups_match_rebuild(client, channel):
+    _, channel_id, url = channel
+    writes = [
+        ({}, points(range(0, 130, 7), 10.0)),
+        # Late points, between the ones already stored
+        ({}, [{"time": f"2024-05-01T00:{minute:02d}:10", "value": -1.0} for minute in range(0, 60, 5)]),
+        ({"on_conflict": "overwrite"}, points(range(50, 200, 3), 100.0)),
+        ({"on_conflict": "keep_first"}, points(range(190, 250), 1000.0)),
+    ]
+    for params, batch in writes:
+        response = client.post(f"{url}/data/batch", params=params, json={"data_points": batch})
+        assert response.status_code == 200, response.text
+    for time in ("2024-05-01T00:07:00", "2024-05-01T00:07:20", "2024-05-01T00:07:40", "2024-05-01T03:02:20"):
+        response = client.delete(f"{url}/data/at", params={"time": time})
+        assert response.status_code == 200, response.text
+
+    with SessionLocal() as db:
+        incremental = rollups(db, channel_id)
+        assert incremental[0] and incremental[1]
+
+        channel_data = ChannelDataRepository.get_channel_by_id(db, channel_id)
+        store = get_channel_store(channel_data)
+        RollupRepository.delete_channel(db, channel_id)
+        RollupRepository.rebuild(db, store, channel_data.data_from, channel_data.data_to)
+        assert rollups(db, channel_id) == incremental
@@ -0,0 +1,57 @@
+"""Ranges given with a UTC offset read the same points as their naive UTC equivalent"""
+
+POINTS = [{"time": f"2024-01-01T{hour:02d}:30:00", "value": float(hour)} for hour in range(6)]
+
+
+def write_points(client, url):
+    response = client.post(f"{url}/data/batch", json={"data_points": POINTS})
+    assert response.status_code == 200, response.text
+
+
+def test_aggregate_with_aware_range(client, channel):
+    _, _, url = channel
+    write_points(client, url)
+
+    naive = client.get(f"{url}/data/aggregate", params={
+        "interval": "1h", "start_date": "2024-01-01T01:00:00", "end_date": "2024-01-01T04:00:00"
+    })
+    aware = client.get(f"{url}/data/aggregate", params={
+        "interval": "1h", "start_date": "2024-01-01T01:00:00Z", "end_date": "2024-01-01T06:00:00+02:00"
+    })
+    assert naive.status_code == 200, naive.text
+    assert aware.status_code == 200, aware.text
+    assert aware.json()["rows"] == naive.json()["rows"]
+    assert [row["count"] for row in aware.json()["rows"]] == [1, 1, 1]
+
+
+def test_downsample_with_aware_range(client, channel):
+    _, _, url = channel
+    write_points(client, url)
+
+    naive = client.get(f"{url}/data/", params={
+        "max_points": 3, "start_date": "2024-01-01T00:00:00", "end_date": "2024-01-01T05:59:00"
+    })
+    aware = client.get(f"{url}/data/", params={
+        "max_points": 3, "start_date": "2024-01-01T00:00:00Z", "end_date": "2024-01-01T07:59:00+02:00"
+    })
+    assert naive.status_code == 200, naive.text
+    assert aware.status_code == 200, aware.text
+    assert aware.json() == naive.json()
+    assert len(aware.json()) == 3
+
+
+def test_frame_with_aware_range(client, channel):
+    well_id, _, url = channel
+    write_points(client, url)
+
+    naive = client.get(f"/api/wells/{well_id}/frame", params={
+        "channels": "pressure", "interval": "1h", "start_date": "2024-01-01T01:00:00", "end_date": "2024-01-01T03:00:00"
+    })
+    aware = client.get(f"/api/wells/{well_id}/frame", params={
+        "channels": "pressure", "interval": "1h", "start_date": "2024-01-01T01:00:00Z",
+        "end_date": "2024-01-01T05:00:00+02:00"
+    })
+    assert naive.status_code == 200, naive.text
+    assert aware.status_code == 200, aware.text
+    assert aware.json()["time"] == naive.json()["time"]
+    assert aware.json()["columns"] == naive.json()["columns"] == {"pressure": [1.0, 2.0]}
@@ -0,0 +1,42 @@
+"""Deduplicating a legacy bucket table refreshes everything derived from the values dropped"""
+from datetime import datetime
+
+from sqlalchemy import insert, text # type: ignore
+
+from app.core.database import SessionLocal
+from app.models.bucket import bucket_registry
+from app.models.latest_value import ChannelLatestValue
+from app.repositories.bucket_repository import BucketRepository
+from app.repositories.channel_data_repository import ChannelDataRepository
+
+POINTS = [{"time": "2024-03-01T00:30:00", "value": 1.0}, {"time": "2024-03-01T01:30:00", "value": 2.0}]
+
+
+def test_migration_refreshes_cache_latest_value_and_rollups(client, channel):
+    _, channel_id, url = channel
+    response = client.post(f"{url}/data/batch", json={"data_points": POINTS})
+    assert response.status_code == 200, response.text
+    params = {"start_date": "2024-03-01T00:00:00", "end_date": "2024-03-01T02:00:00"}
+    assert client.get(f"{url}/data/statistics", params=params).json()["max"] == 2.0
+
+    # Turn the table back into one predating unique timestamps, holding a later duplicate
+    with SessionLocal() as db:
+        table_name = ChannelDataRepository.get_channel_by_id(db, channel_id).table_name
+        index = f'"ix_{table_name}_time"'
+        db.execute(text(f"DROP INDEX {index}"))
+        db.execute(text(f'CREATE INDEX {index} ON "{table_name}" (time)'))
+        db.commit()
+    bucket_registry.load()
+    with SessionLocal() as db:
+        db.execute(insert(bucket_registry.get(table_name)), [{"time": datetime(2024, 3, 1, 1, 30), "value": 10.0}])
+        db.commit()
+
+    with SessionLocal() as db:
+        assert BucketRepository.migrate_unique_time_index(db, table_name, keep="last") == 1
+        latest = db.get(ChannelLatestValue, channel_id)
+        assert (latest.time, latest.value) == (datetime(2024, 3, 1, 1, 30), 10.0)
+
+    statistics = client.get(f"{url}/data/statistics", params=params).json()
+    assert (statistics["count"], statistics["max"], statistics["avg"]) == (2, 10.0, 5.5)
+    rows = client.get(f"{url}/data/aggregate", params={"interval": "1h", **params}).json()["rows"]
+    assert [row["max"] for row in rows] == [1.0, 10.0]
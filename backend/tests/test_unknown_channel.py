@@ -0,0 +1,13 @@
+"""Data endpoints answer 404 for a channel that doesn't belong to the well"""
+import pytest # type: ignore
+
+
+@pytest.mark.parametrize("method, path, request_args", [
+    ("post", "upload", {"content": b"", "headers": {"Content-Type": "text/csv"}}),
+    ("get", "export", {}),
+    ("get", "aggregate", {"params": {"interval": "1h"}}),
+])
+def test_unknown_channel_is_not_found(client, channel, method, path, request_args):
+    well_id, channel_id, _ = channel
+    response = getattr(client, method)(f"/api/wells/{well_id}/channels/{channel_id + 1000}/data/{path}", **request_args)
+    assert response.status_code == 404, response.text
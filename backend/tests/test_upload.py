@@ -0,0 +1,87 @@
+"""Streamed uploads report their outcome in bounded form and validate every format alike"""
+import asyncio
+import numpy as np # type: ignore
+import pytest # type: ignore
+
+from app.controllers import bucket_upload_controller
+from app.core.columnar import MEDIA_TYPE_ARROW, MEDIA_TYPE_PACKED, encode_packed
+
+
+def upload(client, url, body, content_type, **params):
+    response = client.post(f"{url}/data/upload", content=body, headers={"Content-Type": content_type}, params=params)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_non_finite_values_rejected_in_every_format(client, channel):
+    _, _, url = channel
+    ndjson = "\n".join([
+        '{"time": "2024-01-01T00:00:00", "value": 1}',
+        '{"time": "2024-01-01T00:01:00", "value": NaN}',
+        '{"time": "2024-01-01T00:02:00", "value": Infinity}',
+    ])
+    csv = "time,value\n2024-01-01T01:00:00,1\n2024-01-01T01:01:00,nan\n2024-01-01T01:02:00,-inf\n"
+    times = np.array(["2024-01-01T02:00:00", "2024-01-01T02:01:00", "2024-01-01T02:02:00"], dtype="datetime64[us]")
+    packed = encode_packed(times, np.array([1.0, np.nan, np.inf]))
+
+    for body, content_type in (
+        (ndjson, "application/x-ndjson"), (csv, "text/csv"), (packed, MEDIA_TYPE_PACKED)
+    ):
+        result = upload(client, url, body, content_type)
+        assert (result["written"], result["rejected"]) == (1, 2), content_type
+        assert all(
+            sample.endswith("missing time or non-finite value")
+            for sample in result["failed_chunks"][0]["error_samples"]
+        )
+
+
+def test_upload_lists_only_failed_chunks_up_to_a_limit(client, channel, monkeypatch):
+    _, _, url = channel
+    monkeypatch.setattr(bucket_upload_controller, "MAX_FAILED_CHUNKS", 2)
+    lines = []
+    for minute in range(10):
+        lines.append(f"2024-01-02T00:{minute:02d}:00,{minute}")
+        lines.append("bad" if minute % 2 else f"2024-01-02T00:{minute:02d}:30,{minute}")
+    result = upload(client, url, "\n".join(lines), "text/csv", chunk_size=2)
+
+    assert (result["chunks"], result["written"], result["rejected"]) == (10, 15, 5)
+    assert [chunk["chunk"] for chunk in result["failed_chunks"]] == [1, 3]
+
+    job = client.get(f"/api/jobs/{result['job_id']}").json()
+    assert (job["kind"], job["status"], job["points_written"]) == ("upload", "succeeded", 15)
+    assert job["result"]["rejected"] == 5
+
+
+def test_malformed_arrow_body_is_rejected(client, channel):
+    pa = pytest.importorskip("pyarrow")
+    _, _, url = channel
+    batch = pa.RecordBatch.from_pydict({
+        "time": pa.array([[1, 2]], type=pa.list_(pa.int64())),
+        "value": pa.array([1.0]),
+    })
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+
+    for body in (sink.getvalue().to_pybytes(), b"not an arrow stream"):
+        response = client.post(f"{url}/data/upload", content=body, headers={"Content-Type": MEDIA_TYPE_ARROW})
+        assert response.status_code == 400, response.text
+
+
+def test_text_chunks_are_parsed_off_the_event_loop(client, channel, monkeypatch):
+    _, _, url = channel
+    parse_chunk = bucket_upload_controller.BucketUploadController._parse_chunk
+    on_loop = []
+
+    def recording_parse_chunk(lines, upload_format):
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError:
+            on_loop.append(False)
+        return parse_chunk(lines, upload_format)
+
+    monkeypatch.setattr(bucket_upload_controller.BucketUploadController, "_parse_chunk", recording_parse_chunk)
+    result = upload(client, url, "2024-01-03T00:00:00,1\n2024-01-03T00:01:00,2\n", "text/csv", chunk_size=1)
+    assert result["written"] == 2
+    assert on_loop == [False, False]
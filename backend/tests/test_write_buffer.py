@@ -0,0 +1,67 @@
+"""The write buffer flushes each channel's points one batch at a time, in arrival order"""
+import threading
+import time
+from datetime import datetime, timedelta
+
+from app.repositories.bucket_write_buffer import BucketWriteBuffer
+
+
+def test_one_flush_per_channel_in_arrival_order():
+    buffer = BucketWriteBuffer(max_points=1, max_delay_seconds=0, max_pending=100, flush_workers=4, return_rows=False)
+    lock = threading.Lock()
+    running = {}
+    overlaps = []
+    written = []
+
+    def write(db, well_name, channel_name, on_conflict, points):
+        with lock:
+            running[channel_name] = running.get(channel_name, 0) + 1
+            if running[channel_name] > 1:
+                overlaps.append(channel_name)
+        time.sleep(0.02)
+        with lock:
+            running[channel_name] -= 1
+            written.extend((channel_name, point.value) for point in points)
+        for point in points:
+            point.future.set_result(None)
+
+    # Flushes are exercised without a database
+    buffer._write = write
+    buffer.start()
+    futures = []
+    try:
+        for index in range(6):
+            for channel in ("a", "b"):
+                futures.append(buffer.enqueue(
+                    "well", channel, datetime(2024, 1, 1) + timedelta(seconds=index), float(index), "overwrite"
+                ))
+            time.sleep(0.005)
+        for future in futures:
+            future.result(timeout=5)
+    finally:
+        buffer.stop()
+
+    assert overlaps == []
+    for channel in ("a", "b"):
+        assert [value for name, value in written if name == channel] == [float(index) for index in range(6)]
+
+
+def test_stop_flushes_buffers_held_back_by_a_running_flush():
+    buffer = BucketWriteBuffer(max_points=1, max_delay_seconds=0, max_pending=100, flush_workers=2, return_rows=False)
+    written = []
+
+    def write(db, well_name, channel_name, on_conflict, points):
+        time.sleep(0.02)
+        written.extend(point.value for point in points)
+        for point in points:
+            point.future.set_result(None)
+
+    buffer._write = write
+    buffer.start()
+    futures = [buffer.enqueue("well", "a", datetime(2024, 1, 1), 0.0)]
+    time.sleep(0.005)
+    futures += [buffer.enqueue("well", "a", datetime(2024, 1, 1), 1.0, "overwrite")]
+    buffer.stop()
+
+    assert all(future.done() for future in futures)
+    assert written == [0.0, 1.0]
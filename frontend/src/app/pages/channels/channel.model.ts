@@ -22,3 +22,26 @@ export type ChannelData = {
   time: number | string;
   value: number;
 };
+
+export type JobStatus =
+  | 'pending'
+  | 'running'
+  | 'succeeded'
+  | 'failed'
+  | 'cancelled';
+
+export const FINISHED_JOB_STATUSES: JobStatus[] = [
+  'succeeded',
+  'failed',
+  'cancelled',
+];
+
+export type Job = {
+  id: string;
+  kind: string;
+  status: JobStatus;
+  points_written: number;
+  total_points: number | null;
+  progress: number | null;
+  error: string | null;
+};
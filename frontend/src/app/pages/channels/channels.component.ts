@@ -386,18 +386,24 @@ export class ChannelsComponent implements OnInit, AfterViewInit, OnDestroy {
                   );
                   return of(null);
                 }
-                return this.channelService.generateChannelData(
-                  well_id,
-                  channel.id,
-                  channel
-                );
+                // Generation runs as a background job, reload once it is done
+                return this.channelService
+                  .generateChannelData(well_id, channel.id, channel)
+                  .pipe(
+                    switchMap((job) => this.channelService.waitForJob(job.id))
+                  );
               })
             )
             .subscribe({
-              next: (channelData) => {
-                if (channelData) {
-                  this.loadChannelData(channelData.id);
-                  this.selectChannel(channelData);
+              next: (job) => {
+                if (!job) {
+                  return;
+                }
+                if (job.status === 'succeeded') {
+                  this.loadChannels();
+                  this.selectChannel(channel);
+                } else {
+                  console.error(`Data generation ${job.status}:`, job.error);
                 }
               },
               error: (error) => {
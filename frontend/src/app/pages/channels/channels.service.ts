@@ -1,8 +1,13 @@
 import { HttpClient } from '@angular/common/http';
 import { inject, Injectable } from '@angular/core';
-import { map, Observable } from 'rxjs';
+import { exhaustMap, first, map, Observable, timer } from 'rxjs';
 import { environment } from '../../../environments/environment';
-import { Channel, ChannelData } from './channel.model';
+import {
+  Channel,
+  ChannelData,
+  FINISHED_JOB_STATUSES,
+  Job,
+} from './channel.model';
 
 const baseUrl = environment.apiUrl;
 
@@ -59,8 +64,8 @@ export class ChannelsService {
     well_id: number,
     id: number,
     channel: Partial<Channel>
-  ): Observable<Channel> {
-    return this.#http.post<Channel>(
+  ): Observable<Job> {
+    return this.#http.post<Job>(
       `${baseUrl}/wells/${well_id}/channels/${id}/generator/populate`,
       {
         well_id: well_id,
@@ -70,4 +75,16 @@ export class ChannelsService {
       }
     );
   }
+
+  getJob(id: string): Observable<Job> {
+    return this.#http.get<Job>(`${baseUrl}/jobs/${id}`);
+  }
+
+  // Poll a background job until it finishes, emitting its final state
+  waitForJob(id: string, intervalMs = 1000): Observable<Job> {
+    return timer(0, intervalMs).pipe(
+      exhaustMap(() => this.getJob(id)),
+      first((job) => FINISHED_JOB_STATUSES.includes(job.status))
+    );
+  }
 }